@@ -0,0 +1,1400 @@
+# Title  : Benchmark
+# 性能基准测试脚本，用于对比核心处理路径优化前后的耗时
+# 用法   : python scripts/Benchmark.py [用例名 ...]   (不带参数时运行全部用例)
+import os
+import sys
+import time
+import struct
+import argparse
+
+import numpy as np
+
+# 将src目录加入模块搜索路径，以便导入app.core
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+# ===== 参数 =====
+N_SAMPLES = 81920 + 4096  # 单次采集的uint32数量（约一帧）
+REPEAT    = 20            # 每个用例重复次数
+
+
+def timeit(func, repeat=REPEAT):
+    """多次运行func，返回最短耗时(秒)"""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def make_raw_frame(n_samples=N_SAMPLES, seed=0):
+    """生成随机的原始采集字节流（小端uint32）"""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 2**32, n_samples, dtype=np.uint32).astype('<u4').tobytes()
+
+
+def report(name, seconds, nbytes=None):
+    """打印单项耗时"""
+    line = f"  {name:<32s} {seconds * 1e3:10.3f} ms"
+    if nbytes:
+        mb = nbytes / (1024 * 1024)
+        line += f"   {seconds * 1e3 / mb:10.3f} ms/MB"
+    print(line)
+
+
+# ===== 用例 =====
+def bench_decode():
+    """ADCSample帧解析: struct.unpack分批+gc vs np.frombuffer零拷贝"""
+    import gc
+    from app.core.ADCSample import ADCSample
+
+    data = bytearray(make_raw_frame())
+
+    def legacy():
+        data_view = memoryview(data)
+        u32_values = []
+        batch_size = 1024 * 256
+        for i in range(0, len(data), batch_size):
+            batch_data = data_view[i:i + batch_size]
+            batch_u32 = struct.unpack('<' + 'I' * (len(batch_data) // 4), batch_data)
+            u32_values.extend(batch_u32)
+            del batch_data, batch_u32
+            gc.collect()
+        return u32_values
+
+    def vectorized():
+        return ADCSample.decode_u32_frame(data)
+
+    assert np.array_equal(np.asarray(legacy(), dtype=np.uint32), vectorized())
+    t_old = timeit(legacy, repeat=5)
+    t_new = timeit(vectorized)
+    report("struct.unpack + gc.collect", t_old, len(data))
+    report("np.frombuffer", t_new, len(data))
+    print(f"  加速比: {t_old / max(t_new, 1e-9):.0f}x")
+
+
+def bench_load():
+    """标定步骤加载(10个文件): CSV逐行解析 vs .bin内存映射"""
+    import tempfile
+    from app.core.FileManager import FileManager
+
+    n_files = 10
+    with tempfile.TemporaryDirectory() as tmp:
+        fm = FileManager(base_data_path=os.path.join(tmp, 'data'))
+        for i in range(n_files):
+            u32 = np.frombuffer(make_raw_frame(seed=i), dtype='<u4')
+            fm.save_adc_csv_data(u32, f'step_{i:04d}.csv', tmp)
+            fm.save_adc_binary_data(u32, f'step_{i:04d}.bin', tmp)
+
+        csv_files = sorted(os.path.join(tmp, f) for f in os.listdir(tmp) if f.endswith('.csv'))
+        bin_files = fm.find_data_files(tmp, recursive=False)
+        assert all(f.endswith('.bin') for f in bin_files)
+
+        def load_csv():
+            return [fm.load_u32_text_first_col(f) for f in csv_files]
+
+        def load_bin():
+            # 求和以强制读取映射的全部页面
+            return [int(fm.load_u32_data(f).sum()) for f in bin_files]
+
+        for a, b in zip(load_csv(), bin_files):
+            assert np.array_equal(a, fm.load_u32_data(b))
+        t_old = timeit(load_csv, repeat=3)
+        t_new = timeit(load_bin)
+        report(f"CSV x{n_files}", t_old)
+        report(f"BIN(memmap) x{n_files}", t_new)
+        print(f"  加速比: {t_old / max(t_new, 1e-9):.0f}x")
+
+
+def legacy_load_u32_text_first_col(path, skip_first=True):
+    """优化前FileManager.load_u32_text_first_col的实现（逐编码重读+逐行解析），仅用于对比"""
+    import re
+    encodings = ["utf-8", "utf-8-sig", "gbk", "latin1", "utf-16", "utf-16le", "utf-16be"]
+    last_err = None
+    for enc in encodings:
+        try:
+            vals = []
+            with open(path, "r", encoding=enc, errors="strict") as f:
+                if skip_first:
+                    next(f, None)
+                for line in f:
+                    s = line.strip()
+                    if not s:
+                        continue
+                    parts = s.split(',')
+                    if len(parts) >= 2:
+                        second_col = parts[1].strip()
+                        try:
+                            vals.append(np.uint32(int(second_col)))
+                        except ValueError:
+                            try:
+                                if second_col.startswith('0x'):
+                                    val = int(second_col, 16)
+                                else:
+                                    m = re.search(r'(0x[0-9a-fA-F]+|\d+)', second_col)
+                                    if not m:
+                                        continue
+                                    val = int(m.group(1), 0)
+                                vals.append(np.uint32(val))
+                            except (ValueError, TypeError):
+                                continue
+            return np.asarray(vals, dtype=np.uint32)
+        except Exception as e:
+            last_err = e
+    raise last_err
+
+
+def bench_csv_read():
+    """旧版CSV读取(80k行): 逐行解析 vs 字节级向量化解析"""
+    import tempfile
+    from app.core.FileManager import FileManager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fm = FileManager(base_data_path=os.path.join(tmp, 'data'))
+        u32 = np.frombuffer(make_raw_frame(), dtype='<u4')
+        fm.save_adc_csv_data(u32, 'capture.csv', tmp)
+        path = os.path.join(tmp, 'capture.csv')
+        nbytes = os.path.getsize(path)
+
+        assert np.array_equal(legacy_load_u32_text_first_col(path), fm.load_u32_text_first_col(path))
+        t_old = timeit(lambda: legacy_load_u32_text_first_col(path), repeat=3)
+        t_new = timeit(lambda: fm.load_u32_text_first_col(path))
+        report(f"逐行解析 ({u32.size}行)", t_old, nbytes)
+        report(f"向量化解析 ({u32.size}行)", t_new, nbytes)
+        print(f"  加速比: {t_old / max(t_new, 1e-9):.1f}x")
+
+
+def legacy_save_adc_csv_data(data, filepath, timestamp):
+    """优化前FileManager.save_adc_csv_data的实现（csv.writer逐行写入），仅用于对比"""
+    import csv
+    with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['Index', '32位原始数据(十进制)', '32位原始数据(十六进制)', '时间戳'])
+        for idx, val in enumerate(data.tolist()):
+            writer.writerow([idx, str(val), f"0x{val:08X}", timestamp])
+
+
+def bench_csv_write():
+    """CSV保存(80k行): csv.writer逐行 vs 分块批量格式化"""
+    import tempfile
+    from app.core.FileManager import FileManager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fm = FileManager(base_data_path=os.path.join(tmp, 'data'))
+        u32 = np.frombuffer(make_raw_frame(), dtype='<u4')
+        old_path = os.path.join(tmp, 'old.csv')
+        new_path = os.path.join(tmp, 'new.csv')
+
+        # 用新文件中的时间戳生成旧格式文件，要求逐字节一致
+        fm.save_adc_csv_data(u32, 'new.csv', tmp)
+        with open(new_path, encoding='utf-8', newline='') as f:
+            f.readline()
+            timestamp = f.readline().rstrip('\r\n').split(',')[3]
+        legacy_save_adc_csv_data(u32, old_path, timestamp)
+        with open(old_path, 'rb') as f_old, open(new_path, 'rb') as f_new:
+            assert f_old.read() == f_new.read()
+
+        fm.save_adc_csv_data(u32, 'header_ts.csv', tmp, timestamp_in_header=True)
+        assert np.array_equal(fm.load_u32_text_first_col(os.path.join(tmp, 'header_ts.csv')), u32)
+
+        t_old = timeit(lambda: legacy_save_adc_csv_data(u32, old_path, timestamp), repeat=3)
+        t_new = timeit(lambda: fm.save_adc_csv_data(u32, 'new.csv', tmp), repeat=5)
+        t_hdr = timeit(lambda: fm.save_adc_csv_data(u32, 'header_ts.csv', tmp, timestamp_in_header=True), repeat=5)
+        report(f"csv.writer ({u32.size}行)", t_old, os.path.getsize(old_path))
+        report(f"批量格式化 ({u32.size}行)", t_new, os.path.getsize(new_path))
+        report("批量格式化(时间戳写入表头)", t_hdr, os.path.getsize(os.path.join(tmp, 'header_ts.csv')))
+        print(f"  加速比: {t_old / max(t_new, 1e-9):.1f}x")
+
+
+def bench_pipeline():
+    """100次采集: 串行(接收→解析→写盘) vs 流水线，网络接收以固定延时模拟"""
+    import tempfile
+    from app.core.ADCSample import ADCSample
+    from app.core.FileManager import FileManager
+    from app.core.AcquisitionPipeline import AcquisitionPipeline
+
+    n_acq = 100
+    recv_time = 0.03  # 模拟单次网络接收耗时（约344KB@100Mbps）
+    frame = make_raw_frame()
+
+    class SimulatedADCSample(ADCSample):
+        def acquire_raw(self, test_num):
+            time.sleep(recv_time)
+            return bytearray(frame), None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        adc = SimulatedADCSample(file_manager=FileManager(base_data_path=os.path.join(tmp, 'data')))
+
+        def serial():
+            out = os.path.join(tmp, 'serial')
+            adc.file_manager.ensure_dir_exists(out)
+            for i in range(n_acq):
+                raw, _ = adc.acquire_raw(i)
+                u32 = adc.decode_u32_frame(raw)
+                adc.save_test_result(i, u32, f'adc_raw_data_{i + 1:04d}.bin', out)
+
+        def pipelined():
+            pipe = AcquisitionPipeline(adc, n_acq, output_dir=os.path.join(tmp, 'pipeline'),
+                                       analyze_func=lambda i, u32: int(u32.max()))
+            ok, msg = pipe.run()
+            assert ok and pipe.saved_count == n_acq, msg
+            return pipe
+
+        # 仅写.bin时写盘很快；额外写CSV时写盘与接收耗时相当，流水线重叠的收益最明显
+        for save_csv in (False, True):
+            adc.save_csv = save_csv
+            t_old = timeit(serial, repeat=1)
+            t0 = time.perf_counter()
+            pipe = pipelined()
+            t_new = time.perf_counter() - t0
+            label = "BIN+CSV" if save_csv else "BIN"
+            report(f"串行 {label} x{n_acq}", t_old)
+            report(f"流水线 {label} x{n_acq}", t_new)
+            print(pipe.format_stats())
+            print(f"  加速比: {t_old / max(t_new, 1e-9):.1f}x")
+
+
+def bench_transfer():
+    """单帧接收(本地模拟板卡): 逐块read直到结束标记 vs 长度前缀 vs 帧头分帧，含限速链路"""
+    import tempfile
+    import logging
+    from app.core.ADCBoardSimulator import ADCBoardSimulator, SimulatorConfig
+    from app.core.TcpClient import TcpClient
+    from app.core.ADCSample import ADCSample
+    from app.core.FileManager import FileManager
+
+    logging.getLogger('app.core.ADCSample').setLevel(logging.WARNING)
+    n_acq = 10
+    links = [
+        ("回环", SimulatorConfig()),
+        ("100Mbps+1ms", SimulatorConfig(bandwidth=100e6 / 8, latency=0.001)),
+    ]
+    for link_name, sim_config in links:
+        with tempfile.TemporaryDirectory() as tmp, ADCBoardSimulator(config=sim_config) as sim:
+            tcp = TcpClient()
+            tcp.connect(sim.host, sim.port)
+            adc = ADCSample(tcp, FileManager(base_data_path=os.path.join(tmp, 'data')))
+            for mode in ('stream', 'length', 'header'):
+                adc.receive_mode = mode
+                mb_per_s = []
+
+                def acquire():
+                    for i in range(n_acq):
+                        u32, error = adc.perform_single_test(i)
+                        assert error is None, error
+                        mb_per_s.append(adc.last_transfer['mb_per_s'])
+
+                t = timeit(acquire, repeat=1)
+                report(f"{link_name} {mode} x{n_acq}", t, n_acq * sim.n_samples * 4)
+                print(f"  {'':<32s} 接收速率中位数 {np.median(mb_per_s):10.1f} MB/s")
+            tcp.close()
+
+
+def bench_multiboard():
+    """多板卡并发采集(每块板卡为限速100Mbps的本地模拟板卡): 1/2/4块板卡的总吞吐量"""
+    import tempfile
+    import logging
+    from contextlib import ExitStack
+    from app.core.ADCBoardSimulator import ADCBoardSimulator, SimulatorConfig
+    from app.core.BoardPool import BoardPool
+    from app.core.FileManager import FileManager
+
+    logging.getLogger('app.core').setLevel(logging.WARNING)
+    n_acq = 10
+    # 预先生成一帧重复发送，避免模拟器生成帧的CPU开销影响客户端吞吐量
+    frame = np.frombuffer(make_raw_frame(), dtype='<u4')
+    sim_config = SimulatorConfig(bandwidth=100e6 / 8, latency=0.001)
+    base = None
+    for n_boards in (1, 2, 4):
+        with tempfile.TemporaryDirectory() as tmp, ExitStack() as stack:
+            sims = [stack.enter_context(ADCBoardSimulator(config=sim_config, frame_source=lambda i: frame))
+                    for _ in range(n_boards)]
+            pool = BoardPool([(sim.host, sim.port) for sim in sims],
+                             FileManager(base_data_path=os.path.join(tmp, 'data')))
+            ok, msg = pool.connect_all()
+            assert ok, msg
+            record = pool.acquire(n_acq, os.path.join(tmp, 'run'), receive_mode='length')
+            pool.close_all()
+            assert record['total_acquisitions'] == n_acq * n_boards
+            base = base or record['acquisitions_per_s']
+            report(f"{n_boards}块板卡 x{n_acq}", record['elapsed_s'])
+            print(f"  {'':<32s} {record['acquisitions_per_s']:8.2f} 次/s {record['mb_per_s']:8.1f} MB/s "
+                  f"(相对单板 {record['acquisitions_per_s'] / base:.2f}x)")
+
+
+def bench_commands():
+    """命令往返(本地模拟板卡*IDN?): TcpClient逐条 vs AsyncTcpClient逐条 vs 流水线批量，回环与1ms往返时延"""
+    from app.core.ADCBoardSimulator import ADCBoardSimulator, SimulatorConfig
+    from app.core.TcpClient import TcpClient
+    from app.core.AsyncTcpClient import PipelinedTcpClient
+
+    n_cmd = 500
+    batch = 50
+    for link_name, sim_config in (("回环", SimulatorConfig()), ("RTT 1ms", SimulatorConfig(rtt=0.001))):
+        with ADCBoardSimulator(config=sim_config) as sim:
+            tcp = TcpClient()
+            tcp.connect(sim.host, sim.port)
+
+            def legacy():
+                for _ in range(n_cmd):
+                    ok, _ = tcp.send("*IDN?")
+                    ok, resp = tcp.receive()
+                    assert ok and resp.startswith('TDR'), resp
+
+            t_old = timeit(legacy, repeat=1)
+            tcp.close()
+
+            client = PipelinedTcpClient()
+            ok, msg = client.connect(sim.host, sim.port)
+            assert ok, msg
+
+            def sequential():
+                for _ in range(n_cmd):
+                    ok, resp = client.query("*IDN?\r\n")
+                    assert ok and resp.startswith('TDR'), resp
+
+            def pipelined():
+                for _ in range(n_cmd // batch):
+                    for ok, resp in client.query_many(["*IDN?\r\n"] * batch):
+                        assert ok and resp.startswith('TDR'), resp
+
+            t_seq = timeit(sequential, repeat=1)
+            t_pipe = timeit(pipelined, repeat=3)
+            client.shutdown()
+
+        for name, t in ((f"{link_name} TcpClient逐条 x{n_cmd}", t_old),
+                        (f"{link_name} AsyncTcpClient逐条 x{n_cmd}", t_seq),
+                        (f"{link_name} 流水线({batch}条/批) x{n_cmd}", t_pipe)):
+            report(name, t)
+            print(f"  {'':<32s} {n_cmd / t:10.0f} 命令/s")
+
+
+def bench_metrics():
+    """传输统计开销(本地模拟板卡): 命令往返和帧接收在关闭/开启TransportMetrics时的耗时"""
+    import json
+    import tempfile
+    import logging
+    from app.core.ADCBoardSimulator import ADCBoardSimulator
+    from app.core.TcpClient import TcpClient
+    from app.core.ADCSample import ADCSample
+    from app.core.FileManager import FileManager
+
+    logging.getLogger('app.core').setLevel(logging.WARNING)
+    n_cmd = 2000
+    n_acq = 10
+    with tempfile.TemporaryDirectory() as tmp, ADCBoardSimulator() as sim:
+        tcp = TcpClient()
+        tcp.connect(sim.host, sim.port)
+        adc = ADCSample(tcp, FileManager(base_data_path=os.path.join(tmp, 'data')))
+        adc.receive_mode = 'header'
+
+        def commands():
+            for _ in range(n_cmd):
+                tcp.send("*IDN?")
+                tcp.receive()
+
+        def frames():
+            for i in range(n_acq):
+                adc.perform_single_test(i)
+
+        for label in ("关闭", "开启"):
+            if label == "开启":
+                tcp.enable_metrics(os.path.join(tmp, 'metrics.json'))
+            report(f"统计{label} 命令 x{n_cmd}", timeit(commands, repeat=3))
+            report(f"统计{label} 采集 x{n_acq}", timeit(frames, repeat=3))
+        tcp.close()
+
+        with open(os.path.join(tmp, 'metrics.json'), encoding='utf-8') as f:
+            assert json.load(f)['rtt']['*IDN?']['count'] == 3 * n_cmd
+        print("  " + tcp.metrics.format_text().replace("\n", "\n  "))
+
+
+def legacy_set_s_mode(tcp, mode_config):
+    """旧版ClockController.set_s_mode的命令序列：每条命令发送两次，命令之间固定sleep(0.1)"""
+    def send_clock_command(clock_type, channel, enable):
+        command = f"lmk_state {clock_type} {channel} {enable}\r\n"
+        tcp.send(command)
+        time.sleep(0.1)
+        return tcp.send(command)
+
+    if mode_config['trigger']['port1']:
+        send_clock_command(1, 2, 1)
+        time.sleep(0.1)
+        send_clock_command(1, 3, 0)
+        time.sleep(0.1)
+    if mode_config['trigger']['port2']:
+        send_clock_command(1, 3, 1)
+        time.sleep(0.1)
+        send_clock_command(1, 2, 0)
+        time.sleep(0.1)
+    if mode_config['sample']['port1']:
+        send_clock_command(2, 3, 1)
+        time.sleep(0.1)
+    if mode_config['sample']['port2']:
+        send_clock_command(2, 1, 1)
+        time.sleep(0.1)
+
+
+def bench_clock():
+    """S参数模式切换(本地模拟板卡, RTT 1ms): 旧版固定sleep vs 状态差分+批量发送+应答确认"""
+    from app.core.ADCBoardSimulator import ADCBoardSimulator, SimulatorConfig
+    from app.core.TcpClient import TcpClient
+    from app.core.ClockController import ClockController
+
+    sequence = ['S11', 'S21', 'S12', 'S22']
+    with ADCBoardSimulator(config=SimulatorConfig(rtt=0.001)) as sim:
+        tcp = TcpClient()
+        tcp.connect(sim.host, sim.port)
+        # 模拟板卡支持STATUS?查询，用其应答确认（真实板卡默认只发送不确认）
+        clock = ClockController(tcp, ack_command='STATUS?')
+
+        def legacy():
+            for mode in sequence:
+                legacy_set_s_mode(tcp, ClockController.S_MODES[mode])
+
+        def transactional():
+            for mode in sequence:
+                ok, msg = clock.set_s_mode(mode)
+                assert ok, msg
+                expected = {ch: int(on) for key, on in clock.get_mode_states(mode).items()
+                            for ch in [ClockController.PORT_CHANNELS[key]]}
+                assert all(sim.lmk_states.get(ch) == e for ch, e in expected.items()), (mode, sim.lmk_states)
+                assert clock.validate_configuration(mode)[0]
+
+        t_old = timeit(legacy, repeat=1)
+        t_new = timeit(transactional, repeat=5)
+        # 模式不变时不产生任何网络往返
+        t_same = timeit(lambda: clock.set_s_mode('S22'), repeat=100)
+        tcp.close()
+
+    report(f"旧版 {'→'.join(sequence)}", t_old)
+    report(f"状态差分 {'→'.join(sequence)}", t_new)
+    report("状态差分 模式不变", t_same)
+    print(f"  加速比: {t_old / t_new:.1f}x")
+
+
+def legacy_calculate_calibration_coefficients(std):
+    """旧版VNACalibration误差系数计算：逐频点循环，每个频点从字典中取标量"""
+    n_points = len(std['thru_refl_f'])
+    coeffs = {name: np.zeros(n_points, dtype=complex)
+              for name in ('EDF', 'ERF', 'ESF', 'EXF', 'ELF', 'ETF', 'EDR', 'ERR', 'ESR', 'EXR', 'ELR', 'ETR')}
+    for d, names in (('f', 'EDF ERF ESF EXF ELF ETF'), ('r', 'EDR ERR ESR EXR ELR ETR')):
+        ED, ER, ES, EX, EL, ET = names.split()
+        for i in range(n_points):
+            M1 = std[f'short_{d}'][i]
+            M3 = std[f'open_{d}'][i]
+            M5 = std[f'load_{d}'][i]
+            M6 = std[f'isolation_{d}'][i]
+            M9 = std[f'thru_trans_{d}'][i]
+            M10 = std[f'thru_refl_{d}'][i]
+            coeffs[ED][i] = M5
+            coeffs[ER][i] = 2 * (M5 - M1) * (M3 - M5) / (M3 - M1)
+            coeffs[ES][i] = (M3 + M1 - 2 * M5) / (M3 - M1)
+            coeffs[EX][i] = M6
+            coeffs[EL][i] = (M10 - M5) / (coeffs[ES][i] * (M10 - M5) + coeffs[ER][i])
+            coeffs[ET][i] = (M9 - M6) * (1 - coeffs[ES][i] * coeffs[EL][i])
+    return coeffs
+
+
+def legacy_apply_calibration(results, c):
+    """旧版VNACalibration.apply_calibration：逐频点循环"""
+    n_points = len(results['S11'])
+    out = {name: np.zeros(n_points, dtype=complex) for name in ('S11', 'S21', 'S12', 'S22')}
+    for i in range(n_points):
+        S11, S21, S12, S22 = (results[name][i] for name in ('S11', 'S21', 'S12', 'S22'))
+        A = (S11 - c['EDF'][i]) / c['ERF'][i]
+        B = (S21 - c['EXF'][i]) / c['ETF'][i]
+        C = (S12 - c['EXR'][i]) / c['ETR'][i]
+        D = (S22 - c['EDR'][i]) / c['ERR'][i]
+        den = (1 + A * c['ESF'][i]) * (1 + D * c['ESR'][i]) - B * C * c['ELF'][i] * c['ELR'][i]
+        out['S11'][i] = (A * (1 + D * c['ESR'][i]) - B * C * c['ELF'][i]) / den
+        out['S22'][i] = (D * (1 + A * c['ESF'][i]) - B * C * c['ELR'][i]) / den
+        out['S12'][i] = (C * (1 + A * (c['ESF'][i] - c['ELR'][i]))) / den
+        out['S21'][i] = (B * (1 + D * (c['ESR'][i] - c['ELF'][i]))) / den
+    return out
+
+
+def bench_vna_cal():
+    """VNA 12项误差模型(1~35GHz/100MHz, 341点): 逐频点循环 vs 整段数组计算，批量DUT修正"""
+    from app.core.VNACalibration import VNACalibration
+
+    n_meas = 100
+    cal = VNACalibration(lambda cmd: None)
+    cal.start_freq, cal.stop_freq, cal.step_freq = 1000, 35000, 100
+    n = len(cal.get_frequencies())
+    rng = np.random.default_rng(0)
+
+    def rand_c(scale, size=n):
+        return scale * (rng.standard_normal(size) + 1j * rng.standard_normal(size))
+
+    # 随机误差项 -> 按误差模型生成标准件和DUT的原始测量值
+    true = {}
+    for d in 'FR':
+        true.update({f'ED{d}': rand_c(0.05), f'ER{d}': 0.9 + rand_c(0.05), f'ES{d}': rand_c(0.05),
+                     f'EX{d}': rand_c(0.001), f'EL{d}': rand_c(0.05), f'ET{d}': 0.9 + rand_c(0.05)})
+
+    def one_port(d, gamma):
+        return true[f'ED{d}'] + true[f'ER{d}'] * gamma / (1 - true[f'ES{d}'] * gamma)
+
+    std = {}
+    for d, key in (('F', 'f'), ('R', 'r')):
+        std[f'short_{key}'] = one_port(d, -1)
+        std[f'open_{key}'] = one_port(d, 1)
+        std[f'load_{key}'] = one_port(d, 0)
+        std[f'isolation_{key}'] = true[f'EX{d}']
+        std[f'thru_refl_{key}'] = one_port(d, true[f'EL{d}'])
+        std[f'thru_trans_{key}'] = true[f'EX{d}'] + true[f'ET{d}'] / (1 - true[f'ES{d}'] * true[f'EL{d}'])
+    for names, key in ((VNACalibration.FORWARD_STANDARDS, 'f'), (VNACalibration.REVERSE_STANDARDS, 'r')):
+        for name, (step, data_key) in names.items():
+            cal.measurements[f"{step}_{data_key}"] = std[f'{name}_{key}']
+
+    S = {name: rand_c(0.3, (n_meas, n)) for name in ('S11', 'S21', 'S12', 'S22')}
+    dS = S['S11'] * S['S22'] - S['S21'] * S['S12']
+
+    def measured(d, s_refl, s_other):
+        den = 1 - true[f'ES{d}'] * s_refl - true[f'EL{d}'] * s_other + true[f'ES{d}'] * true[f'EL{d}'] * dS
+        return den, s_refl - true[f'EL{d}'] * dS
+
+    den_f, num_f = measured('F', S['S11'], S['S22'])
+    den_r, num_r = measured('R', S['S22'], S['S11'])
+    raw = {'S11': true['EDF'] + true['ERF'] * num_f / den_f, 'S21': true['EXF'] + true['ETF'] * S['S21'] / den_f,
+           'S22': true['EDR'] + true['ERR'] * num_r / den_r, 'S12': true['EXR'] + true['ETR'] * S['S12'] / den_r}
+
+    # 正确性：误差项和修正结果都应还原
+    cal.calculate_calibration_coefficients()
+    for name, value in true.items():
+        assert np.allclose(cal.calibration_coeffs[name], value), name
+    corrected = cal.apply_calibration(raw)
+    for name in S:
+        assert np.allclose(corrected[name], S[name]), name
+    legacy = legacy_apply_calibration({k: v[0] for k, v in raw.items()}, legacy_calculate_calibration_coefficients(std))
+    for name in S:
+        assert np.allclose(legacy[name], corrected[name][0]), name
+
+    report(f"逐频点 误差系数 ({n}点)", timeit(lambda: legacy_calculate_calibration_coefficients(std), repeat=5))
+    report(f"向量化 误差系数 ({n}点)", timeit(cal.calculate_calibration_coefficients))
+    t_old = timeit(lambda: [legacy_apply_calibration({k: v[i] for k, v in raw.items()}, cal.calibration_coeffs)
+                            for i in range(n_meas)], repeat=1)
+    t_single = timeit(lambda: [cal.apply_calibration({k: v[i] for k, v in raw.items()}) for i in range(n_meas)], repeat=3)
+    t_batch = timeit(lambda: cal.apply_calibration(raw))
+    report(f"逐频点 修正 x{n_meas}", t_old)
+    report(f"向量化 逐条修正 x{n_meas}", t_single)
+    report(f"向量化 批量修正 [{n_meas}, {n}]", t_batch)
+    print(f"  加速比: 逐条 {t_old / t_single:.1f}x  批量 {t_old / t_batch:.1f}x")
+
+
+def bench_scpi_sweep():
+    """VNA标准件扫频(本地SCPI模拟仪器, RTT 1ms, 每条命令50µs): 逐条设置/查询 vs 影子状态+批量+流水线"""
+    import logging
+    from app.core.SCPIInstrumentSimulator import SCPIInstrumentSimulator, SCPISimulatorConfig
+    from app.core.AsyncTcpClient import PipelinedTcpClient
+    from app.core.SCPISweepEngine import client_query_many
+    from app.core.VNACalibration import VNACalibration
+
+    logging.getLogger('app.core').setLevel(logging.WARNING)
+    with SCPIInstrumentSimulator(config=SCPISimulatorConfig(rtt=0.001, command_time=50e-6)) as sim:
+        client = PipelinedTcpClient()
+        ok, msg = client.connect(sim.host, sim.port)
+        assert ok, msg
+
+        def send_command(cmd):
+            if '?' in cmd or cmd.startswith('CALI'):
+                ok, resp = client.query(cmd + '\n')
+                return resp if ok else None
+            client.send(cmd + '\n')
+            return None
+
+        cal = VNACalibration(send_command, client_query_many(client))
+        cal.start_freq, cal.stop_freq, cal.step_freq = 1000, 35000, 100
+        freqs = cal.get_frequencies()
+        freq_range = [cal.start_freq, cal.stop_freq, cal.step_freq]
+
+        def legacy():
+            # 旧版measure_standard：每个频点对每个通道下发4条设置命令，逐条查询功率和相位
+            out = {}
+            for rx in (1, 2):
+                out[rx] = np.zeros(len(freqs), dtype=complex)
+            for i, freq in enumerate(freqs):
+                cal.setup_instrument(1, freq, cal.calibration_pow)
+                cal.setup_instrument(2, freq, -70)
+                for rx in (1, 2):
+                    power, phase = cal.measure_power_and_phase(1, rx, freq)
+                    out[rx][i] = 10 ** ((power - cal.calibration_pow) / 20) * np.exp(1j * np.radians(phase))
+            return out
+
+        n0 = sim.command_count
+        t0 = time.perf_counter()
+        old = legacy()
+        t_old = time.perf_counter() - t0
+        n_old = sim.command_count - n0
+
+        cal.sweep_engine.invalidate()
+        n0 = sim.command_count
+        t0 = time.perf_counter()
+        new = cal.measure_standard("Through", 1, [1, 2], freq_range)
+        t_new = time.perf_counter() - t0
+        n_new = sim.command_count - n0
+        stats = cal.sweep_engine.get_stats()
+        client.shutdown()
+
+    for rx in (1, 2):
+        assert np.allclose(old[rx], new[f"DATA_M_1{rx}"], atol=1e-4)
+        expected = np.array([sim.s_params(f, 1, rx) for f in freqs])
+        assert np.allclose(new[f"DATA_M_1{rx}"], expected, rtol=1e-3, atol=1e-4)
+
+    n = len(freqs)
+    report(f"逐条 {n}点 ({n_old}条命令)", t_old)
+    report(f"扫频引擎 {n}点 ({n_new}条命令)", t_new)
+    print(f"  {'':<32s} {t_old / n * 1e3:10.3f} -> {stats['ms_per_point']:.3f} ms/点, "
+          f"跳过 {stats['commands_skipped']} 条重复设置, 加速比 {t_old / t_new:.1f}x")
+
+
+def bench_cal_store():
+    """校准系数库(341点校准 -> 681点DUT频率轴, 100条测量): 保存/加载、np.interp逐项插值 vs 缓存索引插值"""
+    import tempfile
+    import logging
+    from app.core.CalibrationStore import CalibrationStore, StoredCalibration, TERM_NAMES
+
+    logging.getLogger('app.core').setLevel(logging.WARNING)
+    rng = np.random.default_rng(0)
+    cal_freqs = np.arange(1000, 35000 + 100, 100, dtype=np.float64)
+    dut_freqs = np.arange(1000, 35000 + 50, 50, dtype=np.float64)
+    n_meas = 100
+    coeffs = {name: 0.5 + rng.standard_normal(len(cal_freqs)) * 0.05 + 1j * rng.standard_normal(len(cal_freqs)) * 0.05
+              for name in TERM_NAMES}
+    raw = {name: rng.standard_normal((n_meas, len(dut_freqs))) * 0.3 + 0j for name in ('S11', 'S21', 'S12', 'S22')}
+
+    def legacy_interp():
+        return {name: np.interp(dut_freqs, cal_freqs, c.real) + 1j * np.interp(dut_freqs, cal_freqs, c.imag)
+                for name, c in coeffs.items()}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CalibrationStore(os.path.join(tmp, 'calibration'))
+        cal_dir = os.path.join(tmp, 'calibration', 'Calibration_SOLT_DualPort_bench')
+        ok, cal_id = store.save(coeffs, cal_freqs, calibration_dir=cal_dir)
+        assert ok, cal_id
+        assert store.list_calibrations()[0]['id'] == cal_id
+
+        t_save = timeit(lambda: store.save(coeffs, cal_freqs, calibration_dir=cal_dir), repeat=5)
+        t_load = timeit(lambda: CalibrationStore(store.root_dir).load(cal_id))
+        stored = CalibrationStore(store.root_dir).load()
+        for name in TERM_NAMES:
+            assert np.array_equal(stored.coefficients[name], coeffs[name])
+
+        ref = legacy_interp()
+        resampled = stored.coefficients_at(dut_freqs)
+        for name in TERM_NAMES:
+            assert np.allclose(ref[name], resampled[name])
+
+        def first_apply():
+            # 新的StoredCalibration：需要一次插值（索引已按频率轴对缓存）
+            CalibrationStore(store.root_dir).load(cal_id).apply(raw, dut_freqs)
+
+        t_interp_old = timeit(legacy_interp)
+        # 新建对象以跳过按频率轴缓存的插值结果，只复用插值索引
+        t_interp_new = timeit(lambda: StoredCalibration(cal_id, stored.freqs, stored.terms,
+                                                        stored.metadata).coefficients_at(dut_freqs))
+        t_first = timeit(first_apply, repeat=5)
+        t_apply = timeit(lambda: stored.apply(raw, dut_freqs))
+
+    report(f"保存 ({len(cal_freqs)}点)", t_save)
+    report("加载 (npz)", t_load)
+    report(f"np.interp 12项插值 ({len(dut_freqs)}点)", t_interp_old)
+    report(f"缓存索引 12项插值 ({len(dut_freqs)}点)", t_interp_new)
+    report(f"加载+插值+修正 [{n_meas}, {len(dut_freqs)}]", t_first)
+    report(f"缓存后修正 [{n_meas}, {len(dut_freqs)}]", t_apply)
+
+
+def bench_batch():
+    """DataAnalyzer批量处理(THRU/LOAD): 逐文件循环 vs 2-D堆叠批处理（逐行找边沿 / 复用已知上升沿位置）"""
+    import tempfile
+    import logging
+    from app.core.ADCBoardSimulator import make_tdr_frame, SimulatorConfig
+    from app.core.ConfigManager import AnalysisConfig
+    from app.core.DataAnalyze import DataAnalyzer
+    from app.core.FileManager import FileManager
+
+    logging.getLogger('app.core').setLevel(logging.WARNING)
+    n_unique = 20
+    keys = ('ys_full', 'ys', 'mags', 'ys_d_full', 'ys_d', 'mags_d')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fm = FileManager(base_data_path=os.path.join(tmp, 'data'))
+        unique = []
+        for i in range(n_unique):
+            name = f"frame_{i:03d}.bin"
+            fm.save_adc_binary_data(make_tdr_frame(i, SimulatorConfig(seed=i)), name, tmp)
+            unique.append(os.path.join(tmp, name))
+        analyzer = DataAnalyzer(AnalysisConfig(keep_traces=True), file_manager=fm, plotter=None)
+
+        # 一致性检查
+        files = unique[:10]
+        ref = analyzer.batch_process_files(files)
+        stacked = analyzer.batch_process_files_stacked(files)
+        known = analyzer.batch_process_files_stacked(files, rise_positions=stacked['rise_positions'])
+        for result in (stacked, known):
+            assert result['success_count'] == ref['success_count']
+            for key in keys:
+                assert np.allclose(np.vstack(ref[key]), result[key]), key
+            assert np.allclose(ref['sum_Xd'], result['sum_Xd'])
+        unique_rise = analyzer.batch_process_files_stacked(unique)['rise_positions']
+
+        for n_files in (10, 100, 1000):
+            files = [unique[i % n_unique] for i in range(n_files)]
+            repeat = 3 if n_files <= 100 else 1
+            if n_files <= 100:
+                t_old = timeit(lambda: analyzer.batch_process_files(files), repeat=repeat)
+                report(f"逐文件循环 {n_files}个 ({t_old / n_files * 1e3:.2f} ms/个)", t_old)
+                t_new = timeit(lambda: analyzer.batch_process_files_stacked(files), repeat=repeat)
+                report(f"堆叠批处理 {n_files}个 ({t_new / n_files * 1e3:.2f} ms/个)", t_new)
+            # 逐行找边沿的耗时与文件数成正比，1000个文件只测复用上升沿的路径
+            rise = np.resize(unique_rise, n_files)
+            t_known = timeit(lambda: analyzer.batch_process_files_stacked(files, rise_positions=rise), repeat=repeat)
+            report(f"堆叠批处理+已知上升沿 {n_files}个 ({t_known / n_files * 1e3:.2f} ms/个)", t_known)
+
+
+def legacy_reconstruct(segment, t_sample, t_trig, rise_pos, roi_start, roi_end):
+    """原实现：每个文件重新argsort，再np.roll对齐并截取ROI"""
+    t_within_period = (np.arange(len(segment), dtype=np.float64) * t_sample) % t_trig
+    sort_idx = np.argsort(t_within_period)
+    y_sorted = segment[sort_idx]
+    shift = (len(segment) // 4 - rise_pos) % len(segment)
+    y_full = np.roll(y_sorted, shift)
+    return y_full, y_full[roi_start:roi_end]
+
+
+def bench_recon():
+    """等效时间重建(81920点): 逐文件argsort+roll vs 缓存的重建计划(排序索引) + roll"""
+    from app.core.ConfigManager import AnalysisConfig
+    from app.core.DataProcessor import DataProcessor
+
+    cfg = AnalysisConfig()
+    processor = DataProcessor(cfg)
+    rng = np.random.default_rng(0)
+    segment = rng.integers(-2**19, 2**19, cfg.n_points).astype(np.int32)
+    rise_pos = 12345
+
+    def reconstruct():
+        plan = processor.get_reconstruction_plan()
+        y_full = processor.align_data(plan.sort(segment), rise_pos, plan.target_position)
+        return y_full, processor.extract_roi(y_full, plan.roi_start, plan.roi_end)
+
+    ref_full, ref_roi = legacy_reconstruct(segment, cfg.t_sample, cfg.t_trig, rise_pos, cfg.roi_start, cfg.roi_end)
+    y_full, y_roi = reconstruct()
+    assert np.array_equal(y_full, ref_full)
+    assert np.array_equal(y_roi, ref_roi)
+
+    t_old = timeit(lambda: legacy_reconstruct(segment, cfg.t_sample, cfg.t_trig, rise_pos, cfg.roi_start, cfg.roi_end))
+    t_new = timeit(reconstruct)
+    report("argsort + roll + ROI", t_old)
+    report("重建计划 排序 + roll + ROI", t_new)
+
+
+def bench_parallel():
+    """DataAnalyzer逐文件分析(100个文件): 单进程 vs 进程池（结果顺序与单进程一致）"""
+    import tempfile
+    import logging
+    from app.core.ADCBoardSimulator import make_tdr_frame, SimulatorConfig
+    from app.core.ConfigManager import AnalysisConfig
+    from app.core.DataAnalyze import DataAnalyzer
+    from app.core.FileManager import FileManager
+
+    logging.getLogger('app.core').setLevel(logging.WARNING)
+    n_files = 100
+    keys = ('ys_full', 'ys', 'mags', 'ys_d_full', 'ys_d', 'mags_d')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fm = FileManager(base_data_path=os.path.join(tmp, 'data'))
+        files = []
+        for i in range(n_files):
+            name = f"frame_{i:03d}.bin"
+            fm.save_adc_binary_data(make_tdr_frame(i, SimulatorConfig(seed=i)), name, tmp)
+            files.append(os.path.join(tmp, name))
+        analyzer = DataAnalyzer(AnalysisConfig(keep_traces=True), file_manager=fm, plotter=None)
+
+        t0 = time.perf_counter()
+        ref = analyzer.batch_process_files(files, n_workers=1)
+        t_serial = time.perf_counter() - t0
+        report(f"单进程 ({t_serial / n_files * 1e3:.2f} ms/个)", t_serial)
+
+        for n_workers in (2, 4, os.cpu_count() or 1):
+            t0 = time.perf_counter()
+            res = analyzer.batch_process_files_parallel(files, n_workers)
+            t_par = time.perf_counter() - t0
+            assert res['success_count'] == ref['success_count']
+            for key in keys:
+                assert all(np.array_equal(a, b) for a, b in zip(ref[key], res[key])), key
+            assert np.allclose(ref['sum_Xd'], res['sum_Xd'])
+            report(f"{n_workers} 进程 ({t_par / n_files * 1e3:.2f} ms/个, 加速 {t_serial / t_par:.2f}x)", t_par)
+
+        # 中断：第10次检查时请求停止
+        checks = iter(range(10))
+        res = analyzer.batch_process_files_parallel(files, 2, should_stop=lambda: next(checks, None) is None)
+        assert res['success_count'] < n_files
+    print(f"  CPU核数: {os.cpu_count()}")
+
+
+def bench_accumulate():
+    """批量结果求平均(81920点曲线): 逐文件保存+vstack vs 流式Welford累加器（耗时与峰值内存）"""
+    import tracemalloc
+    from app.core.ConfigManager import AnalysisConfig
+    from app.core.ResultProcessor import ResultProcessor, TRACE_KEYS
+
+    cfg = AnalysisConfig()
+    processor = ResultProcessor(cfg)
+    l_roi = cfg.roi_end - cfg.roi_start
+    l_diff = l_roi - cfg.diff_points
+    rng = np.random.default_rng(0)
+    base = {
+        'y_full': rng.standard_normal(cfg.n_points) * 1000 + 5000,
+        'y_roi': rng.standard_normal(l_roi) * 1000 + 5000,
+        'mag_linear': rng.random(l_roi // 2 + 1) + 0.1,
+        'y_full_diff': rng.standard_normal(cfg.n_points - cfg.diff_points),
+        'y_diff': rng.standard_normal(l_diff),
+        'mag_linear_d': rng.random(l_diff // 2 + 1) + 0.1,
+        'Xd_norm': rng.standard_normal(l_diff // 2 + 1) + 1j * rng.standard_normal(l_diff // 2 + 1),
+        'freq': np.arange(l_roi // 2 + 1, dtype=np.float64),
+        'freq_d': np.arange(l_diff // 2 + 1, dtype=np.float64),
+    }
+
+    def file_result(i):
+        # 每个文件在基准曲线上叠加不同的偏移
+        return {key: (value + 0.01 * i if key not in ('freq', 'freq_d') else value) for key, value in base.items()}
+
+    def legacy(n_files):
+        results = {key: [] for key, _ in TRACE_KEYS}
+        results['sum_Xd'] = np.zeros_like(base['Xd_norm'])
+        for i in range(n_files):
+            res = file_result(i)
+            for key, src in TRACE_KEYS:
+                results[key].append(res[src].astype(np.float64))
+            results['sum_Xd'] += res['Xd_norm']
+        results['success_count'] = n_files
+        return processor.calculate_averages(results)
+
+    def streaming(n_files):
+        accumulator = processor.new_accumulator()
+        for i in range(n_files):
+            accumulator.add(file_result(i))
+        return processor.calculate_averages({'accumulator': accumulator})
+
+    ref, new = legacy(50), streaming(50)
+    for key, value in ref.items():
+        assert np.allclose(value, new[key]), key
+    assert np.allclose(new['y_full_std'], 0.01 * np.std(np.arange(50)))
+
+    for n_files in (100, 1000):
+        for name, func in (("逐文件保存+vstack", legacy), ("流式累加", streaming)):
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            func(n_files)
+            elapsed = time.perf_counter() - t0
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            report(f"{name} {n_files}个 (峰值 {peak / 1e6:.0f} MB)", elapsed)
+
+
+def legacy_compute_spectrum(data, ts_eff):
+    """原实现：每次调用重新生成汉宁窗和频率轴"""
+    data_centered = data.astype(np.float64) - np.mean(data)
+    window = np.hanning(len(data))
+    fft_result = np.fft.rfft(data_centered * window)
+    freq = np.fft.rfftfreq(len(data), d=ts_eff)
+    scale = (np.sum(window) / len(data)) * len(data)
+    return freq, np.abs(fft_result) / (scale + 1e-12), fft_result
+
+
+def bench_spectrum():
+    """频谱计算: 逐次生成窗函数/频率轴 vs SpectralEngine缓存；[64, 8182]二维批量 单线程 vs 多线程"""
+    from app.core.ConfigManager import AnalysisConfig
+    from app.core.SpectralEngine import SpectralEngine, HAS_SCIPY_FFT
+
+    ts_eff = AnalysisConfig().ts_eff
+    rng = np.random.default_rng(0)
+    engine = SpectralEngine()
+    # 每个文件的ROI、差分ROI以及SHORT模式左右两半
+    lengths = (8192, 8182, 2212, 5980)
+    signals = [rng.standard_normal(n) * 1000 for n in lengths]
+
+    for x in signals:
+        for ref, new in zip(legacy_compute_spectrum(x, ts_eff), engine.spectrum(x, ts_eff)):
+            assert np.allclose(ref, new)
+
+    t_old = timeit(lambda: [legacy_compute_spectrum(x, ts_eff) for x in signals], repeat=50)
+    t_new = timeit(lambda: [engine.spectrum(x, ts_eff) for x in signals], repeat=50)
+    report(f"逐次生成 窗+频率轴 ({len(lengths)}种长度)", t_old)
+    report(f"SpectralEngine 缓存 ({len(lengths)}种长度)", t_new)
+
+    stack = rng.standard_normal((64, 8182)) * 1000
+    ref_mag = np.vstack([legacy_compute_spectrum(row, ts_eff)[1] for row in stack])
+    assert np.allclose(engine.spectrum(stack, ts_eff)[1], ref_mag)
+    t_rows = timeit(lambda: [legacy_compute_spectrum(row, ts_eff) for row in stack], repeat=5)
+    t_2d = timeit(lambda: engine.spectrum(stack, ts_eff), repeat=5)
+    report("逐行 64 x 8182", t_rows)
+    report("二维 64 x 8182 (单线程)", t_2d)
+    if HAS_SCIPY_FFT:
+        parallel = SpectralEngine(workers=-1)
+        t_mt = timeit(lambda: parallel.spectrum(stack, ts_eff), repeat=5)
+        report(f"二维 64 x 8182 (scipy.fft workers=-1, {os.cpu_count()}核)", t_mt)
+
+
+def legacy_find_edge_candidates(self, smoothed_data, is_rising=True, min_amplitude_ratio=0.3):
+    """原实现：Python循环逐窗口计算峰峰值，逐个候选点切片求前后均值"""
+    # 第一步：窗口移动检测候选区间
+    window_size = max(10, int(len(smoothed_data) * 0.05))  # 5%的窗口大小，最小10个点
+    step_size = max(5, int(len(smoothed_data) * 0.03))    # 3%的步进大小，最小5个点
+    
+    # 确保步长不为0
+    if step_size == 0:
+        step_size = 1
+        
+    threshold = np.ptp(smoothed_data) * min_amplitude_ratio  # 峰峰值阈值
+    
+    candidate_windows = []
+    
+    # 滑动窗口检测
+    for start in range(0, len(smoothed_data) - window_size, step_size):
+        end = start + window_size
+        window_data = smoothed_data[start:end]
+        window_p2p = np.ptp(window_data)  # 计算窗口内的峰峰值
+        
+        if window_p2p > threshold:
+            candidate_windows.append((start, end, window_p2p))
+    
+    if not candidate_windows:
+        return []
+    
+    # 第二步：对候选区间做平均值处理，去掉平均值最小的异常点
+    valid_windows = []
+    window_means = []
+    
+    for start, end, p2p in candidate_windows:
+        window_mean = np.mean(smoothed_data[start:end])
+        window_means.append(window_mean)
+    
+    # 计算平均值的均值和标准差
+    mean_of_means = np.mean(window_means)
+    std_of_means = np.std(window_means)
+    
+    # 筛选有效的窗口（去掉平均值异常的点）
+    for i, (start, end, p2p) in enumerate(candidate_windows):
+        if abs(window_means[i] - mean_of_means) < 2 * std_of_means:
+            valid_windows.append((start, end, p2p))
+    
+    if not valid_windows:
+        return []
+    
+    # 第三步：在有效窗口内使用差分法搜索精确的边沿位置
+    valid_candidates = []
+    
+    for start, end, p2p in valid_windows:
+        window_data = smoothed_data[start:end]
+        
+        # 计算差分
+        dy = np.diff(window_data)
+        
+        # 设置差分阈值
+        if is_rising:
+            dy_threshold = np.max(dy) * 0.3 if len(dy) > 0 else 0
+            candidate_indices = np.flatnonzero(dy > dy_threshold) + 1
+        else:
+            dy_threshold = np.min(dy) * 0.3 if len(dy) > 0 else 0
+            candidate_indices = np.flatnonzero(dy < dy_threshold) + 1
+        
+        # 转换回全局坐标并计算幅度
+        for candidate in candidate_indices:
+            global_pos = start + candidate
+            if 20 <= global_pos < len(smoothed_data) - 20:
+                # 新增：过滤毛刺噪声点
+                if self._is_spike_noise(smoothed_data, 3):
+                    continue  # 跳过毛刺噪声点
+                
+                # 计算候选点前后±5%窗口的平均值
+                window_size_5pct = max(5, int(len(smoothed_data) * 0.02))
+                pre_window_start = max(0, global_pos - window_size_5pct)
+                pre_window_end = global_pos
+                post_window_start = global_pos
+                post_window_end = min(len(smoothed_data), global_pos + window_size_5pct)
+                
+                pre_avg = np.mean(smoothed_data[pre_window_start:pre_window_end])
+                post_avg = np.mean(smoothed_data[post_window_start:post_window_end])
+                
+                # 判断是否为毛刺信号：如果两边平均值差距很小，说明是毛刺
+                if abs(pre_avg - post_avg) < threshold * 0.1:
+                    continue  # 跳过毛刺信号
+                
+                # 通过两边大小判断边沿类型
+                if is_rising and post_avg > pre_avg:
+                    amplitude = post_avg - pre_avg
+                    valid_candidates.append((global_pos, amplitude))
+                elif not is_rising and post_avg < pre_avg:
+                    amplitude = pre_avg - post_avg
+                    valid_candidates.append((global_pos, amplitude))
+    
+    return valid_candidates
+
+def bench_edges():
+    """边沿分析(81920点): 逐窗口/逐候选点循环 vs 滑动窗口视图向量化"""
+    import types
+    import logging
+    from app.core.ADCBoardSimulator import make_tdr_frame, SimulatorConfig
+    from app.core.ConfigManager import AnalysisConfig
+    from app.core.DataAnalyze import DataAnalyzer
+    from app.core.EdgeDetector import EdgeDetector
+
+    logging.getLogger('app.core').setLevel(logging.WARNING)
+    cfg = AnalysisConfig()
+    analyzer = DataAnalyzer(cfg, plotter=None)
+    detector = EdgeDetector(cfg)
+    legacy = EdgeDetector(cfg)
+    legacy._find_edge_candidates = types.MethodType(legacy_find_edge_candidates, legacy)
+
+    # 候选点列表与原循环实现的逐位一致性由 tests/test_edge_candidates.py 检验
+    traces = []
+    for seed in range(8):
+        u32 = np.frombuffer(make_tdr_frame(seed, SimulatorConfig(seed=seed)), dtype='<u4')[1:]
+        segment = analyzer.extract_basic_segment(u32, seed)
+        traces.append((segment['y_sorted'], segment['y_full'].astype(np.float64)))
+    average = np.mean([y_full for _, y_full in traces], axis=0)
+
+    y_sorted, y_full = traces[0]
+    report("find_rise_position 循环", timeit(lambda: legacy.find_rise_position(y_sorted, 1, None, 0.5)))
+    report("find_rise_position 向量化", timeit(lambda: detector.find_rise_position(y_sorted, 1, None, 0.5)))
+    report("analyze_edges 循环 (每条曲线)", timeit(lambda: legacy.analyze_edges(average)))
+    report("analyze_edges 向量化 (每条曲线)", timeit(lambda: detector.analyze_edges(average)))
+
+
+def bench_pyramid():
+    """边沿搜索(81920点): 全分辨率5%窗口(SearchMethod.RISING) vs 多分辨率金字塔(SearchMethod.PYRAMID)"""
+    import logging
+    from app.core.ADCBoardSimulator import make_tdr_frame, SimulatorConfig
+    from app.core.ConfigManager import AnalysisConfig, SearchMethod
+    from app.core.DataAnalyze import DataAnalyzer
+    from app.core.EdgeDetector import EdgeDetector
+
+    logging.getLogger('app.core').setLevel(logging.WARNING)
+    analyzer = DataAnalyzer(AnalysisConfig(), plotter=None)
+    full = EdgeDetector(AnalysisConfig(search_method=SearchMethod.RISING))
+    pyramid = EdgeDetector(AnalysisConfig(search_method=SearchMethod.PYRAMID))
+    keys = ('first_rise_pos', 'second_rise_pos', 'fall_pos')
+
+    def traces(sim_config, n_frames=4):
+        sorted_traces, aligned = [], []
+        for i in range(n_frames):
+            u32 = np.frombuffer(make_tdr_frame(i, sim_config), dtype='<u4')[1:]
+            segment = analyzer.extract_basic_segment(u32, i)
+            sorted_traces.append(segment['y_sorted'])
+            aligned.append(segment['y_full'].astype(np.float64))
+        return sorted_traces, aligned + [np.mean(aligned, axis=0)]
+
+    def deviations(sorted_traces, aligned):
+        """返回 未对齐数据上升沿最大偏差, 各边沿 [一致数, 最大偏差(两者都找到时)]"""
+        rise_dev = max(abs(int(full.find_rise_position(y, SearchMethod.RISING, None, 0.5)) -
+                           int(pyramid.find_rise_position(y, SearchMethod.PYRAMID, None, 0.5)))
+                       for y in sorted_traces)
+        stats = {key: [0, 0] for key in keys}
+        for y in aligned:
+            ref, new = full.analyze_edges(y), pyramid.analyze_edges(y)
+            for key in keys:
+                a, b = ref.get(key), new.get(key)
+                stats[key][0] += (a is None) == (b is None)
+                if a is not None and b is not None:
+                    stats[key][1] = max(stats[key][1], abs(int(a) - int(b)))
+        return rise_dev, stats
+
+    # 标称波形：对齐后的第一上升沿必须一致，第二上升沿/下降沿允许几个点的偏差
+    sorted_traces, aligned = traces(SimulatorConfig(seed=0), 8)
+    rise_dev, stats = deviations(sorted_traces, aligned)
+    assert stats['first_rise_pos'] == [len(aligned), 0], stats
+    assert stats['second_rise_pos'][0] == len(aligned) and stats['second_rise_pos'][1] <= 3, stats
+    assert stats['fall_pos'][0] == len(aligned), stats
+    assert rise_dev <= 32, rise_dev
+
+    # 其它波形只报告偏差（高噪声/慢上升沿时原方法的第二边沿常落在噪声或第一边沿上）
+    variants = {
+        '标称': SimulatorConfig(seed=0),
+        '噪声2000': SimulatorConfig(seed=1, noise_rms=2000),
+        '反射2ns/0.4': SimulatorConfig(seed=2, reflections=[(2e-9, 0.4)]),
+        '负反射': SimulatorConfig(seed=3, reflections=[(0.5e-9, -0.3)]),
+        '上升时间300ps': SimulatorConfig(seed=4, rise_time=300e-12),
+    }
+    for name, sim_config in variants.items():
+        rise_dev, stats = deviations(*traces(sim_config))
+        summary = ", ".join(f"{key.split('_')[0]} {ok}/5 检出一致 最大差{dev}" for key, (ok, dev) in stats.items())
+        print(f"  {name:<12s} 未对齐上升沿最大差{rise_dev}; {summary}")
+
+    y_sorted, y_full = sorted_traces[0], aligned[-1]
+    report("find_rise_position 全分辨率", timeit(lambda: full.find_rise_position(y_sorted, SearchMethod.RISING, None, 0.5)))
+    report("find_rise_position 金字塔", timeit(lambda: pyramid.find_rise_position(y_sorted, SearchMethod.PYRAMID, None, 0.5)))
+    report("analyze_edges 全分辨率", timeit(lambda: full.analyze_edges(y_full)))
+    report("analyze_edges 金字塔", timeit(lambda: pyramid.analyze_edges(y_full)))
+
+
+def bench_fft_edge():
+    """上升沿定位(81920点): 逐行5%窗口(SearchMethod.RISING)/金字塔 vs 整批FFT求导(SearchMethod.FFT)"""
+    import logging
+    from app.core.ADCBoardSimulator import make_tdr_frame, SimulatorConfig
+    from app.core.ConfigManager import AnalysisConfig, SearchMethod
+    from app.core.DataAnalyze import DataAnalyzer
+    from app.core.EdgeDetector import EdgeDetector
+
+    logging.getLogger('app.core').setLevel(logging.WARNING)
+    config = AnalysisConfig()
+    analyzer = DataAnalyzer(config, plotter=None)
+    detector = EdgeDetector(config)
+    n = config.n_points
+
+    def stack(sim_config, n_frames=8):
+        return np.array([analyzer.extract_basic_segment(
+            np.frombuffer(make_tdr_frame(i, sim_config), dtype='<u4')[1:], i)['y_sorted']
+            for i in range(n_frames)], dtype=np.float64)
+
+    def circular_dev(a, b):
+        return int(np.max(np.abs((np.asarray(a) - np.asarray(b) + n // 2) % n - n // 2)))
+
+    # 与窗口方法的偏差：陡峭上升沿应在几个点以内；慢上升沿时窗口方法的后2%窗口包含反射台阶，结果偏晚（见find_rise_positions_fft）
+    variants = {
+        '标称': SimulatorConfig(seed=0),
+        '噪声2000': SimulatorConfig(seed=1, noise_rms=2000),
+        '反射2ns/0.4': SimulatorConfig(seed=2, reflections=[(2e-9, 0.4)]),
+        '负反射': SimulatorConfig(seed=3, reflections=[(0.5e-9, -0.3)]),
+        '上升时间300ps': SimulatorConfig(seed=4, rise_time=300e-12),
+    }
+    for name, sim_config in variants.items():
+        traces = stack(sim_config)
+        ref = [detector.find_rise_position(y, SearchMethod.RISING, None, 0.5) for y in traces]
+        dev = circular_dev(ref, detector.find_rise_positions_fft(traces))
+        single = circular_dev(ref, [detector.find_rise_position(y, SearchMethod.FFT) for y in traces])
+        assert single == dev, (single, dev)
+        if name != '上升时间300ps':
+            assert dev <= 8, (name, dev)
+        print(f"  {name:<12s} 与窗口方法最大差 {dev} 点")
+
+    traces = np.concatenate([stack(SimulatorConfig(seed=0)), stack(SimulatorConfig(seed=5))])
+    rows = len(traces)
+    for name, method in (('窗口', SearchMethod.RISING), ('金字塔', SearchMethod.PYRAMID)):
+        best = timeit(lambda: [detector.find_rise_position(y, method, None, 0.5) for y in traces])
+        report(f"逐行{name} 每条", best / rows)
+    report("FFT逐行 每条", timeit(lambda: [detector.find_rise_positions_fft(y) for y in traces]) / rows)
+    report(f"FFT整批({rows}条) 每条", timeit(lambda: detector.find_rise_positions_fft(traces)) / rows)
+
+
+def legacy_extract_adc_data(u32_arr, use_signed18=True):
+    """原extract_adc_data: 移位/掩码/类型转换各生成一个整帧临时数组"""
+    bit31 = ((u32_arr >> 31) & 0x1).astype(np.uint8)
+    adc_18u = (u32_arr & ((1 << 20) - 1)).astype(np.uint32)
+    if use_signed18:
+        adc_18s = ((adc_18u + (1 << 19)) & ((1 << 20) - 1)) - (1 << 19)
+        adc_data = adc_18s.astype(np.int32)
+    else:
+        adc_data = adc_18u.astype(np.int32)
+    return bit31, adc_data
+
+
+def legacy_detect_valid_data(bit31, edge_search_start=1):
+    edge_idx = np.flatnonzero((bit31[1:] == 1) & (bit31[:-1] == 0))
+    edge_idx = edge_idx[edge_idx >= edge_search_start]
+    return edge_idx[0] + 1 if edge_idx.size else None
+
+
+def bench_unpack():
+    """ADC字解析(单帧): 原extract_adc_data+detect_valid_data+两次mean vs 分块触发搜索+移位解包(复用缓冲区)"""
+    import tracemalloc
+    from app.core.ADCBoardSimulator import make_tdr_frame, SimulatorConfig
+    from app.core.ConfigManager import AnalysisConfig
+    from app.core.DataProcessor import DataProcessor
+
+    processor = DataProcessor(AnalysisConfig())
+    frames = [np.frombuffer(make_tdr_frame(i, SimulatorConfig(seed=i)), dtype='<u4')[1:] for i in range(4)]
+    rng = np.random.default_rng(0)
+    random_words = rng.integers(0, 1 << 32, size=N_SAMPLES, dtype=np.uint32)
+
+    def legacy(u32, signed=True):
+        bit31, adc = legacy_extract_adc_data(u32, signed)
+        rise_idx = legacy_detect_valid_data(bit31, 1)
+        return rise_idx, adc, np.mean(adc), np.mean(adc)
+
+    def fused(u32, signed=True):
+        rise_idx = processor.find_trigger_edge(u32, 1)
+        adc = processor.unpack_adc(u32, signed, processor.adc_buffer(u32.shape))
+        return rise_idx, adc, np.mean(adc)
+
+    # 结果与原实现逐点一致（含随机字的有符号/无符号解析、二维批量和bit31数组）
+    for u32 in frames + [random_words]:
+        for signed in (True, False):
+            ref, new = legacy(u32, signed), fused(u32, signed)
+            assert ref[0] == new[0] and np.array_equal(ref[1], new[1]) and ref[2] == new[2]
+    stack = np.stack(frames)
+    ref_bit31, ref_adc = legacy_extract_adc_data(stack)
+    bit31, adc = processor.extract_adc_data(stack)
+    assert np.array_equal(ref_bit31, bit31) and np.array_equal(ref_adc, adc)
+    assert np.array_equal(processor.find_trigger_edges(stack), processor.detect_valid_data_batch(bit31))
+
+    u32 = frames[0]
+    for name, func in (("原实现", legacy), ("分块触发搜索+移位解包", fused)):
+        func(u32)
+        tracemalloc.start()
+        func(u32)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        report(f"{name} (临时峰值 {peak / u32.nbytes:.1f}倍帧长)", timeit(lambda: func(u32)), u32.nbytes)
+
+
+def bench_fold():
+    """多周期折叠(每次采集4个周期): 只用第一个周期 vs 折叠全部周期平均（平坦区噪声与耗时）"""
+    import logging
+    from app.core.ADCBoardSimulator import make_tdr_frame, SimulatorConfig
+    from app.core.ConfigManager import AnalysisConfig
+    from app.core.DataAnalyze import DataAnalyzer
+
+    logging.getLogger('app.core').setLevel(logging.WARNING)
+    n = AnalysisConfig().n_points
+    sim_config = SimulatorConfig(seed=0, n_samples=4 * n + 4096, noise_rms=2000)
+    frames = [np.frombuffer(make_tdr_frame(i, sim_config), dtype='<u4')[1:] for i in range(4)]
+    single = DataAnalyzer(AnalysisConfig(), plotter=None)
+    folded = DataAnalyzer(AnalysisConfig(fold_periods=0), plotter=None)
+
+    # 只折叠一个周期时与按周期排序逐点一致
+    processor = single.data_processor
+    u32 = frames[0]
+    start = processor.find_trigger_edge(u32) + single.config.start_index
+    adc = processor.unpack_adc(u32)
+    plan = processor.get_reconstruction_plan()
+    assert np.array_equal(processor.fold_segment(adc, start, n, 1), adc[start:start + n][plan.sort_idx])
+
+    def flat_noise(analyzer):
+        """对齐后上升沿之后平坦区的噪声（相邻点差分的标准差/√2）"""
+        res = [analyzer.extract_basic_segment(u32, i) for i, u32 in enumerate(frames)]
+        lo, hi = plan.target_position + n // 10, plan.target_position + n // 4
+        noise = np.mean([np.std(np.diff(r['y_full'][lo:hi])) / np.sqrt(2) for r in res])
+        return noise, res[0]['n_averages']
+
+    noise_1, k_1 = flat_noise(single)
+    noise_k, k = flat_noise(folded)
+    batch = folded.process_batch(np.stack(frames))
+    assert np.all(batch['n_averages'] == k)
+    assert noise_k < noise_1 / np.sqrt(k) * 1.2, (noise_1, noise_k)
+    print(f"  平坦区噪声: 单周期 {noise_1:.0f}, 折叠{k}个周期 {noise_k:.0f} (理论 {noise_1 / np.sqrt(k):.0f})")
+    print(f"  每个文件等效平均次数: {k_1} -> {k}，相同信噪比所需采集次数减少为 1/{k}")
+    report("extract_basic_segment 单周期", timeit(lambda: single.extract_basic_segment(u32, 0)))
+    report(f"extract_basic_segment 折叠{k}周期", timeit(lambda: folded.extract_basic_segment(u32, 0)))
+    report(f"process_batch 折叠{k}周期 (每个)", timeit(lambda: folded.process_batch(np.stack(frames))) / len(frames))
+
+
+def bench_cache():
+    """重新分析未改动的文件夹(100个文件): 无缓存 vs 分析缓存（冷启动/全部命中/只改ROI时复用对齐结果）"""
+    import tempfile
+    import logging
+    from dataclasses import replace
+    from app.core.ADCBoardSimulator import make_tdr_frame, SimulatorConfig
+    from app.core.ConfigManager import AnalysisConfig
+    from app.core.DataAnalyze import DataAnalyzer
+    from app.core.FileManager import FileManager
+
+    logging.getLogger('app.core').setLevel(logging.WARNING)
+    n_files = 100
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fm = FileManager(base_data_path=os.path.join(tmp, 'data'))
+        files = []
+        for i in range(n_files):
+            name = f"frame_{i:03d}.bin"
+            fm.save_adc_binary_data(make_tdr_frame(i, SimulatorConfig(seed=i)), name, tmp)
+            files.append(os.path.join(tmp, name))
+
+        config = AnalysisConfig(keep_traces=True)
+        plain = DataAnalyzer(config, file_manager=fm, plotter=None)
+        cached = DataAnalyzer(replace(config, analysis_cache=True), file_manager=fm, plotter=None)
+
+        def run(analyzer):
+            t0 = time.perf_counter()
+            res = analyzer.batch_process_files(files)
+            return time.perf_counter() - t0, res
+
+        def same(a, b):
+            assert a['success_count'] == b['success_count']
+            assert np.array_equal(a['sum_Xd'], b['sum_Xd'])
+            for key in ('ys_full', 'ys', 'mags', 'ys_d_full', 'ys_d', 'mags_d'):
+                assert all(np.array_equal(x, y) for x, y in zip(a[key], b[key])), key
+
+        t_plain, ref = run(plain)
+        t_cold, cold = run(cached)
+        t_warm, warm = run(cached)
+        same(ref, cold)
+        same(ref, warm)
+        cache = cached.cache
+        report(f"无缓存 ({t_plain / n_files * 1e3:.2f} ms/个)", t_plain)
+        report(f"缓存冷启动 ({t_cold / n_files * 1e3:.2f} ms/个)", t_cold)
+        report(f"全部命中 ({t_warm / n_files * 1e3:.2f} ms/个, 加速 {t_plain / t_warm:.0f}x)", t_warm)
+        t_file = timeit(lambda: [plain.analyze_file(f, i) for i, f in enumerate(files)], repeat=3)
+        t_hit = timeit(lambda: [cached.analyze_file(f, i) for i, f in enumerate(files)], repeat=3)
+        report(f"analyze_file 无缓存 ({t_file / n_files * 1e3:.2f} ms/个)", t_file)
+        report(f"analyze_file 命中 ({t_hit / n_files * 1e3:.2f} ms/个, 加速 {t_file / t_hit:.0f}x)", t_hit)
+        print(f"  缓存占用 {cache.total_bytes / 1e6:.1f} MB（其余耗时为逐文件流式累加，与是否缓存无关）")
+
+        # 只改动ROI：'segment'阶段命中，从对齐后的y_full继续，结果与无缓存一致
+        roi_config = replace(config, roi_end_tenths=28)
+        t_roi_plain, roi_ref = run(DataAnalyzer(roi_config, file_manager=fm, plotter=None))
+        roi_cached = DataAnalyzer(replace(roi_config, analysis_cache=True), file_manager=fm, plotter=None)
+        t_roi, roi_res = run(roi_cached)
+        same(roi_ref, roi_res)
+        assert roi_cached.cache.misses == n_files and roi_cached.cache.hits == n_files
+        report(f"只改ROI 无缓存 ({t_roi_plain / n_files * 1e3:.2f} ms/个)", t_roi_plain)
+        report(f"只改ROI 复用对齐结果 ({t_roi / n_files * 1e3:.2f} ms/个)", t_roi)
+
+        # 修改文件内容后对应条目失效；容量上限按LRU淘汰
+        fm.save_adc_binary_data(make_tdr_frame(1, SimulatorConfig(seed=1000)), "frame_000.bin", tmp)
+        changed = DataAnalyzer(replace(config, analysis_cache=True), file_manager=fm, plotter=None)
+        changed.analyze_file(files[0], 0)
+        assert changed.cache.hits == 0
+        small = DataAnalyzer(replace(config, analysis_cache=True, analysis_cache_mb=cache.total_bytes / 4 / 2 ** 20,
+                                     analysis_cache_dir=os.path.join(tmp, 'small')), file_manager=fm, plotter=None)
+        small.batch_process_files(files)
+        assert small.cache.total_bytes <= small.cache.max_bytes
+        print(f"  容量上限 {small.cache.max_bytes / 1e6:.1f} MB: 淘汰后占用 {small.cache.total_bytes / 1e6:.1f} MB")
+
+
+BENCHMARKS = {
+    'decode': bench_decode,
+    'load': bench_load,
+    'csv_read': bench_csv_read,
+    'csv_write': bench_csv_write,
+    'pipeline': bench_pipeline,
+    'transfer': bench_transfer,
+    'multiboard': bench_multiboard,
+    'commands': bench_commands,
+    'metrics': bench_metrics,
+    'clock': bench_clock,
+    'vna_cal': bench_vna_cal,
+    'scpi_sweep': bench_scpi_sweep,
+    'cal_store': bench_cal_store,
+    'batch': bench_batch,
+    'recon': bench_recon,
+    'parallel': bench_parallel,
+    'accumulate': bench_accumulate,
+    'spectrum': bench_spectrum,
+    'edges': bench_edges,
+    'pyramid': bench_pyramid,
+    'fft_edge': bench_fft_edge,
+    'unpack': bench_unpack,
+    'fold': bench_fold,
+    'cache': bench_cache,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TDR核心处理路径性能基准")
+    parser.add_argument('names', nargs='*', help=f"要运行的用例: {', '.join(BENCHMARKS)}")
+    args = parser.parse_args()
+
+    names = args.names or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"未知用例: {name}")
+        print(f"[{name}] {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+# src/app/core/ADCBoardSimulator.py
+import re
+import time
+import socket
+import select
+import struct
+import threading
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 帧头模式: 4字节魔数 + 小端uint32负载字节数
+FRAME_MAGIC = b'ADCF'
+FRAME_HEADER = struct.Struct('<4sI')
+
+# 命令以空白或回车换行分隔；sample/read类命令板卡端不带换行也能识别
+_COMMAND_RE = re.compile(rb'\s*(lmk_state\s+\d+\s+\d+\s+\d+|readall|readf|read|sample|\*IDN\?|STATUS\?)')
+
+
+@dataclass
+class SimulatorConfig:
+    """模拟板卡配置：帧内容、链路特性和故障注入"""
+    # ===== 帧格式 =====
+    n_samples: int = 81920 + 4096          # 每帧uint32数量
+    chunk_size: int = 32768                # read逐块模式下每块的字节数
+    marker_index: int = 1000               # bit31从该点起置1（触发标记上升沿）
+    # ===== TDR波形（等效采样） =====
+    clock_freq: float = 39.53858777e6      # 采样时钟(Hz)，与AnalysisConfig一致
+    trigger_freq: float = 10e6             # 触发频率(Hz)
+    rise_time: float = 30e-12              # 10%-90%上升时间(秒)
+    edge_phase: float = 0.25               # 上升沿在触发周期内的位置(比例)
+    fall_phase: float = 0.75               # 下降沿在触发周期内的位置(比例)
+    amplitude: float = 150000.0            # 阶跃幅度(ADC码)
+    offset: float = -75000.0               # 直流偏置(ADC码)
+    reflections: List[Tuple[float, float]] = field(default_factory=lambda: [(1.0e-9, 0.3)])  # (延时秒, 反射系数)
+    noise_rms: float = 200.0               # 高斯噪声均方根(ADC码)
+    # ===== 链路特性 =====
+    latency: float = 0.0                   # 每次回复前的处理延时(秒)，逐条串行
+    rtt: float = 0.0                       # 链路往返时延(秒)，回复不早于命令到达后rtt发出，可被流水线重叠
+    bandwidth: float = 0.0                 # 负载发送带宽(字节/秒)，0表示不限速
+    fragment_size: int = 0                 # 负载分片发送大小(字节)，0表示一次sendall
+    # ===== 故障注入（每次回复独立按概率触发） =====
+    drop_rate: float = 0.0                 # 丢弃整次回复
+    short_read_rate: float = 0.0           # 负载只发送前一部分（短帧）
+    stall_rate: float = 0.0                # 负载发送中途停顿
+    stall_time: float = 2.0                # 停顿时长(秒)
+    seed: int = 0                          # 噪声和故障的随机种子
+
+
+def _erf(x: np.ndarray) -> np.ndarray:
+    """误差函数的向量化近似（Abramowitz-Stegun 7.1.26，最大误差1.5e-7），避免依赖scipy"""
+    sign = np.sign(x)
+    x = np.abs(x)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    return sign * (1.0 - poly * np.exp(-x * x))
+
+
+def tdr_step(t: np.ndarray, t0: float, rise_time: float) -> np.ndarray:
+    """t0处的高斯型阶跃(0→1)，rise_time为10%-90%上升时间"""
+    sigma = rise_time / 2.563  # 10%-90%上升时间 = 2.563σ
+    return 0.5 * (1.0 + _erf((t - t0) / (sigma * np.sqrt(2.0))))
+
+
+def tdr_waveform(phase_t: np.ndarray, config: SimulatorConfig) -> np.ndarray:
+    """
+    触发周期内的TDR方波响应（不含噪声）：上升沿+反射台阶，下降沿为其镜像
+
+    Args:
+        phase_t: 周期内时间(秒)，取值[0, t_trig)
+        config: 模拟器配置
+    """
+    t_trig = 1.0 / config.trigger_freq
+    edges = [(config.edge_phase * t_trig, 1.0), (config.fall_phase * t_trig, -1.0)]
+    y = np.zeros_like(phase_t)
+    for t_edge, polarity in edges:
+        y += polarity * tdr_step(phase_t, t_edge, config.rise_time)
+        for delay, coeff in config.reflections:
+            y += polarity * coeff * tdr_step(phase_t, t_edge + delay, config.rise_time)
+    return config.offset + config.amplitude * y
+
+
+def make_tdr_frame(index: int, config: SimulatorConfig) -> np.ndarray:
+    """
+    生成一帧板卡原始数据：bit31为触发标记，低20位为有符号ADC采样
+
+    每帧的触发相位随机，采样时间与analysis中按(k*t_sample) % t_trig排序的等效采样一致。
+    """
+    rng = np.random.default_rng((config.seed, index))
+    t_sample = 1.0 / config.clock_freq
+    t_trig = 1.0 / config.trigger_freq
+    k = np.arange(config.n_samples, dtype=np.float64)
+    phase_t = (k * t_sample + rng.uniform(0.0, t_trig)) % t_trig
+
+    y = tdr_waveform(phase_t, config)
+    if config.noise_rms > 0:
+        y += rng.normal(0.0, config.noise_rms, config.n_samples)
+
+    adc = np.clip(np.rint(y), -(1 << 19), (1 << 19) - 1).astype(np.int32)
+    frame = adc.view(np.uint32) & np.uint32((1 << 20) - 1)
+    frame[config.marker_index:] |= np.uint32(1 << 31)
+    return frame
+
+
+class ADCBoardSimulator:
+    """
+    本地ADC板卡模拟服务器，协议与板卡一致，用于无硬件时测试采集链路
+
+    支持的命令:
+        sample          采集一帧，回复 "ok <字节数>\\r\\n"
+        read            逐块读取: 每次回复下一块(chunk_size字节)，读完后回复单字节b'\\x00'
+        readall         长度前缀传输: 回复 "<字节数>\\r\\n" 后连续发送整帧
+        readf           帧头传输: 回复 FRAME_HEADER(b'ADCF', 字节数) 后连续发送整帧
+        lmk_state t c e 时钟控制，不回复
+        *IDN? / STATUS? 查询，回复一行文本
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, config: Optional[SimulatorConfig] = None,
+                 frame_source: Optional[Callable[[int], np.ndarray]] = None):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口，0表示由系统分配（启动后从self.port读取）
+            config: 模拟器配置，默认生成TDR阶跃帧、无延时、无故障
+            frame_source: 帧生成函数 f(帧序号) -> uint32数组，默认使用make_tdr_frame
+        """
+        self.host = host
+        self.port = port
+        self.config = config or SimulatorConfig()
+        self.frame_source = frame_source or (lambda index: make_tdr_frame(index, self.config))
+        self.lmk_states = {}
+        self.frame_count = 0
+        self.fault_counts = {'drop': 0, 'short_read': 0, 'stall': 0}
+        self._fault_rng = np.random.default_rng(self.config.seed)
+        self._server_sock = None
+        self._thread = None
+        self._running = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def n_samples(self) -> int:
+        return self.config.n_samples
+
+    # ===== 服务器控制 =====
+    def start(self):
+        """启动监听线程，返回(地址, 端口)"""
+        self._server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server_sock.bind((self.host, self.port))
+        self._server_sock.listen(8)
+        self._server_sock.settimeout(0.2)
+        self.port = self._server_sock.getsockname()[1]
+        self._running.set()
+        self._thread = threading.Thread(target=self._accept_loop, name='adc-sim', daemon=True)
+        self._thread.start()
+        logger.info(f"ADC板卡模拟器已启动: {self.host}:{self.port}")
+        return self.host, self.port
+
+    def stop(self):
+        """停止服务器"""
+        self._running.clear()
+        if self._thread:
+            self._thread.join(2.0)
+            self._thread = None
+        if self._server_sock:
+            self._server_sock.close()
+            self._server_sock = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _accept_loop(self):
+        while self._running.is_set():
+            try:
+                conn, _ = self._server_sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            # 应答多为短小的文本行，关闭Nagle避免与客户端延迟确认叠加产生约40ms的停顿
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    # ===== 协议处理 =====
+    def _serve_client(self, conn: socket.socket):
+        """处理单个连接，每个连接有独立的当前帧和读指针"""
+        session = {'frame': b'', 'offset': 0, 't_recv': 0.0}
+        buf = b''
+        try:
+            while self._running.is_set():
+                # 用select轮询以便响应stop()；连接本身保持阻塞，大块sendall不会超时
+                readable, _, _ = select.select([conn], [], [], 0.2)
+                if not readable:
+                    continue
+                data = conn.recv(4096)
+                if not data:
+                    break
+                session['t_recv'] = time.perf_counter()
+                buf += data
+                while True:
+                    m = _COMMAND_RE.match(buf)
+                    if not m:
+                        break
+                    buf = buf[m.end():]
+                    self._handle_command(conn, m.group(1).decode('ascii'), session)
+                # 丢弃无法识别的内容，保留可能是不完整命令的尾部
+                if len(buf) > 64:
+                    buf = buf[-32:]
+        except OSError as e:
+            logger.debug(f"模拟器连接断开: {e}")
+        finally:
+            conn.close()
+
+    def _next_frame(self) -> bytes:
+        with self._lock:
+            index = self.frame_count
+            self.frame_count += 1
+        return np.ascontiguousarray(self.frame_source(index), dtype='<u4').tobytes()
+
+    def _fault(self, name: str, rate: float) -> bool:
+        """按概率判定是否注入故障"""
+        if rate <= 0:
+            return False
+        with self._lock:
+            hit = self._fault_rng.random() < rate
+            if hit:
+                self.fault_counts[name] += 1
+        return hit
+
+    def _reply(self, conn: socket.socket, session: dict, prefix: bytes, payload: bytes = b''):
+        """按配置的延时、带宽和故障发送一次回复（prefix为应答行或帧头，payload为数据）"""
+        cfg = self.config
+        if cfg.latency > 0:
+            time.sleep(cfg.latency)
+        if cfg.rtt > 0:
+            wait = session['t_recv'] + cfg.rtt - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+        if self._fault('drop', cfg.drop_rate):
+            return
+        if prefix:
+            conn.sendall(prefix)
+        if not payload:
+            return
+
+        if self._fault('short_read', cfg.short_read_rate):
+            payload = payload[:len(payload) // 2]
+        stall_at = len(payload) // 2 if self._fault('stall', cfg.stall_rate) else -1
+
+        step = cfg.fragment_size or len(payload)
+        if cfg.bandwidth > 0:
+            # 限速时按约10ms的数据量分片，便于均匀节流
+            step = min(step, max(1024, int(cfg.bandwidth * 0.01)))
+        view = memoryview(payload)
+        t0 = time.perf_counter()
+        offset = 0
+        while offset < len(payload):
+            end = min(offset + step, len(payload))
+            if offset < stall_at < end:
+                end = stall_at  # 在停顿点处切分
+            if offset == stall_at:
+                time.sleep(cfg.stall_time)
+                t0 += cfg.stall_time
+            if cfg.bandwidth > 0:
+                # 发送前等到该分片在限定带宽下应发完的时刻
+                ahead = end / cfg.bandwidth - (time.perf_counter() - t0)
+                if ahead > 0:
+                    time.sleep(ahead)
+            conn.sendall(view[offset:end])
+            offset = end
+
+    def _handle_command(self, conn: socket.socket, command: str, session: dict):
+        if command == 'sample':
+            session['frame'] = self._next_frame()
+            session['offset'] = 0
+            self._reply(conn, session, f"ok {len(session['frame'])}\r\n".encode('ascii'))
+        elif command == 'read':
+            frame, offset = session['frame'], session['offset']
+            if offset >= len(frame):
+                self._reply(conn, session, b'\x00')
+            else:
+                chunk = frame[offset:offset + self.config.chunk_size]
+                session['offset'] = offset + len(chunk)
+                self._reply(conn, session, b'', chunk)
+        elif command == 'readall':
+            frame = session['frame']
+            session['offset'] = len(frame)
+            self._reply(conn, session, f"{len(frame)}\r\n".encode('ascii'), frame)
+        elif command == 'readf':
+            frame = session['frame']
+            session['offset'] = len(frame)
+            self._reply(conn, session, FRAME_HEADER.pack(FRAME_MAGIC, len(frame)), frame)
+        elif command == '*IDN?':
+            self._reply(conn, session, b'TDR,ADC Board Simulator,0,1.0\r\n')
+        elif command == 'STATUS?':
+            self._reply(conn, session, b'OK\r\n')
+        else:
+            _, clock_type, channel, enable = command.split()
+            self.lmk_states[(int(clock_type), int(channel))] = int(enable)
+
+
+def main():
+    """以独立进程运行模拟板卡，上位机连接127.0.0.1:15000即可采样"""
+    import argparse
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="ADC板卡模拟服务器")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=15000)
+    parser.add_argument('--latency', type=float, default=0.0, help="每次回复前的处理延时(秒)")
+    parser.add_argument('--rtt', type=float, default=0.0, help="链路往返时延(秒)")
+    parser.add_argument('--bandwidth', type=float, default=0.0, help="负载带宽(MB/s)，0表示不限速")
+    parser.add_argument('--drop-rate', type=float, default=0.0)
+    parser.add_argument('--short-read-rate', type=float, default=0.0)
+    parser.add_argument('--stall-rate', type=float, default=0.0)
+    parser.add_argument('--stall-time', type=float, default=2.0)
+    args = parser.parse_args()
+
+    config = SimulatorConfig(latency=args.latency, rtt=args.rtt, bandwidth=args.bandwidth * 1024 * 1024,
+                             drop_rate=args.drop_rate, short_read_rate=args.short_read_rate,
+                             stall_rate=args.stall_rate, stall_time=args.stall_time)
+    with ADCBoardSimulator(args.host, args.port, config) as sim:
+        try:
+            while True:
+                time.sleep(1.0)
+        except KeyboardInterrupt:
+            logger.info(f"模拟器停止，共生成 {sim.frame_count} 帧，故障统计: {sim.fault_counts}")
+
+
+if __name__ == "__main__":
+    main()
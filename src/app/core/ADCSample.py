@@ -1,12 +1,13 @@
 # src/app/core/ADCSample.py
-import struct
 import os
 import time
 import socket
+import struct
 
 
 import logging
 import gc  # 添加垃圾回收模块
+import numpy as np
 
 try:
     from .TcpClient import TcpClient
@@ -17,6 +18,10 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# 帧头传输模式: 4字节魔数 + 小端uint32负载字节数（与ADCBoardSimulator一致）
+FRAME_MAGIC = b'ADCF'
+FRAME_HEADER = struct.Struct('<4sI')
+
 class ADCSample:
     """使用外部TcpClient实例的ADC采样类，优化内存使用"""
     
@@ -29,6 +34,11 @@ class ADCSample:
         self.server_port = self.tcp_client.server_port if self.tcp_client and self.tcp_client.server_port else 15000
         self.chunk_size = 32768  # 32KB chunks
         self.output_dir = 'data\\results\\test'
+        self.save_csv = False  # 是否额外输出CSV（二进制为主格式）
+        # 接收模式: 'stream'逐块read直到b'\x00'; 'length'长度前缀(readall); 'header'帧头+负载(readf)
+        self.receive_mode = 'stream'
+        self.frame_timeout = 5.0  # 分帧接收时单次recv的停顿超时(秒)，仅用于判断链路异常
+        self.last_transfer = {}  # 最近一次接收的字节数、耗时和MB/s
     
     def set_tcp_client(self, tcp_client):
         """设置外部TcpClient实例"""
@@ -47,6 +57,11 @@ class ADCSample:
         """设置输出目录"""
         self.output_dir = output_dir
     
+    @property
+    def metrics(self):
+        """传输统计（与TcpClient共享，未启用时为None）"""
+        return getattr(self.tcp_client, 'metrics', None)
+    
     def is_connected(self):
         """检查是否已连接"""
         return self.tcp_client and self.tcp_client.connected
@@ -67,7 +82,7 @@ class ADCSample:
     def receive_binary_data(self, max_retries=3, base_timeout=1.0):
         """
         专门用于接收二进制数据的方法，优化内存使用
-        返回: (是否成功, 字节数据或错误信息)
+        返回: (是否成功, 接收缓冲区bytearray或错误信息)
         """
         if not self.is_connected() or not self.tcp_client.sock:
             return False, "未连接"
@@ -124,15 +139,113 @@ class ADCSample:
             gc.collect()
             return False, "接收数据超时"
         
-        # 返回前进行内存整理
-        if hasattr(data, 'shrink_to_fit'):
-            data.shrink_to_fit()
-        
-        return True, bytes(data)  # 返回不可变的bytes对象而不是bytearray
+        # 直接返回接收缓冲区，避免再复制一份bytes，后续可用np.frombuffer零拷贝解析
+        return True, data
 
     
+    def receive_framed_data(self, mode=None):
+        """
+        分帧接收：先得到本帧字节数，再用recv_into写入一次性分配的缓冲区，直到收满
+        
+        'length'模式发送readall，板卡回复"<字节数>\r\n"后连续发送整帧；
+        'header'模式发送readf，板卡回复FRAME_HEADER后连续发送整帧。
+        不依赖超时判断结束，也没有逐块分配。
+        
+        返回: (是否成功, 接收缓冲区bytearray或错误信息)
+        """
+        mode = mode or self.receive_mode
+        if not self.is_connected() or not self.tcp_client.sock:
+            return False, "未连接"
+        
+        sock = self.tcp_client.sock
+        command = 'readf' if mode == 'header' else 'readall'
+        t0 = time.perf_counter()
+        success, message = self.tcp_client.send(command)
+        if not success:
+            return False, message
+        
+        previous_timeout = sock.gettimeout()
+        try:
+            sock.settimeout(self.frame_timeout)
+            if mode == 'header':
+                header = bytearray(FRAME_HEADER.size)
+                self._recv_exact_into(sock, memoryview(header))
+                magic, nbytes = FRAME_HEADER.unpack(header)
+                if magic != FRAME_MAGIC:
+                    return False, f"帧头错误: {bytes(magic)!r}"
+            else:
+                nbytes = self._recv_length_line(sock)
+            
+            data = bytearray(nbytes)
+            self._recv_exact_into(sock, memoryview(data))
+            self._record_transfer(nbytes, time.perf_counter() - t0)
+            return True, data
+            
+        except (socket.timeout, ConnectionError, ValueError) as e:
+            return False, f"分帧接收失败: {str(e)}"
+        finally:
+            # 恢复TcpClient设置的超时，不影响之后的命令收发
+            sock.settimeout(previous_timeout)
+    
+    @staticmethod
+    def _recv_exact_into(sock, view):
+        """循环recv_into到view的递增偏移，直到填满"""
+        offset = 0
+        total = len(view)
+        while offset < total:
+            n = sock.recv_into(view[offset:], total - offset)
+            if n == 0:
+                raise ConnectionError(f"连接已关闭，已接收 {offset}/{total} 字节")
+            offset += n
+    
+    @staticmethod
+    def _recv_length_line(sock, max_len=32):
+        """逐字节读取长度前缀行"<字节数>\r\n"，不会多读负载数据"""
+        line = bytearray()
+        while len(line) < max_len:
+            b = sock.recv(1)
+            if not b:
+                raise ConnectionError("连接已关闭")
+            if b == b'\n':
+                return int(line.strip())
+            line += b
+        raise ValueError(f"长度前缀过长: {bytes(line)!r}")
+    
+    def _record_transfer(self, nbytes, seconds):
+        """记录并打印本次接收吞吐量"""
+        mb_per_s = nbytes / (1024 * 1024) / seconds if seconds > 0 else 0.0
+        self.last_transfer = {'bytes': nbytes, 'seconds': seconds, 'mb_per_s': mb_per_s}
+        metrics = getattr(self.tcp_client, 'metrics', None)
+        if metrics is not None:
+            metrics.record_receive(nbytes)
+            metrics.record_acquisition(nbytes, seconds)
+        logger.info(f"接收 {nbytes} 字节，耗时 {seconds * 1e3:.1f} ms，{mb_per_s:.1f} MB/s")
+    
     def perform_single_test(self, test_num):
         """执行单次测试并返回数据，优化内存使用"""
+        data, error = self.acquire_raw(test_num)
+        if error:
+            return None, error
+        
+        try:
+            # 将数据解析为小端 uint32 (长度不是4的倍数时忽略尾部字节)
+            u32_values = self.decode_u32_frame(data)
+            if u32_values.size == 0:
+                return None, "未接收到有效数据"
+            
+            logger.info(f"测试 {test_num + 1}: 成功解析 {u32_values.size} 个32位数据点")
+            return u32_values, None
+            
+        except Exception as e:
+            return None, f"测试过程中发生错误: {str(e)}"
+    
+    def acquire_raw(self, test_num):
+        """
+        执行一次采样并接收原始字节流（不解析），供流水线的接收阶段使用
+        
+        Returns:
+            (接收缓冲区bytearray, None) 或 (None, 错误信息)
+        """
         if not self.is_connected():
             return None, "未连接到服务器"
         
@@ -147,62 +260,43 @@ class ADCSample:
             if 'ok' not in response.lower():
                 return None, f"采样失败: {response}"
             
-            # 接收采样数据 - 使用专门的二进制接收方法
-            success, data = self.receive_binary_data(max_retries=5)
+            # 接收采样数据 - 板卡支持时使用分帧接收，否则逐块接收直到结束标记
+            if self.receive_mode in ('length', 'header'):
+                success, data = self.receive_framed_data()
+            else:
+                t0 = time.perf_counter()
+                success, data = self.receive_binary_data(max_retries=5)
+                if success:
+                    self._record_transfer(len(data), time.perf_counter() - t0)
             if not success:
                 return None, f"数据接收失败: {data}"
             
             logger.info(f"测试 {test_num + 1}: 接收 {len(data)} 字节原始数据")
             
-            # 检查数据长度是否为4的倍数
-            if len(data) % 4 != 0:
-                # 截断到最近的4的倍数
-                data = data[:len(data) - (len(data) % 4)]
+            # 测试完成后再次清空TCP缓存
+            bytes_cleared = self.tcp_client.clear_receive_buffer()
+            if bytes_cleared > 0:
+                logger.debug(f"测试后清空了 {bytes_cleared} 字节的TCP缓存")
             
-            # 将数据解析为小端 uint32
-            num_values = len(data) // 4
-            if num_values == 0:
-                return None, "未接收到有效数据"
-            
-            try:
-                # 使用内存视图避免数据复制
-                data_view = memoryview(data)
-                u32_values = []
-                
-                # 分批处理数据以避免一次性分配大内存
-                batch_size = 1024 * 256  # 每批处理256KB数据
-                for i in range(0, len(data), batch_size):
-                    end_idx = min(i + batch_size, len(data))
-                    batch_data = data_view[i:end_idx]
-                    batch_num_values = len(batch_data) // 4
-                    
-                    if batch_num_values > 0:
-                        batch_u32 = struct.unpack('<' + 'I' * batch_num_values, batch_data)
-                        u32_values.extend(batch_u32)
-                    
-                    # 释放批次内存
-                    del batch_data, batch_u32
-                    gc.collect()
-                
-                logger.info(f"测试 {test_num + 1}: 成功解析 {num_values} 个32位数据点")
-                
-                # 释放大内存对象
-                del data, data_view
-                gc.collect()
-
-                # 测试完成后再次清空TCP缓存
-                bytes_cleared = self.tcp_client.clear_receive_buffer()
-                if bytes_cleared > 0:
-                    logger.debug(f"测试后清空了 {bytes_cleared} 字节的TCP缓存")
-                
-                return u32_values, None
-                
-            except struct.error as e:
-                return None, f"数据解析错误: {str(e)}"
+            return data, None
             
         except Exception as e:
             return None, f"测试过程中发生错误: {str(e)}"
     
+    @staticmethod
+    def decode_u32_frame(data) -> np.ndarray:
+        """
+        将接收缓冲区零拷贝解析为小端uint32数组视图
+        
+        Args:
+            data: bytes/bytearray/memoryview等支持缓冲区协议的对象
+            
+        Returns:
+            与data共享内存的np.uint32数组（bytearray输入时可写）
+        """
+        num_values = len(data) // 4
+        return np.frombuffer(data, dtype='<u4', count=num_values)
+    
     def perform_multiple_tests(self, test_count=10, delay_between_tests=0.1):
         """执行多次测试，优化内存使用"""
         if not self.is_connected():
@@ -230,9 +324,8 @@ class ADCSample:
                 else:
                     logger.error(f"测试 {i + 1} 保存失败: {message}")
                 
-                # 立即释放测试数据内存
+                # 释放测试数据引用
                 del u32_values
-                gc.collect()
                 
                 # 每次测试后短暂暂停
                 time.sleep(delay_between_tests)
@@ -255,50 +348,36 @@ class ADCSample:
         return successful_tests > 0, f"完成 {successful_tests}/{test_count} 次测试"
 
     def save_test_result(self, test_num, u32_values, filename=None, output_dir=None):
-        """保存测试结果到文件，优化内存使用"""
+        """
+        保存测试结果到文件：二进制(.bin + .json元数据)为主格式，CSV按save_csv可选输出
+        
+        filename可带.bin/.csv扩展名或不带扩展名，两种格式使用相同的文件名主干
+        """
         if filename is None:
-            filename = f'test_result_{test_num + 1:04d}.csv'
+            filename = f'test_result_{test_num + 1:04d}'
         if output_dir is None:
             output_dir = self.output_dir
+        stem = os.path.splitext(filename)[0]
         
-        # 保存CSV文件
-        csv_success, csv_message = self.file_manager.save_adc_csv_data(u32_values, filename, output_dir)
+        # 保存原始二进制数据
+        bin_success, bin_message = self.save_binary_data(u32_values, f'{stem}.bin', output_dir, test_num)
+        if not self.save_csv:
+            return bin_success, f"BIN: {bin_message}"
         
-        # 同时保存原始二进制数据
-        bin_filename = f'{filename.replace(".csv","")}.bin'
-        bin_success, bin_message = self.save_binary_data(u32_values, bin_filename, output_dir)
+        # 可选：同时保存CSV文件
+        csv_success, csv_message = self.file_manager.save_adc_csv_data(u32_values, f'{stem}.csv', output_dir)
         
-        return csv_success, f"CSV: {csv_message}, BIN: {bin_message}"
+        return bin_success and csv_success, f"BIN: {bin_message}, CSV: {csv_message}"
     
-    def save_binary_data(self, u32_values, filename, output_dir):
-        """保存原始二进制数据，优化内存使用"""
-        self.file_manager.ensure_dir_exists(output_dir)
-        filepath = os.path.join(output_dir, filename)
-        
-        try:
-            # 分批处理大数组以避免一次性分配大内存
-            batch_size = 1024 * 256  # 每批处理256KB数据
-            total_values = len(u32_values)
-            
-            with open(filepath, 'wb') as f:
-                for i in range(0, total_values, batch_size):
-                    end_idx = min(i + batch_size, total_values)
-                    batch_data = u32_values[i:end_idx]
-                    
-                    # 将uint32数组转换为字节数据
-                    binary_data = struct.pack('<' + 'I' * len(batch_data), *batch_data)
-                    f.write(binary_data)
-                    
-                    # 释放批次内存
-                    del batch_data, binary_data
-                    gc.collect()
-            
-            logger.info(f"二进制数据已保存到 {filepath}，共{total_values * 4}字节")
-            return True, f"二进制数据保存成功: {filepath}"
-            
-        except Exception as e:
-            logger.error(f"二进制数据保存失败: {str(e)}")
-            return False, f"二进制数据保存失败: {str(e)}"
+    def save_binary_data(self, u32_values, filename, output_dir, test_num=None):
+        """保存原始二进制数据（小端uint32）及元数据旁车文件"""
+        metadata = {
+            'server_ip': self.server_ip,
+            'server_port': self.server_port,
+        }
+        if test_num is not None:
+            metadata['test_num'] = test_num + 1
+        return self.file_manager.save_adc_binary_data(u32_values, filename, output_dir, metadata)
 
     def cleanup(self):
         """清理资源，释放内存"""
@@ -0,0 +1,321 @@
+# src/app/core/AcquisitionPipeline.py
+import os
+import time
+import queue
+import threading
+import logging
+from typing import Callable, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# 阶段之间传递的结束标记
+_STOP = object()
+
+
+class StageStats:
+    """单个流水线阶段的吞吐量计数器"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0          # 处理成功的条目数
+        self.errors = 0         # 处理失败的条目数
+        self.bytes = 0          # 处理的字节数
+        self.busy_time = 0.0    # 实际处理耗时(秒)
+        self.wait_time = 0.0    # 等待上游数据或下游队列空位的耗时(秒)
+        self._lock = threading.Lock()
+
+    def add(self, busy_time: float, nbytes: int = 0, ok: bool = True):
+        """记录一次处理"""
+        with self._lock:
+            if ok:
+                self.items += 1
+            else:
+                self.errors += 1
+            self.bytes += nbytes
+            self.busy_time += busy_time
+
+    def add_wait(self, wait_time: float):
+        """记录一次等待"""
+        with self._lock:
+            self.wait_time += wait_time
+
+    def snapshot(self, elapsed: float) -> Dict[str, Any]:
+        """
+        返回统计快照
+
+        Args:
+            elapsed: 流水线总运行时间(秒)，用于计算利用率
+        """
+        with self._lock:
+            busy = self.busy_time
+            return {
+                'items': self.items,
+                'errors': self.errors,
+                'bytes': self.bytes,
+                'busy_s': busy,
+                'wait_s': self.wait_time,
+                'items_per_s': self.items / busy if busy > 0 else 0.0,
+                'mb_per_s': self.bytes / (1024 * 1024) / busy if busy > 0 else 0.0,
+                'utilization': busy / elapsed if elapsed > 0 else 0.0,
+            }
+
+
+class AcquisitionPipeline:
+    """
+    ADC采集流水线：接收 → 解析 → 写盘 → (可选)实时分析
+
+    各阶段运行在独立线程中，通过有界队列连接。下游处理慢时上游put阻塞（反压），
+    从而保证内存占用有上限；网络接收和磁盘写入可以重叠进行。
+    回调函数在对应阶段的线程中调用，Qt中可直接在回调里emit信号。
+    """
+
+    def __init__(self, adc_sample, count: int, interval: float = 0.0,
+                 output_dir: Optional[str] = None, filename_prefix: str = 'adc_raw_data',
+                 save_raw_data: bool = True, queue_size: int = 4,
+                 analyze_func: Optional[Callable[[int, Any], None]] = None,
+                 on_progress: Optional[Callable[[int, int, str], None]] = None,
+                 on_saved: Optional[Callable[[str, str], None]] = None,
+                 on_error: Optional[Callable[[int, str], None]] = None):
+        """
+        Args:
+            adc_sample: ADCSample实例（需提供acquire_raw/decode_u32_frame/save_test_result）
+            count: 采集次数
+            interval: 两次采集之间的间隔(秒)
+            output_dir: 输出目录，默认使用adc_sample.output_dir
+            filename_prefix: 输出文件名前缀
+            save_raw_data: 是否启用写盘阶段
+            queue_size: 每个阶段输入队列的最大长度
+            analyze_func: 实时分析函数 f(索引, uint32数组)，为None时不启用分析阶段
+            on_progress: 进度回调 f(当前序号, 总数, 信息)
+            on_saved: 保存完成回调 f(文件路径, 信息)
+            on_error: 错误回调 f(索引, 错误信息)
+        """
+        self.adc_sample = adc_sample
+        self.count = count
+        self.interval = interval
+        self.output_dir = output_dir or adc_sample.output_dir
+        self.filename_prefix = filename_prefix
+        self.save_raw_data = save_raw_data
+        self.analyze_func = analyze_func
+        self.on_progress = on_progress
+        self.on_saved = on_saved
+        self.on_error = on_error
+
+        self.decode_queue = queue.Queue(maxsize=queue_size)
+        self.write_queue = queue.Queue(maxsize=queue_size) if save_raw_data else None
+        self.analysis_queue = queue.Queue(maxsize=queue_size) if analyze_func else None
+
+        self.stats = {name: StageStats(name) for name in ('receive', 'decode', 'write', 'analysis')}
+        self.saved_count = 0
+        self.decoded_count = 0
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._start_time = None
+        self._elapsed = 0.0
+
+    # ===== 控制 =====
+    def start(self):
+        """启动所有阶段线程"""
+        if self.save_raw_data:
+            self.adc_sample.file_manager.ensure_dir_exists(self.output_dir)
+
+        stages = [('receive', self._receive_stage), ('decode', self._decode_stage)]
+        if self.write_queue is not None:
+            stages.append(('write', self._write_stage))
+        if self.analysis_queue is not None:
+            stages.append(('analysis', self._analysis_stage))
+
+        self._start_time = time.perf_counter()
+        self._threads = [threading.Thread(target=target, name=f'acq-{name}', daemon=True)
+                         for name, target in stages]
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        """请求停止：不再发起新的采集，已接收的数据继续解析和保存"""
+        self._stop_event.set()
+
+    def join(self, timeout: Optional[float] = None):
+        """等待所有阶段结束"""
+        for t in self._threads:
+            t.join(timeout)
+        self._elapsed = time.perf_counter() - self._start_time
+
+    def run(self):
+        """
+        阻塞运行整个流水线
+
+        Returns:
+            (是否成功, 状态信息)
+        """
+        self.start()
+        self.join()
+
+        n_ok = self.saved_count if self.save_raw_data else self.decoded_count
+        logger.info("采集流水线统计:\n" + self.format_stats())
+        return n_ok > 0, f"完成 {n_ok}/{self.count} 次采样"
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    # ===== 统计 =====
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """返回各阶段统计信息"""
+        elapsed = self._elapsed or (time.perf_counter() - self._start_time if self._start_time else 0.0)
+        result = {name: s.snapshot(elapsed) for name, s in self.stats.items()}
+        result['total'] = {
+            'elapsed_s': elapsed,
+            'acquisitions_per_s': self.stats['receive'].items / elapsed if elapsed > 0 else 0.0,
+            'bottleneck': max(self.stats.values(), key=lambda s: s.busy_time).name,
+        }
+        return result
+
+    def format_stats(self) -> str:
+        """格式化统计信息，便于日志输出"""
+        stats = self.get_stats()
+        lines = []
+        for name in ('receive', 'decode', 'write', 'analysis'):
+            s = stats[name]
+            if s['items'] == 0 and s['errors'] == 0:
+                continue
+            lines.append(f"  {name:<8s} 条目:{s['items']:5d} 失败:{s['errors']:3d} "
+                         f"处理:{s['busy_s']:7.3f}s 等待:{s['wait_s']:7.3f}s "
+                         f"{s['items_per_s']:8.1f}/s {s['mb_per_s']:8.1f}MB/s 利用率:{s['utilization'] * 100:5.1f}%")
+        total = stats['total']
+        lines.append(f"  总耗时:{total['elapsed_s']:.3f}s 采集速率:{total['acquisitions_per_s']:.2f}/s "
+                     f"瓶颈阶段:{total['bottleneck']}")
+        return "\n".join(lines)
+
+    # ===== 队列辅助 =====
+    def _put(self, q: queue.Queue, item, stage: str):
+        """带反压的put，记录等待时间"""
+        t0 = time.perf_counter()
+        q.put(item)
+        self.stats[stage].add_wait(time.perf_counter() - t0)
+
+    def _get(self, q: queue.Queue, stage: str):
+        """阻塞get，记录等待时间"""
+        t0 = time.perf_counter()
+        item = q.get()
+        self.stats[stage].add_wait(time.perf_counter() - t0)
+        return item
+
+    def _report_error(self, index: int, message: str):
+        logger.error(f"采样 {index + 1} 失败: {message}")
+        if self.on_error:
+            try:
+                self.on_error(index, message)
+            except Exception as e:
+                # 回调异常不能让阶段线程退出，否则上游会因队列满而永久阻塞
+                logger.error(f"错误回调失败: {str(e)}")
+
+    # ===== 各阶段 =====
+    def _receive_stage(self):
+        """接收阶段：发送sample指令并接收原始字节流"""
+        stats = self.stats['receive']
+        try:
+            for i in range(self.count):
+                if self._stop_event.is_set():
+                    break
+                if self.on_progress:
+                    try:
+                        self.on_progress(i + 1, self.count, f"采样 {i + 1}/{self.count}")
+                    except Exception as e:
+                        logger.error(f"进度回调失败: {str(e)}")
+
+                t0 = time.perf_counter()
+                try:
+                    raw, error = self.adc_sample.acquire_raw(i)
+                except Exception as e:
+                    raw, error = None, f"接收过程中发生错误: {str(e)}"
+                stats.add(time.perf_counter() - t0, len(raw) if raw else 0, ok=error is None)
+
+                if error:
+                    self._report_error(i, error)
+                else:
+                    self._put(self.decode_queue, (i, raw), 'receive')
+
+                if self.interval > 0 and i + 1 < self.count:
+                    # 可被stop()打断的等待
+                    self._stop_event.wait(self.interval)
+        finally:
+            self.decode_queue.put(_STOP)
+
+    def _decode_stage(self):
+        """解析阶段：原始字节流零拷贝解析为uint32数组，分发给写盘和分析阶段"""
+        stats = self.stats['decode']
+        try:
+            while True:
+                item = self._get(self.decode_queue, 'decode')
+                if item is _STOP:
+                    break
+                i, raw = item
+
+                t0 = time.perf_counter()
+                try:
+                    u32_values = self.adc_sample.decode_u32_frame(raw)
+                    error = None if u32_values.size > 0 else "未接收到有效数据"
+                except Exception as e:
+                    # 单帧解析失败只丢弃该帧，继续消费队列
+                    error = f"数据解析失败: {str(e)}"
+                stats.add(time.perf_counter() - t0, len(raw), ok=error is None)
+                if error:
+                    self._report_error(i, error)
+                    continue
+                self.decoded_count += 1
+
+                if self.write_queue is not None:
+                    self._put(self.write_queue, (i, u32_values), 'decode')
+                if self.analysis_queue is not None:
+                    self._put(self.analysis_queue, (i, u32_values), 'decode')
+        finally:
+            for q in (self.write_queue, self.analysis_queue):
+                if q is not None:
+                    q.put(_STOP)
+
+    def _write_stage(self):
+        """写盘阶段：保存二进制(及可选CSV)文件"""
+        stats = self.stats['write']
+        while True:
+            item = self._get(self.write_queue, 'write')
+            if item is _STOP:
+                break
+            i, u32_values = item
+
+            filename = f'{self.filename_prefix}_{i + 1:04d}.bin'
+            t0 = time.perf_counter()
+            try:
+                success, message = self.adc_sample.save_test_result(i, u32_values, filename, self.output_dir)
+            except Exception as e:
+                success, message = False, str(e)
+            stats.add(time.perf_counter() - t0, u32_values.nbytes, ok=success)
+
+            if success:
+                self.saved_count += 1
+                if self.on_saved:
+                    try:
+                        self.on_saved(os.path.join(self.output_dir, filename), f"数据已保存: {filename}")
+                    except Exception as e:
+                        # 回调异常不能让写盘线程退出，否则上游会因队列满而永久阻塞
+                        logger.error(f"保存回调失败: {str(e)}")
+            else:
+                self._report_error(i, f"数据保存失败: {message}")
+
+    def _analysis_stage(self):
+        """实时分析阶段：调用analyze_func，异常不影响采集"""
+        stats = self.stats['analysis']
+        while True:
+            item = self._get(self.analysis_queue, 'analysis')
+            if item is _STOP:
+                break
+            i, u32_values = item
+
+            t0 = time.perf_counter()
+            try:
+                self.analyze_func(i, u32_values)
+                ok = True
+            except Exception as e:
+                ok = False
+                logger.error(f"采样 {i + 1} 实时分析失败: {str(e)}")
+            stats.add(time.perf_counter() - t0, u32_values.nbytes, ok=ok)
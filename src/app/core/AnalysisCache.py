@@ -0,0 +1,258 @@
+# src/app/core/AnalysisCache.py
+import os
+import json
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+# 每个阶段的结果取决于的AnalysisConfig字段（后一阶段包含前一阶段的字段）
+SEGMENT_FIELDS = (
+    'clock_freq', 'trigger_freq', 'n_points', 'start_index', 'use_signed18', 'skip_first_value',
+    'edge_search_start', 'search_method', 'min_edge_amplitude_ratio', 'fft_edge_bandwidth_hz', 'fold_periods',
+)
+RESULT_FIELDS = SEGMENT_FIELDS + (
+    'roi_start_tenths', 'roi_end_tenths', 'diff_points', 'average_points', 'cal_mode',
+    'min_second_rise_ratio', 'min_second_fall_ratio',
+)
+STAGE_FIELDS = {'segment': SEGMENT_FIELDS, 'result': RESULT_FIELDS}
+
+# 结果阶段保存的数组（y_roi由y_full切片得到）和标量（边沿位置为None时存-1）
+RESULT_ARRAYS = ('y_full', 'mag_linear', 'y_full_diff', 'y_diff', 'mag_linear_d', 'Xd_norm', 'freq', 'freq_d')
+EDGE_KEYS = ('rise_pos', 'second_rise_pos', 'fall_pos')
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> bytes:
+    """原始数据文件内容的blake2b摘要"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.digest()
+
+
+def write_entry(path: str, arrays: Dict[str, Any]):
+    """
+    写入一个缓存条目：8字节头长度 + JSON头(名称/类型/形状/偏移) + 各数组的原始字节（8字节对齐）
+
+    与npz相比读取时不经过zip解析，一次read后用frombuffer直接得到数组
+    """
+    arrays = {name: np.asarray(value, order='C') for name, value in arrays.items()}
+    fields, offset = [], 0
+    for name, value in arrays.items():
+        fields.append([name, value.dtype.str, list(value.shape), offset])
+        offset += (value.nbytes + 7) // 8 * 8
+    header = json.dumps(fields).encode('utf-8')
+    header += b' ' * (-len(header) % 8)
+    with open(path, 'wb') as f:
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        for value in arrays.values():
+            f.write(value.tobytes())
+            f.write(b'\0' * (-value.nbytes % 8))
+
+
+def read_entry(path: str) -> Dict[str, np.ndarray]:
+    """读取write_entry写入的条目，数组为只读视图"""
+    with open(path, 'rb') as f:
+        buf = f.read()
+    header_len = int.from_bytes(buf[:8], 'little')
+    base = 8 + header_len
+    entry = {}
+    for name, dtype, shape, offset in json.loads(buf[8:base]):
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape, dtype=np.int64))
+        entry[name] = np.frombuffer(buf, dtype=dtype, count=count, offset=base + offset).reshape(tuple(shape))
+    return entry
+
+
+def config_digest(config, fields) -> bytes:
+    """配置中指定字段的摘要"""
+    values = {name: getattr(config, name, None) for name in fields}
+    payload = json.dumps([CACHE_VERSION, values], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+
+class AnalysisCache:
+    """
+    逐文件分析结果的磁盘缓存（内容寻址）
+
+    键为 原始文件内容摘要 + 阶段 + 该阶段相关配置字段的摘要，因此文件内容或相关配置改变后自动失效，
+    只改动后一阶段的配置（如ROI、差分点数）时仍可复用前一阶段（对齐后的y_full）。
+    每个条目保存为一个文件（write_entry格式，先写临时文件再替换，多进程同时写入安全），
+    总大小超过max_bytes时按最近使用时间(LRU)删除最旧的条目。
+    文件摘要按 (路径, 大小, 修改时间) 在内存中缓存，同一文件不重复读取。
+    """
+
+    SUFFIX = '.entry'
+
+    def __init__(self, cache_dir: str, max_bytes: int = 1 << 30):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存总大小上限（字节）
+        """
+        self.cache_dir = str(cache_dir)
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Optional["OrderedDict[str, int]"] = None   # 键 -> 文件大小，按使用时间排序
+        self._total_bytes = 0
+        self._digests: Dict[Tuple[str, int, int], bytes] = {}
+
+    # ===== 键 =====
+    def source_digest(self, path: str) -> bytes:
+        """原始文件摘要（文件大小和修改时间不变时直接使用内存中的结果）"""
+        st = os.stat(path)
+        memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        digest = self._digests.get(memo_key)
+        if digest is None:
+            digest = file_digest(path)
+            self._digests[memo_key] = digest
+        return digest
+
+    def key(self, source: bytes, stage: str, config) -> str:
+        """由文件摘要、阶段和相关配置字段计算缓存键"""
+        h = hashlib.blake2b(source, digest_size=20)
+        h.update(stage.encode('ascii'))
+        h.update(config_digest(config, STAGE_FIELDS[stage]))
+        return h.hexdigest()
+
+    # ===== 索引 =====
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def _load_index(self):
+        """首次使用时扫描缓存目录，按修改时间建立LRU顺序"""
+        if self._entries is not None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(self.SUFFIX):
+                st = entry.stat()
+                found.append((st.st_mtime_ns, entry.name[:-len(self.SUFFIX)], st.st_size))
+        self._entries = OrderedDict((key, size) for _, key, size in sorted(found))
+        self._total_bytes = sum(self._entries.values())
+
+    def _forget(self, key: str):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, _ = next(iter(self._entries.items()))
+            self._forget(key)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    # ===== 读写 =====
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取一个条目，不存在或损坏时返回None"""
+        with self._lock:
+            self._load_index()
+            path = self._path(key)
+            if key not in self._entries and not os.path.exists(path):
+                self.misses += 1
+                return None
+            try:
+                entry = read_entry(path)
+                os.utime(path)
+            except FileNotFoundError:
+                # 已被其它进程淘汰
+                self._forget(key)
+                self.misses += 1
+                return None
+            except Exception as e:
+                logger.warning(f"分析缓存条目读取失败，已丢弃: {key}: {e}")
+                self._forget(key)
+                self.misses += 1
+                return None
+            if key not in self._entries:
+                # 由其它进程写入的条目
+                self._entries[key] = os.path.getsize(path)
+                self._total_bytes += self._entries[key]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, arrays: Dict[str, Any]):
+        """写入一个条目（数组或标量），超出容量时删除最久未使用的条目"""
+        with self._lock:
+            self._load_index()
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                write_entry(tmp_path, arrays)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                logger.warning(f"分析缓存写入失败: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return
+            self._forget(key)
+            self._entries[key] = os.path.getsize(path)
+            self._total_bytes += self._entries[key]
+            self._evict()
+
+    def clear(self):
+        """删除所有缓存条目"""
+        with self._lock:
+            self._load_index()
+            for key in list(self._entries):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._entries.clear()
+            self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._load_index()
+            return self._total_bytes
+
+    # ===== 分析结果的打包 =====
+    @staticmethod
+    def pack_segment(basic_result: Dict[str, Any]) -> Dict[str, Any]:
+        """extract_basic_segment结果中可以复用的部分"""
+        return {
+            'y_full': basic_result['y_full'],
+            'adc_full_mean': basic_result['adc_full_mean'],
+            'n_averages': basic_result['n_averages'],
+        }
+
+    @staticmethod
+    def pack_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """process_single_file结果中累加和作图需要的部分（不含data_dict中的整帧数据）"""
+        packed = {name: result[name] for name in RESULT_ARRAYS}
+        data_dict = result.get('data_dict') or {}
+        for name in EDGE_KEYS:
+            value = data_dict.get(name)
+            packed[name] = -1 if value is None else int(value)
+        packed['n_averages'] = result.get('n_averages', 1)
+        return packed
+
+    @staticmethod
+    def unpack_result(entry: Dict[str, Any], roi_start: int, roi_end: int) -> Dict[str, Any]:
+        """由缓存条目恢复与process_single_file相同键的结果字典（data_dict只含边沿位置和曲线）"""
+        result = {name: entry[name] for name in RESULT_ARRAYS}
+        result['y_roi'] = result['y_full'][roi_start:roi_end]
+        result['n_averages'] = int(entry['n_averages'])
+        data_dict = {name: (int(entry[name]) if int(entry[name]) >= 0 else None) for name in EDGE_KEYS}
+        data_dict.update({'y_full': result['y_full'], 'y_roi': result['y_roi'],
+                          'n_averages': result['n_averages']})
+        result['data_dict'] = data_dict
+        return result
@@ -0,0 +1,257 @@
+# src/app/core/AsyncTcpClient.py
+import asyncio
+import socket
+import threading
+import logging
+from collections import deque
+from typing import List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTcpClient:
+    """
+    基于asyncio的文本命令客户端，支持请求流水线
+
+    后台读协程用readuntil按行切分响应，并按发送顺序依次交给等待中的请求
+    （板卡/仪表按收到命令的顺序应答），因此多条查询可以同时在途。
+    没有对应请求的响应行（先send后receive的旧用法）放入未认领队列，由receive()取走。
+    
+    注意：query只能用于有应答的命令；无应答的命令（如lmk_state）请用send，
+    否则后续响应会与请求错位。
+    """
+
+    def __init__(self, line_terminator: bytes = b'\n', encoding: str = 'utf-8'):
+        self.line_terminator = line_terminator
+        self.encoding = encoding
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.connected = False
+        self.last_error = None
+        self.server_ip = '192.168.1.10'
+        self.server_port = 15000
+        self._pending = deque()          # 等待响应的Future，按发送顺序排列
+        self._unclaimed = None           # 未认领的响应行
+        self._reader_task = None
+
+    async def connect(self, ip: str, port: int, timeout: float = 3) -> Tuple[bool, str]:
+        """建立连接并启动后台读协程"""
+        self.server_ip = ip
+        self.server_port = port
+        await self.close()
+        try:
+            self.reader, self.writer = await asyncio.wait_for(asyncio.open_connection(ip, int(port)), timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            self.last_error = str(e) or "连接超时"
+            return False, f"连接失败: {self.last_error}"
+        sock = self.writer.get_extra_info('socket')
+        if sock is not None:
+            # 流水线中多条短命令连续写出，关闭Nagle避免等待对端确认
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._unclaimed = asyncio.Queue()
+        self._reader_task = asyncio.ensure_future(self._read_loop())
+        self.connected = True
+        self.last_error = None
+        return True, "连接成功"
+
+    async def close(self):
+        """关闭连接，未完成的请求以ConnectionError结束"""
+        self.connected = False
+        if self._reader_task:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader_task = None
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+            self.writer = None
+            self.reader = None
+        self._fail_pending(ConnectionError("连接已关闭"))
+
+    def _fail_pending(self, exc: Exception):
+        while self._pending:
+            fut = self._pending.popleft()
+            if not fut.done():
+                fut.set_exception(exc)
+
+    async def _read_loop(self):
+        """后台读协程：逐行读取响应并按顺序分发"""
+        try:
+            while True:
+                try:
+                    line = await self.reader.readuntil(self.line_terminator)
+                except asyncio.IncompleteReadError as e:
+                    if e.partial:
+                        self._dispatch(e.partial)
+                    raise ConnectionError("连接被对端关闭")
+                except asyncio.LimitOverrunError as e:
+                    # 超长行按缓冲区上限截断，避免读协程卡死
+                    line = await self.reader.read(e.consumed)
+                self._dispatch(line)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.connected = False
+            self.last_error = str(e)
+            self._fail_pending(e if isinstance(e, ConnectionError) else ConnectionError(str(e)))
+
+    def _dispatch(self, line: bytes):
+        text = line.decode(self.encoding, errors='ignore').strip()
+        if self._pending:
+            fut = self._pending.popleft()
+            # 已超时取消的请求仍占据队列中的位置，其迟到的响应在这里被丢弃
+            if not fut.done():
+                fut.set_result(text)
+            return
+        self._unclaimed.put_nowait(text)
+
+    def _write(self, msg: str):
+        if not self.connected or not self.writer:
+            raise ConnectionError("未连接")
+        self.writer.write(msg.encode(self.encoding))
+
+    async def send(self, msg: str) -> Tuple[bool, str]:
+        """只发送不等待响应（响应可随后用receive()读取）"""
+        try:
+            self._write(msg)
+            await self.writer.drain()
+            return True, "发送成功"
+        except (OSError, ConnectionError) as e:
+            self.last_error = str(e)
+            return False, f"发送失败: {e}"
+
+    async def receive(self, timeout: float = 1.0) -> Tuple[bool, str]:
+        """读取一条未被查询认领的响应行"""
+        if self._unclaimed is None:
+            return False, "未连接"
+        try:
+            return True, await asyncio.wait_for(self._unclaimed.get(), timeout)
+        except asyncio.TimeoutError:
+            self.last_error = f"接收超时 ({timeout:.1f}s)"
+            return False, f"接收失败: {self.last_error}"
+
+    async def query(self, msg: str, timeout: float = 1.0) -> Tuple[bool, str]:
+        """发送一条命令并等待其响应（超时只影响本条命令）"""
+        results = await self.query_many([msg], timeout)
+        return results[0]
+
+    async def query_many(self, msgs: Sequence[str], timeout: float = 1.0) -> List[Tuple[bool, str]]:
+        """
+        流水线查询：一次写出所有命令，再按顺序等待各自的响应
+
+        Args:
+            msgs: 命令列表（需自带结束符，与TcpClient用法一致）
+            timeout: 每条命令的超时时间(秒)，从写出时开始计算
+
+        Returns:
+            与msgs等长的(是否成功, 响应或错误信息)列表
+        """
+        loop = asyncio.get_running_loop()
+        futures = []
+        try:
+            for msg in msgs:
+                fut = loop.create_future()
+                self._pending.append(fut)
+                futures.append(fut)
+            # 合并为一次写出，避免首条命令单独成包
+            self._write("".join(msgs))
+            await self.writer.drain()
+        except (OSError, ConnectionError) as e:
+            self.last_error = str(e)
+            # 命令没有写出，不会有对应的响应：从队列中移除，避免占位吞掉之后请求的响应
+            for fut in futures:
+                fut.cancel()
+                try:
+                    self._pending.remove(fut)
+                except ValueError:
+                    pass
+            return [(False, f"发送失败: {e}")] * len(msgs)
+
+        deadline = loop.time() + timeout
+        results = []
+        for msg, fut in zip(msgs, futures):
+            try:
+                results.append((True, await asyncio.wait_for(fut, max(0.0, deadline - loop.time()))))
+            except asyncio.TimeoutError:
+                self.last_error = f"命令 {msg.strip()} 响应超时"
+                results.append((False, f"接收失败: {self.last_error}"))
+            except ConnectionError as e:
+                results.append((False, f"接收失败: {e}"))
+        return results
+
+
+class PipelinedTcpClient:
+    """
+    AsyncTcpClient的同步外观，接口与TcpClient一致（connect/send/receive/close），
+    事件循环运行在后台线程中，另外提供query/query_many流水线查询。
+    """
+
+    def __init__(self):
+        self._client = AsyncTcpClient()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='async-tcp', daemon=True)
+        self._thread.start()
+        self.sock = None  # 二进制逐块接收仍需使用TcpClient
+
+    def _run(self, coro, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    @property
+    def connected(self) -> bool:
+        return self._client.connected
+
+    @property
+    def last_error(self):
+        return self._client.last_error
+
+    @property
+    def server_ip(self):
+        return self._client.server_ip
+
+    @property
+    def server_port(self):
+        return self._client.server_port
+
+    def connect(self, ip, port, timeout=3):
+        return self._run(self._client.connect(ip, port, timeout))
+
+    def send(self, msg, max_retries=3, base_timeout=1.0):
+        """与TcpClient.send参数兼容；写出由事件循环完成，不需要重试"""
+        return self._run(self._client.send(msg))
+
+    def receive(self, bufsize=4096, max_retries=3, base_timeout=1.0):
+        """与TcpClient.receive参数兼容，总超时为base_timeout * max_retries"""
+        return self._run(self._client.receive(base_timeout * max(1, max_retries)))
+
+    def query(self, msg, timeout=1.0):
+        return self._run(self._client.query(msg, timeout))
+
+    def query_many(self, msgs, timeout=1.0):
+        return self._run(self._client.query_many(list(msgs), timeout))
+
+    def clear_receive_buffer(self):
+        """丢弃所有未认领的响应行，返回丢弃的字节数"""
+        async def drain():
+            n = 0
+            queue = self._client._unclaimed
+            while queue is not None and not queue.empty():
+                n += len(queue.get_nowait())
+            return n
+        return self._run(drain())
+
+    def close(self):
+        if self._loop.is_running():
+            self._run(self._client.close())
+
+    def shutdown(self):
+        """关闭连接并停止后台事件循环"""
+        self.close()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(1.0)
+        self._loop.close()
@@ -0,0 +1,210 @@
+# src/app/core/BoardPool.py
+import os
+import time
+import threading
+import logging
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+
+try:
+    from .TcpClient import TcpClient
+    from .ADCSample import ADCSample
+    from .FileManager import FileManager
+    from .AcquisitionPipeline import AcquisitionPipeline
+except ImportError:
+    from TcpClient import TcpClient
+    from ADCSample import ADCSample
+    from FileManager import FileManager
+    from AcquisitionPipeline import AcquisitionPipeline
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BoardSpec:
+    """单块TDR板卡的连接信息"""
+    name: str
+    ip: str
+    port: int = 15000
+
+
+class BoardPool:
+    """
+    多板卡连接池：每块板卡独占一个TcpClient/ADCSample，采集在线程池中并发执行
+
+    每块板卡的数据保存在 输出目录/<板卡名> 下，所有板卡的结果合并为一份运行记录(run_record.json)。
+    网络接收和磁盘写入都会释放GIL，因此总吞吐量随板卡数量近似线性增长。
+    """
+
+    def __init__(self, boards: Sequence[Union[BoardSpec, Tuple[str, int]]], file_manager=None):
+        """
+        Args:
+            boards: BoardSpec列表，或(ip, port)元组列表（自动命名为board1、board2...）
+            file_manager: FileManager实例，用于保存运行记录
+        """
+        self.boards: List[BoardSpec] = [
+            b if isinstance(b, BoardSpec) else BoardSpec(f'board{i + 1}', b[0], int(b[1]))
+            for i, b in enumerate(boards)
+        ]
+        names = [b.name for b in self.boards]
+        if len(set(names)) != len(names):
+            raise ValueError(f"板卡名称重复: {names}")
+
+        self.file_manager = file_manager or FileManager()
+        self.clients: Dict[str, TcpClient] = {}
+        self.samplers: Dict[str, ADCSample] = {}
+        self._pipelines: Dict[str, AcquisitionPipeline] = {}
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    # ===== 连接管理 =====
+    def connect_all(self, timeout: float = 3) -> Tuple[bool, str]:
+        """
+        并发连接所有板卡
+
+        Returns:
+            (是否全部连接成功, 状态信息)
+        """
+        def connect(board: BoardSpec):
+            client = TcpClient()
+            success, message = client.connect(board.ip, board.port, timeout)
+            return board, client, success, message
+
+        failures = []
+        with ThreadPoolExecutor(max_workers=max(1, len(self.boards))) as executor:
+            for board, client, success, message in executor.map(connect, self.boards):
+                if success:
+                    self.clients[board.name] = client
+                    self.samplers[board.name] = ADCSample(client, self.file_manager)
+                    logger.info(f"板卡 {board.name} ({board.ip}:{board.port}) 连接成功")
+                else:
+                    failures.append(f"{board.name}: {message}")
+                    logger.error(f"板卡 {board.name} ({board.ip}:{board.port}) {message}")
+
+        if failures:
+            return False, f"{len(failures)}/{len(self.boards)} 块板卡连接失败: {'; '.join(failures)}"
+        return True, f"已连接 {len(self.boards)} 块板卡"
+
+    def close_all(self):
+        """断开所有板卡"""
+        for client in self.clients.values():
+            client.close()
+        self.clients.clear()
+        self.samplers.clear()
+
+    def connected_boards(self) -> List[BoardSpec]:
+        """返回已连接的板卡"""
+        return [b for b in self.boards if b.name in self.clients and self.clients[b.name].connected]
+
+    def __enter__(self):
+        self.connect_all()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close_all()
+
+    # ===== 并发采集 =====
+    def acquire(self, count: int, output_dir: str, interval: float = 0.0,
+                filename_prefix: str = 'adc_raw_data', receive_mode: str = 'stream',
+                save_csv: bool = False, save_record: bool = True) -> Dict[str, Any]:
+        """
+        所有已连接板卡并发执行count次采集
+
+        Args:
+            count: 每块板卡的采集次数
+            output_dir: 输出根目录，各板卡写入其下的同名子目录
+            interval: 每块板卡两次采集之间的间隔(秒)
+            filename_prefix: 文件名前缀
+            receive_mode: ADCSample接收模式('stream'/'length'/'header')
+            save_csv: 是否额外输出CSV
+            save_record: 是否将合并的运行记录写入 output_dir/run_record.json
+
+        Returns:
+            合并的运行记录字典
+        """
+        boards = self.connected_boards()
+        if not boards:
+            raise RuntimeError("没有已连接的板卡")
+
+        self._stopped = False
+        start = datetime.now()
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(boards)) as executor:
+            futures = {
+                b.name: executor.submit(self._acquire_board, b, count, output_dir, interval,
+                                        filename_prefix, receive_mode, save_csv)
+                for b in boards
+            }
+            board_records = {name: f.result() for name, f in futures.items()}
+        elapsed = time.perf_counter() - t0
+
+        total_acq = sum(r['saved'] for r in board_records.values())
+        total_bytes = sum(r['stats']['receive']['bytes'] for r in board_records.values())
+        record = {
+            'start_time': start.strftime("%Y-%m-%d %H:%M:%S.%f"),
+            'elapsed_s': elapsed,
+            'count_per_board': count,
+            'n_boards': len(boards),
+            'total_acquisitions': total_acq,
+            'acquisitions_per_s': total_acq / elapsed if elapsed > 0 else 0.0,
+            'mb_per_s': total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+            'stopped': self._stopped,
+            'boards': board_records,
+        }
+
+        if save_record:
+            self.file_manager.ensure_dir_exists(output_dir)
+            record_path = os.path.join(output_dir, 'run_record.json')
+            self.file_manager.save_json_data(record, record_path)
+            record['record_path'] = record_path
+
+        logger.info(f"多板卡采集完成: {len(boards)} 块板卡，共 {total_acq} 次采集，"
+                    f"耗时 {elapsed:.2f}s，{record['acquisitions_per_s']:.2f} 次/s，{record['mb_per_s']:.1f} MB/s")
+        return record
+
+    def _acquire_board(self, board: BoardSpec, count: int, output_dir: str, interval: float,
+                       filename_prefix: str, receive_mode: str, save_csv: bool) -> Dict[str, Any]:
+        """单块板卡的采集任务（在线程池中运行）"""
+        adc = self.samplers[board.name]
+        adc.receive_mode = receive_mode
+        adc.save_csv = save_csv
+        board_dir = os.path.join(output_dir, board.name)
+
+        errors = []
+        pipeline = AcquisitionPipeline(
+            adc, count, interval,
+            output_dir=board_dir,
+            filename_prefix=filename_prefix,
+            on_error=lambda i, msg: errors.append({'index': i + 1, 'error': msg}),
+        )
+        with self._lock:
+            self._pipelines[board.name] = pipeline
+            if self._stopped:
+                pipeline.stop()
+
+        try:
+            success, message = pipeline.run()
+        except Exception as e:
+            success, message = False, f"采集过程中发生错误: {str(e)}"
+        finally:
+            with self._lock:
+                self._pipelines.pop(board.name, None)
+
+        return {
+            **asdict(board),
+            'output_dir': board_dir,
+            'success': success,
+            'message': message,
+            'saved': pipeline.saved_count,
+            'errors': errors,
+            'stats': pipeline.get_stats(),
+        }
+
+    def stop(self):
+        """停止所有板卡的采集（已接收的数据继续保存）"""
+        with self._lock:
+            self._stopped = True
+            for pipeline in self._pipelines.values():
+                pipeline.stop()
@@ -0,0 +1,323 @@
+# src/app/core/CalibrationStore.py
+import os
+import json
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .VNACalibration import VNACalibration
+except ImportError:
+    from VNACalibration import VNACalibration
+
+logger = logging.getLogger(__name__)
+
+# 12项误差系数在堆叠数组中的行顺序
+TERM_NAMES = VNACalibration.FORWARD_TERMS + VNACalibration.REVERSE_TERMS
+
+# 插值索引缓存: (校准频率轴摘要, DUT频率轴摘要) -> (左端索引, 右端权重)
+_INTERP_CACHE: "OrderedDict[Tuple[bytes, bytes], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+_INTERP_CACHE_SIZE = 32
+_interp_lock = threading.Lock()
+
+
+def grid_key(freqs: np.ndarray) -> bytes:
+    """频率轴摘要，作为缓存键"""
+    return hashlib.blake2b(np.ascontiguousarray(freqs, dtype=np.float64).tobytes(), digest_size=16).digest()
+
+
+def interpolation_indices(cal_freqs: np.ndarray, dut_freqs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算DUT频点在校准频率轴上的线性插值索引和权重（按频率轴对缓存）
+
+    Returns:
+        (左端索引 i0, 权重 w)，插值结果为 c[..., i0] * (1 - w) + c[..., i0 + 1] * w
+
+    Raises:
+        ValueError: DUT频点超出校准频率范围
+    """
+    key = (grid_key(cal_freqs), grid_key(dut_freqs))
+    with _interp_lock:
+        cached = _INTERP_CACHE.get(key)
+        if cached is not None:
+            _INTERP_CACHE.move_to_end(key)
+            return cached
+
+    cal_freqs = np.asarray(cal_freqs, dtype=np.float64)
+    dut_freqs = np.asarray(dut_freqs, dtype=np.float64)
+    # 允许浮点误差范围内的端点
+    tol = 1e-9 * max(abs(cal_freqs[0]), abs(cal_freqs[-1]), 1.0)
+    if dut_freqs.min() < cal_freqs[0] - tol or dut_freqs.max() > cal_freqs[-1] + tol:
+        raise ValueError(f"DUT频率范围 {dut_freqs.min()}~{dut_freqs.max()} 超出校准频率范围 "
+                         f"{cal_freqs[0]}~{cal_freqs[-1]}")
+
+    if len(cal_freqs) == 1:
+        i0 = np.zeros(len(dut_freqs), dtype=np.intp)
+        w = np.zeros(len(dut_freqs))
+    else:
+        i0 = np.clip(np.searchsorted(cal_freqs, dut_freqs, side='right') - 1, 0, len(cal_freqs) - 2)
+        w = np.clip((dut_freqs - cal_freqs[i0]) / (cal_freqs[i0 + 1] - cal_freqs[i0]), 0.0, 1.0)
+    i0.setflags(write=False)
+    w.setflags(write=False)
+
+    with _interp_lock:
+        _INTERP_CACHE[key] = (i0, w)
+        if len(_INTERP_CACHE) > _INTERP_CACHE_SIZE:
+            _INTERP_CACHE.popitem(last=False)
+    return i0, w
+
+
+class StoredCalibration:
+    """从校准库加载的一份校准：频率轴、12项误差系数和元数据"""
+
+    RESAMPLED_CACHE_SIZE = 8  # 插值到DUT频率轴的系数最多缓存的频率轴个数
+
+    def __init__(self, cal_id: str, freqs: np.ndarray, terms: np.ndarray, metadata: Dict[str, Any]):
+        """
+        Args:
+            cal_id: 校准ID
+            freqs: 校准频率轴 (MHz)，递增
+            terms: 堆叠的误差系数 [12, n_freq]，行顺序见TERM_NAMES
+            metadata: 元数据
+        """
+        self.cal_id = cal_id
+        self.freqs = freqs
+        self.terms = terms
+        self.metadata = metadata
+        self._grid_key = grid_key(freqs)
+        self._resampled: "OrderedDict[bytes, Dict[str, np.ndarray]]" = OrderedDict()
+
+    @property
+    def coefficients(self) -> Dict[str, np.ndarray]:
+        """校准频率轴上的误差系数字典（与VNACalibration.calibration_coeffs格式相同）"""
+        return dict(zip(TERM_NAMES, self.terms))
+
+    def coefficients_at(self, dut_freqs: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        误差系数插值到DUT频率轴（实部/虚部分别线性插值），最近使用的RESAMPLED_CACHE_SIZE个频率轴只计算一次
+
+        Args:
+            dut_freqs: DUT频率轴 (MHz)，为None时返回校准频率轴上的系数
+        """
+        if dut_freqs is None:
+            return self.coefficients
+        dut_freqs = np.asarray(dut_freqs, dtype=np.float64)
+        key = grid_key(dut_freqs)
+        coeffs = self._resampled.get(key)
+        if coeffs is not None:
+            self._resampled.move_to_end(key)
+            return coeffs
+        if key == self._grid_key:
+            coeffs = self.coefficients
+        else:
+            i0, w = interpolation_indices(self.freqs, dut_freqs)
+            terms = self.terms[:, i0] * (1 - w) + self.terms[:, np.minimum(i0 + 1, len(self.freqs) - 1)] * w
+            coeffs = dict(zip(TERM_NAMES, terms))
+        self._resampled[key] = coeffs
+        if len(self._resampled) > self.RESAMPLED_CACHE_SIZE:
+            self._resampled.popitem(last=False)
+        return coeffs
+
+    def apply(self, measurements: Dict[str, np.ndarray], dut_freqs: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        用本校准修正原始S参数，不需要重新测量标准件或重新计算误差项
+
+        Args:
+            measurements: 原始S参数 {'S11','S21','S12','S22'}，形状 [n_freq] 或 [n_meas, n_freq]
+            dut_freqs: 测量的频率轴 (MHz)，为None时要求与校准频率轴相同
+        """
+        coeffs = self.coefficients_at(dut_freqs)
+        n_points = len(coeffs['EDF'])
+        raw = {}
+        for name in ('S11', 'S21', 'S12', 'S22'):
+            raw[name] = np.asarray(measurements[name], dtype=complex)
+            if raw[name].shape[-1] != n_points:
+                raise ValueError(f"{name} 频点数 {raw[name].shape[-1]} 与校准系数频点数 {n_points} 不一致")
+        return VNACalibration.correct_s_parameters(raw['S11'], raw['S21'], raw['S12'], raw['S22'], coeffs)
+
+
+class CalibrationStore:
+    """
+    校准系数库
+
+    每份校准保存为一个npz文件（频率轴、堆叠的12项误差系数、元数据JSON），
+    默认写入校准目录下的ErrorCoefficients文件夹；根目录下的index.json记录所有可用校准。
+    """
+
+    INDEX_FILE = 'index.json'
+    COEFF_FILE = 'error_coefficients.npz'
+
+    def __init__(self, root_dir: str = os.path.join("data", "calibration")):
+        """
+        Args:
+            root_dir: 校准根目录（与CalibrationModel.create_calibration_folders一致）
+        """
+        self.root_dir = root_dir
+        self.index_path = os.path.join(root_dir, self.INDEX_FILE)
+        self._lock = threading.Lock()
+        self._loaded: Dict[str, StoredCalibration] = {}
+
+    # ===== 索引 =====
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"读取校准索引失败 {self.index_path}: {str(e)}")
+            return {}
+
+    def _write_index(self, index: Dict[str, Dict[str, Any]]):
+        os.makedirs(self.root_dir, exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def list_calibrations(self, cal_type: Optional[str] = None,
+                          port_config: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        列出可用校准（按时间从新到旧），可按校准类型/端口配置过滤
+
+        Returns:
+            索引条目列表，每项包含 id/path/cal_type/port_config/timestamp/start_freq/stop_freq/n_points
+        """
+        entries = [dict(entry, id=cal_id) for cal_id, entry in self._read_index().items()]
+        if cal_type:
+            entries = [e for e in entries if e.get('cal_type') == cal_type]
+        if port_config:
+            entries = [e for e in entries if e.get('port_config') == port_config]
+        return sorted(entries, key=lambda e: e.get('timestamp', ''), reverse=True)
+
+    def _reserve_id(self, base_id: str) -> str:
+        """在索引和根目录中都未使用的校准ID（重名时追加_2、_3...），并创建其目录占位"""
+        with self._lock:
+            index = self._read_index()
+            cal_id, n = base_id, 1
+            while cal_id in index or os.path.exists(os.path.join(self.root_dir, cal_id)):
+                n += 1
+                cal_id = f"{base_id}_{n}"
+            os.makedirs(os.path.join(self.root_dir, cal_id))
+        return cal_id
+
+    def remove(self, cal_id: str) -> bool:
+        """从索引中移除校准（不删除文件）"""
+        with self._lock:
+            index = self._read_index()
+            if cal_id not in index:
+                return False
+            del index[cal_id]
+            self._write_index(index)
+            self._loaded.pop(cal_id, None)
+        return True
+
+    # ===== 保存/加载 =====
+    def save(self, coeffs: Dict[str, np.ndarray], freqs: np.ndarray, cal_type: str = "SOLT",
+             port_config: str = "DualPort", calibration_dir: Optional[str] = None,
+             cal_id: Optional[str] = None, extra: Optional[Dict[str, Any]] = None) -> Tuple[bool, str]:
+        """
+        保存一份校准并登记到索引
+
+        Args:
+            coeffs: 12项误差系数字典（VNACalibration.calibration_coeffs）
+            freqs: 校准频率轴 (MHz)
+            cal_type: 校准类型 (SOLT/TRL)
+            port_config: 端口配置 (SinglePort/DualPort)
+            calibration_dir: 校准目录（create_calibration_folders的返回值），系数写入其ErrorCoefficients子目录；
+                             为None时在根目录下新建以cal_id命名的目录
+            cal_id: 校准ID，默认取校准目录名或 类型_端口_时间戳(微秒)，后者与已有校准重名时追加序号
+            extra: 附加元数据（如功率、中频带宽）
+
+        Returns:
+            (是否成功, 校准ID或错误信息)
+        """
+        try:
+            freqs = np.asarray(freqs, dtype=np.float64)
+            missing = [name for name in TERM_NAMES if name not in coeffs]
+            if missing:
+                return False, f"缺少误差系数: {', '.join(missing)}"
+            terms = np.stack([np.asarray(coeffs[name], dtype=np.complex128) for name in TERM_NAMES])
+            if terms.shape[1] != len(freqs):
+                return False, f"误差系数频点数 {terms.shape[1]} 与频率轴长度 {len(freqs)} 不一致"
+            if len(freqs) > 1 and np.any(np.diff(freqs) <= 0):
+                return False, "频率轴必须严格递增"
+
+            now = datetime.now()
+            if cal_id is None:
+                if calibration_dir:
+                    cal_id = os.path.basename(os.path.normpath(calibration_dir))
+                else:
+                    cal_id = self._reserve_id(f"Calibration_{cal_type}_{port_config}_{now.strftime('%Y%m%d_%H%M%S_%f')}")
+            base_dir = calibration_dir or os.path.join(self.root_dir, cal_id)
+            coeff_dir = os.path.join(base_dir, "ErrorCoefficients")
+            os.makedirs(coeff_dir, exist_ok=True)
+            path = os.path.join(coeff_dir, self.COEFF_FILE)
+
+            metadata = {
+                'cal_type': cal_type,
+                'port_config': port_config,
+                'timestamp': now.strftime("%Y-%m-%d %H:%M:%S.%f"),
+                'start_freq': float(freqs[0]),
+                'stop_freq': float(freqs[-1]),
+                'n_points': int(len(freqs)),
+                'terms': list(TERM_NAMES),
+            }
+            if extra:
+                metadata.update(extra)
+            # 不压缩，加载时直接读取连续数组
+            np.savez(path, freqs=freqs, terms=terms, metadata=np.array(json.dumps(metadata, ensure_ascii=False)))
+
+            entry = {key: metadata[key] for key in ('cal_type', 'port_config', 'timestamp',
+                                                    'start_freq', 'stop_freq', 'n_points')}
+            entry['path'] = os.path.relpath(path, self.root_dir)
+            with self._lock:
+                index = self._read_index()
+                index[cal_id] = entry
+                self._write_index(index)
+                self._loaded.pop(cal_id, None)
+
+            logger.info(f"校准系数已保存: {cal_id} -> {path}")
+            return True, cal_id
+        except Exception as e:
+            logger.error(f"校准系数保存失败: {str(e)}")
+            return False, f"校准系数保存失败: {str(e)}"
+
+    def load(self, cal_id: Optional[str] = None, cal_type: Optional[str] = None,
+             port_config: Optional[str] = None) -> StoredCalibration:
+        """
+        加载一份校准（同一ID只从磁盘读取一次）
+
+        Args:
+            cal_id: 校准ID，为None时加载满足过滤条件的最新校准
+
+        Raises:
+            KeyError: 没有对应的校准
+        """
+        if cal_id is None:
+            entries = self.list_calibrations(cal_type, port_config)
+            if not entries:
+                raise KeyError("没有可用的校准")
+            cal_id = entries[0]['id']
+
+        with self._lock:
+            cached = self._loaded.get(cal_id)
+        if cached is not None:
+            return cached
+
+        entry = self._read_index().get(cal_id)
+        if entry is None:
+            raise KeyError(f"校准不存在: {cal_id}")
+        path = entry['path'] if os.path.isabs(entry['path']) else os.path.join(self.root_dir, entry['path'])
+        with np.load(path, allow_pickle=False) as data:
+            stored = StoredCalibration(cal_id, data['freqs'], data['terms'], json.loads(str(data['metadata'])))
+
+        with self._lock:
+            self._loaded[cal_id] = stored
+        logger.info(f"校准系数已加载: {cal_id} ({stored.metadata.get('n_points')} 点)")
+        return stored
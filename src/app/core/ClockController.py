@@ -1,6 +1,5 @@
 # src/app/core/ClockController.py
-import time
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List
 
 class ClockController:
     """时钟控制类，用于控制Port1和Port2的触发时钟和采样时钟"""
@@ -29,19 +28,37 @@ class ClockController:
         }
     }
     
-    def __init__(self, tcp_client=None):
+    # 端口时钟与板卡LMK通道的对应关系: 状态键 -> (时钟类型, 通道号)
+    PORT_CHANNELS = {
+        'trigger_port1': (1, 2),
+        'trigger_port2': (1, 3),
+        'sample_port1': (2, 3),
+        'sample_port2': (2, 1),
+    }
+    
+    def __init__(self, tcp_client=None, ack_command: Optional[str] = None, ack_reply: Optional[str] = 'OK',
+                 ack_timeout: float = 1.0):
+        """
+        参数:
+            tcp_client: TcpClient实例
+            ack_command: 批量命令后追加的查询命令（板卡按顺序处理，收到其应答即表示之前的命令已被处理）；
+                         lmk_state本身没有应答，默认None只发送不确认，固件支持查询命令时再启用
+            ack_reply: 期望的应答内容（应答以其开头才算确认），None时任意非空应答都算确认
+            ack_timeout: 等待应答的超时时间(秒)
+        """
         self.tcp_client = tcp_client
-        self.clock_states = {
-            'trigger_port1': False,
-            'trigger_port2': False,
-            'sample_port1': False,
-            'sample_port2': False
-        }
+        self.ack_command = ack_command
+        self.ack_reply = ack_reply
+        self.ack_timeout = ack_timeout
+        # 缓存的板卡时钟状态，None表示未知（首次配置或应答失败后会全部重发）
+        self.clock_states = {key: None for key in self.PORT_CHANNELS}
         self.current_mode = None  # 当前S参数模式
     
     def set_tcp_client(self, tcp_client):
-        """设置TCP客户端"""
+        """设置TCP客户端（板卡状态未知，缓存失效）"""
         self.tcp_client = tcp_client
+        self.clock_states = {key: None for key in self.PORT_CHANNELS}
+        self.current_mode = None
     
     def send_clock_command(self, clock_type: int, channel: int, enable: int) -> Tuple[bool, str]:
         """
@@ -67,20 +84,45 @@ class ClockController:
         if enable not in [0, 1]:
             return False, "使能状态错误，必须是0或1"
         
-        # 构建命令: Lmk 1 1 1
-        command = f"lmk_state {clock_type} {channel} {enable}\r\n"  # 添加回车换行符
+        state_key = self._get_state_key(clock_type, channel)
+        success, message = self._send_batch([self._format_command(clock_type, channel, enable)])
+        if success and state_key:
+            self.clock_states[state_key] = (enable == 1)
+        return success, message
+    
+    @staticmethod
+    def _format_command(clock_type: int, channel: int, enable: int) -> str:
+        """构建命令: lmk_state 1 2 1"""
+        return f"lmk_state {clock_type} {channel} {enable}\r\n"
+    
+    def _send_batch(self, commands: List[str]) -> Tuple[bool, str]:
+        """
+        一次写出所有命令；设置了ack_command时追加应答查询并等待确认（单次往返，不再固定sleep）
         
+        返回:
+            (成功状态, 消息)
+        """
+        if not self.tcp_client or not self.tcp_client.connected:
+            return False, "TCP客户端未连接"
+        
+        summary = ", ".join(cmd.strip() for cmd in commands)
         try:
-            # 使用TcpClient的send方法发送命令
-            self.tcp_client.send(command)
-            time.sleep(0.1)
-            success, response = self.tcp_client.send(command)
-            if success:
-                # 更新状态
-                self._update_clock_state(clock_type, channel, enable)
-                return True, f"时钟控制成功: {command.strip()}"
-            else:
+            # 丢弃残留数据，避免把旧响应误当作本次应答
+            self.tcp_client.clear_receive_buffer()
+            payload = "".join(commands)
+            if self.ack_command:
+                payload += f"{self.ack_command}\r\n"
+            success, response = self.tcp_client.send(payload)
+            if not success:
                 return False, f"时钟控制失败: {response}"
+            
+            if self.ack_command:
+                success, response = self.tcp_client.receive(max_retries=1, base_timeout=self.ack_timeout)
+                if not success:
+                    return False, f"时钟控制未确认: {summary} ({response})"
+                if self.ack_reply is not None and not response.startswith(self.ack_reply):
+                    return False, f"时钟控制应答异常: {summary} (收到 {response!r})"
+            return True, f"时钟控制成功: {summary}"
         except Exception as e:
             return False, f"发送命令时发生错误: {str(e)}"
     
@@ -91,17 +133,10 @@ class ClockController:
             self.clock_states[state_key] = (enable == 1)
     
     def _get_state_key(self, clock_type: int, channel: int) -> Optional[str]:
-        """获取状态字典的键"""
-        if clock_type == 1:  # 触发信号
-            if channel == 1:
-                return 'trigger_port1'
-            elif channel == 2:
-                return 'trigger_port2'
-        elif clock_type == 2:  # 采样信号
-            if channel == 1:
-                return 'sample_port1'
-            elif channel == 2:
-                return 'sample_port2'
+        """获取状态字典的键（按PORT_CHANNELS中的板卡通道对应）"""
+        for key, type_channel in self.PORT_CHANNELS.items():
+            if type_channel == (clock_type, channel):
+                return key
         return None
     
     def get_clock_state(self, clock_type: int, channel: int) -> Optional[bool]:
@@ -121,6 +156,56 @@ class ClockController:
         """获取所有可用的S参数模式"""
         return {mode: info['description'] for mode, info in self.S_MODES.items()}
     
+    def get_mode_states(self, mode: str) -> Dict[str, bool]:
+        """获取S参数模式对应的目标时钟状态"""
+        mode_config = self.S_MODES[mode.upper()]
+        return {
+            'trigger_port1': mode_config['trigger']['port1'],
+            'trigger_port2': mode_config['trigger']['port2'],
+            'sample_port1': mode_config['sample']['port1'],
+            'sample_port2': mode_config['sample']['port2'],
+        }
+    
+    def diff_states(self, target: Dict[str, bool]) -> List[Tuple[str, int, int, int]]:
+        """
+        计算缓存状态与目标状态的差异
+        
+        返回:
+            需要发送的(状态键, 时钟类型, 通道号, 使能)列表；先关闭再开启，避免两个端口同时被触发
+        """
+        changes = [
+            (key, *self.PORT_CHANNELS[key], int(enable))
+            for key, enable in target.items()
+            if self.clock_states.get(key) != enable
+        ]
+        return sorted(changes, key=lambda c: c[3])
+    
+    def apply_states(self, target: Dict[str, bool], force: bool = False) -> Tuple[bool, str]:
+        """
+        事务式配置时钟：只发送有变化的通道，一次批量发送并等待应答
+        
+        应答成功后才更新缓存；失败时相关通道标记为未知，下次会重新发送。
+        
+        参数:
+            target: 目标状态 {状态键: 是否开启}
+            force: 是否忽略缓存全部发送
+        
+        返回:
+            (成功状态, 消息)
+        """
+        if force:
+            changes = [(key, *self.PORT_CHANNELS[key], int(enable)) for key, enable in target.items()]
+            changes.sort(key=lambda c: c[3])
+        else:
+            changes = self.diff_states(target)
+        if not changes:
+            return True, "时钟状态无变化"
+        
+        success, message = self._send_batch([self._format_command(t, c, e) for _, t, c, e in changes])
+        for key, _, _, enable in changes:
+            self.clock_states[key] = (enable == 1) if success else None
+        return success, message
+    
     def set_s_mode(self, mode: str) -> Tuple[bool, str]:
         """
         设置S参数测量模式
@@ -136,43 +221,14 @@ class ClockController:
             return False, f"不支持的S参数模式: {mode}"
         
         mode_config = self.S_MODES[mode]
+        success, message = self.apply_states(self.get_mode_states(mode))
         
-        
-        results = []
-        
-        # 配置触发时钟
-        if mode_config['trigger']['port1']:
-            success, message = self.send_clock_command(1, 2, 1)  # 触发 Port1
-            time.sleep(0.1)
-            success, message = self.send_clock_command(1, 3, 0)  # 关闭 Port2
-            results.append((success, message))
-            time.sleep(0.1)
-        if mode_config['trigger']['port2']:
-            success, message = self.send_clock_command(1, 3, 1)  # 触发 Port2
-            time.sleep(0.1)
-            success, message = self.send_clock_command(1, 2, 0)  # 关闭 Port1
-            results.append((success, message))
-            time.sleep(0.1)
-        
-        # 配置采样时钟
-        if mode_config['sample']['port1']:
-            success, message = self.send_clock_command(2, 3, 1)  # 采样 Port1
-            results.append((success, message))
-            time.sleep(0.1)
-        if mode_config['sample']['port2']:
-            success, message = self.send_clock_command(2, 1, 1)  # 采样 Port2
-            results.append((success, message))
-            time.sleep(0.1)
-        
-        # 检查所有命令是否成功
-        all_success = all(success for success, _ in results)
-        messages = [msg for _, msg in results]
-        
-        if all_success:
+        if success:
             self.current_mode = mode
             return True, f"成功设置 {mode} 模式: {mode_config['description']}"
         else:
-            return False, f"设置 {mode} 模式失败: {'; '.join(messages)}"
+            self.current_mode = None
+            return False, f"设置 {mode} 模式失败: {message}"
     
     def set_s11_mode(self) -> Tuple[bool, str]:
         """设置S11模式（端口1反射测量）"""
@@ -192,41 +248,19 @@ class ClockController:
     
     def enable_all_clocks(self) -> Tuple[bool, str]:
         """启用所有时钟"""
-        results = []
-        for clock_type in [1, 2]:
-            for channel in [1, 2]:
-                success, message = self.send_clock_command(clock_type, channel, 1)
-                results.append((success, message))
-                time.sleep(0.1)  # 短暂延迟
-        
-        # 检查所有命令是否成功
-        all_success = all(success for success, _ in results)
-        messages = [msg for _, msg in results]
-        
-        if all_success:
+        success, message = self.apply_states({key: True for key in self.PORT_CHANNELS})
+        if success:
             self.current_mode = 'ALL'  # 特殊模式标识
-            return all_success, "所有时钟已启用"
-        else:
-            return all_success, "; ".join(messages)
+            return success, "所有时钟已启用"
+        return success, message
     
     def disable_all_clocks(self) -> Tuple[bool, str]:
         """禁用所有时钟"""
-        results = []
-        for clock_type in [1, 2]:
-            for channel in [1, 2]:
-                success, message = self.send_clock_command(clock_type, channel, 0)
-                results.append((success, message))
-                time.sleep(0.1)  # 短暂延迟
-        
-        # 检查所有命令是否成功
-        all_success = all(success for success, _ in results)
-        messages = [msg for _, msg in results]
-        
-        if all_success:
+        success, message = self.apply_states({key: False for key in self.PORT_CHANNELS})
+        if success:
             self.current_mode = None
-            return all_success, "所有时钟已禁用"
-        else:
-            return all_success, "; ".join(messages)
+            return success, "所有时钟已禁用"
+        return success, message
     
     def get_status(self) -> Dict[str, Any]:
         """获取当前时钟状态"""
@@ -276,10 +310,5 @@ class ClockController:
     def cleanup(self):
         """清理资源"""
         self.tcp_client = None
-        self.clock_states = {
-            'trigger_port1': False,
-            'trigger_port2': False,
-            'sample_port1': False,
-            'sample_port2': False
-        }
+        self.clock_states = {key: None for key in self.PORT_CHANNELS}
         self.current_mode = None
@@ -10,6 +10,9 @@ logger = logging.getLogger(__name__)
 class SearchMethod:
     RISING = 1
     MAX = 2
+    PYRAMID = 3     # 多分辨率搜索：在降采样金字塔的最粗一级定位边沿，再逐级细化到全分辨率
+                    # （第二边沿在高噪声/慢上升沿/负反射时与RISING结果不同，未在界面中提供）
+    FFT = 4         # 频域定位：FFT求导并高斯低通后取斜率最大处（多条曲线一次批量FFT）
 
 class CalibrationMode:
     OPEN = "OPEN"
@@ -22,6 +25,7 @@ class AnalysisConfig:
     """数据分析配置类"""
     input_dir: str = 'data\\results\\test'
     recursive: bool = True
+    prefer_binary: bool = True  # 同名.bin/.csv同时存在时优先读取.bin
     clock_freq: float = 39.53858777e6
     trigger_freq: float = 10e6
     n_points: int = 81920
@@ -41,6 +45,18 @@ class AnalysisConfig:
     min_second_rise_ratio: float = 0.2
     min_second_fall_ratio: float = 0.2
     cal_mode: str = CalibrationMode.LOAD
+    batch_mode: bool = False       # 二维批量处理：多个文件堆叠后沿axis=1一次计算
+                                   # （上升沿位置已知或search_method为FFT时才明显加速，RISING/MAX逐行搜索时与逐文件相当）
+    batch_chunk_size: int = 64     # 批量模式下每批堆叠的文件数
+    n_workers: int = 1             # 逐文件分析的并行进程数，1为单进程，<=0为CPU核数
+    keep_traces: bool = False      # 批量处理时保留每个文件的曲线（默认只流式累加均值/方差）
+    fft_workers: int = 1           # 二维批量FFT的线程数(scipy.fft)，-1为CPU核数
+    fft_edge_bandwidth_hz: float = 10e9  # SearchMethod.FFT边沿滤波器的高斯低通带宽(Hz)
+    reuse_adc_buffer: bool = False  # 逐文件处理时ADC数据写入复用的缓冲区（结果中的adc_full会被下一个文件覆盖）
+    fold_periods: int = 1          # 每次采集折叠平均的重建周期数(n_points点为一个周期)，<=0为用尽所有完整周期
+    analysis_cache: bool = False   # 逐文件分析结果写入磁盘缓存（按原始文件内容和相关配置寻址）
+    analysis_cache_dir: Optional[str] = None  # 缓存目录，None时为 <数据根目录>/cache/analysis
+    analysis_cache_mb: float = 1024  # 缓存总大小上限(MB)，超出时删除最久未使用的条目
 
     @property
     def t_sample(self) -> float:
@@ -1,23 +1,28 @@
 # src/app/core/DataAnalyzer.py
+import os
 import numpy as np
 from typing import Dict, Any, List, Optional, Tuple
 import logging
 from tqdm import tqdm
 
 try:
-    from .ConfigManager import AnalysisConfig, ConfigValidator, CalibrationMode
+    from .ConfigManager import AnalysisConfig, ConfigValidator, CalibrationMode, SearchMethod
     from .DataProcessor import DataProcessor
     from .EdgeDetector import EdgeDetector
-    from .ResultProcessor import ResultProcessor
+    from .ResultProcessor import ResultProcessor, ResultAccumulator, TRACE_KEYS
     from .FileManager import FileManager
     from .DataPlotter import DataPlotter
+    from .ParallelAnalysis import ParallelFileAnalyzer
+    from .AnalysisCache import AnalysisCache
 except ImportError:
-    from ConfigManager import AnalysisConfig, ConfigValidator, CalibrationMode
+    from ConfigManager import AnalysisConfig, ConfigValidator, CalibrationMode, SearchMethod
     from DataProcessor import DataProcessor
     from EdgeDetector import EdgeDetector
-    from ResultProcessor import ResultProcessor
+    from ResultProcessor import ResultProcessor, ResultAccumulator, TRACE_KEYS
     from FileManager import FileManager
     from DataPlotter import DataPlotter
+    from ParallelAnalysis import ParallelFileAnalyzer
+    from AnalysisCache import AnalysisCache
 logger = logging.getLogger(__name__)
 
 class DataAnalyzer:
@@ -33,9 +38,24 @@ class DataAnalyzer:
         self.data_processor = data_processor or DataProcessor(config)
         self.edge_detector = edge_detector or EdgeDetector(config)
         self.result_processor = result_processor or ResultProcessor(config)
+        self._cache: Optional[AnalysisCache] = None
         
         # 验证配置
         ConfigValidator.validate_config(config)
+    
+    @property
+    def cache(self) -> Optional[AnalysisCache]:
+        """逐文件分析结果的磁盘缓存，config.analysis_cache为False时为None"""
+        cfg = self.config
+        if not getattr(cfg, 'analysis_cache', False):
+            return None
+        # 界面的ADCConfig没有目录/容量字段，此时使用AnalysisConfig的默认值
+        cache_dir = (getattr(cfg, 'analysis_cache_dir', None)
+                     or os.path.join(str(self.file_manager.base_data_path), 'cache', 'analysis'))
+        cache_mb = getattr(cfg, 'analysis_cache_mb', 1024)
+        if self._cache is None or self._cache.cache_dir != cache_dir:
+            self._cache = AnalysisCache(cache_dir, int(cache_mb * 1024 * 1024))
+        return self._cache
   
     def extract_basic_segment(self, u32_arr: np.ndarray, data_index: int = -1) -> Optional[Dict[str, Any]]:
         """提取基本数据段，返回字典格式的结果
@@ -48,15 +68,18 @@ class DataAnalyzer:
             处理结果字典或None
         """
         try:
-            # 1. 提取ADC数据
-            bit31, adc_full = self.data_processor.extract_adc_data(u32_arr, self.config.use_signed18)
-        
-            # 2. 检测有效数据
-            rise_idx = self.data_processor.detect_valid_data(bit31, self.config.edge_search_start)
+            # 1. 检测有效数据（直接在uint32数据上分块搜索bit31上升沿）
+            rise_idx = self.data_processor.find_trigger_edge(u32_arr, self.config.edge_search_start)
             if rise_idx is None:
                 logger.warning(f"数据索引 {data_index}: 未检测到有效数据")
                 return None
         
+            # 2. 提取ADC数据（reuse_adc_buffer时写入跨文件复用的缓冲区）
+            reuse = getattr(self.config, 'reuse_adc_buffer', False)
+            out = self.data_processor.adc_buffer(np.shape(u32_arr)) if reuse else None
+            adc_full = self.data_processor.unpack_adc(u32_arr, self.config.use_signed18, out)
+            adc_full_mean = np.mean(adc_full)
+        
             # 3. 截取数据段
             segment_adc = self.data_processor.extract_data_segment(
                 adc_full, rise_idx, self.config.start_index, self.config.n_points
@@ -65,24 +88,27 @@ class DataAnalyzer:
                 logger.warning(f"数据索引 {data_index}: 数据段截取失败")
                 return None
         
-            # 4. 按周期排序
-            y_sorted, _ = self.data_processor.sort_data_by_period(
-                segment_adc, self.config.t_sample, self.config.t_trig
-            )
+            # 4. 按周期排序（排序索引由重建计划缓存），fold_periods不为1时折叠多个周期平均
+            plan = self.data_processor.get_reconstruction_plan()
+            start_capture = rise_idx + self.config.start_index
+            n_periods = self.fold_period_count(adc_full.size - start_capture)
+            if n_periods > 1:
+                y_sorted = self.data_processor.fold_segment(adc_full, start_capture, self.config.n_points, n_periods)
+            else:
+                y_sorted = plan.sort(segment_adc)
 
             
             # 5. 搜索所有边沿位置,第一上升沿，第二上升沿，下降沿
             rise_pos = self.edge_detector.find_rise_position(
-                y_sorted, self.config.search_method, np.mean(adc_full), self.config.min_edge_amplitude_ratio
+                y_sorted, self.config.search_method, adc_full_mean, self.config.min_edge_amplitude_ratio
             )
 
-            # 6. 数据对齐
-            target_idx = self.config.n_points // 4
-            y_full = self.data_processor.align_data(y_sorted, rise_pos, target_idx)
+            # 6. 数据对齐：已排序的数据循环移位，使上升沿位于目标位置
+            y_full = self.data_processor.align_data(y_sorted, rise_pos, plan.target_position)
 
             
             # 7. 提取ROI
-            y_roi = self.data_processor.extract_roi(y_full, self.config.roi_start, self.config.roi_end)
+            y_roi = self.data_processor.extract_roi(y_full, plan.roi_start, plan.roi_end)
 
             # 搜索所有上升沿位置
             edges_dict = self.analyze_edges(y_roi)
@@ -93,12 +119,13 @@ class DataAnalyzer:
             return {
                 'adc_full': adc_full,
                 'y_roi': y_roi,
-                'adc_full_mean': np.mean(adc_full),
+                'adc_full_mean': adc_full_mean,
                 'rise_pos': rise_pos,
                 'second_rise_pos': second_rise_pos,
                 'fall_pos': fall_pos,
                 'y_sorted': y_sorted,
-                'y_full': y_full
+                'y_full': y_full,
+                'n_averages': n_periods
             }
         
         except Exception as e:
@@ -106,6 +133,18 @@ class DataAnalyzer:
             return None
 
 
+    def fold_period_count(self, n_available_samples: int) -> int:
+        """
+        一次采集中折叠平均的周期数（即每个文件的等效平均次数）
+        
+        Args:
+            n_available_samples: 触发截取起点之后的采样点数
+        """
+        available = max(0, int(n_available_samples) // self.config.n_points)
+        if self.config.fold_periods <= 0:
+            return available
+        return min(self.config.fold_periods, available)
+
     def process_thru_load_mode(self, data_dict: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         处理THRU和LOAD模式的数据
@@ -227,21 +266,9 @@ class DataAnalyzer:
             y_roi = data_dict['y_roi']
             adc_full_mean = data_dict['adc_full_mean']
             
-            # OPEN模式特殊处理：可能需要不同的窗口函数或预处理
-            # 去均值处理
-            y_roi_centered = y_roi.astype(np.float64) - np.mean(y_roi)
-          
-            # 使用不同的窗口函数（Blackman窗）
-            window = np.blackman(len(y_roi_centered))
-            windowed_data = y_roi_centered * window
-          
-            # 计算FFT
-            fft_result = np.fft.rfft(windowed_data)
-            freq = np.fft.rfftfreq(len(y_roi_centered), d=self.config.ts_eff)
-          
-            # 归一化
-            scale = (np.sum(window) / len(y_roi_centered)) * len(y_roi_centered)
-            magnitude_linear = np.abs(fft_result) / (scale + 1e-12)
+            # OPEN模式特殊处理：去均值后使用不同的窗口函数（Blackman窗）
+            freq, magnitude_linear, _ = self.data_processor.compute_spectrum(
+                y_roi, self.config.ts_eff, window_type='blackman')
           
             # 差分处理
             if self.config.l_roi <= self.config.diff_points:
@@ -285,84 +312,164 @@ class DataAnalyzer:
             basic_result = self.extract_basic_segment(u32_arr, file_index)
             if basic_result is None:
                 return None
+            return self.process_basic_result(basic_result)
             
+        except Exception as e:
+            logger.error(f"处理文件索引 {file_index} 时出错: {e}")
+            return None
+
+    def process_basic_result(self, basic_result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """按校准模式处理extract_basic_segment的结果（步骤8-10）"""
+        try:
             # 根据校准模式选择不同的处理方法
             if self.config.cal_mode in [CalibrationMode.THRU, CalibrationMode.LOAD]:
                 # THRU和LOAD模式使用标准处理
-                return self.process_thru_load_mode(basic_result)
+                result = self.process_thru_load_mode(basic_result)
             
             elif self.config.cal_mode == CalibrationMode.SHORT:
                 # SHORT模式特殊处理
-                return self.process_thru_load_mode(basic_result)
+                result = self.process_thru_load_mode(basic_result)
             
             elif self.config.cal_mode == CalibrationMode.OPEN:
                 # OPEN模式特殊处理
-                return self.process_thru_load_mode(basic_result)
+                result = self.process_thru_load_mode(basic_result)
             
             else:
                 logger.error(f"未知的校准模式: {self.config.cal_mode}")
                 return None
             
+            if result is not None:
+                result['n_averages'] = basic_result['n_averages']
+            return result
+            
         except Exception as e:
-            logger.error(f"处理文件索引 {file_index} 时出错: {e}")
+            logger.error(f"按校准模式处理时出错: {e}")
             return None
 
+    def basic_segment_from_full(self, y_full: np.ndarray, adc_full_mean: float, n_averages: int) -> Dict[str, Any]:
+        """由对齐后的y_full重建extract_basic_segment的结果（步骤7起，不含adc_full和y_sorted）"""
+        plan = self.data_processor.get_reconstruction_plan()
+        y_roi = self.data_processor.extract_roi(y_full, plan.roi_start, plan.roi_end)
+        edges_dict = self.analyze_edges(y_roi)
+        return {
+            'y_roi': y_roi,
+            'adc_full_mean': adc_full_mean,
+            'rise_pos': edges_dict['first_rise_pos'],
+            'second_rise_pos': edges_dict['second_rise_pos'],
+            'fall_pos': edges_dict['fall_pos'],
+            'y_full': y_full,
+            'n_averages': n_averages
+        }
 
-    def batch_process_files(self, file_list: List[str]) -> Dict[str, Any]:
+    def analyze_file(self, path: str, file_index: int = -1) -> Optional[Dict[str, Any]]:
+        """
+        加载并处理一个文件，启用分析缓存时优先使用缓存
+        
+        缓存命中'result'阶段时不读取原始数据；只命中'segment'阶段（如只改动了ROI/差分参数）时
+        由缓存的y_full从步骤7继续；都未命中时完整处理并写入两个阶段的缓存。
+        
+        Returns:
+            与process_single_file相同键的结果字典（命中缓存时data_dict只含边沿位置和曲线），失败时为None
+        """
+        cache = self.cache
+        if cache is None:
+            raw = self.file_manager.load_u32_data(path, skip_first=self.config.skip_first_value)
+            return self.process_single_file(raw, file_index)
+        
+        source = cache.source_digest(path)
+        result_key = cache.key(source, 'result', self.config)
+        entry = cache.get(result_key)
+        if entry is not None:
+            plan = self.data_processor.get_reconstruction_plan()
+            return AnalysisCache.unpack_result(entry, plan.roi_start, plan.roi_end)
+        
+        segment_key = cache.key(source, 'segment', self.config)
+        entry = cache.get(segment_key)
+        if entry is not None:
+            basic_result = self.basic_segment_from_full(
+                entry['y_full'], float(entry['adc_full_mean']), int(entry['n_averages']))
+        else:
+            raw = self.file_manager.load_u32_data(path, skip_first=self.config.skip_first_value)
+            basic_result = self.extract_basic_segment(raw, file_index)
+            del raw
+            if basic_result is None:
+                return None
+            cache.put(segment_key, AnalysisCache.pack_segment(basic_result))
+        
+        result = self.process_basic_result(basic_result)
+        if result is not None:
+            cache.put(result_key, AnalysisCache.pack_result(result))
+        return result
+
+    def log_cache_stats(self):
+        """报告分析缓存的命中情况"""
+        cache = self._cache
+        if cache is not None and (cache.hits or cache.misses):
+            logger.info(f"分析缓存: 命中 {cache.hits} 次，未命中 {cache.misses} 次，"
+                        f"占用 {cache.total_bytes / 1e6:.1f} MB")
+
+
+    def new_batch_results(self, total_files: int) -> Dict[str, Any]:
+        """
+        批量处理结果的初始结构
+        
+        逐文件结果由'accumulator'（ResultAccumulator）流式累加；config.keep_traces为True时
+        'ys_full'/'ys'/'mags'/'ys_d_full'/'ys_d'/'mags_d'为保留的逐文件曲线列表；
+        'n_averages'为每个成功文件折叠平均的周期数
+        """
+        accumulator = self.result_processor.new_accumulator()
+        results = {
+            'freq_ref': None, 'freq_d_ref': None, 'sum_Xd': None,
+            'success_count': 0, 'total_files': total_files,
+            'n_averages': [],
+            'accumulator': accumulator,
+        }
+        results.update(accumulator.traces)
+        return results
+
+    def accumulate_result(self, results: Dict[str, Any], res: Dict[str, Any]):
+        """将单个文件的处理结果累加到批量结果中"""
+        accumulator = results['accumulator']
+        accumulator.add(res)
+        results['freq_ref'] = accumulator.freq_ref
+        results['freq_d_ref'] = accumulator.freq_d_ref
+        results['sum_Xd'] = accumulator.sum_Xd
+        results['success_count'] = accumulator.count
+        results['n_averages'].append(res.get('n_averages', 1))
+
+    def log_fold_averages(self, results: Dict[str, Any]):
+        """多周期折叠时报告每个文件的等效平均次数"""
+        n_averages = np.asarray(results.get('n_averages', []))
+        if n_averages.size and n_averages.max() > 1:
+            logger.info(f"多周期折叠: 每个文件平均 {n_averages.min()}~{n_averages.max()} 个周期，"
+                        f"共 {int(n_averages.sum())} 次等效平均（{n_averages.size} 个文件）")
+
+    def batch_process_files(self, file_list: List[str], n_workers: Optional[int] = None) -> Dict[str, Any]:
         """
         批量处理文件列表
         
         Args:
             file_list: 要处理的文件路径列表
+            n_workers: 并行进程数，None时使用config.n_workers，1为单进程顺序处理
             
         Returns:
             处理结果字典
         """
+        n_workers = self.config.n_workers if n_workers is None else n_workers
+        if n_workers != 1 and len(file_list) > 1:
+            return self.batch_process_files_parallel(file_list, n_workers)
+
         logger.info(f"开始处理 {len(file_list)} 个文件")
-    
-        # 初始化结果存储
-        results = {
-            'ys_full':[],'ys': [], 'mags': [], 'ys_d_full':[],'ys_d': [], 'mags_d': [],
-            'freq_ref': None, 'freq_d_ref': None, 'sum_Xd': None,
-            'success_count': 0, 'total_files': len(file_list)
-        }
+        results = self.new_batch_results(len(file_list))
     
         # 处理每个文件
         for i, f in enumerate(tqdm(file_list, desc="处理文件", unit="file")):
             try:
-                raw = self.file_manager.load_u32_text_first_col(f, skip_first=self.config.skip_first_value)
-                res = self.process_single_file(raw, i)  # 传递文件索引
+                res = self.analyze_file(f, i)  # 传递文件索引
                 
                 if res is None:
                     continue
-                
-                # 从字典中提取数据
-                y_full = res['y_full']
-                y_roi = res['y_roi']
-                freq = res['freq']
-                mag_linear = res['mag_linear']
-                y_full_diff = res['y_full_diff']
-                y_diff = res['y_diff']
-                freq_d = res['freq_d']
-                mag_linear_d = res['mag_linear_d']
-                Xd_norm = res['Xd_norm']
-            
-                # 初始化参考频率
-                if results['freq_ref'] is None:
-                    results['freq_ref'] = freq
-                if results['freq_d_ref'] is None:
-                    results['freq_d_ref'] = freq_d
-                    results['sum_Xd'] = np.zeros_like(Xd_norm, dtype=np.complex128)
-            
-                # 存储结果
-                results['ys_full'].append(y_full.astype(np.float64))
-                results['ys'].append(y_roi.astype(np.float64))
-                results['mags'].append(mag_linear.astype(np.float64))
-                results['ys_d_full'].append(y_full_diff.astype(np.float64))
-                results['ys_d'].append(y_diff.astype(np.float64))
-                results['mags_d'].append(mag_linear_d.astype(np.float64))
-                results['sum_Xd'] += Xd_norm
-                results['success_count'] += 1
+                self.accumulate_result(results, res)
             except Exception as e:
                 logger.warning(f"处理文件 {f} (索引 {i}) 失败: {e}")
                 continue
@@ -371,15 +478,254 @@ class DataAnalyzer:
             raise RuntimeError("没有文件成功处理")
     
         logger.info(f"成功处理 {results['success_count']}/{len(file_list)} 个文件")
+        self.log_fold_averages(results)
+        self.log_cache_stats()
+        return results
+
+    def batch_process_files_parallel(self, file_list: List[str], n_workers: Optional[int] = None,
+                                     should_stop=None) -> Dict[str, Any]:
+        """
+        多进程批量处理文件列表，结果顺序与file_list一致，与batch_process_files相同
+        
+        Args:
+            file_list: 要处理的文件路径列表
+            n_workers: 进程数，None或<=0时使用CPU核数
+            should_stop: 返回True时中断处理的回调
+        """
+        analyzer = ParallelFileAnalyzer(self.config, n_workers, self.file_manager.base_data_path)
+        logger.info(f"开始并行处理 {len(file_list)} 个文件 ({analyzer.n_workers} 个进程)")
+        results = self.new_batch_results(len(file_list))
+    
+        for i, f, res, error in tqdm(analyzer.iter_results(file_list, should_stop), total=len(file_list),
+                                     desc="处理文件", unit="file"):
+            if error is not None:
+                logger.warning(f"处理文件 {f} (索引 {i}) 失败: {error}")
+            if res is not None:
+                self.accumulate_result(results, res)
+    
+        if results['success_count'] == 0:
+            raise RuntimeError("没有文件成功处理")
+    
+        logger.info(f"成功处理 {results['success_count']}/{len(file_list)} 个文件")
+        self.log_fold_averages(results)
         return results
 
 
-    def analyze_edges(self, sorted_data: np.ndarray) -> Dict[str, Any]:
+    def process_batch(self, u32_stack: np.ndarray, lengths: Optional[np.ndarray] = None,
+                      rise_positions: Optional[np.ndarray] = None, first_index: int = 0) -> Dict[str, Any]:
         """
-        完整的边沿分析流程，返回边沿位置和中点位置
+        二维批量处理：每行一次采集，步骤1-10（THRU/LOAD处理流程）沿axis=1一次完成
+        
+        Args:
+            u32_stack: [N, L] uint32数组，长度不足L的采集在行尾补0
+            lengths: 每行的有效长度，为None时均为L
+            rise_positions: 每行排序后数据中的上升沿位置（对齐用），为None时逐行搜索
+            first_index: 第一行的文件索引，用于日志
+            
+        Returns:
+            结果字典: 'valid' 为每行是否处理成功的布尔数组，'rise_pos' 为每行使用的上升沿位置，
+            'n_averages' 为每行折叠平均的周期数（失败的行为0），
+            其余数组只包含成功的行，键名与process_thru_load_mode一致
+        """
+        cfg = self.config
+        n_rows = u32_stack.shape[0]
+        if lengths is None:
+            lengths = np.full(n_rows, u32_stack.shape[1])
+        
+        # 1. 提取ADC数据（写入复用的缓冲区，adc_full不出现在结果中）
+        adc_full = self.data_processor.unpack_adc(
+            u32_stack, cfg.use_signed18, self.data_processor.adc_buffer(u32_stack.shape))
+        
+        # 2. 检测有效数据
+        rise_idx = self.data_processor.find_trigger_edges(u32_stack, cfg.edge_search_start)
+        
+        # 3. 截取数据段的起点，检查长度
+        starts = rise_idx + cfg.start_index
+        valid = (rise_idx >= 0) & (starts + cfg.n_points <= lengths)
+        if cfg.l_roi <= cfg.diff_points:
+            valid[:] = False
+        for i in np.flatnonzero(~valid):
+            reason = "未检测到有效数据" if rise_idx[i] < 0 else "数据段截取失败"
+            logger.warning(f"数据索引 {first_index + i}: {reason}")
+        
+        result = {'valid': valid, 'rise_pos': np.full(n_rows, -1, dtype=np.int64),
+                  'n_averages': np.zeros(n_rows, dtype=np.int64)}
+        rows = np.flatnonzero(valid)
+        if rows.size == 0:
+            return result
+        
+        adc_rows = adc_full[rows]
+        starts = starts[rows]
+        plan = self.data_processor.get_reconstruction_plan()
+        sort_idx = plan.sort_idx
+        
+        # 各行共用同一折叠周期数（取可用周期数最少的一行）
+        n_periods = self.fold_period_count(int((lengths[rows] - starts).min()))
+        result['n_averages'][rows] = n_periods
+        
+        if n_periods > 1 and rise_positions is not None:
+            # 4-6. 折叠平均后按已知上升沿循环移位对齐
+            y_sorted = self.data_processor.fold_batch(adc_rows, starts, n_periods)
+            rise_pos = np.asarray(rise_positions, dtype=np.int64)[rows]
+            y_full = self.data_processor.align_batch(y_sorted, plan.target_position - rise_pos)
+            del y_sorted
+        elif rise_positions is None:
+            # 4-5. 按周期排序（或折叠平均）后搜索上升沿（FFT方法整批一次计算，其余方法逐行）
+            if n_periods > 1:
+                y_sorted = self.data_processor.fold_batch(adc_rows, starts, n_periods)
+            else:
+                y_sorted = self.data_processor.gather_aligned_batch(adc_rows, starts, sort_idx)
+            if cfg.search_method == SearchMethod.FFT:
+                rise_pos = self.edge_detector.find_rise_positions_fft(y_sorted).astype(np.int64)
+            else:
+                full_means = adc_rows.sum(axis=1) / lengths[rows]
+                rise_pos = np.array([
+                    self.edge_detector.find_rise_position(row, cfg.search_method, mean, cfg.min_edge_amplitude_ratio)
+                    for row, mean in zip(y_sorted, full_means)
+                ], dtype=np.int64)
+            # 6. 数据对齐
+            y_full = self.data_processor.align_batch(y_sorted, plan.target_position - rise_pos)
+            del y_sorted
+        else:
+            # 4-6. 截取、排序和对齐合并为一次gather
+            rise_pos = np.asarray(rise_positions, dtype=np.int64)[rows]
+            shifts = (plan.target_position - rise_pos) % cfg.n_points
+            y_full = self.data_processor.gather_aligned_batch(adc_rows, starts, sort_idx, shifts)
+        del adc_rows
+        result['rise_pos'][rows] = rise_pos
+        
+        # 7. 提取ROI
+        y_roi = self.data_processor.extract_roi(y_full, plan.roi_start, plan.roi_end)
+        
+        # 8. ROI频谱分析
+        freq, mag_linear, _ = self.data_processor.compute_spectrum_batch(y_roi, cfg.ts_eff)
+        
+        # 9. 差分与平滑
+        y_full_diff = self.data_processor.smooth_uniform_batch(
+            self.data_processor.compute_difference(y_full, cfg.diff_points), cfg.average_points)
+        y_diff = self.data_processor.smooth_uniform_batch(
+            self.data_processor.compute_difference(y_roi, cfg.diff_points), cfg.average_points)
+        
+        # 10. 差分频谱分析
+        freq_d, mag_linear_d, Xd_norm = self.data_processor.compute_spectrum_batch(y_diff, cfg.ts_eff)
+        
+        result.update({
+            'y_full': y_full,
+            'y_roi': y_roi,
+            'freq': freq,
+            'mag_linear': mag_linear,
+            'y_diff': y_diff,
+            'y_full_diff': y_full_diff,
+            'freq_d': freq_d,
+            'mag_linear_d': mag_linear_d,
+            'Xd_norm': Xd_norm,
+        })
+        return result
+
+    def batch_process_files_stacked(self, file_list: List[str], rise_positions: Optional[np.ndarray] = None,
+                                    chunk_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        批量处理文件列表（二维批量模式）
+        
+        每次加载chunk_size个文件堆叠为二维数组，用process_batch一次处理；
+        只有给出rise_positions（如同一批次的上一轮结果）或search_method为FFT时上升沿搜索才是整批完成的，
+        否则每行仍调用find_rise_position，耗时与batch_process_files相当，因此batch_mode默认关闭。
+        结果由'accumulator'流式累加；config.keep_traces为True时 ys_full/ys/mags/ys_d_full/ys_d/mags_d
+        为 [成功数, 点数] 数组，与batch_process_files的列表可互换使用。
+        
+        Args:
+            file_list: 要处理的文件路径列表
+            rise_positions: 每个文件的上升沿位置（与file_list等长），为None时逐个搜索
+            chunk_size: 每批文件数，默认使用config.batch_chunk_size
+            
+        Returns:
+            处理结果字典
+        """
+        cfg = self.config
+        chunk_size = chunk_size or cfg.batch_chunk_size
+        n_files = len(file_list)
+        logger.info(f"开始批量处理 {n_files} 个文件（每批 {chunk_size} 个）")
+        if rise_positions is not None and len(rise_positions) != n_files:
+            raise ValueError(f"上升沿位置数量 {len(rise_positions)} 与文件数量 {n_files} 不一致")
+        
+        # 保留逐文件曲线时按最终大小预分配，逐批填入成功的行
+        out = {}
+        if cfg.keep_traces:
+            l_roi = cfg.roi_end - cfg.roi_start
+            l_diff = l_roi - cfg.diff_points
+            out = {
+                'ys_full': np.empty((n_files, cfg.n_points)),
+                'ys': np.empty((n_files, l_roi)),
+                'mags': np.empty((n_files, l_roi // 2 + 1)),
+                'ys_d_full': np.empty((n_files, cfg.n_points - cfg.diff_points)),
+                'ys_d': np.empty((n_files, l_diff)),
+                'mags_d': np.empty((n_files, l_diff // 2 + 1)),
+            }
+        accumulator = ResultAccumulator(keep_traces=False)
+        results = {
+            'freq_ref': None, 'freq_d_ref': None, 'sum_Xd': None,
+            'success_count': 0, 'total_files': n_files,
+            'rise_positions': np.full(n_files, -1, dtype=np.int64),
+            'n_averages': np.zeros(n_files, dtype=np.int64),
+            'accumulator': accumulator,
+        }
+        
+        count = 0
+        for chunk_start in tqdm(range(0, n_files, chunk_size), desc="批量处理", unit="batch"):
+            chunk_files = file_list[chunk_start:chunk_start + chunk_size]
+            arrays = []
+            for i, f in enumerate(chunk_files):
+                try:
+                    arrays.append(self.file_manager.load_u32_data(f, skip_first=cfg.skip_first_value))
+                except Exception as e:
+                    logger.warning(f"加载文件 {f} (索引 {chunk_start + i}) 失败: {e}")
+                    arrays.append(np.zeros(0, dtype=np.uint32))
+            
+            lengths = np.array([a.size for a in arrays])
+            stack = np.zeros((len(arrays), max(lengths.max(), 2)), dtype=np.uint32)
+            for i, a in enumerate(arrays):
+                stack[i, :a.size] = a
+            del arrays
+            
+            chunk_rise = None if rise_positions is None else rise_positions[chunk_start:chunk_start + len(chunk_files)]
+            try:
+                res = self.process_batch(stack, lengths, chunk_rise, first_index=chunk_start)
+            except Exception as e:
+                logger.warning(f"处理第 {chunk_start}~{chunk_start + len(chunk_files) - 1} 个文件失败: {e}")
+                continue
+            
+            results['rise_positions'][chunk_start:chunk_start + len(chunk_files)] = res['rise_pos']
+            results['n_averages'][chunk_start:chunk_start + len(chunk_files)] = res['n_averages']
+            n_ok = int(res['valid'].sum())
+            if n_ok == 0:
+                continue
+            accumulator.add_batch(res)
+            for key, src in TRACE_KEYS:
+                if key in out:
+                    out[key][count:count + n_ok] = res[src]
+            count += n_ok
+        
+        if count == 0:
+            raise RuntimeError("没有文件成功处理")
+        
+        results.update({key: value[:count] for key, value in out.items()})
+        results.update({
+            'freq_ref': accumulator.freq_ref,
+            'freq_d_ref': accumulator.freq_d_ref,
+            'sum_Xd': accumulator.sum_Xd,
+            'success_count': count,
+        })
+        results['n_averages'] = results['n_averages'][results['n_averages'] > 0]
+        logger.info(f"成功处理 {count}/{n_files} 个文件")
+        self.log_fold_averages(results)
+        return results
+
+    def analyze_edges(self, sorted_data: np.ndarray, periodic: bool = False) -> Dict[str, Any]:
+        """
+        完整的边沿分析流程，返回边沿位置和中点位置（ROI传periodic=False，整周期的y_full传True）
         """
         try:
-            edges_dict = self.edge_detector.analyze_edges(sorted_data)
+            edges_dict = self.edge_detector.analyze_edges(sorted_data, periodic)
             return edges_dict
         except Exception as e:
             logger.error(f"边沿分析失败: {e}")
@@ -419,21 +765,28 @@ class DataAnalyzer:
         logger.info(f"结果已保存到: {output_filename}")
 
     def run_analysis(self):
-        """运行完整分析流程"""
+        """
+        运行完整分析流程
+        
+        Raises:
+            FileNotFoundError: 输入目录中没有数据文件（由FileManager.find_data_files抛出）
+        """
         logger.info("开始数据分析...")
       
-        files = self.file_manager.find_csv_files(self.config.input_dir, self.config.recursive)
-        if not files:
-            raise RuntimeError(f"在目录 {self.config.input_dir} 中未找到CSV文件")
+        files = self.file_manager.find_data_files(self.config.input_dir, self.config.recursive,
+                                                  self.config.prefer_binary)
         
         # 批量处理文件
-        results = self.batch_process_files(files)
+        if self.config.batch_mode:
+            results = self.batch_process_files_stacked(files)
+        else:
+            results = self.batch_process_files(files)
         
         # 计算平均值
         averages = self.result_processor.calculate_averages(results)
         
         # 对平均数据进行边沿分析
-        edge_analysis = self.analyze_edges(averages['y_full_avg'])
+        edge_analysis = self.analyze_edges(averages['y_full_avg'], periodic=True)
       
         # 使用绘图器绘制图表（如果提供了绘图器）
         if self.plotter:
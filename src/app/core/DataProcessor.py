@@ -3,13 +3,48 @@ import numpy as np
 from typing import Tuple, Optional, List, Dict, Any
 import logging
 
+try:
+    from .SpectralEngine import SpectralEngine
+except ImportError:
+    from SpectralEngine import SpectralEngine
+
 logger = logging.getLogger(__name__)
 
+
+class ReconstructionPlan:
+    """
+    等效时间重建计划：按周期排序的索引、对齐目标位置和ROI范围
+    
+    只取决于 clock_freq、trigger_freq、n_points 和 ROI 范围，由DataProcessor按配置缓存。
+    排序后用 DataProcessor.align_data（np.roll）对齐，不再为每个移位量构造gather索引。
+    """
+    
+    def __init__(self, sort_idx: np.ndarray, target_position: int, roi_start: int, roi_end: int):
+        self.sort_idx = sort_idx
+        self.n_points = len(sort_idx)
+        self.target_position = target_position
+        self.roi_start = roi_start
+        self.roi_end = roi_end
+    
+    def sort(self, segment: np.ndarray) -> np.ndarray:
+        """按周期内时间排序，与sort_data_by_period结果一致"""
+        return segment[..., self.sort_idx]
+
+
 class DataProcessor:
     """数据处理核心类"""
     
+    TRIGGER_SEARCH_CHUNK = 65536   # 分块搜索bit31上升沿时每块的采样点数
+    
     def __init__(self, config):
         self.config = config
+        # 排序索引按参数缓存，窗函数和频率轴由频谱引擎缓存
+        self._sort_idx_cache: Dict[Tuple[int, float, float], np.ndarray] = {}
+        self.spectral = SpectralEngine(workers=getattr(config, 'fft_workers', 1))
+        self._plan: Optional[ReconstructionPlan] = None
+        self._plan_key = None
+        self._adc_buffer: Optional[np.ndarray] = None
+        self._fold_cache: Dict[Tuple[int, int, float, float], Tuple[np.ndarray, np.ndarray]] = {}
 
     
     def smooth_data(self, 
@@ -154,20 +189,69 @@ class DataProcessor:
     
     def extract_adc_data(self, u32_arr: np.ndarray, use_signed18: bool = True) -> Tuple[np.ndarray, np.ndarray]:
         """从uint32数组中提取bit31和ADC数据"""
-        # 提取bit31
-        bit31 = ((u32_arr >> 31) & 0x1).astype(np.uint8)
-      
-        # 提取ADC数据
-        adc_18u = (u32_arr & ((1 << 20) - 1)).astype(np.uint32)
-      
-        # 转换为有符号或无符号
+        # 提取bit31（比较结果直接按uint8解释，不再移位和转换类型）
+        bit31 = np.greater_equal(u32_arr, 1 << 31).view(np.uint8)
+        return bit31, self.unpack_adc(u32_arr, use_signed18)
+    
+    def unpack_adc(self, u32_arr: np.ndarray, use_signed18: bool = True,
+                   out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        从uint32数组中提取低20位ADC数据，结果为int32，不生成bit31数组
+        
+        有符号时在int32视图上左移12位再算术右移12位完成符号扩展，只遍历两次；
+        无符号时一次按位与。out为同形状的int32数组时结果直接写入（见adc_buffer）。
+        """
+        u32_arr = np.asarray(u32_arr)
+        if u32_arr.dtype.itemsize != 4:
+            u32_arr = u32_arr.astype(np.uint32)
+        words = u32_arr.view(np.int32)
+        if out is None:
+            out = np.empty(words.shape, dtype=np.int32)
+        
         if use_signed18:
-            adc_18s = ((adc_18u + (1 << 19)) & ((1 << 20) - 1)) - (1 << 19)
-            adc_data = adc_18s.astype(np.int32)
+            np.left_shift(words, 12, out=out)
+            np.right_shift(out, 12, out=out)
         else:
-            adc_data = adc_18u.astype(np.int32)
-      
-        return bit31, adc_data
+            np.bitwise_and(words, (1 << 20) - 1, out=out)
+        return out
+    
+    def adc_buffer(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        可跨文件复用的int32输出缓冲区（形状不同时重新分配）
+        
+        注意：写入该缓冲区的结果在处理下一个文件时会被覆盖
+        """
+        shape = tuple(shape)
+        if self._adc_buffer is None or self._adc_buffer.shape != shape:
+            self._adc_buffer = np.empty(shape, dtype=np.int32)
+        return self._adc_buffer
+    
+    def _first_trigger_edge(self, u32_arr: np.ndarray, edge_search_start: int) -> int:
+        """分块搜索bit31首个0->1跳变后的位置，未找到返回-1"""
+        n = len(u32_arr)
+        chunk = self.TRIGGER_SEARCH_CHUNK
+        for lo in range(max(edge_search_start + 1, 1), n, chunk):
+            high = np.greater_equal(u32_arr[lo - 1:lo + chunk], 1 << 31)
+            edges = np.flatnonzero(high[1:] > high[:-1])
+            if edges.size:
+                return lo + int(edges[0])
+        return -1
+    
+    def find_trigger_edge(self, u32_arr: np.ndarray, edge_search_start: int = 1) -> Optional[int]:
+        """
+        直接在uint32数组中检测bit31上升沿位置，结果与 extract_adc_data -> detect_valid_data 一致
+        
+        按TRIGGER_SEARCH_CHUNK分块比较，找到后立即返回，不生成整帧的bit31数组
+        """
+        rise_idx = self._first_trigger_edge(u32_arr, edge_search_start)
+        if rise_idx < 0:
+            logger.warning("未找到上升沿")
+            return None
+        return rise_idx
+    
+    def find_trigger_edges(self, u32_stack: np.ndarray, edge_search_start: int = 1) -> np.ndarray:
+        """逐行分块检测bit31上升沿，返回上升沿位置数组，未找到的行为-1（同detect_valid_data_batch）"""
+        return np.array([self._first_trigger_edge(row, edge_search_start) for row in u32_stack], dtype=np.int64)
     
     def detect_valid_data(self, bit31: np.ndarray, edge_search_start: int = 1) -> Optional[int]:
         """检测bit31数组中的上升沿位置"""
@@ -195,46 +279,188 @@ class DataProcessor:
         # 截取数据段
         return adc_data[start_capture : start_capture + n_points]
     
+    def fold_index(self, n_points: int, n_periods: int, t_sample: float,
+                   t_trig: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        多周期折叠的分格索引，按参数缓存
+        
+        第p个周期第i个采样点按周期内时间归入排序网格（第0个周期排序后的相位）中最近的一格，
+        第0个周期与period_sort_index的排序结果一一对应，因此每格至少有一个采样点。
+        
+        Returns:
+            (每个采样点所在的格 [n_periods, n_points], 每格的采样点数 [n_points])
+        """
+        key = (n_points, n_periods, t_sample, t_trig)
+        cached = self._fold_cache.get(key)
+        if cached is None:
+            sort_idx = self.period_sort_index(n_points, t_sample, t_trig)
+            grid = ((np.arange(n_points, dtype=np.float64) * t_sample) % t_trig)[sort_idx]
+            phase = (np.arange(n_periods * n_points, dtype=np.float64) * t_sample) % t_trig
+            # 循环意义下左右两个相邻网格点中较近的一个
+            right = np.searchsorted(grid, phase)
+            left = right - 1
+            right %= n_points
+            left %= n_points
+            closer_right = (grid[right] - phase) % t_trig < (phase - grid[left]) % t_trig
+            bins = np.where(closer_right, right, left).reshape(n_periods, n_points)
+            counts = np.bincount(bins.ravel(), minlength=n_points).astype(np.float64)
+            bins.setflags(write=False)
+            counts.setflags(write=False)
+            cached = (bins, counts)
+            self._fold_cache[key] = cached
+        return cached
+    
+    def fold_segment(self, adc_data: np.ndarray, start_capture: int, n_points: int,
+                     n_periods: int) -> np.ndarray:
+        """
+        将从start_capture开始的n_periods个周期折叠到同一个等效时间网格上并平均
+        
+        结果已按周期内时间排序，n_periods为1时与 sort_data_by_period 的结果相同
+        """
+        cfg = self.config
+        bins, counts = self.fold_index(n_points, n_periods, cfg.t_sample, cfg.t_trig)
+        samples = adc_data[start_capture:start_capture + n_periods * n_points]
+        return np.bincount(bins.ravel(), weights=samples, minlength=n_points) / counts
+    
+    def fold_batch(self, adc_data: np.ndarray, starts: np.ndarray, n_periods: int) -> np.ndarray:
+        """
+        二维批量折叠：每行从starts[i]开始折叠n_periods个周期，结果 [N, n_points] 已按周期内时间排序
+        
+        逐周期gather后用一次bincount累加到 (行, 格) 上，临时数组只有一个周期大小
+        """
+        cfg = self.config
+        n = cfg.n_points
+        n_rows = adc_data.shape[0]
+        bins, counts = self.fold_index(n, n_periods, cfg.t_sample, cfg.t_trig)
+        row_offset = (np.arange(n_rows) * n)[:, None]
+        cols = np.arange(n)
+        folded = np.zeros(n_rows * n)
+        for p in range(n_periods):
+            samples = np.take_along_axis(adc_data, starts[:, None] + (p * n + cols), axis=1)
+            folded += np.bincount((row_offset + bins[p]).ravel(), weights=samples.ravel(), minlength=n_rows * n)
+        folded = folded.reshape(n_rows, n)
+        folded /= counts
+        return folded
+    
     def sort_data_by_period(self, segment_data: np.ndarray, 
                           t_sample: float, t_trig: float) -> Tuple[np.ndarray, np.ndarray]:
-        """按周期时间对数据进行排序"""
-        # 计算周期内时间
-        t_within_period = (np.arange(len(segment_data), dtype=np.float64) * t_sample) % t_trig
-      
-        # 按时间排序
-        sort_idx = np.argsort(t_within_period)
+        """按周期时间对数据进行排序（排序索引按参数缓存）"""
+        sort_idx = self.period_sort_index(len(segment_data), t_sample, t_trig)
         sorted_data = segment_data[sort_idx]
       
         return sorted_data, sort_idx
     
-    def compute_spectrum(self, data: np.ndarray, ts_eff: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        """计算数据的频谱"""
-        # 去均值
-        data_centered = data.astype(np.float64) - np.mean(data)
-      
-        # 加窗
-        window = np.hanning(len(data))
-        windowed_data = data_centered * window
-      
-        # 计算FFT
-        fft_result = np.fft.rfft(windowed_data)
-        freq = np.fft.rfftfreq(len(data), d=ts_eff)
-      
-        # 归一化
-        scale = (np.sum(window) / len(data)) * len(data)
-        magnitude_linear = np.abs(fft_result) / (scale + 1e-12)
-      
-        return freq, magnitude_linear, fft_result
+    def compute_spectrum(self, data: np.ndarray, ts_eff: float,
+                         window_type: str = 'hanning') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """计算数据的频谱（去均值、加窗、rfft），支持[N, 点数]二维输入逐行计算"""
+        return self.spectral.spectrum(data, ts_eff, window_type)
     
     def compute_difference(self, data: np.ndarray, diff_points: int) -> np.ndarray:
-        """计算数据的差分"""
-        return data[diff_points:] - data[:-diff_points]
+        """计算数据的差分（沿最后一维，支持二维批量数据）"""
+        return data[..., diff_points:] - data[..., :-diff_points]
     
     def align_data(self, sorted_data: np.ndarray, rise_pos: int, target_position: int) -> np.ndarray:
         """对齐数据，使上升沿位于目标位置"""
         shift = (target_position - rise_pos) % len(sorted_data)
         return np.roll(sorted_data, shift)
     
+    def align_batch(self, sorted_data: np.ndarray, shifts: np.ndarray) -> np.ndarray:
+        """
+        逐行循环移位，第i行结果与 np.roll(sorted_data[i], shifts[i]) 一致
+        
+        每行两次切片复制，不构造 [N, n] 的索引数组
+        """
+        n = sorted_data.shape[1]
+        out = np.empty_like(sorted_data)
+        for i, shift in enumerate(np.asarray(shifts) % n):
+            out[i, shift:] = sorted_data[i, :n - shift]
+            out[i, :shift] = sorted_data[i, n - shift:]
+        return out
+    
     def extract_roi(self, aligned_data: np.ndarray, roi_start: int, roi_end: int) -> np.ndarray:
-        """从对齐后的数据中提取感兴趣区域(ROI)"""
-        return aligned_data[roi_start:roi_end]
+        """从对齐后的数据中提取感兴趣区域(ROI)（沿最后一维，支持二维批量数据）"""
+        return aligned_data[..., roi_start:roi_end]
+    
+    # ===== 重建计划 =====
+    def _plan_config_key(self) -> Tuple:
+        cfg = self.config
+        return (cfg.clock_freq, cfg.trigger_freq, cfg.n_points, cfg.roi_start, cfg.roi_end)
+    
+    def get_reconstruction_plan(self) -> ReconstructionPlan:
+        """
+        当前配置对应的重建计划
+        
+        每次调用都与配置中的 clock_freq/trigger_freq/n_points/ROI 比较，配置改变后自动重建
+        """
+        key = self._plan_config_key()
+        if self._plan is None or self._plan_key != key:
+            cfg = self.config
+            sort_idx = self.period_sort_index(cfg.n_points, cfg.t_sample, cfg.t_trig)
+            self._plan = ReconstructionPlan(sort_idx, cfg.n_points // 4, cfg.roi_start, cfg.roi_end)
+            self._plan_key = key
+        return self._plan
+    
+    def invalidate_plan(self):
+        """丢弃缓存的重建计划和排序索引（例如config对象被整体替换后）"""
+        self._plan = None
+        self._plan_key = None
+        self._sort_idx_cache.clear()
+        self._fold_cache.clear()
+    
+    # ===== 二维批量处理：每行一次采集，沿axis=1计算 =====
+    def detect_valid_data_batch(self, bit31: np.ndarray, edge_search_start: int = 1) -> np.ndarray:
+        """逐行检测bit31中的首个上升沿，返回上升沿位置数组，未找到的行为-1"""
+        edges = (bit31[:, 1:] == 1) & (bit31[:, :-1] == 0)
+        edges[:, :edge_search_start] = False
+        found = edges.any(axis=1)
+        return np.where(found, edges.argmax(axis=1) + 1, -1)
+    
+    def period_sort_index(self, n_points: int, t_sample: float, t_trig: float) -> np.ndarray:
+        """按周期内时间排序的索引（与sort_data_by_period一致），同一参数只计算一次"""
+        key = (n_points, t_sample, t_trig)
+        sort_idx = self._sort_idx_cache.get(key)
+        if sort_idx is None:
+            t_within_period = (np.arange(n_points, dtype=np.float64) * t_sample) % t_trig
+            sort_idx = np.argsort(t_within_period)
+            sort_idx.setflags(write=False)
+            self._sort_idx_cache[key] = sort_idx
+        return sort_idx
+    
+    def gather_aligned_batch(self, adc_data: np.ndarray, starts: np.ndarray, sort_idx: np.ndarray,
+                             shifts: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        截取、按周期排序并循环移位对齐，合并为一次gather
+        
+        结果第i行第j列为 adc_data[i, starts[i] + sort_idx[(j - shifts[i]) % n]]，
+        等价于逐行 extract_data_segment -> sort_data_by_period -> align_data
+        """
+        n = len(sort_idx)
+        if shifts is None:
+            cols = starts[:, None] + sort_idx[None, :]
+        else:
+            cols = starts[:, None] + sort_idx[(np.arange(n)[None, :] - shifts[:, None]) % n]
+        return np.take_along_axis(adc_data, cols, axis=1)
+    
+    def smooth_uniform_batch(self, data: np.ndarray, window_size: int = 5) -> np.ndarray:
+        """
+        逐行均匀移动平均，结果与 smooth_data(row, window_size, 'uniform', mode='same') 一致
+        
+        用累加和计算窗口和，耗时与窗口大小无关
+        """
+        n = data.shape[1]
+        if window_size < 1:
+            raise ValueError("窗口大小必须大于0")
+        if window_size > n:
+            raise ValueError("窗口大小不能大于数据长度")
+        if window_size % 2 == 0:
+            window_size += 1
+        half = window_size // 2
+        
+        csum = np.zeros((data.shape[0], n + 2 * half + 1), dtype=np.float64)
+        np.cumsum(data, axis=1, out=csum[:, half + 1:half + 1 + n])
+        csum[:, half + 1 + n:] = csum[:, half + n:half + n + 1]
+        return (csum[:, window_size:] - csum[:, :-window_size]) / window_size
+    
+    def compute_spectrum_batch(self, data: np.ndarray, ts_eff: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """逐行计算频谱，结果与compute_spectrum一致"""
+        return self.spectral.spectrum(data, ts_eff)
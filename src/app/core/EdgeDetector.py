@@ -3,12 +3,25 @@ import matplotlib.pyplot as plt
 import numpy as np
 from typing import Optional, Dict, Any, List, Tuple
 import logging
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from .ConfigManager import SearchMethod
+    from .SpectralEngine import SpectralEngine
+except ImportError:
+    from ConfigManager import SearchMethod
+    from SpectralEngine import SpectralEngine
 logger = logging.getLogger(__name__)
 class EdgeDetector:
     """边沿检测器类"""
     
+    PYRAMID_MIN_LENGTH = 1024     # 金字塔最粗一级的最小长度
+    PYRAMID_REFINE_MARGIN = 4     # 逐级细化时在上一级位置两侧额外搜索的点数
+    
     def __init__(self, config):
         self.config = config
+        self.spectral = SpectralEngine(workers=getattr(config, 'fft_workers', 1))
+        self._edge_filter_cache: Dict[Tuple[int, float, float], np.ndarray] = {}
     
     def _preprocess_data(self, data: np.ndarray, window_size: int = 5) -> np.ndarray:
         """数据预处理：移动平均滤波"""
@@ -61,111 +74,286 @@ class EdgeDetector:
         Returns:
             候选点列表，每个元素为(位置, 幅度)
         """
+        n = len(smoothed_data)
         # 第一步：窗口移动检测候选区间
-        window_size = max(10, int(len(smoothed_data) * 0.05))  # 5%的窗口大小，最小10个点
-        step_size = max(5, int(len(smoothed_data) * 0.03))    # 3%的步进大小，最小5个点
+        window_size = max(10, int(n * 0.05))  # 5%的窗口大小，最小10个点
+        step_size = max(5, int(n * 0.03))    # 3%的步进大小，最小5个点
         
         # 确保步长不为0
         if step_size == 0:
             step_size = 1
-            
-        threshold = np.ptp(smoothed_data) * min_amplitude_ratio  # 峰峰值阈值
         
-        candidate_windows = []
+        starts = np.arange(0, n - window_size, step_size)
+        if starts.size == 0:
+            return []
         
-        # 滑动窗口检测
-        for start in range(0, len(smoothed_data) - window_size, step_size):
-            end = start + window_size
-            window_data = smoothed_data[start:end]
-            window_p2p = np.ptp(window_data)  # 计算窗口内的峰峰值
-            
-            if window_p2p > threshold:
-                candidate_windows.append((start, end, window_p2p))
+        threshold = np.ptp(smoothed_data) * min_amplitude_ratio  # 峰峰值阈值
         
-        if not candidate_windows:
+        # 所有窗口的峰峰值一次计算（窗口为原数组的视图，不复制）
+        windows = sliding_window_view(smoothed_data, window_size)[starts]
+        window_p2p = windows.max(axis=1) - windows.min(axis=1)
+        candidate = window_p2p > threshold
+        if not candidate.any():
             return []
         
         # 第二步：对候选区间做平均值处理，去掉平均值最小的异常点
-        valid_windows = []
-        window_means = []
-        
-        for start, end, p2p in candidate_windows:
-            window_mean = np.mean(smoothed_data[start:end])
-            window_means.append(window_mean)
+        window_means = windows[candidate].mean(axis=1)
         
         # 计算平均值的均值和标准差
         mean_of_means = np.mean(window_means)
         std_of_means = np.std(window_means)
         
         # 筛选有效的窗口（去掉平均值异常的点）
-        for i, (start, end, p2p) in enumerate(candidate_windows):
-            if abs(window_means[i] - mean_of_means) < 2 * std_of_means:
-                valid_windows.append((start, end, p2p))
-        
-        if not valid_windows:
+        valid_starts = starts[candidate][np.abs(window_means - mean_of_means) < 2 * std_of_means]
+        if valid_starts.size == 0:
             return []
         
         # 第三步：在有效窗口内使用差分法搜索精确的边沿位置
-        valid_candidates = []
+        # 窗口内差分即全局差分的切片，按窗口设置差分阈值
+        dy_windows = sliding_window_view(np.diff(smoothed_data), window_size - 1)[valid_starts]
+        if is_rising:
+            dy_threshold = dy_windows.max(axis=1, keepdims=True) * 0.3
+            hit = dy_windows > dy_threshold
+        else:
+            dy_threshold = dy_windows.min(axis=1, keepdims=True) * 0.3
+            hit = dy_windows < dy_threshold
+        
+        # 按窗口顺序、窗口内从前到后展开为全局坐标（重叠窗口中的点会重复出现，与逐窗口搜索一致）
+        rows, offsets = np.nonzero(hit)
+        global_pos = valid_starts[rows] + offsets + 1
+        global_pos = global_pos[(global_pos >= 20) & (global_pos < n - 20)]
+        if global_pos.size == 0:
+            return []
         
-        for start, end, p2p in valid_windows:
-            window_data = smoothed_data[start:end]
-            
-            # 计算差分
-            dy = np.diff(window_data)
+        # 过滤毛刺噪声点（检测位置固定为3，对所有候选点结果相同）
+        if self._is_spike_noise(smoothed_data, 3):
+            return []
+        
+        # 计算候选点前后±2%窗口的平均值（每个位置只算一次）
+        window_size_5pct = max(5, int(n * 0.02))
+        positions, inverse = np.unique(global_pos, return_inverse=True)
+        pre_avg, post_avg = self._window_averages(smoothed_data, positions, window_size_5pct)
+        pre_avg, post_avg = pre_avg[inverse], post_avg[inverse]
+        
+        # 判断是否为毛刺信号：如果两边平均值差距很小，说明是毛刺
+        keep = ~(np.abs(pre_avg - post_avg) < threshold * 0.1)
+        
+        # 通过两边大小判断边沿类型
+        if is_rising:
+            keep &= post_avg > pre_avg
+            amplitude = post_avg - pre_avg
+        else:
+            keep &= post_avg < pre_avg
+            amplitude = pre_avg - post_avg
+        
+        return list(zip(global_pos[keep], amplitude[keep]))
+    
+    def _window_averages(self, data: np.ndarray, positions: np.ndarray,
+                         half_width: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        各位置之前 [pos-half_width, pos) 和之后 [pos, pos+half_width) 的平均值，靠近两端时截短窗口
+        
+        完整窗口按行对滑动窗口视图求均值，与逐个切片np.mean的结果逐位一致
+        """
+        n = len(data)
+        pre_avg = np.empty(len(positions))
+        post_avg = np.empty(len(positions))
+        
+        full_pre = positions >= half_width
+        full_post = positions + half_width <= n
+        if n >= half_width:
+            view = sliding_window_view(data, half_width)
+            # 分块计算，限制临时数组大小
+            chunk = max(1, (1 << 20) // half_width)
+            for idx, offset, out in ((np.flatnonzero(full_pre), -half_width, pre_avg),
+                                     (np.flatnonzero(full_post), 0, post_avg)):
+                for i in range(0, idx.size, chunk):
+                    sel = idx[i:i + chunk]
+                    out[sel] = view[positions[sel] + offset].mean(axis=1)
+        
+        for i in np.flatnonzero(~full_pre):
+            pos = positions[i]
+            pre_avg[i] = np.mean(data[max(0, pos - half_width):pos])
+        for i in np.flatnonzero(~full_post):
+            pos = positions[i]
+            post_avg[i] = np.mean(data[pos:min(n, pos + half_width)])
+        return pre_avg, post_avg
+
+    # ===== 多分辨率(金字塔)搜索 =====
+    def _build_pyramid(self, data: np.ndarray) -> List[np.ndarray]:
+        """逐级2点块均值降采样，直到长度不足PYRAMID_MIN_LENGTH的两倍，返回[全分辨率, 1/2, 1/4, ...]"""
+        levels = [np.asarray(data, dtype=np.float64)]
+        while len(levels[-1]) >= 2 * self.PYRAMID_MIN_LENGTH:
+            prev = levels[-1]
+            half = len(prev) // 2
+            levels.append(0.5 * (prev[0:2 * half:2] + prev[1:2 * half:2]))
+        return levels
+    
+    @staticmethod
+    def _step_amplitudes(data: np.ndarray, start: int, stop: int, half_width: int) -> np.ndarray:
+        """
+        位置start..stop-1处的台阶幅度：之后half_width点均值减之前half_width点均值，靠近两端时截短窗口
+        
+        只对[start-half_width, stop+half_width)做局部累加和
+        """
+        n = len(data)
+        lo = max(0, start - half_width)
+        hi = min(n, stop + half_width)
+        csum = np.concatenate(([0.0], np.cumsum(data[lo:hi], dtype=np.float64)))
+        pos = np.arange(start, stop)
+        pre_lo = np.maximum(pos - half_width, 0)
+        post_hi = np.minimum(pos + half_width, n)
+        pre = (csum[pos - lo] - csum[pre_lo - lo]) / np.maximum(pos - pre_lo, 1)
+        post = (csum[post_hi - lo] - csum[pos - lo]) / np.maximum(post_hi - pos, 1)
+        return post - pre
+    
+    def _find_edge_candidates_pyramid(self, data: np.ndarray,
+                                      is_rising: bool = True,
+                                      min_amplitude_ratio: float = 0.3) -> List[Tuple[int, float]]:
+        """
+        多分辨率边沿候选搜索，返回格式与_find_edge_candidates相同
+        
+        在最粗一级上按台阶幅度的局部极大值找出候选边沿（窗口峰峰值需超过阈值），
+        再逐级在上一级位置附近细化；全分辨率上只在小窗口内按差分阈值和前后±2%均值确定位置和幅度。
+        """
+        n = len(data)
+        if n < 100:
+            return self._find_edge_candidates(data, is_rising, min_amplitude_ratio)
+        
+        sign = 1.0 if is_rising else -1.0
+        threshold = np.ptp(data) * min_amplitude_ratio
+        half_width = max(5, int(n * 0.02))        # 与_find_edge_candidates的前后均值窗口一致
+        window_size = max(10, int(n * 0.05))
+        
+        levels = self._build_pyramid(data)
+        top = len(levels) - 1
+        coarse = levels[top]
+        factor = 1 << top
+        
+        # 最粗一级：台阶幅度的局部极大值
+        hw = max(2, half_width // factor)
+        amp = sign * self._step_amplitudes(coarse, 0, len(coarse), hw)
+        # 两端补-inf，使紧贴数据两端的边沿（未对齐数据中常见）也能成为极大值
+        padded = np.concatenate(([-np.inf], amp, [-np.inf]))
+        peak = (amp >= padded[:-2]) & (amp > padded[2:]) & (amp >= threshold * 0.1)
+        peaks = np.flatnonzero(peak)
+        if peaks.size == 0:
+            return []
+        
+        # 窗口峰峰值需超过阈值（与逐窗口搜索的候选区间条件对应）
+        half_window = max(1, window_size // (2 * factor))
+        p2p_windows = sliding_window_view(
+            np.pad(coarse, half_window, mode='edge'), 2 * half_window + 1)[peaks]
+        peaks = peaks[(p2p_windows.max(axis=1) - p2p_windows.min(axis=1)) > threshold]
+        
+        # 非极大值抑制：hw范围内只保留幅度最大的峰
+        kept = []
+        for c in peaks[np.argsort(-amp[peaks], kind='stable')]:
+            if all(abs(c - k) > hw for k in kept):
+                kept.append(c)
+        
+        margin = self.PYRAMID_REFINE_MARGIN
+        positions = []
+        for c in sorted(kept):
+            # 逐级细化到全分辨率的上一级
+            for level in range(top - 1, 0, -1):
+                lv = levels[level]
+                lo = max(0, 2 * c - margin)
+                hi = min(len(lv), 2 * c + 2 + margin)
+                lv_amp = sign * self._step_amplitudes(lv, lo, hi, max(2, half_width >> level))
+                c = lo + int(np.argmax(lv_amp))
             
-            # 设置差分阈值
-            if is_rising:
-                dy_threshold = np.max(dy) * 0.3 if len(dy) > 0 else 0
-                candidate_indices = np.flatnonzero(dy > dy_threshold) + 1
-            else:
-                dy_threshold = np.min(dy) * 0.3 if len(dy) > 0 else 0
-                candidate_indices = np.flatnonzero(dy < dy_threshold) + 1
+            # 全分辨率：在覆盖整个边沿的小窗口内按差分阈值筛选（与逐窗口搜索的差分条件一致）
+            center = 2 * c + 1 if top > 0 else c
+            lo = max(1, center - max(factor, 2 * margin))
+            hi = min(n, center + max(factor, 2 * margin) + 1)
+            dy = sign * (data[lo:hi] - data[lo - 1:hi - 1])
+            positions.append(lo + np.flatnonzero(dy > dy.max() * 0.3))
+        
+        if not positions:
+            return []
+        positions = np.unique(np.concatenate(positions))
+        positions = positions[(positions >= 20) & (positions < n - 20)]
+        if positions.size == 0 or self._is_spike_noise(data, 3):
+            return []
+        
+        # 前后±2%均值、毛刺和方向判断与_find_edge_candidates相同
+        pre_avg, post_avg = self._window_averages(data, positions, half_width)
+        keep = ~(np.abs(pre_avg - post_avg) < threshold * 0.1)
+        if is_rising:
+            keep &= post_avg > pre_avg
+            amplitude = post_avg - pre_avg
+        else:
+            keep &= post_avg < pre_avg
+            amplitude = pre_avg - post_avg
+        return list(zip(positions[keep], amplitude[keep]))
+    
+    # ===== 频域(FFT)定位 =====
+    def _edge_filter(self, n: int, ts_eff: float, bandwidth_hz: float) -> np.ndarray:
+        """
+        长度为n的rfft边沿滤波器：求导(j2πf，高通)乘高斯低通(-3dB带宽为bandwidth_hz)，
+        相当于用高斯平滑后的斜率作匹配滤波；按(长度, ts_eff, 带宽)缓存
+        """
+        key = (n, ts_eff, bandwidth_hz)
+        kernel = self._edge_filter_cache.get(key)
+        if kernel is None:
+            freq = self.spectral.frequencies(n, ts_eff)
+            kernel = 2j * np.pi * freq * np.exp(-np.log(2) * (freq / bandwidth_hz) ** 2)
+            kernel.setflags(write=False)
+            self._edge_filter_cache[key] = kernel
+        return kernel
+    
+    def find_rise_positions_fft(self, traces: np.ndarray, periodic: bool = True) -> np.ndarray:
+        """
+        频域边沿定位：多条曲线一次批量FFT，返回每行的上升沿位置（平滑后斜率最大处）
+        
+        返回的是斜率最大处（阶跃的50%点）。RISING方法取前后2%窗口均值差最大处，
+        无反射时与此一致；上升沿后2%窗口内有反射台阶时RISING会偏向反射一侧
+        （300ps上升沿、1ns/0.3反射时约晚37个点），两者之差不是本方法的偏差。
+        
+        Args:
+            traces: [N, 点数] 二维数组（也接受一维数组）
+            periodic: 数据是否为整周期（按周期排序的数据首尾相接，循环FFT可直接定位
+                      跨越数组首尾的上升沿）；ROI等非整周期数据应传False，此时先做镜像延拓，
+                      避免循环FFT把首尾之间的跳变当作边沿
             
-            # 转换回全局坐标并计算幅度
-            for candidate in candidate_indices:
-                global_pos = start + candidate
-                if 20 <= global_pos < len(smoothed_data) - 20:
-                    # 新增：过滤毛刺噪声点
-                    if self._is_spike_noise(smoothed_data, 3):
-                        continue  # 跳过毛刺噪声点
-                    
-                    # 计算候选点前后±5%窗口的平均值
-                    window_size_5pct = max(5, int(len(smoothed_data) * 0.02))
-                    pre_window_start = max(0, global_pos - window_size_5pct)
-                    pre_window_end = global_pos
-                    post_window_start = global_pos
-                    post_window_end = min(len(smoothed_data), global_pos + window_size_5pct)
-                    
-                    pre_avg = np.mean(smoothed_data[pre_window_start:pre_window_end])
-                    post_avg = np.mean(smoothed_data[post_window_start:post_window_end])
-                    
-                    # 判断是否为毛刺信号：如果两边平均值差距很小，说明是毛刺
-                    if abs(pre_avg - post_avg) < threshold * 0.1:
-                        continue  # 跳过毛刺信号
-                    
-                    # 通过两边大小判断边沿类型
-                    if is_rising and post_avg > pre_avg:
-                        amplitude = post_avg - pre_avg
-                        valid_candidates.append((global_pos, amplitude))
-                    elif not is_rising and post_avg < pre_avg:
-                        amplitude = pre_avg - post_avg
-                        valid_candidates.append((global_pos, amplitude))
-        
-        return valid_candidates
+        Returns:
+            每行的上升沿位置数组（一维输入时为长度1的数组）
+        """
+        data = np.atleast_2d(np.asarray(traces, dtype=np.float64))
+        n = data.shape[1]
+        if not periodic:
+            # 镜像延拓后首尾连续，镜像一半的斜率反号，不会产生额外的上升沿
+            data = np.concatenate((data, data[:, ::-1]), axis=1)
+        bandwidth = getattr(self.config, 'fft_edge_bandwidth_hz', 10e9)
+        
+        spectrum = self.spectral.rfft(data)
+        spectrum *= self._edge_filter(data.shape[1], self.config.ts_eff, bandwidth)
+        slope = self.spectral.irfft(spectrum, data.shape[1])
+        return np.argmax(slope[:, :n], axis=1)
+    
+    def _edge_candidates(self, data: np.ndarray, is_rising: bool, min_amplitude_ratio: float,
+                         search_method: Optional[int] = None) -> List[Tuple[int, float]]:
+        """按搜索方法选择全分辨率或多分辨率的候选搜索（FFT方法的第二边沿搜索使用全分辨率）"""
+        if search_method is None:
+            search_method = self.config.search_method
+        if search_method == SearchMethod.PYRAMID:
+            return self._find_edge_candidates_pyramid(data, is_rising, min_amplitude_ratio)
+        return self._find_edge_candidates(data, is_rising, min_amplitude_ratio)
 
     def find_rise_position(self, sorted_data: np.ndarray, search_method: int, 
                          adc_full_mean: Optional[float] = None,
-                         min_edge_amplitude_ratio: float = 0.5) -> int:
-        """在排序后的数据中搜索上升沿位置"""
+                         min_edge_amplitude_ratio: float = 0.5,
+                         periodic: bool = True) -> int:
+        """在排序后的数据中搜索上升沿位置（periodic只影响FFT方法，见find_rise_positions_fft）"""
         # 预处理数据
  
-        if search_method == 1:  # RISING
+        if search_method in (SearchMethod.RISING, SearchMethod.PYRAMID):
             if adc_full_mean is None:
                 adc_full_mean = np.mean(sorted_data)
             
             # 找到所有上升沿候选点
-            candidates = self._find_edge_candidates(sorted_data, True, min_edge_amplitude_ratio)
+            candidates = self._edge_candidates(sorted_data, True, min_edge_amplitude_ratio, search_method)
             
             if candidates:
                 # 选择幅度最大的候选点
@@ -178,6 +366,8 @@ class EdgeDetector:
                     return max_dy_idx + 1
                 else:
                     return 0
+        elif search_method == SearchMethod.FFT:
+            return int(self.find_rise_positions_fft(sorted_data, periodic)[0])
         else:
             # 最大值方法
             return np.argmax(sorted_data)
@@ -187,7 +377,8 @@ class EdgeDetector:
                                 is_rising: bool = True,
                                 min_amplitude_ratio: float = 0.1,
                                 search_start_offset: int = 50,
-                                search_range_ratio: float = 0.5) -> Optional[int]:
+                                search_range_ratio: float = 0.5,
+                                smoothed_data: Optional[np.ndarray] = None) -> Optional[int]:
         """
         查找第二个边沿位置（上升沿或下降沿）
         
@@ -198,6 +389,7 @@ class EdgeDetector:
             min_amplitude_ratio: 最小幅度比例
             search_start_offset: 搜索起始偏移量
             search_range_ratio: 搜索范围比例
+            smoothed_data: 已平滑的数据（analyze_edges中第二上升沿和下降沿搜索共用），为None时在此计算
             
         Returns:
             第二个边沿位置或None
@@ -206,7 +398,8 @@ class EdgeDetector:
             return None
         
         # 预处理数据
-        smoothed_data = self._preprocess_data(sorted_data)
+        if smoothed_data is None:
+            smoothed_data = self._preprocess_data(sorted_data)
         
         # 计算第一个边沿的幅度作为参考
         if is_rising:
@@ -231,7 +424,7 @@ class EdgeDetector:
             return None
         
         # 在搜索范围内找到所有候选边沿
-        candidates = self._find_edge_candidates(
+        candidates = self._edge_candidates(
             smoothed_data[search_start:search_end], 
             is_rising, 
             min_amplitude_ratio
@@ -257,21 +450,23 @@ class EdgeDetector:
         return valid_candidates[0][0]
     
     def find_second_rise_position(self, sorted_data: np.ndarray, first_rise_pos: int, 
-                                min_second_rise_ratio: float = 0.1) -> Optional[int]:
+                                min_second_rise_ratio: float = 0.1,
+                                smoothed_data: Optional[np.ndarray] = None) -> Optional[int]:
         """查找第二个上升沿位置"""
         return self.find_second_edge_position(
-            sorted_data, first_rise_pos, True, min_second_rise_ratio, 30, 0.5
+            sorted_data, first_rise_pos, True, min_second_rise_ratio, 30, 0.5, smoothed_data
         )
     
     def find_second_fall_position(self, sorted_data: np.ndarray, first_rise_pos: int, 
-                                min_second_fall_ratio: float = 0.1) -> Optional[int]:
+                                min_second_fall_ratio: float = 0.1,
+                                smoothed_data: Optional[np.ndarray] = None) -> Optional[int]:
         """查找下降沿位置"""
         return self.find_second_edge_position(
-            sorted_data, first_rise_pos, False, min_second_fall_ratio, 30, 0.7
+            sorted_data, first_rise_pos, False, min_second_fall_ratio, 30, 0.7, smoothed_data
         )
     
-    def analyze_edges(self, sorted_data: np.ndarray) -> Dict[str, Any]:
-        """完整的边沿分析流程"""
+    def analyze_edges(self, sorted_data: np.ndarray, periodic: bool = False) -> Dict[str, Any]:
+        """完整的边沿分析流程（输入通常是ROI，默认按非整周期数据处理；periodic只影响FFT方法）"""
         # 确保数据长度足够
         if len(sorted_data) < 100:
             return {'first_rise_pos': None, 'second_rise_pos': None, 'fall_pos': None}
@@ -280,7 +475,8 @@ class EdgeDetector:
             sorted_data, 
             self.config.search_method, 
             np.mean(sorted_data),
-            self.config.min_edge_amplitude_ratio
+            self.config.min_edge_amplitude_ratio,
+            periodic
         )
         
         result = {'first_rise_pos': first_rise_pos}
@@ -293,9 +489,12 @@ class EdgeDetector:
             first_amplitude = first_peak_val - first_baseline
             result['first_rise_amplitude'] = first_amplitude
             
+            # 第二上升沿和下降沿搜索共用同一份平滑数据
+            smoothed_data = self._preprocess_data(sorted_data)
+            
             # 查找第二个上升沿
             second_rise_pos = self.find_second_rise_position(
-                sorted_data, first_rise_pos, self.config.min_second_rise_ratio
+                sorted_data, first_rise_pos, self.config.min_second_rise_ratio, smoothed_data
             )
             result['second_rise_pos'] = second_rise_pos
             
@@ -313,7 +512,7 @@ class EdgeDetector:
             
             # 查找下降沿
             fall_pos = self.find_second_fall_position(
-                sorted_data, first_rise_pos, self.config.min_second_fall_ratio
+                sorted_data, first_rise_pos, self.config.min_second_fall_ratio, smoothed_data
             )
             result['fall_pos'] = fall_pos
             
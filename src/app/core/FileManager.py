@@ -1,5 +1,6 @@
 # src/app/core/FileManager.py
 import os
+import re
 import json
 import csv
 import numpy as np
@@ -7,6 +8,7 @@ import pandas as pd
 import struct
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -59,29 +61,107 @@ class FileManager:
         return directory
 
     
-    def save_adc_csv_data(self, data, filename, output_dir, include_timestamp=True):
-        """保存ADC数据到CSV文件"""
+    def save_adc_csv_data(self, data, filename, output_dir, include_timestamp=True,
+                          timestamp_in_header=False, chunk_rows=16384):
+        """
+        保存ADC数据到CSV文件
+        
+        按块批量格式化后整体写入，输出与csv.writer逐行写入的格式一致（\r\n换行）。
+        
+        Args:
+            data: uint32数组或整数序列
+            filename: 文件名
+            output_dir: 输出目录
+            include_timestamp: 是否写入时间戳
+            timestamp_in_header: True时时间戳只在标题行后写一行注释（不含逗号，旧版读取会跳过），
+                数据行的时间戳列留空；False时与旧格式一致，每行都写时间戳
+            chunk_rows: 每次格式化写入的行数
+        """
         self.ensure_dir_exists(output_dir)
         filepath = os.path.join(output_dir, filename)
         
         try:
+            values = np.asarray(data, dtype=np.int64).ravel()
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f") if include_timestamp else ""
+            row_timestamp = "" if timestamp_in_header else timestamp
+            row_fmt = "%d,%d,0x%08X," + row_timestamp.replace('%', '%%') + "\r\n"
+            
             with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(['Index', '32位原始数据(十进制)', '32位原始数据(十六进制)', '时间戳'])
-                
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f") if include_timestamp else ""
+                csvfile.write("Index,32位原始数据(十进制),32位原始数据(十六进制),时间戳\r\n")
+                if timestamp_in_header and timestamp:
+                    csvfile.write(f"# 时间戳: {timestamp}\r\n")
                 
-                for idx, val in enumerate(data):
-                    hex_val = f"0x{val:08X}"
-                    writer.writerow([idx, str(val), hex_val, timestamp])
+                # 每块组成(index, 十进制, 十六进制)扁平元组，一次%格式化生成整块文本
+                for start in range(0, values.size, chunk_rows):
+                    chunk = values[start:start + chunk_rows]
+                    rows = np.empty((chunk.size, 3), dtype=np.int64)
+                    rows[:, 0] = np.arange(start, start + chunk.size)
+                    rows[:, 1] = chunk
+                    rows[:, 2] = chunk
+                    csvfile.write((row_fmt * chunk.size) % tuple(rows.ravel().tolist()))
             
-            logger.info(f"数据已保存到 {filepath}，共{len(data)}个数据点")
+            logger.info(f"数据已保存到 {filepath}，共{values.size}个数据点")
             return True, f"数据保存成功: {filepath}"
             
         except Exception as e:
             logger.error(f"数据保存失败: {str(e)}")
             return False, f"数据保存失败: {str(e)}"
     
+    def save_adc_binary_data(self, data, filename, output_dir, metadata=None):
+        """
+        保存ADC原始数据为二进制文件（小端uint32，无文件头），并写入同名.json元数据旁车文件
+        
+        Args:
+            data: uint32数组或可转换为数组的序列
+            filename: 文件名（.bin）
+            output_dir: 输出目录
+            metadata: 附加元数据字典，可选
+            
+        Returns:
+            (是否成功, 状态信息)
+        """
+        self.ensure_dir_exists(output_dir)
+        filepath = os.path.join(output_dir, filename)
+        
+        try:
+            u32_arr = np.ascontiguousarray(data, dtype='<u4')
+            u32_arr.tofile(filepath)
+            
+            meta = {
+                'format': 'adc_raw_u32',
+                'dtype': '<u4',
+                'n_samples': int(u32_arr.size),
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f"),
+            }
+            if metadata:
+                meta.update(metadata)
+            with open(self.get_metadata_path(filepath), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2, ensure_ascii=False)
+            
+            logger.info(f"二进制数据已保存到 {filepath}，共{u32_arr.size}个数据点")
+            return True, f"二进制数据保存成功: {filepath}"
+            
+        except Exception as e:
+            logger.error(f"二进制数据保存失败: {str(e)}")
+            return False, f"二进制数据保存失败: {str(e)}"
+    
+    @staticmethod
+    def get_metadata_path(path):
+        """获取原始数据文件对应的元数据旁车文件路径"""
+        return os.path.splitext(path)[0] + '.json'
+    
+    def load_adc_metadata(self, path):
+        """读取原始数据文件的元数据，不存在或损坏时返回空字典"""
+        meta_path = self.get_metadata_path(path)
+        if not os.path.exists(meta_path):
+            return {}
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"读取元数据失败 {meta_path}: {str(e)}")
+            return {}
+    
     def save_analysis_results_csv(self, data, filename, headers=None):
         """保存分析结果到CSV文件"""
         try:
@@ -131,9 +211,55 @@ class FileManager:
             logger.error(f"JSON数据保存失败: {str(e)}")
             return False
     
+    @staticmethod
+    def _sniff_text_encoding(raw: bytes) -> str:
+        """
+        一次性判断文本编码：UTF-16看BOM，其余按utf-8 → gbk → latin1顺序严格校验
+        (与逐个编码重读文件的结果一致，但只解码一次)
+        """
+        if raw.startswith((b'\xff\xfe', b'\xfe\xff')):
+            return 'utf-16'
+        if raw.isascii():
+            return 'utf-8'
+        for enc in ('utf-8', 'gbk'):
+            try:
+                raw.decode(enc)
+                return enc
+            except UnicodeDecodeError:
+                continue
+        return 'latin1'
+    
+    @staticmethod
+    def _parse_u32_field(second_col: str) -> Optional[int]:
+        """
+        逐行慢速路径：解析CSV第二列，支持十进制、0x十六进制以及夹杂文字的数字
+        
+        Returns:
+            解析出的整数，无法解析时返回None
+        """
+        try:
+            # 尝试直接转换为整数
+            return int(second_col)
+        except ValueError:
+            pass
+        # 如果直接转换失败，尝试十六进制格式
+        try:
+            if second_col.startswith('0x'):
+                return int(second_col, 16)
+            # 使用正则表达式匹配数字
+            m = re.search(r'(0x[0-9a-fA-F]+|\d+)', second_col)
+            if m:
+                return int(m.group(1), 0)
+        except (ValueError, TypeError):
+            pass
+        return None
+    
     def load_u32_text_first_col(self, path: str, skip_first: bool = True) -> np.ndarray:
         """
-        从文本文件加载uint32数据
+        从文本文件加载uint32数据（使用CSV第二列，即十进制原始数据列）
+        
+        编码只判断一次；整个文件在字节层面用numpy向量化切分行和列，
+        第二列为纯十进制数字的行直接批量转换，其余行才走逐行慢速解析。
         
         Args:
             path: 文件路径
@@ -142,60 +268,154 @@ class FileManager:
         Returns:
             uint32数组
         """
-        import re
+        with open(path, 'rb') as f:
+            raw = f.read()
         
-        encodings = ["utf-8", "utf-8-sig", "gbk", "latin1", "utf-16", "utf-16le", "utf-16be"]
-        last_err = None
+        encoding = self._sniff_text_encoding(raw)
+        if encoding == 'utf-16':
+            # 统一转为utf-8字节，保证逗号、数字和换行都是单字节
+            raw = raw.decode('utf-16').encode('utf-8')
+            encoding = 'utf-8'
         
-        for enc in encodings:
-            try:
-                vals = []
-                with open(path, "r", encoding=enc, errors="strict") as f:
-                    # 跳过标题行（如果存在）
-                    if skip_first:
-                        next(f, None)
-                    
-                    for line in f:
-                        s = line.strip()
-                        if not s:
-                            continue
-                        
-                        # 分割CSV行的列
-                        parts = s.split(',')
-                        if len(parts) >= 2:  # 确保至少有2列
-                            # 使用第二列的数据（索引1）
-                            second_col = parts[1].strip()
-                            
-                            # 尝试解析第二列的值
-                            try:
-                                # 尝试直接转换为整数
-                                val = int(second_col)
-                                vals.append(np.uint32(val))
-                            except ValueError:
-                                # 如果直接转换失败，尝试十六进制格式
-                                try:
-                                    if second_col.startswith('0x'):
-                                        val = int(second_col, 16)
-                                    else:
-                                        # 使用正则表达式匹配数字
-                                        m = re.search(r'(0x[0-9a-fA-F]+|\d+)', second_col)
-                                        if m:
-                                            val = int(m.group(1), 0)
-                                        else:
-                                            continue
-                                    vals.append(np.uint32(val))
-                                except (ValueError, TypeError):
-                                    continue
-                
-                arr = np.asarray(vals, dtype=np.uint32)
-                return arr
-                
-            except Exception as e:
-                last_err = e
+        buf = np.frombuffer(raw, dtype=np.uint8)
+        if buf.size == 0:
+            return np.empty(0, dtype=np.uint32)
+        
+        # 行边界：\r、\n、\r\n 都视为换行（与文本模式的通用换行一致）
+        lf = np.flatnonzero(buf == 0x0A)
+        cr = np.flatnonzero(buf == 0x0D)
+        if cr.size == 0 or (cr[-1] + 1 < buf.size and np.all(buf[cr + 1] == 0x0A)):
+            # 常见情况：\r只出现在\r\n中，按\n切分后去掉行尾\r，避免产生一半空行
+            starts = np.concatenate(([0], lf + 1))
+            ends = np.concatenate((lf, [buf.size]))
+            ends -= (ends > starts) & (buf[np.maximum(ends - 1, 0)] == 0x0D)
+        else:
+            seps = np.union1d(lf, cr)
+            starts = np.concatenate(([0], seps + 1))
+            ends = np.concatenate((seps, [buf.size]))
+        if skip_first:
+            starts, ends = starts[1:], ends[1:]
+        
+        # 每行第一个逗号；没有逗号的行（含空行）只有一列，直接跳过
+        commas = np.flatnonzero(buf == 0x2C)
+        if commas.size == 0 or starts.size == 0:
+            return np.empty(0, dtype=np.uint32)
+        idx1 = np.searchsorted(commas, starts)
+        has_col = idx1 < commas.size
+        has_col[has_col] = commas[idx1[has_col]] < ends[has_col]
+        starts, ends, idx1 = starts[has_col], ends[has_col], idx1[has_col]
+        
+        # 第二列范围 [第一个逗号+1, 第二个逗号或行尾)
+        field_start = commas[idx1] + 1
+        idx2 = np.minimum(idx1 + 1, commas.size - 1)
+        field_end = np.where((idx1 + 1 < commas.size) & (commas[idx2] < ends), commas[idx2], ends)
+        field_len = field_end - field_start
+        
+        # 快速路径：字段全是ASCII数字且不超过10位。按字段末尾右对齐取10个字节，
+        # 只在各行字段窗口内判断，权重为固定的10的幂
+        max_digits = 10
+        values = np.zeros(field_start.size, dtype=np.int64)
+        fast = (field_len >= 1) & (field_len <= max_digits)
+        if np.any(fast):
+            pos = np.arange(max_digits)
+            f_end, f_len = field_end[fast], field_len[fast]
+            in_field = pos >= (max_digits - f_len)[:, None]
+            offsets = np.maximum(f_end[:, None] - max_digits + pos, 0)
+            digits = buf[offsets] - np.uint8(0x30)  # 非数字字符会回绕成大于9的值
+            digits[~in_field] = 0
+            weights = 10 ** np.arange(max_digits - 1, -1, -1, dtype=np.int64)
+            values[fast] = digits @ weights
+            fast[fast] = np.all(digits <= 9, axis=1)
+        
+        # 超出uint32范围的值交给慢速路径处理（与逐行解析保持相同的报错行为）
+        fast &= values <= 0xFFFFFFFF
+        keep = fast.copy()
+        
+        for i in np.flatnonzero(~fast):
+            line = raw[starts[i]:ends[i]].decode(encoding).strip()
+            parts = line.split(',')
+            if len(parts) < 2:
+                continue
+            val = self._parse_u32_field(parts[1].strip())
+            if val is None:
                 continue
+            values[i] = np.uint32(val)
+            keep[i] = True
         
-        raise last_err or Exception("无法读取文件")
+        return values[keep].astype(np.uint32)
 
+    def load_u32_binary(self, path: str, use_mmap: bool = True) -> np.ndarray:
+        """
+        从二进制文件加载uint32数据（小端，无文件头）
+        
+        Args:
+            path: 文件路径
+            use_mmap: True时通过np.memmap只读映射读取，False时使用np.fromfile一次读入
+            
+        Returns:
+            uint32数组（独立内存，不引用文件映射），长度不是4的倍数时忽略尾部字节
+        """
+        n_values = os.path.getsize(path) // 4
+        if n_values == 0:
+            return np.empty(0, dtype=np.uint32)
+        
+        if use_mmap:
+            # 复制出映射内容后立即释放映射：返回映射视图会使文件在Windows上保持锁定，无法删除或覆盖
+            mapped = np.memmap(path, dtype='<u4', mode='r', shape=(n_values,))
+            try:
+                return np.array(mapped)
+            finally:
+                del mapped
+        return np.fromfile(path, dtype='<u4', count=n_values)
+    
+    def load_u32_data(self, path: str, skip_first: bool = True) -> np.ndarray:
+        """
+        按扩展名加载原始ADC数据：.bin走二进制加载，其余按文本文件解析
+        
+        Args:
+            path: 文件路径
+            skip_first: 文本文件是否跳过标题行（二进制文件无标题行，忽略此参数）
+            
+        Returns:
+            uint32数组
+        """
+        if os.path.splitext(path)[1].lower() == '.bin':
+            return self.load_u32_binary(path)
+        return self.load_u32_text_first_col(path, skip_first=skip_first)
+    
+    def find_data_files(self, input_dir, recursive=True, prefer_binary=True):
+        """
+        查找原始ADC数据文件，同名的.bin和.csv只保留一个
+        
+        Args:
+            input_dir: 输入目录
+            recursive: 是否递归子目录
+            prefer_binary: 同名文件同时存在时优先使用.bin
+            
+        Returns:
+            按路径排序的文件列表
+            
+        Raises:
+            FileNotFoundError: 目录中没有.bin/.csv文件
+        """
+        import glob
+        
+        sub = "**" if recursive else ""
+        found = {}
+        for ext in ('.csv', '.bin'):
+            pattern = os.path.join(input_dir, sub, f"*{ext}")
+            for path in glob.glob(pattern, recursive=recursive):
+                stem = os.path.splitext(path)[0]
+                if stem not in found or (ext == '.bin') == prefer_binary:
+                    found[stem] = path
+        
+        files = sorted(found.values())
+        if not files:
+            raise FileNotFoundError(f"未找到数据文件(.bin/.csv): {input_dir}")
+        
+        n_bin = sum(1 for f in files if f.endswith('.bin'))
+        logger.info(f"找到 {len(files)} 个数据文件 (BIN: {n_bin}, CSV: {len(files) - n_bin})")
+        return files
     
     def find_csv_files(self, input_dir, recursive=True):
         """查找CSV文件"""
@@ -0,0 +1,127 @@
+# src/app/core/ParallelAnalysis.py
+import os
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 子进程返回给主进程的数组（y_roi由主进程从y_full切片得到，不重复传输）
+COMPACT_KEYS = ('y_full', 'mag_linear', 'y_full_diff', 'y_diff', 'mag_linear_d', 'Xd_norm')
+
+# ===== 子进程 =====
+_worker_analyzer = None
+_worker_sent_freq = False
+
+
+def _init_worker(config, base_data_path: str):
+    """子进程初始化：每个进程创建一次DataAnalyzer"""
+    global _worker_analyzer, _worker_sent_freq
+    try:
+        from .DataAnalyze import DataAnalyzer
+        from .FileManager import FileManager
+    except ImportError:
+        from DataAnalyze import DataAnalyzer
+        from FileManager import FileManager
+    _worker_analyzer = DataAnalyzer(config, file_manager=FileManager(base_data_path))
+    _worker_sent_freq = False
+
+
+def _analyze_file(index: int, path: str) -> Tuple[Optional[Dict[str, np.ndarray]], Optional[str]]:
+    """
+    在子进程中加载并分析一个文件（启用分析缓存时优先使用缓存），只返回精简结果
+
+    Returns:
+        (精简结果字典或None, 错误信息或None)
+    """
+    global _worker_sent_freq
+    analyzer = _worker_analyzer
+    try:
+        res = analyzer.analyze_file(path, index)
+        if res is None:
+            return None, None
+        compact = {key: res[key] for key in COMPACT_KEYS}
+        compact['n_averages'] = res['n_averages']
+        # 频率轴只取决于配置，每个进程只随第一个结果发送一次
+        if not _worker_sent_freq:
+            compact['freq'] = res['freq']
+            compact['freq_d'] = res['freq_d']
+            _worker_sent_freq = True
+        return compact, None
+    except Exception as e:
+        return None, str(e)
+
+
+# ===== 主进程 =====
+class ParallelFileAnalyzer:
+    """
+    多进程文件分析：加载 -> process_single_file 在进程池中并行执行，结果按文件顺序产出
+
+    同时在途的任务数受max_pending限制，先完成的结果在主进程中缓存到轮到它为止；
+    should_stop返回True时取消尚未开始的任务并结束迭代。
+    """
+
+    def __init__(self, config, n_workers: Optional[int] = None, base_data_path: str = 'data',
+                 max_pending: Optional[int] = None):
+        """
+        Args:
+            config: AnalysisConfig，传给每个子进程
+            n_workers: 进程数，None或<=0时使用CPU核数
+            base_data_path: 子进程FileManager的数据根目录
+            max_pending: 同时提交的最大任务数，默认为进程数的4倍
+        """
+        self.config = config
+        self.n_workers = n_workers if n_workers and n_workers > 0 else (os.cpu_count() or 1)
+        self.base_data_path = str(base_data_path)
+        self.max_pending = max_pending or self.n_workers * 4
+
+    def _expand(self, compact: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        """补齐与process_single_file一致的键"""
+        res = dict(compact)
+        res['y_roi'] = res['y_full'][self.config.roi_start:self.config.roi_end]
+        res.setdefault('freq', None)
+        res.setdefault('freq_d', None)
+        return res
+
+    def iter_results(self, file_list: List[str], should_stop: Optional[Callable[[], bool]] = None
+                     ) -> Iterator[Tuple[int, str, Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        按文件顺序逐个产出分析结果
+
+        Yields:
+            (文件索引, 文件路径, 结果字典或None, 错误信息或None)；
+            结果字典的键与process_single_file相同（不含data_dict），freq/freq_d可能为None
+        """
+        with ProcessPoolExecutor(max_workers=self.n_workers, initializer=_init_worker,
+                                 initargs=(self.config, self.base_data_path)) as executor:
+            pending = deque()
+            jobs = iter(enumerate(file_list))
+
+            def submit_next():
+                for i, path in jobs:
+                    pending.append((i, path, executor.submit(_analyze_file, i, path)))
+                    return
+
+            for _ in range(self.max_pending):
+                submit_next()
+
+            while pending:
+                if should_stop is not None and should_stop():
+                    for _, _, fut in pending:
+                        fut.cancel()
+                    logger.info(f"并行分析被中断，取消 {len(pending)} 个未完成任务")
+                    return
+
+                i, path, fut = pending[0]
+                try:
+                    compact, error = fut.result(timeout=0.1)
+                except FutureTimeoutError:
+                    continue
+                except Exception as e:
+                    compact, error = None, str(e)
+                pending.popleft()
+                submit_next()
+                yield i, path, (self._expand(compact) if compact is not None else None), error
@@ -5,14 +5,168 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# 累加器键名 -> 单文件处理结果中的键名
+TRACE_KEYS = (
+    ('ys_full', 'y_full'),
+    ('ys', 'y_roi'),
+    ('mags', 'mag_linear'),
+    ('ys_d_full', 'y_full_diff'),
+    ('ys_d', 'y_diff'),
+    ('mags_d', 'mag_linear_d'),
+)
+
+
+class RunningStats:
+    """逐点的在线均值/方差（Welford算法），内存只与点数有关"""
+    
+    def __init__(self):
+        self.count = 0
+        self.mean: Optional[np.ndarray] = None
+        self.m2: Optional[np.ndarray] = None
+    
+    def update(self, x: np.ndarray):
+        """加入一条数据"""
+        x = np.asarray(x, dtype=np.float64)
+        if self.mean is None:
+            self.count = 1
+            self.mean = x.copy()
+            self.m2 = np.zeros_like(self.mean)
+            return
+        if x.shape != self.mean.shape:
+            raise ValueError(f"数据长度 {x.shape} 与已累加的 {self.mean.shape} 不一致")
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        delta *= x - self.mean
+        self.m2 += delta
+    
+    def update_batch(self, rows: np.ndarray):
+        """加入多条数据（[N, 点数]），按Chan等人的方法与已有统计合并"""
+        rows = np.asarray(rows, dtype=np.float64)
+        n_b = rows.shape[0]
+        if n_b == 0:
+            return
+        mean_b = rows.mean(axis=0)
+        m2_b = ((rows - mean_b) ** 2).sum(axis=0)
+        if self.mean is None:
+            self.count, self.mean, self.m2 = n_b, mean_b, m2_b
+            return
+        if mean_b.shape != self.mean.shape:
+            raise ValueError(f"数据长度 {mean_b.shape} 与已累加的 {self.mean.shape} 不一致")
+        n_a = self.count
+        self.count = n_a + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * (n_b / self.count)
+        self.m2 += m2_b + delta ** 2 * (n_a * n_b / self.count)
+    
+    def variance(self, ddof: int = 0) -> np.ndarray:
+        """逐点方差，ddof与np.var含义相同"""
+        if self.mean is None or self.count - ddof <= 0:
+            raise ValueError("累加的数据不足，无法计算方差")
+        return self.m2 / (self.count - ddof)
+    
+    def std(self, ddof: int = 0) -> np.ndarray:
+        """逐点标准差"""
+        return np.sqrt(self.variance(ddof))
+
+
+class ResultAccumulator:
+    """
+    批量处理结果的流式累加器：六类曲线逐点Welford均值/方差，差分频谱复数求和
+    
+    每处理完一个文件调用add()，内存与文件数无关；keep_traces=True时另外保留每个文件的曲线。
+    """
+    
+    def __init__(self, keep_traces: bool = False):
+        self.keep_traces = keep_traces
+        self.stats = {key: RunningStats() for key, _ in TRACE_KEYS}
+        self.traces: Dict[str, List[np.ndarray]] = {key: [] for key, _ in TRACE_KEYS} if keep_traces else {}
+        self.freq_ref: Optional[np.ndarray] = None
+        self.freq_d_ref: Optional[np.ndarray] = None
+        self.sum_Xd: Optional[np.ndarray] = None
+        self.count = 0
+    
+    def _set_reference(self, res: Dict[str, Any]):
+        # 并行模式下只有部分结果带频率轴
+        if self.freq_ref is None and res.get('freq') is not None:
+            self.freq_ref = res['freq']
+        if self.freq_d_ref is None and res.get('freq_d') is not None:
+            self.freq_d_ref = res['freq_d']
+    
+    def add(self, res: Dict[str, Any]):
+        """累加单个文件的处理结果（process_single_file返回的字典）"""
+        self._set_reference(res)
+        if self.sum_Xd is None:
+            self.sum_Xd = np.zeros(np.shape(res['Xd_norm']), dtype=np.complex128)
+        for key, src in TRACE_KEYS:
+            self.stats[key].update(res[src])
+            if self.keep_traces:
+                self.traces[key].append(res[src].astype(np.float64))
+        self.sum_Xd += res['Xd_norm']
+        self.count += 1
+    
+    def add_batch(self, res: Dict[str, Any]):
+        """累加多个文件的处理结果（process_batch返回的二维数组，每行一个文件）"""
+        n_rows = len(res['Xd_norm'])
+        if n_rows == 0:
+            return
+        self._set_reference(res)
+        if self.sum_Xd is None:
+            self.sum_Xd = np.zeros(res['Xd_norm'].shape[1], dtype=np.complex128)
+        for key, src in TRACE_KEYS:
+            self.stats[key].update_batch(res[src])
+            if self.keep_traces:
+                self.traces[key].extend(np.asarray(res[src], dtype=np.float64))
+        self.sum_Xd += res['Xd_norm'].sum(axis=0)
+        self.count += n_rows
+    
+    def averages(self, with_std: bool = True) -> Dict[str, Any]:
+        """返回与ResultProcessor.calculate_averages相同的平均值字典，with_std时附带逐点标准差"""
+        if self.count == 0:
+            raise ValueError("没有累加任何结果")
+        averages = {}
+        
+        # ROI平均值
+        averages['y_full_avg'] = self.stats['ys_full'].mean.copy()
+        averages['y_avg'] = self.stats['ys'].mean.copy()
+        averages['mag_avg_linear'] = self.stats['mags'].mean.copy()
+        averages['mag_avg_db'] = 20 * np.log10(averages['mag_avg_linear'])
+        
+        # 差分平均值
+        averages['y_d_full_avg'] = self.stats['ys_d_full'].mean.copy()
+        averages['y_d_avg'] = self.stats['ys_d'].mean.copy()
+        averages['mag_d_avg_linear'] = self.stats['mags_d'].mean.copy()
+        averages['mag_d_avg_db'] = 20 * np.log10(averages['mag_d_avg_linear'])
+        
+        # 复数FFT平均值
+        averages['avg_Xd'] = self.sum_Xd / self.count
+        
+        if with_std:
+            averages['y_full_std'] = self.stats['ys_full'].std()
+            averages['y_std'] = self.stats['ys'].std()
+            averages['mag_std_linear'] = self.stats['mags'].std()
+            averages['y_d_full_std'] = self.stats['ys_d_full'].std()
+            averages['y_d_std'] = self.stats['ys_d'].std()
+            averages['mag_d_std_linear'] = self.stats['mags_d'].std()
+        return averages
+
+
 class ResultProcessor:
     """结果处理器类"""
     
     def __init__(self, config):
         self.config = config
     
+    def new_accumulator(self) -> ResultAccumulator:
+        """按配置创建结果累加器"""
+        return ResultAccumulator(keep_traces=getattr(self.config, 'keep_traces', False))
+    
     def calculate_averages(self, results: Dict[str, Any]) -> Dict[str, Any]:
-        """计算平均值"""
+        """计算平均值（结果带累加器时直接取流式统计，否则对逐文件曲线求均值）"""
+        accumulator = results.get('accumulator')
+        if accumulator is not None:
+            return accumulator.averages()
+        
         averages = {}
       
         # ROI平均值
@@ -0,0 +1,219 @@
+# src/app/core/SCPIInstrumentSimulator.py
+import re
+import time
+import queue
+import socket
+import select
+import threading
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_FREQ_RE = re.compile(r'([-\d.eE+]+)\s*mhz', re.IGNORECASE)
+_PHASE_RE = re.compile(r'TX(\d+)\s*,\s*RX(\d+)', re.IGNORECASE)
+_CHANNEL_RE = re.compile(r'CHANnel(\d+)', re.IGNORECASE)
+
+
+def default_s_params(freq_mhz: float, tx: int, rx: int) -> complex:
+    """默认被测网络：带1ns电长度的衰减直通，端口反射-20dB"""
+    delay = np.exp(-2j * np.pi * freq_mhz * 1e6 * 1e-9)
+    if tx == rx:
+        return 0.1 * delay * delay
+    return 0.8 * delay
+
+
+@dataclass
+class SCPISimulatorConfig:
+    """SCPI仪器模拟器的时序配置"""
+    rtt: float = 0.0               # 链路往返时延(秒)，应答不早于消息到达后rtt发出
+    command_time: float = 0.0      # 仪器执行每条命令的耗时(秒)，逐条串行
+
+
+class SCPIInstrumentSimulator:
+    """
+    本地SCPI仪器模拟服务器，用于无硬件时测试VNACalibration的扫频流程
+
+    每条消息以换行结束，可用";"拼接多条命令（命令前的":"表示从根节点开始）。
+    支持的命令:
+        SOURce:GPRF:CHANnel<n>:STATe/WFORm/FREQuency/POWer <值>   设置通道，不回复
+        READ:GPRF:CHANnel<n>:POWer:GPRM? <时间>                    回复接收功率(dBm)
+        CALIbration:INSTrument:PHASe TX<t>,RX<r>,<点数>            回复接收相位(度)
+        *IDN?                                                      回复仪器标识
+    同一消息中多条查询的应答以";"连接为一行。
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, config: Optional[SCPISimulatorConfig] = None,
+                 s_params: Optional[Callable[[float, int, int], complex]] = None):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口，0表示由系统分配（启动后从self.port读取）
+            config: 时序配置
+            s_params: 被测网络 f(频率MHz, 发射通道, 接收通道) -> 复数传输/反射系数
+        """
+        self.host = host
+        self.port = port
+        self.config = config or SCPISimulatorConfig()
+        self.s_params = s_params or default_s_params
+        self.channels: Dict[int, Dict[str, str]] = {}
+        self.command_count = 0
+        self.message_count = 0
+        self._server_sock = None
+        self._thread = None
+        self._running = threading.Event()
+        self._lock = threading.Lock()
+
+    # ===== 服务器控制 =====
+    def start(self):
+        """启动监听线程，返回(地址, 端口)"""
+        self._server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server_sock.bind((self.host, self.port))
+        self._server_sock.listen(8)
+        self._server_sock.settimeout(0.2)
+        self.port = self._server_sock.getsockname()[1]
+        self._running.set()
+        self._thread = threading.Thread(target=self._accept_loop, name='scpi-sim', daemon=True)
+        self._thread.start()
+        logger.info(f"SCPI仪器模拟器已启动: {self.host}:{self.port}")
+        return self.host, self.port
+
+    def stop(self):
+        """停止服务器"""
+        self._running.clear()
+        if self._thread:
+            self._thread.join(2.0)
+            self._thread = None
+        if self._server_sock:
+            self._server_sock.close()
+            self._server_sock = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _accept_loop(self):
+        while self._running.is_set():
+            try:
+                conn, _ = self._server_sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    # ===== 协议处理 =====
+    def _serve_client(self, conn: socket.socket):
+        """
+        接收线程按到达时刻给每条消息打时间戳，执行线程串行执行并在 到达时刻+rtt 之后应答，
+        因此流水线发来的多条查询的链路时延可以互相重叠
+        """
+        lines = queue.Queue()
+        worker = threading.Thread(target=self._execute_loop, args=(conn, lines), daemon=True)
+        worker.start()
+        buf = b''
+        try:
+            while self._running.is_set():
+                readable, _, _ = select.select([conn], [], [], 0.2)
+                if not readable:
+                    continue
+                data = conn.recv(4096)
+                if not data:
+                    break
+                t_recv = time.perf_counter()
+                buf += data
+                while b'\n' in buf:
+                    line, buf = buf.split(b'\n', 1)
+                    lines.put((t_recv, line.decode('ascii', errors='ignore').strip()))
+        except OSError as e:
+            logger.debug(f"模拟器连接断开: {e}")
+        finally:
+            lines.put(None)
+            worker.join(2.0)
+            conn.close()
+
+    def _execute_loop(self, conn: socket.socket, lines: queue.Queue):
+        try:
+            while True:
+                item = lines.get()
+                if item is None:
+                    break
+                t_recv, message = item
+                reply = self._handle_message(message)
+                if reply is not None:
+                    wait = t_recv + self.config.rtt - time.perf_counter()
+                    if wait > 0:
+                        time.sleep(wait)
+                    conn.sendall(reply.encode('ascii') + b'\n')
+        except OSError as e:
+            logger.debug(f"模拟器连接断开: {e}")
+
+    def _handle_message(self, message: str) -> Optional[str]:
+        """执行一条消息中的所有命令，返回查询应答（无查询时为None）"""
+        replies = []
+        commands = [cmd.strip().lstrip(':') for cmd in message.split(';') if cmd.strip()]
+        with self._lock:
+            self.message_count += 1
+            self.command_count += len(commands)
+        for cmd in commands:
+            if self.config.command_time > 0:
+                time.sleep(self.config.command_time)
+            reply = self._handle_command(cmd)
+            if reply is not None:
+                replies.append(reply)
+        return ";".join(replies) if replies else None
+
+    def _handle_command(self, cmd: str) -> Optional[str]:
+        upper = cmd.upper()
+        if upper == '*IDN?':
+            return 'TDR,SCPI Instrument Simulator,0,1.0'
+
+        if upper.startswith('SOUR'):
+            header, _, value = cmd.partition(' ')
+            m = _CHANNEL_RE.search(header)
+            if m:
+                node = header.rsplit(':', 1)[-1]
+                with self._lock:
+                    self.channels.setdefault(int(m.group(1)), {})[node] = value.strip()
+            return None
+
+        if upper.startswith('READ:GPRF'):
+            rx = int(_CHANNEL_RE.search(cmd).group(1))
+            tx, freq, power = self._active_source()
+            if tx is None:
+                return '-200.0'
+            gain = abs(self.s_params(freq, tx, rx))
+            return f"{power + 20 * np.log10(max(gain, 1e-10)):.4f}"
+
+        if upper.startswith('CALI'):
+            m = _PHASE_RE.search(cmd)
+            tx, rx = int(m.group(1)), int(m.group(2))
+            freq = self._channel_freq(tx)
+            return f"{np.degrees(np.angle(self.s_params(freq, tx, rx))):.4f}"
+
+        return None
+
+    def _channel_freq(self, channel: int) -> float:
+        m = _FREQ_RE.search(self.channels.get(channel, {}).get('FREQuency', '0Mhz'))
+        return float(m.group(1)) if m else 0.0
+
+    def _active_source(self):
+        """当前发射通道：处于TRXD状态且功率最高的通道，返回(通道, 频率MHz, 功率dBm)"""
+        best = (None, 0.0, -np.inf)
+        with self._lock:
+            channels = {ch: dict(state) for ch, state in self.channels.items()}
+        for ch, state in channels.items():
+            if state.get('STATe', '').upper() != 'TRXD':
+                continue
+            power = float(state.get('POWer', '-inf'))
+            if power > best[2]:
+                best = (ch, self._channel_freq(ch), power)
+        return best
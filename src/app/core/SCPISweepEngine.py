@@ -0,0 +1,192 @@
+# src/app/core/SCPISweepEngine.py
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# query_many回调的每条应答：应答文本(失败为None)，或PipelinedTcpClient.query_many返回的(成功, 应答)元组
+QueryResponse = Union[Optional[str], Tuple[bool, str]]
+
+
+def client_query_many(client, terminator: str = '\n',
+                      timeout: float = 1.0) -> Callable[[Sequence[str]], List[Optional[str]]]:
+    """
+    PipelinedTcpClient的query_many回调适配器：每条命令加结束符，失败的应答转为None
+
+    Args:
+        client: 提供 query_many(消息列表, timeout) -> [(成功, 应答)] 的客户端
+        terminator: 附加在每条命令末尾的结束符
+        timeout: 整批查询的超时(秒)
+    """
+    def query_many(commands: Sequence[str]) -> List[Optional[str]]:
+        return [resp if ok else None
+                for ok, resp in client.query_many([cmd + terminator for cmd in commands], timeout)]
+    return query_many
+
+
+class SCPISweepEngine:
+    """
+    SCPI扫频引擎：为VNACalibration逐频点配置通道并读取功率/相位
+
+    - 保存仪器状态的影子副本，与上次下发值相同的设置命令不再发送（STATe/WFORm/POWer等）
+    - 同一频点的设置命令用";:"拼接为一条消息一次写出
+    - 各接收通道的功率/相位查询通过query_many流水线发出，不再逐条等待应答
+
+    影子状态只反映本引擎下发过的命令，仪器被其它途径修改或重连后需调用invalidate()。
+    """
+
+    def __init__(self, send_command: Callable[[str], Optional[str]],
+                 query_many: Optional[Callable[[Sequence[str]], List[QueryResponse]]] = None,
+                 separator: str = ';:', terminator: str = '', max_message_len: int = 1024):
+        """
+        Args:
+            send_command: 发送一条消息的回调（与VNACalibration的send_command相同），查询时返回应答文本
+            query_many: 流水线查询回调 f(命令列表) -> 应答列表(失败为None)，为None时逐条调用send_command；
+                        也接受PipelinedTcpClient.query_many的(成功, 应答)元组列表（命令需自带结束符，
+                        或用terminator参数附加；需要单独的超时时用client_query_many包装）
+            separator: 多条命令拼接时的分隔符，";:"表示每条命令都从根节点开始
+            terminator: 附加在每条消息末尾的结束符（回调本身不加结束符时使用，如"\n"）
+            max_message_len: 单条拼接消息的最大长度，超出时拆分为多条
+        """
+        self.send_command = send_command
+        self.query_many = query_many
+        self.separator = separator
+        self.terminator = terminator
+        self.max_message_len = max_message_len
+
+        self._shadow: Dict[Tuple[int, str], str] = {}
+        self._pending: List[str] = []
+        self.reset_stats()
+
+    # ===== 影子状态 =====
+    def invalidate(self):
+        """清空影子状态，下次配置时所有命令都会重新下发"""
+        self._shadow.clear()
+        self._pending.clear()
+
+    def _set(self, channel: int, node: str, value: str):
+        """登记一条设置命令，值与影子状态相同时跳过"""
+        key = (channel, node)
+        if self._shadow.get(key) == value:
+            self.commands_skipped += 1
+            return
+        self._shadow[key] = value
+        self._pending.append(f"SOURce:GPRF:CHANnel{channel}:{node} {value}")
+
+    def setup_channel(self, channel: int, freq: float, power: float,
+                      waveform: str = "Sin1M.sin", state: str = "TRXD"):
+        """
+        登记通道配置（与VNACalibration.setup_instrument的命令相同），调用flush()或测量时下发
+
+        Args:
+            channel: 通道号
+            freq: 频率 (MHz)
+            power: 功率 (dBm)
+            waveform: 波形文件
+            state: 通道状态
+        """
+        self._set(channel, "STATe", state)
+        self._set(channel, "WFORm", f"'{waveform}'")
+        self._set(channel, "FREQuency", f"{freq:.2f}Mhz")
+        self._set(channel, "POWer", f"{power:.2f}")
+
+    def flush(self):
+        """将待下发的设置命令拼接后写出"""
+        if not self._pending:
+            return
+        commands, self._pending = self._pending, []
+        self.commands_sent += len(commands)
+
+        batch = ""
+        try:
+            for cmd in commands:
+                if batch and len(batch) + len(self.separator) + len(cmd) > self.max_message_len:
+                    self._write(batch)
+                    batch = ""
+                batch = f"{batch}{self.separator}{cmd}" if batch else cmd
+            self._write(batch)
+        except Exception:
+            # 无法确认仪器实际状态，下次全部重发
+            self._shadow.clear()
+            raise
+
+    def _write(self, message: str):
+        self.messages_sent += 1
+        self.send_command(message + self.terminator)
+
+    # ===== 测量 =====
+    @staticmethod
+    def _response_text(response: QueryResponse) -> Optional[str]:
+        """(成功, 应答)元组转为应答文本，失败为None"""
+        if isinstance(response, tuple):
+            ok, text = response
+            return text if ok else None
+        return response
+
+    def _query(self, commands: List[str]) -> List[Optional[str]]:
+        self.queries_sent += len(commands)
+        if self.query_many is not None:
+            responses = self.query_many([cmd + self.terminator for cmd in commands])
+            return [self._response_text(r) for r in responses]
+        return [self.send_command(cmd + self.terminator) for cmd in commands]
+
+    def measure_point(self, tx_channel: int, rx_channels: Sequence[int], measure_time: float,
+                      phase_samples: int) -> List[Tuple[float, float]]:
+        """
+        下发待定的设置命令，并流水线查询各接收通道的功率和相位
+
+        Args:
+            tx_channel: 发射通道
+            rx_channels: 接收通道列表
+            measure_time: 功率测量时间 (ms)
+            phase_samples: 相位测量采样点数
+
+        Returns:
+            List[Tuple[float, float]]: 每个接收通道的(功率dBm, 相位度)
+        """
+        t0 = time.perf_counter()
+        self.flush()
+
+        commands = []
+        for rx in rx_channels:
+            commands.append(f"READ:GPRF:CHANnel{rx}:POWer:GPRM? {measure_time:.2f}ms")
+            commands.append(f"CALIbration:INSTrument:PHASe TX{tx_channel},RX{rx},{phase_samples}")
+        responses = self._query(commands)
+
+        results = []
+        for i in range(len(rx_channels)):
+            power_response, phase_response = responses[2 * i], responses[2 * i + 1]
+            power = float(power_response) if power_response else 0
+            phase = float(phase_response) if phase_response else 0
+            results.append((power, phase))
+
+        self.points += 1
+        self.sweep_time += time.perf_counter() - t0
+        return results
+
+    # ===== 统计 =====
+    def reset_stats(self):
+        self.points = 0
+        self.commands_sent = 0
+        self.commands_skipped = 0
+        self.messages_sent = 0
+        self.queries_sent = 0
+        self.sweep_time = 0.0
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            'points': self.points,
+            'commands_sent': self.commands_sent,
+            'commands_skipped': self.commands_skipped,
+            'messages_sent': self.messages_sent,
+            'queries_sent': self.queries_sent,
+            'sweep_s': self.sweep_time,
+            'ms_per_point': self.sweep_time / self.points * 1e3 if self.points else 0.0,
+        }
+
+    def format_stats(self) -> str:
+        s = self.get_stats()
+        return (f"{s['points']} 点, 平均 {s['ms_per_point']:.2f} ms/点, "
+                f"设置命令 {s['commands_sent']} 条(跳过 {s['commands_skipped']} 条)/{s['messages_sent']} 条消息, "
+                f"查询 {s['queries_sent']} 条")
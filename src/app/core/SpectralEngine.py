@@ -0,0 +1,105 @@
+# src/app/core/SpectralEngine.py
+import logging
+from typing import Dict, Tuple
+
+import numpy as np
+
+try:
+    import scipy.fft as _fft
+    HAS_SCIPY_FFT = True
+except ImportError:
+    _fft = np.fft
+    HAS_SCIPY_FFT = False
+
+logger = logging.getLogger(__name__)
+
+
+class SpectralEngine:
+    """
+    频谱计算引擎：去均值、加窗、rfft并按窗函数和归一化
+
+    窗函数、归一化系数和频率轴按 (长度, 窗类型) / (长度, ts_eff) 缓存；
+    输入可以是一维数组或二维数组（每行一条曲线，沿最后一维计算），
+    安装了scipy时使用scipy.fft，二维输入按workers设置多线程计算。
+    """
+
+    WINDOWS = {
+        'hanning': np.hanning,
+        'blackman': np.blackman,
+        'hamming': np.hamming,
+        'rect': np.ones,
+    }
+
+    def __init__(self, workers: int = 1):
+        """
+        Args:
+            workers: 二维输入时scipy.fft使用的线程数，-1为CPU核数（未安装scipy时忽略）
+        """
+        self.workers = workers
+        self._windows: Dict[Tuple[int, str], Tuple[np.ndarray, float]] = {}
+        self._freqs: Dict[Tuple[int, float], np.ndarray] = {}
+
+    def window(self, n: int, window_type: str = 'hanning') -> Tuple[np.ndarray, float]:
+        """长度为n的窗函数（只读）及其归一化系数"""
+        key = (n, window_type)
+        cached = self._windows.get(key)
+        if cached is None:
+            if window_type not in self.WINDOWS:
+                raise ValueError(f"不支持的窗口类型: {window_type}")
+            window = self.WINDOWS[window_type](n).astype(np.float64)
+            window.setflags(write=False)
+            cached = (window, (np.sum(window) / n) * n)
+            self._windows[key] = cached
+        return cached
+
+    def frequencies(self, n: int, ts_eff: float) -> np.ndarray:
+        """长度为n的rfft频率轴（只读）"""
+        key = (n, ts_eff)
+        freq = self._freqs.get(key)
+        if freq is None:
+            freq = np.fft.rfftfreq(n, d=ts_eff)
+            freq.setflags(write=False)
+            self._freqs[key] = freq
+        return freq
+
+    def rfft(self, data: np.ndarray) -> np.ndarray:
+        """沿最后一维的rfft，二维输入按workers并行"""
+        if HAS_SCIPY_FFT and data.ndim > 1 and self.workers != 1:
+            return _fft.rfft(data, axis=-1, workers=self.workers)
+        return _fft.rfft(data, axis=-1)
+
+    def irfft(self, spectrum: np.ndarray, n: int) -> np.ndarray:
+        """沿最后一维的irfft（输出长度n），二维输入按workers并行"""
+        if HAS_SCIPY_FFT and spectrum.ndim > 1 and self.workers != 1:
+            return _fft.irfft(spectrum, n=n, axis=-1, workers=self.workers)
+        return _fft.irfft(spectrum, n=n, axis=-1)
+
+    def spectrum(self, data: np.ndarray, ts_eff: float,
+                 window_type: str = 'hanning') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        计算频谱
+
+        Args:
+            data: 一维数组，或 [N, 点数] 二维数组
+            ts_eff: 等效采样间隔(秒)
+            window_type: 窗类型 'hanning'/'blackman'/'hamming'/'rect'
+
+        Returns:
+            (频率轴, 归一化线性幅度, 复数FFT结果)，后两者与输入的行数一致
+        """
+        n = data.shape[-1]
+        window, scale = self.window(n, window_type)
+
+        # 去均值并加窗（在新数组上原地计算）
+        windowed = np.array(data, dtype=np.float64)
+        windowed -= windowed.mean(axis=-1, keepdims=True)
+        windowed *= window
+
+        fft_result = self.rfft(windowed)
+        magnitude_linear = np.abs(fft_result) / (scale + 1e-12)
+        return self.frequencies(n, ts_eff), magnitude_linear, fft_result
+
+    def clear(self):
+        """清空缓存"""
+        self._windows.clear()
+        self._freqs.clear()
@@ -2,6 +2,12 @@
 import socket, select
 import time
 import logging
+
+try:
+    from .TransportMetrics import TransportMetrics
+except ImportError:
+    from TransportMetrics import TransportMetrics
+
 logger = logging.getLogger(__name__)
 class TcpClient:
     """带超时重发机制的TCP客户端"""
@@ -11,11 +17,33 @@ class TcpClient:
         self.last_error = None  # 记录最后一次错误
         self.server_ip = '192.168.1.10'
         self.server_port = 15000
+        self.metrics = None  # TransportMetrics实例，为None时不统计
+        self._last_command = ''
+        self._last_send_time = None
+
+    def enable_metrics(self, dump_path=None):
+        """
+        启用传输统计
+        
+        参数:
+            dump_path: 连接关闭时自动写出统计的文件路径(.json或文本)，可选
+        返回:
+            TransportMetrics实例
+        """
+        if self.metrics is None:
+            self.metrics = TransportMetrics(dump_path)
+        elif dump_path:
+            self.metrics.dump_path = dump_path
+        return self.metrics
+
+    def disable_metrics(self):
+        """关闭传输统计"""
+        self.metrics = None
 
     def connect(self, ip, port, timeout=3):
         self.server_ip = ip
         self.server_port = port
-        self.close()
+        self._close_socket()
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.sock.settimeout(timeout)
         try:
@@ -38,6 +66,7 @@ class TcpClient:
             return 0
         
         bytes_cleared = 0
+        t0 = time.perf_counter() if self.metrics is not None else 0.0
         try:
             # 设置非阻塞模式来检查是否有待处理数据
             self.sock.setblocking(False)
@@ -66,6 +95,8 @@ class TcpClient:
         
         if bytes_cleared > 0:
             logger.debug(f"清空了 {bytes_cleared} 字节的TCP接收缓存")
+        if self.metrics is not None:
+            self.metrics.record_clear(bytes_cleared, time.perf_counter() - t0)
         
         return bytes_cleared
 
@@ -92,22 +123,25 @@ class TcpClient:
                 self.sock.settimeout(current_timeout)
                 
                 # 发送数据
-                self.sock.sendall(msg.encode('utf-8'))
+                data = msg.encode('utf-8')
+                self.sock.sendall(data)
                 self.last_error = None
+                if self.metrics is not None:
+                    self.metrics.record_send(len(data))
+                    self._last_command = msg
+                    self._last_send_time = time.perf_counter()
                 return True, "发送成功"
                 
             except (socket.timeout, ConnectionError) as e:
                 last_exception = e
                 retry_count += 1
+                if self.metrics is not None:
+                    self.metrics.record_retry()
                 time.sleep(0.2 * retry_count)  # 重试等待时间递增
                 
                 # 尝试重建连接
                 if isinstance(e, ConnectionError):
-                    try:
-                        ip, port = self.sock.getpeername()
-                        self.connect(ip, port, current_timeout)
-                    except:
-                        pass
+                    self._reconnect(current_timeout)
                 
             except Exception as e:
                 last_exception = e
@@ -115,6 +149,8 @@ class TcpClient:
         
         # 所有重试失败后的处理
         self.last_error = str(last_exception) if last_exception else "未知错误"
+        if self.metrics is not None:
+            self.metrics.record_error()
         error_msg = f"发送失败(重试{retry_count}次)"
         if last_exception:
             error_msg += f": {str(last_exception)}"
@@ -176,22 +212,29 @@ class TcpClient:
                 if not chunks:
                     raise ValueError("收到空响应")
                 
-                result = b''.join(chunks).decode('utf-8', errors='ignore').strip()
+                raw = b''.join(chunks)
+                result = raw.decode('utf-8', errors='ignore').strip()
                 self.last_error = None
+                if self.metrics is not None:
+                    if self._last_send_time is not None:
+                        # 往返时延：上一条命令发出到其响应收完
+                        self.metrics.record_rtt(self._last_command, time.perf_counter() - self._last_send_time,
+                                                len(raw))
+                        self._last_send_time = None
+                    else:
+                        self.metrics.record_receive(len(raw))
                 return True, result
                 
             except (socket.timeout, ConnectionError) as e:
                 last_exception = e
                 retry_count += 1
+                if self.metrics is not None:
+                    self.metrics.record_retry()
                 time.sleep(0.2 * retry_count)
                 
                 # 尝试重建连接
                 if isinstance(e, ConnectionError):
-                    try:
-                        ip, port = self.sock.getpeername()
-                        self.connect(ip, port, current_timeout)
-                    except:
-                        pass
+                    self._reconnect(current_timeout)
                 
             except Exception as e:
                 last_exception = e
@@ -199,12 +242,23 @@ class TcpClient:
         
         # 所有重试失败后的处理
         self.last_error = str(last_exception) if last_exception else "未知错误"
+        if self.metrics is not None:
+            self.metrics.record_error()
         error_msg = f"接收失败(重试{retry_count}次)"
         if last_exception:
             error_msg += f": {str(last_exception)}"
         return False, error_msg
 
-    def close(self):
+    def _reconnect(self, timeout):
+        """连接异常后按原地址重建连接（对端复位后getpeername会失败，因此使用connect时记录的地址）"""
+        if self.metrics is not None:
+            self.metrics.record_reconnect()
+        try:
+            self.connect(self.server_ip, self.server_port, timeout)
+        except:
+            pass
+
+    def _close_socket(self):
         if self.sock:
             try:
                 self.sock.close()
@@ -213,3 +267,9 @@ class TcpClient:
         self.sock = None
         self.connected = False
         self.last_error = None
+
+    def close(self):
+        self._close_socket()
+        # 会话结束时写出传输统计（如果设置了输出路径）
+        if self.metrics is not None and self.metrics.dump_path:
+            self.metrics.dump()
@@ -0,0 +1,240 @@
+# src/app/core/TransportMetrics.py
+import os
+import json
+import math
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyHistogram:
+    """
+    对数分桶的延时直方图：第0桶为<1µs，之后每桶上限翻倍（1µs, 2µs, 4µs ... 约9分钟）
+
+    记录只做一次log2和计数，开销固定，不保存原始样本。
+    """
+
+    N_BUCKETS = 40
+    BASE = 1e-6
+
+    def __init__(self):
+        self.buckets = [0] * self.N_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        if seconds < self.BASE:
+            idx = 0
+        else:
+            idx = min(int(math.log2(seconds / self.BASE)) + 1, self.N_BUCKETS - 1)
+        self.buckets[idx] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def bucket_upper(self, idx: int) -> float:
+        """第idx桶的上限(秒)"""
+        return self.BASE * (2 ** idx)
+
+    def percentile(self, q: float) -> float:
+        """按桶上限估计分位数(秒)，q取值0~100"""
+        if self.count == 0:
+            return 0.0
+        target = self.count * q / 100.0
+        cum = 0
+        for idx, n in enumerate(self.buckets):
+            cum += n
+            if cum >= target:
+                return min(self.bucket_upper(idx), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1e3 if self.count else 0.0,
+            'min_ms': self.min * 1e3 if self.count else 0.0,
+            'max_ms': self.max * 1e3,
+            'p50_ms': self.percentile(50) * 1e3,
+            'p90_ms': self.percentile(90) * 1e3,
+            'p99_ms': self.percentile(99) * 1e3,
+            # 只输出非空桶: {桶上限(ms): 计数}
+            'buckets_ms': {f"{self.bucket_upper(i) * 1e3:.3g}": n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+class TransportMetrics:
+    """
+    TCP传输层统计：收发字节数、按命令的往返时延直方图、重试/重连次数、
+    clear_receive_buffer耗时以及每次采集的接收吞吐量
+
+    TcpClient/ADCSample通过metrics属性持有实例，为None时完全不统计（只有一次None判断的开销）。
+    """
+
+    def __init__(self, dump_path: Optional[str] = None):
+        """
+        Args:
+            dump_path: 会话结束(TcpClient.close)时自动写出的文件路径，.json为JSON格式，其余为文本
+        """
+        self.dump_path = dump_path
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清零所有统计"""
+        with self._lock:
+            self.session_start = datetime.now()
+            self.bytes_sent = 0
+            self.bytes_received = 0
+            self.commands_sent = 0
+            self.responses_received = 0
+            self.retries = 0
+            self.reconnects = 0
+            self.errors = 0
+            self.clear_calls = 0
+            self.clear_bytes = 0
+            self.clear_time = 0.0
+            self.rtt: Dict[str, LatencyHistogram] = {}
+            self.acquisitions = 0
+            self.acquisition_bytes = 0
+            self.acquisition_time = 0.0
+            self.acquisition_min_mb_s = math.inf
+            self.acquisition_max_mb_s = 0.0
+
+    # ===== 记录接口 =====
+    def record_send(self, nbytes: int):
+        with self._lock:
+            self.commands_sent += 1
+            self.bytes_sent += nbytes
+
+    def record_receive(self, nbytes: int):
+        with self._lock:
+            self.responses_received += 1
+            self.bytes_received += nbytes
+
+    def record_rtt(self, command: str, seconds: float, nbytes: int = 0):
+        """
+        记录一次命令往返时延（按命令首个单词分组），nbytes>0时同时计入一次接收
+        """
+        key = command.split(None, 1)[0] if command.strip() else '<empty>'
+        with self._lock:
+            hist = self.rtt.get(key)
+            if hist is None:
+                hist = self.rtt[key] = LatencyHistogram()
+            hist.record(seconds)
+            if nbytes:
+                self.responses_received += 1
+                self.bytes_received += nbytes
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_reconnect(self):
+        with self._lock:
+            self.reconnects += 1
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def record_clear(self, nbytes: int, seconds: float):
+        with self._lock:
+            self.clear_calls += 1
+            self.clear_bytes += nbytes
+            self.clear_time += seconds
+
+    def record_acquisition(self, nbytes: int, seconds: float):
+        """记录一次采集的二进制接收量和耗时"""
+        mb_per_s = nbytes / (1024 * 1024) / seconds if seconds > 0 else 0.0
+        with self._lock:
+            self.acquisitions += 1
+            self.acquisition_bytes += nbytes
+            self.acquisition_time += seconds
+            self.acquisition_min_mb_s = min(self.acquisition_min_mb_s, mb_per_s)
+            self.acquisition_max_mb_s = max(self.acquisition_max_mb_s, mb_per_s)
+
+    # ===== 导出 =====
+    def snapshot(self) -> Dict[str, Any]:
+        """返回当前统计的字典副本"""
+        with self._lock:
+            elapsed = (datetime.now() - self.session_start).total_seconds()
+            acq_mb = self.acquisition_bytes / (1024 * 1024)
+            return {
+                'session_start': self.session_start.strftime("%Y-%m-%d %H:%M:%S.%f"),
+                'elapsed_s': elapsed,
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+                'commands_sent': self.commands_sent,
+                'responses_received': self.responses_received,
+                'retries': self.retries,
+                'reconnects': self.reconnects,
+                'errors': self.errors,
+                'clear_receive_buffer': {
+                    'calls': self.clear_calls,
+                    'bytes': self.clear_bytes,
+                    'total_ms': self.clear_time * 1e3,
+                },
+                'rtt': {cmd: hist.to_dict() for cmd, hist in self.rtt.items()},
+                'acquisitions': {
+                    'count': self.acquisitions,
+                    'bytes': self.acquisition_bytes,
+                    'receive_s': self.acquisition_time,
+                    'mean_mb_per_s': acq_mb / self.acquisition_time if self.acquisition_time > 0 else 0.0,
+                    'min_mb_per_s': self.acquisition_min_mb_s if self.acquisitions else 0.0,
+                    'max_mb_per_s': self.acquisition_max_mb_s,
+                },
+            }
+
+    def format_text(self) -> str:
+        """格式化为便于阅读的文本"""
+        s = self.snapshot()
+        clear = s['clear_receive_buffer']
+        acq = s['acquisitions']
+        lines = [
+            f"会话开始: {s['session_start']}  持续: {s['elapsed_s']:.1f}s",
+            f"发送: {s['bytes_sent']} 字节 / {s['commands_sent']} 条命令",
+            f"接收: {s['bytes_received']} 字节 / {s['responses_received']} 次",
+            f"重试: {s['retries']}  重连: {s['reconnects']}  错误: {s['errors']}",
+            f"清空接收缓存: {clear['calls']} 次, {clear['bytes']} 字节, 共 {clear['total_ms']:.1f} ms",
+            f"采集: {acq['count']} 次, {acq['bytes']} 字节, 平均 {acq['mean_mb_per_s']:.1f} MB/s "
+            f"(最小 {acq['min_mb_per_s']:.1f}, 最大 {acq['max_mb_per_s']:.1f})",
+            "命令往返时延:",
+        ]
+        for cmd, h in sorted(s['rtt'].items()):
+            lines.append(f"  {cmd:<12s} n={h['count']:<6d} 平均 {h['mean_ms']:8.3f} ms  "
+                         f"p50 {h['p50_ms']:8.3f}  p90 {h['p90_ms']:8.3f}  p99 {h['p99_ms']:8.3f}  "
+                         f"最大 {h['max_ms']:8.3f}")
+        return "\n".join(lines)
+
+    def dump(self, path: Optional[str] = None) -> bool:
+        """
+        写出统计文件（.json为JSON，其余扩展名为文本）
+
+        Returns:
+            是否写出成功
+        """
+        path = path or self.dump_path
+        if not path:
+            return False
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                if path.lower().endswith('.json'):
+                    json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+                else:
+                    f.write(self.format_text() + "\n")
+            logger.info(f"传输统计已保存到: {path}")
+            return True
+        except Exception as e:
+            logger.error(f"传输统计保存失败: {str(e)}")
+            return False
@@ -1,6 +1,11 @@
 import numpy as np
 import logging
-from typing import Dict, List, Tuple, Optional, Callable
+from typing import Dict, List, Tuple, Optional, Callable, Sequence
+
+try:
+    from .SCPISweepEngine import SCPISweepEngine, QueryResponse
+except ImportError:
+    from SCPISweepEngine import SCPISweepEngine, QueryResponse
 
 class VNACalibration:
     """
@@ -8,14 +13,42 @@ class VNACalibration:
     移除了仪器通信部分，通过回调函数与外部通信
     """
     
-    def __init__(self, send_command_callback: Callable[[str], Optional[str]]):
+    # 12项误差模型的系数名称（F=前向/端口1激励，R=反向/端口2激励）
+    FORWARD_TERMS = ('EDF', 'ERF', 'ESF', 'EXF', 'ELF', 'ETF')
+    REVERSE_TERMS = ('EDR', 'ERR', 'ESR', 'EXR', 'ELR', 'ETR')
+    
+    # 求解误差项所用的标准件测量: 名称 -> (校准步骤, 测量数据键)
+    # 步骤: THRU=直通, OPEN1/SHORT1=端口1开路/短路(端口2接负载), OPEN2/SHORT2=端口2开路/短路(端口1接负载)
+    FORWARD_STANDARDS = {
+        'short': ('SHORT1', 'DATA_M_11'),
+        'open': ('OPEN1', 'DATA_M_11'),
+        'load': ('OPEN2', 'DATA_M_11'),
+        'isolation': ('OPEN1', 'DATA_M_12'),
+        'thru_trans': ('THRU', 'DATA_M_12'),
+        'thru_refl': ('THRU', 'DATA_M_11'),
+    }
+    REVERSE_STANDARDS = {
+        'short': ('SHORT2', 'DATA_M_22'),
+        'open': ('OPEN2', 'DATA_M_22'),
+        'load': ('OPEN1', 'DATA_M_22'),
+        'isolation': ('OPEN2', 'DATA_M_21'),
+        'thru_trans': ('THRU', 'DATA_M_21'),
+        'thru_refl': ('THRU', 'DATA_M_22'),
+    }
+    
+    def __init__(self, send_command_callback: Callable[[str], Optional[str]],
+                 query_many_callback: Optional[Callable[[Sequence[str]], List[QueryResponse]]] = None):
         """
         初始化VNA校准类
         
         Args:
             send_command_callback: 发送命令到仪器的回调函数
+            query_many_callback: 流水线查询回调 f(命令列表) -> 应答列表，为None时逐条查询
+                                 （PipelinedTcpClient可用SCPISweepEngine.client_query_many包装）
         """
         self.send_command = send_command_callback
+        # 扫频引擎：跳过重复的设置命令，批量下发，流水线查询
+        self.sweep_engine = SCPISweepEngine(send_command_callback, query_many_callback)
         self.is_connected = False
         
         # 校准参数
@@ -33,6 +66,10 @@ class VNACalibration:
         # 设置日志
         self.logger = logging.getLogger(__name__)
     
+    def get_frequencies(self) -> np.ndarray:
+        """校准/测量频点 (MHz)"""
+        return np.arange(self.start_freq, self.stop_freq + self.step_freq, self.step_freq)
+    
     def setup_instrument(self, channel: int, freq: float, power: float, waveform: str = "Sin1M.sin", state: str = "TRXD"):
         """
         配置仪器参数
@@ -53,6 +90,8 @@ class VNACalibration:
         
         for cmd in commands:
             self.send_command(cmd)
+        # 绕过扫频引擎修改了仪器状态
+        self.sweep_engine.invalidate()
     
     def measure_power_and_phase(self, tx_channel: int, rx_channel: int, freq: float) -> Tuple[float, float]:
         """
@@ -109,32 +148,41 @@ class VNACalibration:
         
         self.logger.info(f"开始测量 {standard_type} 标准件")
         
+        engine = self.sweep_engine
+        engine.reset_stats()
+        measure_time = 1000 / self.calibration_ifbw
+        phase_samples = int(122880 * 1000 / self.calibration_ifbw)
+        
         for i, freq in enumerate(freqs):
-            # 设置仪器
-            self.setup_instrument(tx_channel, freq, self.calibration_pow)
+            # 设置仪器（与上一频点相同的设置不会重复下发）
+            engine.setup_channel(tx_channel, freq, self.calibration_pow)
             
             # 为其他通道设置低功率
             for ch in [1, 2]:
                 if ch != tx_channel:
-                    self.setup_instrument(ch, freq, -70)
+                    engine.setup_channel(ch, freq, -70)
             
-            # 测量每个接收通道
-            for rx in rx_channels:
-                power, phase = self.measure_power_and_phase(tx_channel, rx, freq)
+            # 流水线测量所有接收通道
+            point = engine.measure_point(tx_channel, rx_channels, measure_time, phase_samples)
+            for rx, (power, phase) in zip(rx_channels, point):
+                self.logger.debug(f"频率 {freq}MHz RX{rx}: 功率={power}dBm, 相位={phase}度")
                 
                 # 存储结果
                 results[f"LOG_M_{tx_channel}{rx}"][i] = power - self.calibration_pow
                 results[f"PHASE_M_{tx_channel}{rx}"][i] = phase
-                
-                # 转换为复数形式
-                magnitude = 10 ** (results[f"LOG_M_{tx_channel}{rx}"][i] / 20)
-                angle = results[f"PHASE_M_{tx_channel}{rx}"][i] * np.pi / 180
-                results[f"DATA_M_{tx_channel}{rx}"][i] = magnitude * np.exp(1j * angle)
             
             # 短暂延迟 - 通过回调通知外部
-            if hasattr(self, 'progress_callback'):
+            if hasattr(self, 'progress_callback') and self.progress_callback:
                 self.progress_callback(f"测量{standard_type}-频率{freq}MHz", i/len(freqs)*100)
         
+        # 转换为复数形式
+        for rx in rx_channels:
+            magnitude = 10 ** (results[f"LOG_M_{tx_channel}{rx}"] / 20)
+            angle = results[f"PHASE_M_{tx_channel}{rx}"] * np.pi / 180
+            results[f"DATA_M_{tx_channel}{rx}"] = magnitude * np.exp(1j * angle)
+        
+        self.logger.info(f"{standard_type} 标准件扫频完成: {engine.format_stats()}")
+        
         return results
     
     def perform_calibration(self, progress_callback: Optional[Callable[[str, int], None]] = None):
@@ -145,6 +193,8 @@ class VNACalibration:
             progress_callback: 进度回调函数
         """
         self.progress_callback = progress_callback
+        # 仪器状态未知，首个频点完整下发
+        self.sweep_engine.invalidate()
         
         freq_range = [self.start_freq, self.stop_freq, self.step_freq]
         
@@ -152,13 +202,14 @@ class VNACalibration:
         if progress_callback:
             progress_callback("请连接两个端口的直通件，然后继续", 0)
         
+        # 测量数据按校准步骤分别保存（键为 步骤_DATA_M_xx），避免不同标准件的同名数据互相覆盖
         # 端口1发射，端口1和2接收
         results_through_1 = self.measure_standard("Through", 1, [1, 2], freq_range)
-        self.measurements.update(results_through_1)
+        self._store_measurements('THRU', results_through_1)
         
         # 端口2发射，端口1和2接收
         results_through_2 = self.measure_standard("Through", 2, [1, 2], freq_range)
-        self.measurements.update(results_through_2)
+        self._store_measurements('THRU', results_through_2)
         
         # 测量开路标准件 (Open)
         if progress_callback:
@@ -166,11 +217,11 @@ class VNACalibration:
         
         # 端口1发射，端口1和2接收
         results_open_1 = self.measure_standard("Open", 1, [1, 2], freq_range)
-        self.measurements.update(results_open_1)
+        self._store_measurements('OPEN1', results_open_1)
         
         # 端口2发射，端口2接收
         results_open_2 = self.measure_standard("Open", 2, [2], freq_range)
-        self.measurements.update(results_open_2)
+        self._store_measurements('OPEN1', results_open_2)
         
         # 测量短路标准件 (Short)
         if progress_callback:
@@ -178,7 +229,7 @@ class VNACalibration:
         
         # 端口1发射，端口1接收
         results_short_1 = self.measure_standard("Short", 1, [1], freq_range)
-        self.measurements.update(results_short_1)
+        self._store_measurements('SHORT1', results_short_1)
         
         # 测量端口2开路，端口1负载
         if progress_callback:
@@ -186,11 +237,11 @@ class VNACalibration:
         
         # 端口2发射，端口2和1接收
         results_open_2_full = self.measure_standard("Open", 2, [2, 1], freq_range)
-        self.measurements.update(results_open_2_full)
+        self._store_measurements('OPEN2', results_open_2_full)
         
         # 端口1发射，端口1接收
         results_open_1_extra = self.measure_standard("Open", 1, [1], freq_range)
-        self.measurements.update(results_open_1_extra)
+        self._store_measurements('OPEN2', results_open_1_extra)
         
         # 测量端口2短路，端口1负载
         if progress_callback:
@@ -198,7 +249,7 @@ class VNACalibration:
         
         # 端口2发射，端口2接收
         results_short_2 = self.measure_standard("Short", 2, [2], freq_range)
-        self.measurements.update(results_short_2)
+        self._store_measurements('SHORT2', results_short_2)
         
         # 计算校准系数
         self.calculate_calibration_coefficients()
@@ -208,46 +259,53 @@ class VNACalibration:
         
         self.logger.info("校准完成")
     
-    def calculate_calibration_coefficients(self):
-        """计算校准系数"""
-        n_points = len(np.arange(self.start_freq, self.stop_freq + self.step_freq, self.step_freq))
-        
-        # 初始化系数数组
-        coeffs = {
-            'EDF': np.zeros(n_points, dtype=complex),
-            'ERF': np.zeros(n_points, dtype=complex),
-            'ESF': np.zeros(n_points, dtype=complex),
-            'EXF': np.zeros(n_points, dtype=complex),
-            'ELF': np.zeros(n_points, dtype=complex),
-            'ETF': np.zeros(n_points, dtype=complex),
-            'EDR': np.zeros(n_points, dtype=complex),
-            'ERR': np.zeros(n_points, dtype=complex),
-            'ESR': np.zeros(n_points, dtype=complex),
-            'EXR': np.zeros(n_points, dtype=complex),
-            'ELR': np.zeros(n_points, dtype=complex),
-            'ETR': np.zeros(n_points, dtype=complex)
-        }
+    def _store_measurements(self, step: str, results: Dict[str, np.ndarray]):
+        """按校准步骤保存标准件测量数据"""
+        self.measurements.update({f"{step}_{key}": value for key, value in results.items()})
+    
+    def _get_standard(self, step: str, key: str, n_points: int) -> np.ndarray:
+        """取出某个校准步骤的测量数据，缺失时返回全零"""
+        data = self.measurements.get(f"{step}_{key}")
+        if data is None:
+            self.logger.warning(f"缺少校准测量数据: {step}_{key}")
+            return np.zeros(n_points, dtype=complex)
+        return np.asarray(data, dtype=complex)
+    
+    @staticmethod
+    def solve_error_terms(short: np.ndarray, open_: np.ndarray, load: np.ndarray, isolation: np.ndarray,
+                          thru_trans: np.ndarray, thru_refl: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        单方向6项误差系数（整段频率数组一次求解）
         
-        # 计算前向误差系数
-        for i in range(n_points):
-            # 从测量数据中获取值
-            M5 = self.measurements.get('DATA_M_11', np.zeros(n_points, dtype=complex))[i]
-            M1 = self.measurements.get('DATA_M_11', np.zeros(n_points, dtype=complex))[i]  # 简化处理，实际应根据MATLAB代码调整
-            M3 = self.measurements.get('DATA_M_11', np.zeros(n_points, dtype=complex))[i]  # 简化处理
-            M10 = self.measurements.get('DATA_M_11', np.zeros(n_points, dtype=complex))[i]  # 简化处理
-            M6 = self.measurements.get('DATA_M_12', np.zeros(n_points, dtype=complex))[i]  # 简化处理
-            M9 = self.measurements.get('DATA_M_12', np.zeros(n_points, dtype=complex))[i]  # 简化处理
+        Args:
+            short/open_/load: 激励端口接短路/开路/负载时的反射测量值
+            isolation: 两端口均接负载时的传输测量值
+            thru_trans/thru_refl: 直通时的传输/反射测量值
             
-            # 计算前向误差系数 (根据MATLAB代码)
-            coeffs['EDF'][i] = M5
-            coeffs['ERF'][i] = 2 * (M5 - M1) * (M3 - M5) / (M3 - M1)
-            coeffs['ESF'][i] = (M3 + M1 - 2 * M5) / (M3 - M1)
-            coeffs['EXF'][i] = M6
-            coeffs['ELF'][i] = (M10 - M5) / (coeffs['ESF'][i] * (M10 - M5) + coeffs['ERF'][i])
-            coeffs['ETF'][i] = (M9 - M6) * (1 - coeffs['ESF'][i] * coeffs['ELF'][i])
+        Returns:
+            (方向性ED, 反射跟踪ER, 源匹配ES, 隔离EX, 负载匹配EL, 传输跟踪ET)
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ed = load
+            er = 2 * (load - short) * (open_ - load) / (open_ - short)
+            es = (open_ + short - 2 * load) / (open_ - short)
+            ex = isolation
+            thru_delta = thru_refl - load
+            el = thru_delta / (es * thru_delta + er)
+            et = (thru_trans - isolation) * (1 - es * el)
+        return ed, er, es, ex, el, et
+    
+    def calculate_calibration_coefficients(self):
+        """计算校准系数（前向和反向12项误差模型，按频率轴整体向量化计算）"""
+        n_points = len(self.get_frequencies())
         
-        # 计算反向误差系数 (类似处理)
-        # 这里简化处理，实际应根据MATLAB代码完整实现
+        coeffs = {}
+        for names, standards in ((self.FORWARD_TERMS, self.FORWARD_STANDARDS),
+                                 (self.REVERSE_TERMS, self.REVERSE_STANDARDS)):
+            data = {name: self._get_standard(step, key, n_points) for name, (step, key) in standards.items()}
+            terms = self.solve_error_terms(data['short'], data['open'], data['load'], data['isolation'],
+                                           data['thru_trans'], data['thru_refl'])
+            coeffs.update(zip(names, terms))
         
         self.calibration_coeffs = coeffs
     
@@ -259,8 +317,7 @@ class VNACalibration:
             progress_callback("请连接待测器件，然后继续", 0)
         
         freq_range = [self.start_freq, self.stop_freq, self.step_freq]
-        freqs = np.arange(self.start_freq, self.stop_freq + self.step_freq, self.step_freq)
-        n_points = len(freqs)
+        n_points = len(self.get_frequencies())
         
         # 初始化结果数组
         self.results = {
@@ -289,39 +346,22 @@ class VNACalibration:
         
         self.logger.info("DUT测量完成")
     
-    def apply_calibration(self):
-        """应用校准到测量结果"""
-        n_points = len(self.results['S11'])
+    @staticmethod
+    def correct_s_parameters(S11: np.ndarray, S21: np.ndarray, S12: np.ndarray, S22: np.ndarray,
+                             coeffs: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        用12项误差模型修正原始S参数
         
-        # 初始化校准后的结果数组
-        calibrated_results = {
-            'S11': np.zeros(n_points, dtype=complex),
-            'S21': np.zeros(n_points, dtype=complex),
-            'S12': np.zeros(n_points, dtype=complex),
-            'S22': np.zeros(n_points, dtype=complex)
-        }
+        测量值的最后一维为频率轴，可以带任意前导维度（如批量测量 [n_meas, n_freq]），
+        误差系数 [n_freq] 按广播规则作用于每一条测量。
         
-        for i in range(n_points):
-            # 获取原始测量结果
-            S11 = self.results['S11'][i]
-            S21 = self.results['S21'][i]
-            S12 = self.results['S12'][i]
-            S22 = self.results['S22'][i]
-            
-            # 获取校准系数
-            EDF = self.calibration_coeffs['EDF'][i]
-            ERF = self.calibration_coeffs['ERF'][i]
-            ESF = self.calibration_coeffs['ESF'][i]
-            EXF = self.calibration_coeffs['EXF'][i]
-            ELF = self.calibration_coeffs['ELF'][i]
-            ETF = self.calibration_coeffs['ETF'][i]
-            EDR = self.calibration_coeffs['EDR'][i]
-            ERR = self.calibration_coeffs['ERR'][i]
-            ESR = self.calibration_coeffs['ESR'][i]
-            EXR = self.calibration_coeffs['EXR'][i]
-            ELR = self.calibration_coeffs['ELR'][i]
-            ETR = self.calibration_coeffs['ETR'][i]
-            
+        Returns:
+            Dict[str, np.ndarray]: 修正后的 S11/S21/S12/S22，形状与输入相同
+        """
+        EDF, ERF, ESF, EXF, ELF, ETF = (coeffs[name] for name in VNACalibration.FORWARD_TERMS)
+        EDR, ERR, ESR, EXR, ELR, ETR = (coeffs[name] for name in VNACalibration.REVERSE_TERMS)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
             # 计算中间变量
             A = (S11 - EDF) / ERF
             B = (S21 - EXF) / ETF
@@ -329,14 +369,69 @@ class VNACalibration:
             D = (S22 - EDR) / ERR
             
             # 计算校准后的S参数
-            denominator = (1 + A * ESF) * (1 + D * ESR) - B * C * ELF * ELR
+            AE = 1 + A * ESF
+            DE = 1 + D * ESR
+            BC = B * C
+            inv_denominator = 1 / (AE * DE - BC * (ELF * ELR))
+            
+            return {
+                'S11': (A * DE - BC * ELF) * inv_denominator,
+                'S21': (B * (1 + D * (ESR - ELF))) * inv_denominator,
+                'S12': (C * (1 + A * (ESF - ELR))) * inv_denominator,
+                'S22': (D * AE - BC * ELR) * inv_denominator,
+            }
+    
+    def apply_calibration(self, measurements: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+        """
+        应用校准到测量结果
+        
+        Args:
+            measurements: 原始S参数 {'S11','S21','S12','S22'}，每项形状为 [n_freq] 或 [n_meas, n_freq]；
+                          为None时修正self.results并写回
             
-            calibrated_results['S11'][i] = (A * (1 + D * ESR) - B * C * ELF) / denominator
-            calibrated_results['S22'][i] = (D * (1 + A * ESF) - B * C * ELR) / denominator
-            calibrated_results['S12'][i] = (C * (1 + A * (ESF - ELR))) / denominator
-            calibrated_results['S21'][i] = (B * (1 + D * (ESR - ELF))) / denominator
+        Returns:
+            Dict[str, np.ndarray]: 校准后的S参数
+        """
+        source = self.results if measurements is None else measurements
+        n_points = len(self.calibration_coeffs['EDF'])
+        raw = {}
+        for name in ('S11', 'S21', 'S12', 'S22'):
+            raw[name] = np.asarray(source[name], dtype=complex)
+            if raw[name].shape[-1] != n_points:
+                raise ValueError(f"{name} 频点数 {raw[name].shape[-1]} 与校准系数频点数 {n_points} 不一致")
+        
+        calibrated_results = self.correct_s_parameters(raw['S11'], raw['S21'], raw['S12'], raw['S22'],
+                                                       self.calibration_coeffs)
+        if measurements is None:
+            self.results.update(calibrated_results)
+        return calibrated_results
+    
+    def save_calibration(self, store, calibration_dir: Optional[str] = None, cal_type: str = "SOLT",
+                         port_config: str = "DualPort") -> Tuple[bool, str]:
+        """
+        将当前校准系数保存到CalibrationStore
+        
+        Returns:
+            (是否成功, 校准ID或错误信息)
+        """
+        if not self.calibration_coeffs:
+            return False, "尚未计算校准系数"
+        return store.save(self.calibration_coeffs, self.get_frequencies(), cal_type, port_config,
+                          calibration_dir=calibration_dir,
+                          extra={'calibration_pow': self.calibration_pow, 'calibration_ifbw': self.calibration_ifbw})
+    
+    def load_calibration(self, store, cal_id: Optional[str] = None):
+        """
+        从CalibrationStore加载校准系数，并插值到当前测量频率轴，之后measure_dut直接应用
         
-        self.results.update(calibrated_results)
+        Args:
+            store: CalibrationStore实例
+            cal_id: 校准ID，为None时加载最新校准
+        """
+        stored = store.load(cal_id)
+        self.calibration_coeffs = stored.coefficients_at(self.get_frequencies())
+        self.logger.info(f"已加载校准 {stored.cal_id}")
+        return stored
     
     def get_results(self):
         """获取测量结果"""
@@ -1,10 +1,9 @@
 # src/app/widgets/ADCSamplingPanel/Controller.py
-import os
-import time
 import numpy as np
 from PyQt5.QtWidgets import QFileDialog, QMessageBox
 from PyQt5.QtCore import QObject, pyqtSignal, QThread, pyqtSlot
 from ...core.ADCSample import ADCSample
+from ...core.AcquisitionPipeline import AcquisitionPipeline
 from ...core.FileManager import FileManager
 from ...core.ClockController import ClockController  # 导入时钟控制类
 from memory_profiler import profile
@@ -16,11 +15,14 @@ class ADCWorker(QObject):
     sampleData = pyqtSignal(list)
     dataSaved = pyqtSignal(str, str)  # 数据保存信号 (文件路径, 消息)
     
-    def __init__(self, tcp_client, count, interval, save_raw_data=True, output_dir=None, filename_prefix=None):
+    def __init__(self, tcp_client, count, interval, save_raw_data=True, output_dir=None, filename_prefix=None,
+                 save_csv=False, receive_mode='stream'):
         super().__init__()
         # 使用传入的tcp_client实例化ADCSample
         self.adc_sample = ADCSample()
         self.adc_sample.set_tcp_client(tcp_client)  # 设置TCP客户端
+        self.adc_sample.save_csv = save_csv  # 二进制为主格式，CSV可选
+        self.adc_sample.receive_mode = receive_mode  # 'stream'/'length'/'header'
         self.count = count
         self.interval = interval
         self.save_raw_data = save_raw_data
@@ -28,60 +30,27 @@ class ADCWorker(QObject):
         self.filename_prefix = filename_prefix or 'adc_raw_data'
         self.running = False
         self._should_stop = False
+        self.pipeline = None
 
     @pyqtSlot()
     def run(self):
-        """执行ADC采样"""
+        """执行ADC采样：接收、解析、写盘和界面数据发送在流水线中重叠进行"""
         self.running = True
-        successful_samples = 0
         
         try:
-            # 确保输出目录存在
-            if self.save_raw_data:
-                self.adc_sample.file_manager.ensure_dir_exists(self.output_dir)
-            
-            for i in range(self.count):
-                if not self.running or self._should_stop:
-                    break
-                
-                self.progress.emit(i + 1, self.count, f"采样 {i + 1}/{self.count}")
-                
-                # 执行单次采样 - 使用上下文管理器确保资源释放
-                u32_values, error = None, None
-                try:
-                    u32_values, error = self.adc_sample.perform_single_test(i)
-                    if error:
-                        self.progress.emit(i + 1, self.count, f"采样失败: {error}")
-                        continue
-                    
-                    successful_samples += 1
-                    
-                    # 处理采样数据 - 优化内存使用
-                    sample_data = self._process_sample_data(u32_values)
-                    
-                    # 立即发送数据
-                    self.sampleData.emit([sample_data])
-                    
-                    # 保存原始数据
-                    if self.save_raw_data:
-                        filename = f'{self.filename_prefix}_{i + 1:04d}.csv'
-                        success, message = self.adc_sample.save_test_result(i, u32_values, filename, self.output_dir)
-                        if success:
-                            self.dataSaved.emit(os.path.join(self.output_dir, filename), f"数据已保存: {filename}")
-                        else:
-                            self.progress.emit(i + 1, self.count, f"数据保存失败: {message}")
-                    
-                finally:
-                    # 强制释放采样数据内存
-                    self._force_release_memory(u32_values)
-                    u32_values = None
-                    del u32_values
-                
-                # 等待间隔
-                time.sleep(self.interval)
-            
-            success = successful_samples > 0
-            message = f"完成 {successful_samples}/{self.count} 次采样"
+            self.pipeline = AcquisitionPipeline(
+                self.adc_sample, self.count, self.interval,
+                output_dir=self.output_dir,
+                filename_prefix=self.filename_prefix,
+                save_raw_data=self.save_raw_data,
+                analyze_func=self._emit_sample_data,
+                on_progress=self.progress.emit,
+                on_saved=self.dataSaved.emit,
+                on_error=lambda i, msg: self.progress.emit(i + 1, self.count, f"采样失败: {msg}"),
+            )
+            if self._should_stop:
+                self.pipeline.stop()
+            success, message = self.pipeline.run()
             self.finished.emit(success, message)
             
         except Exception as e:
@@ -90,6 +59,10 @@ class ADCWorker(QObject):
             # 彻底清理资源
             self.cleanup_resources()
 
+    def _emit_sample_data(self, index, u32_values):
+        """流水线实时阶段：转换采样数据并发送给界面"""
+        self.sampleData.emit([self._process_sample_data(u32_values)])
+
     def _process_sample_data(self, u32_values):
         """处理采样数据，优化内存使用"""
         if u32_values is None:
@@ -110,23 +83,6 @@ class ADCWorker(QObject):
             except AttributeError:
                 return u32_values
 
-    def _force_release_memory(self, obj):
-        """强制释放对象内存"""
-        if obj is None:
-            return
-        
-        # 对于numpy数组，使用特殊方法释放内存
-        if isinstance(obj, np.ndarray):
-            # 设置数组为None并调用gc
-            obj.setflags(write=True)
-            obj.resize(0, refcheck=False)
-        elif hasattr(obj, 'clear'):
-            obj.clear()
-        
-        # 删除引用
-        del obj
-
-    
     def cleanup_resources(self):
         """清理工作线程资源"""
         try:
@@ -137,6 +93,7 @@ class ADCWorker(QObject):
                 if hasattr(self.adc_sample, 'tcp_client'):
                     self.adc_sample.tcp_client = None
                 self.adc_sample = None
+            self.pipeline = None
             
             # 清理其他引用
             self.running = False
@@ -153,6 +110,8 @@ class ADCWorker(QObject):
         """停止采样"""
         self.running = False
         self._should_stop = True
+        if self.pipeline:
+            self.pipeline.stop()
 
 
 
@@ -287,6 +246,8 @@ class ADCSamplingController(QObject):
         count = self.view.sample_count_spin.value()
         interval = self.view.sample_interval_spin.value()
         save_raw_data = True
+        save_csv = self.model.save_csv
+        receive_mode = self.view.receive_mode_combo.currentData()
         output_dir = self.view.output_dir_edit.text() or 'data\\results\\test'
         filename_prefix = self.view.filename_edit.text() or 'adc_raw_data'
         
@@ -296,10 +257,12 @@ class ADCSamplingController(QObject):
         self.model.save_raw_data = save_raw_data
         self.model.output_dir = output_dir
         self.model.filename_prefix = filename_prefix
+        self.model.receive_mode = receive_mode
         
         # 创建工作线程，传入TCP客户端
         self.adc_thread = QThread()
-        self.adc_worker = ADCWorker(self.tcp_client, count, interval, save_raw_data, output_dir, filename_prefix)
+        self.adc_worker = ADCWorker(self.tcp_client, count, interval, save_raw_data, output_dir, filename_prefix,
+                                    save_csv, receive_mode)
         self.adc_worker.moveToThread(self.adc_thread)
         
         # 连接信号
@@ -314,7 +277,7 @@ class ADCSamplingController(QObject):
         
         # 启动线程
         self.adc_thread.start()
-        self.log_message(f"开始ADC采样，模式: {current_mode}, 次数: {count}, 间隔: {interval}s", "INFO")
+        self.log_message(f"开始ADC采样，模式: {current_mode}, 次数: {count}, 间隔: {interval}s, 接收: {receive_mode}", "INFO")
     
     def on_sampling_finished(self, success, message):
         """采样完成"""
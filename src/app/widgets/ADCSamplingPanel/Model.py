@@ -12,6 +12,8 @@ class ADCSamplingModel:
         self.output_dir = "data\\results\\test"
         self.filename_prefix = "adc_data"
         self.save_raw_data = True
+        self.save_csv = False  # 原始数据以.bin为主格式，CSV仅在需要时额外输出
+        self.receive_mode = 'stream'  # ADCSample接收模式: 'stream'逐块/'length'长度前缀/'header'帧头（需板卡支持）
         self.max_samples_in_memory = 50  # 内存中最多保留的样本数
         
         # 添加内存监控
@@ -2,7 +2,7 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, 
                              QLabel, QPushButton, QLineEdit, QSpinBox, 
                              QProgressBar, QDoubleSpinBox, QFileDialog, QCheckBox,
-                             QRadioButton, QButtonGroup)
+                             QRadioButton, QButtonGroup, QComboBox)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIntValidator, QPalette, QColor
 
@@ -114,6 +114,14 @@ class ADCSamplingView(QWidget):
         self.sample_interval_spin.setMinimumWidth(70)
         self.sample_interval_spin.setMaximumWidth(100)
         sample_layout.addWidget(self.sample_interval_spin)
+        sample_layout.addWidget(QLabel("接收:"))
+        self.receive_mode_combo = QComboBox()
+        self.receive_mode_combo.addItem("逐块", 'stream')
+        self.receive_mode_combo.addItem("长度前缀", 'length')
+        self.receive_mode_combo.addItem("帧头", 'header')
+        self.receive_mode_combo.setToolTip("逐块: read直到结束标记; 长度前缀: readall; 帧头: readf（需板卡固件支持）")
+        self.receive_mode_combo.setCurrentIndex(0)
+        sample_layout.addWidget(self.receive_mode_combo)
         instrument_layout.addLayout(sample_layout)
           
         # 文件名设置
@@ -2,9 +2,9 @@
 from PyQt5.QtCore import QObject, pyqtSignal, QThread, QEventLoop, QMutex, QWaitCondition
 from PyQt5.QtWidgets import QMessageBox
 from .Model import CalibrationModel, CalibrationType, PortConfig, CalibrationKitType
+from ...core.FileManager import FileManager
 import os
 import numpy as np
-import glob
 
 class CalibrationWorker(QThread):
     progress_updated = pyqtSignal(str, int, bool, bool)  # 修改：添加第三个参数表示是否需要用户确认
@@ -101,8 +101,11 @@ class CalibrationWorker(QThread):
                     self.log_message.emit(f"ADC采样失败: {step}", "ERROR")
                     continue
                 
-                # 获取当前文件夹中的所有数据文件
-                data_files = glob.glob(os.path.join(raw_data_dir, "*.csv"))
+                # 获取当前文件夹中的所有数据文件（优先.bin）
+                try:
+                    data_files = FileManager().find_data_files(raw_data_dir, recursive=False)
+                except FileNotFoundError:
+                    data_files = []
                 if not data_files:
                     self.log_message.emit(f"未找到数据文件: {raw_data_dir}", "ERROR")
                     continue
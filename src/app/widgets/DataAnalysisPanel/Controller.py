@@ -8,6 +8,7 @@ from PyQt5.QtCore import QObject, pyqtSignal, QThread, pyqtSlot
 import config
 from ...core.DataAnalyze import DataAnalyzer, AnalysisConfig
 from ...core.FileManager import FileManager
+from ...core.ParallelAnalysis import ParallelFileAnalyzer
 from ...widgets.PlotWidget import create_plot_widget
 import time
 from typing import Optional, Tuple, Dict, Any
@@ -46,67 +47,18 @@ class ADCProcessWorker(QObject):
       
         try:
             # 初始化结果存储
-            results = {
-                'ys_full':[],'ys': [], 'mags': [], 'ys_d_full':[],'ys_d': [], 'mags_d': [],
-                'freq_ref': None, 'freq_d_ref': None, 'sum_Xd': None,
-                'success_count': 0, 'total_files': len(self.file_list),
-            }
+            results = self.analyzer.new_batch_results(len(self.file_list))
           
             self.log_message.emit(f"开始处理 {len(self.file_list)} 个文件", "INFO")
           
-            # 处理每个文件
-            for i, file_path in enumerate(self.file_list):
-                if self._should_stop:  # 使用明确的停止标志
-                    self.log_message.emit("处理被用户中断", "INFO")
-                    break
-              
-                self.progress.emit(i + 1, len(self.file_list), f"处理文件: {os.path.basename(file_path)}")
-              
-                try:
-                    # 先加载数据，然后使用分析器处理
-                    raw_data = self.load_u32_data(file_path)
-                  
-                    # 使用分析器处理单个文件的数据
-                    res = self.analyzer.process_single_file(raw_data,i)
-                  
-                    if res is None:
-                        self.log_message.emit(f"文件 {os.path.basename(file_path)} 处理失败，跳过", "WARNING")
-                        continue
-                      
-                    # 从字典中提取数据
-                    y_full = res['y_full']
-                    y_roi = res['y_roi']
-                    freq = res['freq']
-                    mag_linear = res['mag_linear']
-                    y_full_diff = res['y_full_diff']
-                    y_diff = res['y_diff']
-                    freq_d = res['freq_d']
-                    mag_linear_d = res['mag_linear_d']
-                    Xd_norm = res['Xd_norm']
-                  
-                    # 初始化参考频率
-                    if results['freq_ref'] is None:
-                        results['freq_ref'] = freq
-                    if results['freq_d_ref'] is None:
-                        results['freq_d_ref'] = freq_d
-                        results['sum_Xd'] = np.zeros_like(Xd_norm, dtype=np.complex128)
-                  
-                    # 存储结果
-                    results['ys_full'].append(y_full.astype(np.float64))
-                    results['ys'].append(y_roi.astype(np.float64))
-                    results['mags'].append(mag_linear.astype(np.float64))
-                    results['ys_d_full'].append(y_full_diff.astype(np.float64))
-                    results['ys_d'].append(y_diff.astype(np.float64))
-                    results['mags_d'].append(mag_linear_d.astype(np.float64))
-                    results['sum_Xd'] += Xd_norm
-                    results['success_count'] += 1
-                      
-                    # 及时释放临时变量内存
-                    del y_full, y_roi, freq, mag_linear, y_full_diff, y_diff, freq_d, mag_linear_d, Xd_norm
-                      
-                except Exception as e:
-                    self.log_message.emit(f"处理文件 {os.path.basename(file_path)} 失败: {str(e)}", "WARNING")
-                    continue
+            n_workers = getattr(self.config, 'n_workers', 1)
+            if n_workers != 1 and len(self.file_list) > 1:
+                self.process_files_parallel(results, n_workers)
+            else:
+                self.process_files_serial(results)
+                cache = self.analyzer.cache
+                if cache is not None and (cache.hits or cache.misses):
+                    self.log_message.emit(f"分析缓存: 命中 {cache.hits} 次，未命中 {cache.misses} 次", "INFO")
           
             if results['success_count'] == 0:
                 raise RuntimeError("没有文件成功处理")
@@ -122,7 +74,7 @@ class ADCProcessWorker(QObject):
 
             try:
                 # 对平均后的数据进行边沿分析，添加异常处理
-                edge_results = self.analyzer.analyze_edges(averages['y_full_avg'])
+                edge_results = self.analyzer.analyze_edges(averages['y_full_avg'], periodic=True)
                 
                 if 'first_rise_pos' in edge_results and edge_results['first_rise_pos'] is not None:
                     edge_results['first_rise_pos_time'] = edge_results['first_rise_pos'] * self.config.ts_eff * 1e6
@@ -162,36 +114,58 @@ class ADCProcessWorker(QObject):
             import gc
             gc.collect()
 
+    def process_files_serial(self, results: Dict[str, Any]):
+        """在当前线程中逐个处理文件"""
+        for i, file_path in enumerate(self.file_list):
+            if self._should_stop:  # 使用明确的停止标志
+                self.log_message.emit("处理被用户中断", "INFO")
+                break
+          
+            self.progress.emit(i + 1, len(self.file_list), f"处理文件: {os.path.basename(file_path)}")
+          
+            try:
+                # 使用分析器加载并处理单个文件（启用分析缓存时优先使用缓存）
+                res = self.analyzer.analyze_file(file_path, i)
+              
+                if res is None:
+                    self.log_message.emit(f"文件 {os.path.basename(file_path)} 处理失败，跳过", "WARNING")
+                    continue
+                  
+                self.analyzer.accumulate_result(results, res)
+                # 及时释放临时变量内存
+                del res
+                  
+            except Exception as e:
+                self.log_message.emit(f"处理文件 {os.path.basename(file_path)} 失败: {str(e)}", "WARNING")
+                continue
+
+    def process_files_parallel(self, results: Dict[str, Any], n_workers: int):
+        """在进程池中并行处理文件，结果按文件顺序累加，进度按完成顺序上报"""
+        parallel = ParallelFileAnalyzer(self.config, n_workers, self.analyzer.file_manager.base_data_path)
+        self.log_message.emit(f"使用 {parallel.n_workers} 个进程并行处理", "INFO")
+        for done, (i, file_path, res, error) in enumerate(
+                parallel.iter_results(self.file_list, should_stop=lambda: self._should_stop), start=1):
+            self.progress.emit(done, len(self.file_list), f"处理文件: {os.path.basename(file_path)}")
+            if res is None:
+                reason = f"失败: {error}" if error else "处理失败，跳过"
+                self.log_message.emit(f"文件 {os.path.basename(file_path)} {reason}", "WARNING")
+                continue
+            self.analyzer.accumulate_result(results, res)
+        if self._should_stop:
+            self.log_message.emit("处理被用户中断", "INFO")
+
     def stop(self):
         """停止处理"""
         self._should_stop = True
         self.running = False
 
     def load_u32_data(self, path: str) -> np.ndarray:
-        """从文件加载uint32数据"""
-        file_manager = FileManager()
-        return file_manager.load_u32_text_first_col(path, skip_first=self.config.skip_first_value)
+        """从文件加载uint32数据（.bin内存映射，其余按文本解析）"""
+        return self.analyzer.file_manager.load_u32_data(path, skip_first=self.config.skip_first_value)
   
     def calculate_averages(self, results: Dict[str, Any]) -> Dict[str, Any]:
-        """计算平均值"""
-        averages = {}
-      
-        # ROI平均值
-        averages['y_full_avg'] = np.mean(np.vstack(results['ys_full']), axis=0)
-        averages['y_avg'] = np.mean(np.vstack(results['ys']), axis=0)
-        averages['mag_avg_linear'] = np.mean(np.vstack(results['mags']), axis=0)
-        averages['mag_avg_db'] = 20 * np.log10(averages['mag_avg_linear'])
-    
-        # 差分平均值
-        averages['y_d_full_avg'] = np.mean(np.vstack(results['ys_d_full']), axis=0)
-        averages['y_d_avg'] = np.mean(np.vstack(results['ys_d']), axis=0)
-        averages['mag_d_avg_linear'] = np.mean(np.vstack(results['mags_d']), axis=0)
-        averages['mag_d_avg_db'] = 20 * np.log10(averages['mag_d_avg_linear'])
-    
-        # 复数FFT平均值
-        averages['avg_Xd'] = results['sum_Xd'] / results['success_count']
-    
-        return averages
+        """计算平均值（由结果累加器给出，含逐点标准差）"""
+        return self.analyzer.result_processor.calculate_averages(results)
 
 
 class DataAnalysisController(QObject):
@@ -250,7 +224,7 @@ class DataAnalysisController(QObject):
                 self.view,
                 "选择数据文件",
                 "",
-                "数据文件 (*.s2p *.csv *.txt *.dat);;所有文件 (*)"
+                "数据文件 (*.bin *.s2p *.csv *.txt *.dat);;所有文件 (*)"
             )
           
             if file_paths:
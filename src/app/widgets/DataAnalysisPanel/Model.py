@@ -20,7 +20,7 @@ class ADCConfig:
     edge_search_start: int = 1
     diff_points: int = 10
     average_points: int = 1
-    search_method: int = 1  # SearchMethod.RISING
+    search_method: int = 1  # SearchMethod.RISING (2: MAX, 4: FFT；3: PYRAMID 未在界面中提供)
     roi_start_tenths: float = 20
     roi_end_tenths: float = 30
     roi_mid_tenths: float = 27
@@ -29,6 +29,9 @@ class ADCConfig:
     min_second_rise_ratio: float = 0.2    # 第二个上升沿最小幅度比例
     min_second_fall_ratio: float = 0.2    # 下降沿最小幅度比例
     cal_mode: str = "LOAD"  # 新增CAL_Mode参数
+    n_workers: int = 1  # 并行分析进程数，1为单进程，<=0为CPU核数
+    fold_periods: int = 1  # 每次采集折叠平均的周期数，<=0为用尽所有完整周期
+    analysis_cache: bool = False  # 重新分析未改动的文件时使用磁盘缓存
 
     @property
     def t_sample(self) -> float:
@@ -118,7 +121,10 @@ class DataAnalysisModel:
             'search_method': self.adc_config.search_method,
             'roi_start_tenths': self.adc_config.roi_start_tenths,
             'roi_end_tenths': self.adc_config.roi_end_tenths,
-            'output_csv': self.adc_config.output_csv
+            'output_csv': self.adc_config.output_csv,
+            'n_workers': self.adc_config.n_workers,
+            'fold_periods': self.adc_config.fold_periods,
+            'analysis_cache': self.adc_config.analysis_cache
         }
     
     def update_adc_config_from_dict(self, config_dict: Dict[str, Any]):
@@ -144,5 +150,8 @@ class DataAnalysisModel:
             search_method=self.adc_config.search_method,
             roi_start_tenths=self.adc_config.roi_start_tenths,
             roi_end_tenths=self.adc_config.roi_end_tenths,
-            output_csv=self.adc_config.output_csv
+            output_csv=self.adc_config.output_csv,
+            n_workers=self.adc_config.n_workers,
+            fold_periods=self.adc_config.fold_periods,
+            analysis_cache=self.adc_config.analysis_cache
         )
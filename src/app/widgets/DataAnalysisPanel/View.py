@@ -276,6 +276,7 @@ class DataAnalysisView(QWidget):
         self.search_method_combo = QComboBox()
         self.search_method_combo.addItem("Raise", 1)
         self.search_method_combo.addItem("MAX", 2)
+        self.search_method_combo.addItem("FFT", 4)
         self.search_method_combo.setCurrentIndex(0)
         grid_layout.addWidget(self.search_method_combo, 1, 1)
         
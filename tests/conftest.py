@@ -0,0 +1,8 @@
+# tests/conftest.py
+# 将src目录加入模块搜索路径，以便以 app.core.* 导入被测模块
+import os
+import sys
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
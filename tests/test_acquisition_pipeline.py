@@ -0,0 +1,89 @@
+# tests/test_acquisition_pipeline.py
+# 采集流水线：回调或单帧解析抛出异常时各阶段继续消费队列，不会死锁
+import threading
+
+import numpy as np
+import pytest
+
+from app.core.AcquisitionPipeline import AcquisitionPipeline
+
+N_ACQ = 12
+
+
+class FakeFileManager:
+    def ensure_dir_exists(self, path):
+        pass
+
+
+class FakeSample:
+    """最小的ADCSample替身：奇数次采集成功，偶数次接收失败；第3次的数据无法解析；保存全部失败"""
+    
+    output_dir = 'unused'
+    
+    def __init__(self):
+        self.file_manager = FakeFileManager()
+        self.saved = []
+    
+    def acquire_raw(self, index):
+        if index % 2 == 0:
+            return None, "接收超时"
+        return np.full(4, index, dtype='<u4').tobytes(), None
+    
+    def decode_u32_frame(self, raw):
+        values = np.frombuffer(raw, dtype='<u4')
+        if values[0] == 3:
+            raise ValueError("帧格式错误")
+        return values
+    
+    def save_test_result(self, index, u32_values, filename, output_dir):
+        self.saved.append(index)
+        return False, "磁盘已满"
+
+
+def raising_callback(*args):
+    raise RuntimeError("回调异常")
+
+
+def run_with_timeout(pipeline, timeout=20.0):
+    result = {}
+    t = threading.Thread(target=lambda: result.update(value=pipeline.run()), daemon=True)
+    t.start()
+    t.join(timeout)
+    assert not t.is_alive(), "流水线未结束（死锁）"
+    return result['value']
+
+
+@pytest.mark.parametrize('save_raw_data', [True, False])
+def test_raising_callbacks_and_decode_errors_do_not_block(save_raw_data):
+    sample = FakeSample()
+    errors = []
+    
+    def on_error(index, message):
+        errors.append(index)
+        raise RuntimeError("错误回调异常")
+    
+    pipeline = AcquisitionPipeline(sample, N_ACQ, save_raw_data=save_raw_data, queue_size=1,
+                                   on_error=on_error, on_progress=raising_callback)
+    ok, message = run_with_timeout(pipeline)
+    
+    stats = pipeline.get_stats()
+    assert stats['receive']['items'] == N_ACQ // 2 and stats['receive']['errors'] == N_ACQ // 2
+    assert stats['decode']['items'] == N_ACQ // 2 - 1 and stats['decode']['errors'] == 1
+    assert pipeline.decoded_count == N_ACQ // 2 - 1
+    expected_errors = set(range(0, N_ACQ, 2)) | {3}
+    if save_raw_data:
+        assert not ok
+        assert sorted(sample.saved) == [i for i in range(1, N_ACQ, 2) if i != 3]
+        expected_errors |= set(sample.saved)
+    else:
+        assert ok
+    assert set(errors) == expected_errors
+
+
+def test_raising_analysis_does_not_block():
+    sample = FakeSample()
+    pipeline = AcquisitionPipeline(sample, N_ACQ, save_raw_data=False, queue_size=1,
+                                   analyze_func=raising_callback)
+    ok, _ = run_with_timeout(pipeline)
+    assert ok
+    assert pipeline.get_stats()['analysis']['errors'] == N_ACQ // 2 - 1
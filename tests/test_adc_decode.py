@@ -0,0 +1,94 @@
+# tests/test_adc_decode.py
+# ADC帧解析：零拷贝解析、20位有符号扩展、bit31触发沿搜索
+import struct
+
+import numpy as np
+import pytest
+
+from app.core.ADCSample import ADCSample
+from app.core.ConfigManager import AnalysisConfig
+from app.core.DataProcessor import DataProcessor
+
+
+def legacy_extract_adc_data(u32_arr, use_signed18=True):
+    """优化前的extract_adc_data（掩码+加偏置的符号扩展）"""
+    bit31 = ((u32_arr >> 31) & 0x1).astype(np.uint8)
+    adc_18u = (u32_arr & ((1 << 20) - 1)).astype(np.uint32)
+    if use_signed18:
+        adc_18s = ((adc_18u + (1 << 19)) & ((1 << 20) - 1)) - (1 << 19)
+        return bit31, adc_18s.astype(np.int32)
+    return bit31, adc_18u.astype(np.int32)
+
+
+def legacy_detect_valid_data(bit31, edge_search_start=1):
+    edge_idx = np.flatnonzero((bit31[1:] == 1) & (bit31[:-1] == 0))
+    edge_idx = edge_idx[edge_idx >= edge_search_start]
+    return edge_idx[0] + 1 if edge_idx.size else None
+
+
+@pytest.fixture
+def processor():
+    return DataProcessor(AnalysisConfig())
+
+
+@pytest.fixture
+def random_words():
+    return np.random.default_rng(0).integers(0, 1 << 32, size=200_003, dtype=np.uint32)
+
+
+def test_decode_u32_frame_round_trip(random_words):
+    raw = random_words.astype('<u4').tobytes()
+    decoded = ADCSample.decode_u32_frame(raw)
+    assert decoded.dtype == np.dtype('<u4')
+    assert np.array_equal(decoded, random_words)
+    assert np.array_equal(decoded[:4], struct.unpack('<4I', raw[:16]))
+
+
+def test_decode_u32_frame_ignores_trailing_bytes_and_shares_memory():
+    data = bytearray(struct.pack('<3I', 1, 2, 0xFFFFFFFF) + b'\x01\x02')
+    decoded = ADCSample.decode_u32_frame(data)
+    assert decoded.tolist() == [1, 2, 0xFFFFFFFF]
+    data[0] = 7
+    assert decoded[0] == 7
+
+
+@pytest.mark.parametrize('signed', [True, False])
+def test_unpack_adc_matches_legacy(processor, random_words, signed):
+    _, expected = legacy_extract_adc_data(random_words, signed)
+    assert np.array_equal(processor.unpack_adc(random_words, signed), expected)
+    out = processor.adc_buffer(random_words.shape)
+    assert processor.unpack_adc(random_words, signed, out) is out
+    assert np.array_equal(out, expected)
+
+
+def test_unpack_adc_sign_extension_boundaries(processor):
+    words = np.array([0x00000, 0x7FFFF, 0x80000, 0xFFFFF, 0x80000001, 0xFFF80000], dtype=np.uint32)
+    assert processor.unpack_adc(words, True).tolist() == [0, (1 << 19) - 1, -(1 << 19), -1, 1, -(1 << 19)]
+    assert processor.unpack_adc(words, False).tolist() == [0, 0x7FFFF, 0x80000, 0xFFFFF, 1, 0x80000]
+
+
+def test_extract_adc_data_matches_legacy(processor, random_words):
+    bit31, adc = processor.extract_adc_data(random_words)
+    old_bit31, old_adc = legacy_extract_adc_data(random_words)
+    assert np.array_equal(bit31, old_bit31)
+    assert np.array_equal(adc, old_adc)
+
+
+@pytest.mark.parametrize('edge', [2, 5, 70_000, 65_536, 65_537, 199_999])
+def test_find_trigger_edge_matches_detect_valid_data(processor, edge):
+    words = np.zeros(200_000, dtype=np.uint32)
+    words[edge:] |= np.uint32(1 << 31)
+    bit31, _ = legacy_extract_adc_data(words)
+    assert processor.find_trigger_edge(words, 1) == legacy_detect_valid_data(bit31, 1) == edge
+
+
+def test_find_trigger_edge_without_edge(processor):
+    assert processor.find_trigger_edge(np.zeros(1000, dtype=np.uint32), 1) is None
+    assert processor.find_trigger_edge(np.full(1000, 1 << 31, dtype=np.uint32), 1) is None
+
+
+def test_find_trigger_edges_batch(processor):
+    stack = np.zeros((3, 5000), dtype=np.uint32)
+    stack[0, 100:] |= np.uint32(1 << 31)
+    stack[2, 4321:] |= np.uint32(1 << 31)
+    assert processor.find_trigger_edges(stack, 1).tolist() == [100, -1, 4321]
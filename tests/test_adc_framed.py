@@ -0,0 +1,93 @@
+# tests/test_adc_framed.py
+# ADCSample分帧接收('length'/'header')：与逐块接收结果一致，短帧/帧头错误时失败并恢复套接字超时
+import logging
+
+import numpy as np
+import pytest
+
+from app.core.ADCBoardSimulator import ADCBoardSimulator, SimulatorConfig, make_tdr_frame
+from app.core.ADCSample import ADCSample, FRAME_HEADER
+from app.core.FileManager import FileManager
+from app.core.TcpClient import TcpClient
+
+N_SAMPLES = 20000
+
+
+class BadMagicSimulator(ADCBoardSimulator):
+    """readf回复错误魔数的帧头"""
+
+    def _handle_command(self, conn, command, session):
+        if command == 'readf':
+            frame = session['frame']
+            session['offset'] = len(frame)
+            self._reply(conn, session, FRAME_HEADER.pack(b'XXXX', len(frame)), frame)
+        else:
+            super()._handle_command(conn, command, session)
+
+
+class TimeoutRecordingClient(TcpClient):
+    """记录每次send之后套接字的超时（分帧接收结束后应恢复到这个值）"""
+
+    def send(self, msg, max_retries=3, base_timeout=1.0):
+        result = super().send(msg, max_retries, base_timeout)
+        self.timeout_after_send = self.sock.gettimeout()
+        return result
+
+
+def connect(sim, tmp_path):
+    logging.getLogger('app.core').setLevel(logging.WARNING)
+    tcp = TimeoutRecordingClient()
+    ok, msg = tcp.connect(sim.host, sim.port)
+    assert ok, msg
+    return ADCSample(tcp, FileManager(base_data_path=str(tmp_path)))
+
+
+@pytest.mark.parametrize('mode', ['stream', 'length', 'header'])
+@pytest.mark.parametrize('fragment_size', [0, 1500])
+def test_receive_modes_return_the_simulated_frame(tmp_path, mode, fragment_size):
+    config = SimulatorConfig(n_samples=N_SAMPLES, chunk_size=8192, fragment_size=fragment_size)
+    with ADCBoardSimulator(config=config) as sim:
+        adc = connect(sim, tmp_path)
+        adc.receive_mode = mode
+        adc.frame_timeout = 4.5
+        for i in range(2):
+            data, error = adc.acquire_raw(i)
+            assert error is None
+            np.testing.assert_array_equal(adc.decode_u32_frame(data), make_tdr_frame(i, config))
+        assert adc.last_transfer['bytes'] == 4 * N_SAMPLES
+        assert adc.tcp_client.sock.gettimeout() != adc.frame_timeout
+        adc.tcp_client.close()
+
+
+@pytest.mark.parametrize('mode', ['length', 'header'])
+def test_truncated_payload_fails_and_restores_timeout(tmp_path, mode):
+    config = SimulatorConfig(n_samples=N_SAMPLES, short_read_rate=1.0)
+    with ADCBoardSimulator(config=config) as sim:
+        adc = connect(sim, tmp_path)
+        adc.frame_timeout = 0.2
+        ok, _ = adc.send_command('sample')
+        assert ok
+        ok, message = adc.receive_framed_data(mode)
+        assert not ok
+        assert '分帧接收失败' in message
+        assert sim.fault_counts['short_read'] == 1
+        assert adc.tcp_client.sock.gettimeout() == adc.tcp_client.timeout_after_send != adc.frame_timeout
+        adc.tcp_client.close()
+
+
+def test_bad_header_magic(tmp_path):
+    with BadMagicSimulator(config=SimulatorConfig(n_samples=N_SAMPLES)) as sim:
+        adc = connect(sim, tmp_path)
+        adc.receive_mode = 'header'
+        adc.frame_timeout = 4.5
+
+        data, error = adc.acquire_raw(0)
+        assert data is None
+        assert "帧头错误" in error and "XXXX" in error
+        assert adc.tcp_client.sock.gettimeout() == adc.tcp_client.timeout_after_send != adc.frame_timeout
+        adc.tcp_client.close()
+
+
+def test_not_connected(tmp_path):
+    adc = ADCSample(TcpClient(), FileManager(base_data_path=str(tmp_path)))
+    assert adc.receive_framed_data('length') == (False, "未连接")
@@ -0,0 +1,108 @@
+# tests/test_analysis_cache.py
+# 分析结果磁盘缓存：命中、文件/配置改变后失效、LRU淘汰
+import os
+import time
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from app.core.AnalysisCache import AnalysisCache, read_entry, write_entry
+from app.core.ConfigManager import AnalysisConfig
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'frame.bin'
+    path.write_bytes(np.arange(1000, dtype='<u4').tobytes())
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AnalysisCache(str(tmp_path / 'cache'), max_bytes=1 << 20)
+
+
+def test_entry_round_trip(tmp_path):
+    arrays = {'y': np.linspace(0, 1, 7), 'z': np.arange(6, dtype=np.int16).reshape(2, 3),
+              'c': np.array([1 + 2j, 3 - 4j]), 'n': 5, 'f': 2.5}
+    path = str(tmp_path / 'x.entry')
+    write_entry(path, arrays)
+    entry = read_entry(path)
+    for name, value in arrays.items():
+        value = np.asarray(value)
+        assert entry[name].dtype == value.dtype and entry[name].shape == value.shape
+        assert np.array_equal(entry[name], value)
+
+
+def test_hit_after_put(cache, source):
+    config = AnalysisConfig()
+    key = cache.key(cache.source_digest(str(source)), 'result', config)
+    assert cache.get(key) is None
+    cache.put(key, {'y_full': np.arange(10.0), 'rise_pos': 3})
+    entry = cache.get(key)
+    assert np.array_equal(entry['y_full'], np.arange(10.0)) and int(entry['rise_pos']) == 3
+    assert (cache.hits, cache.misses) == (1, 1)
+    
+    # 新实例扫描目录后同样命中
+    reopened = AnalysisCache(cache.cache_dir, cache.max_bytes)
+    assert reopened.get(key) is not None
+
+
+def test_key_changes_with_file_content(cache, source):
+    config = AnalysisConfig()
+    key = cache.key(cache.source_digest(str(source)), 'segment', config)
+    cache.put(key, {'y_full': np.zeros(4)})
+    
+    source.write_bytes(np.arange(1, 1001, dtype='<u4').tobytes())
+    st = os.stat(source)
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    new_key = cache.key(cache.source_digest(str(source)), 'segment', config)
+    assert new_key != key
+    assert cache.get(new_key) is None
+
+
+def test_key_changes_only_with_stage_fields(cache, source):
+    digest = cache.source_digest(str(source))
+    config = AnalysisConfig()
+    roi_changed = replace(config, roi_end_tenths=28)
+    edge_changed = replace(config, edge_search_start=5)
+    unrelated = replace(config, n_workers=4, output_csv='other.csv')
+    
+    # ROI只影响'result'阶段，'segment'阶段仍可复用
+    assert cache.key(digest, 'segment', roi_changed) == cache.key(digest, 'segment', config)
+    assert cache.key(digest, 'result', roi_changed) != cache.key(digest, 'result', config)
+    # 上升沿搜索参数两个阶段都失效
+    assert cache.key(digest, 'segment', edge_changed) != cache.key(digest, 'segment', config)
+    assert cache.key(digest, 'result', edge_changed) != cache.key(digest, 'result', config)
+    # 与结果无关的字段不影响键
+    for stage in ('segment', 'result'):
+        assert cache.key(digest, stage, unrelated) == cache.key(digest, stage, config)
+    assert cache.key(digest, 'segment', config) != cache.key(digest, 'result', config)
+
+
+def test_lru_eviction(tmp_path):
+    payload = np.zeros(1000)    # 每个条目约8KB
+    cache = AnalysisCache(str(tmp_path / 'cache'), max_bytes=3 * payload.nbytes + 3000)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, {'v': payload})
+        time.sleep(0.01)
+    assert cache.get('a') is not None     # a成为最近使用的条目
+    cache.put('d', {'v': payload})
+    
+    assert cache.get('b') is None         # 最久未使用的b被淘汰
+    for key in ('a', 'c', 'd'):
+        assert cache.get(key) is not None
+    assert cache.total_bytes <= cache.max_bytes
+    assert sorted(f for f in os.listdir(cache.cache_dir)) == ['a.entry', 'c.entry', 'd.entry']
+    
+    cache.clear()
+    assert cache.total_bytes == 0 and os.listdir(cache.cache_dir) == []
+
+
+def test_corrupt_entry_is_dropped(cache):
+    cache.put('k', {'v': np.arange(3)})
+    with open(os.path.join(cache.cache_dir, 'k.entry'), 'wb') as f:
+        f.write(b'\x10garbage')
+    assert cache.get('k') is None
+    assert cache.misses == 1
@@ -0,0 +1,132 @@
+# tests/test_async_tcp_client.py
+# AsyncTcpClient流水线：按序匹配应答、超时后迟到的应答被丢弃、未认领队列、对端关闭与写出失败
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from app.core.ADCBoardSimulator import ADCBoardSimulator, SimulatorConfig
+from app.core.AsyncTcpClient import AsyncTcpClient, PipelinedTcpClient
+
+IDN = 'TDR,ADC Board Simulator,0,1.0'
+
+
+@pytest.fixture
+def sim():
+    with ADCBoardSimulator(config=SimulatorConfig(n_samples=1000)) as sim:
+        yield sim
+
+
+@pytest.fixture
+def slow_sim():
+    # 每条应答延迟100ms，模拟器逐条串行应答
+    with ADCBoardSimulator(config=SimulatorConfig(n_samples=1000, latency=0.1)) as sim:
+        yield sim
+
+
+def run(sim, scenario):
+    """连接模拟器后在新的事件循环中执行scenario(client)"""
+    async def main():
+        client = AsyncTcpClient()
+        ok, msg = await client.connect(sim.host, sim.port)
+        assert ok, msg
+        try:
+            return await scenario(client)
+        finally:
+            await client.close()
+    return asyncio.run(main())
+
+
+def test_query_many_matches_responses_in_order(sim):
+    async def scenario(client):
+        return await client.query_many(['*IDN?\n', 'STATUS?\n', '*IDN?\n', 'STATUS?\n'])
+    assert run(sim, scenario) == [(True, IDN), (True, 'OK'), (True, IDN), (True, 'OK')]
+
+
+def test_late_reply_after_timeout_is_discarded(slow_sim):
+    async def scenario(client):
+        first = await client.query('*IDN?\n', timeout=0.03)
+        # *IDN?的应答迟到，只应被丢弃，不能交给下一条查询
+        second = await client.query('STATUS?\n', timeout=1.0)
+        return first, second, len(client._pending), client._unclaimed.qsize()
+    first, second, pending, unclaimed = run(slow_sim, scenario)
+    assert not first[0] and '超时' in first[1]
+    assert second == (True, 'OK')
+    assert pending == 0 and unclaimed == 0
+
+
+def test_unclaimed_lines_go_to_receive(sim):
+    async def scenario(client):
+        assert (await client.send('STATUS?\n'))[0]
+        assert (await client.send('*IDN?\n'))[0]
+        lines = [await client.receive(1.0), await client.receive(1.0)]
+        # 查询不会取走未认领的行，也不会被它们错位
+        query = await client.query('STATUS?\n')
+        empty = await client.receive(0.05)
+        return lines, query, empty
+    lines, query, empty = run(sim, scenario)
+    assert lines == [(True, 'OK'), (True, IDN)]
+    assert query == (True, 'OK')
+    assert not empty[0]
+
+
+@pytest.fixture
+def closing_server():
+    """收到第一行后不应答、直接关闭连接的服务器"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+
+    def serve():
+        conn, _ = server.accept()
+        with conn:
+            conn.recv(1024)
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield server.getsockname()
+    thread.join(2.0)
+    server.close()
+
+
+def test_peer_close_fails_pending_futures(closing_server):
+    host, port = closing_server
+
+    async def main():
+        client = AsyncTcpClient()
+        ok, msg = await client.connect(host, port)
+        assert ok, msg
+        results = await client.query_many(['*IDN?\n', 'STATUS?\n'], timeout=2.0)
+        state = client.connected, len(client._pending)
+        await client.close()
+        return results, state
+    results, (connected, pending) = asyncio.run(main())
+    assert all(not ok and '关闭' in msg for ok, msg in results)
+    assert not connected
+    assert pending == 0
+
+
+def test_write_failure_leaves_no_pending(sim):
+    async def scenario(client):
+        client.connected = False  # 模拟写出时连接已断开
+        results = await client.query_many(['*IDN?\n', 'STATUS?\n'])
+        pending = len(client._pending)
+        client.connected = True
+        after = await client.query('STATUS?\n')
+        return results, pending, after
+    results, pending, after = run(sim, scenario)
+    assert all(not ok and '发送失败' in msg for ok, msg in results)
+    assert pending == 0
+    assert after == (True, 'OK')
+
+
+def test_pipelined_client_facade(sim):
+    client = PipelinedTcpClient()
+    ok, msg = client.connect(sim.host, sim.port)
+    assert ok, msg
+    try:
+        assert client.query_many(['STATUS?\n', '*IDN?\n']) == [(True, 'OK'), (True, IDN)]
+        assert client.send('STATUS?\n')[0]
+        assert client.receive() == (True, 'OK')
+    finally:
+        client.shutdown()
@@ -0,0 +1,135 @@
+# tests/test_board_pool.py
+# 多板卡连接池：各板卡独立输出目录、合并运行记录、连接失败的板卡被跳过、stop()停止所有板卡
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import ExitStack
+
+import numpy as np
+import pytest
+
+from app.core.ADCBoardSimulator import ADCBoardSimulator, SimulatorConfig, make_tdr_frame
+from app.core.BoardPool import BoardPool, BoardSpec
+from app.core.FileManager import FileManager
+
+N_SAMPLES = 4096
+N_BOARDS = 3
+
+
+def unused_port():
+    """返回一个当前没有监听的本地端口"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def simulators():
+    """N_BOARDS个独立的仿真板卡，每块使用不同的随机种子"""
+    logging.getLogger('app.core').setLevel(logging.ERROR)
+    configs = [SimulatorConfig(n_samples=N_SAMPLES, seed=seed) for seed in range(N_BOARDS)]
+    with ExitStack() as stack:
+        sims = [stack.enter_context(ADCBoardSimulator(config=cfg)) for cfg in configs]
+        yield list(zip(sims, configs))
+
+
+def make_pool(simulators, tmp_path, extra=()):
+    specs = [BoardSpec(f'board_{i}', sim.host, sim.port) for i, (sim, _) in enumerate(simulators)]
+    return BoardPool(specs + list(extra), FileManager(base_data_path=str(tmp_path)))
+
+
+def test_each_board_writes_its_own_directory(simulators, tmp_path):
+    output_dir = str(tmp_path / 'run')
+    with make_pool(simulators, tmp_path) as pool:
+        record = pool.acquire(3, output_dir)
+
+    assert record['n_boards'] == N_BOARDS
+    assert record['total_acquisitions'] == 3 * N_BOARDS
+    for i, (_, cfg) in enumerate(simulators):
+        board = record['boards'][f'board_{i}']
+        assert board['success'] and board['saved'] == 3 and board['errors'] == []
+        assert board['output_dir'] == os.path.join(output_dir, f'board_{i}')
+        for k in range(3):
+            path = os.path.join(board['output_dir'], f'adc_raw_data_{k + 1:04d}.bin')
+            np.testing.assert_array_equal(np.fromfile(path, dtype='<u4'), make_tdr_frame(k, cfg))
+
+
+def test_run_record_merges_all_boards(simulators, tmp_path):
+    output_dir = str(tmp_path / 'run')
+    with make_pool(simulators, tmp_path) as pool:
+        record = pool.acquire(2, output_dir)
+
+    assert record['record_path'] == os.path.join(output_dir, 'run_record.json')
+    with open(record['record_path'], encoding='utf-8') as f:
+        saved = json.load(f)
+    assert set(saved['boards']) == {f'board_{i}' for i in range(N_BOARDS)}
+    assert saved['total_acquisitions'] == sum(b['saved'] for b in saved['boards'].values())
+    assert saved['count_per_board'] == 2 and not saved['stopped']
+    for i, (sim, _) in enumerate(simulators):
+        board = saved['boards'][f'board_{i}']
+        assert (board['name'], board['ip'], board['port']) == (f'board_{i}', sim.host, sim.port)
+        assert board['stats']['receive']['bytes'] == 2 * 4 * N_SAMPLES
+
+    no_record_dir = str(tmp_path / 'no_record')
+    with make_pool(simulators, tmp_path) as pool:
+        record = pool.acquire(1, no_record_dir, save_record=False)
+    assert 'record_path' not in record
+    assert not os.path.exists(os.path.join(no_record_dir, 'run_record.json'))
+
+
+def test_unreachable_board_is_reported_and_skipped(simulators, tmp_path):
+    dead = BoardSpec('dead', '127.0.0.1', unused_port())
+    pool = make_pool(simulators, tmp_path, extra=[dead])
+    try:
+        success, message = pool.connect_all(timeout=1)
+        assert not success
+        assert f'1/{N_BOARDS + 1}' in message and 'dead' in message
+        assert [b.name for b in pool.connected_boards()] == [f'board_{i}' for i in range(N_BOARDS)]
+
+        record = pool.acquire(1, str(tmp_path / 'run'))
+        assert record['n_boards'] == N_BOARDS
+        assert 'dead' not in record['boards']
+        assert not os.path.exists(tmp_path / 'run' / 'dead')
+    finally:
+        pool.close_all()
+
+
+def test_acquire_without_connected_boards_raises(tmp_path):
+    pool = BoardPool([('127.0.0.1', unused_port())], FileManager(base_data_path=str(tmp_path)))
+    assert not pool.connect_all(timeout=1)[0]
+    with pytest.raises(RuntimeError):
+        pool.acquire(1, str(tmp_path / 'run'))
+
+
+def test_duplicate_board_names_are_rejected():
+    with pytest.raises(ValueError):
+        BoardPool([BoardSpec('a', '127.0.0.1'), BoardSpec('a', '127.0.0.2')])
+
+
+def test_stop_reaches_every_pipeline(simulators, tmp_path):
+    count, interval = 5, 30.0
+    with make_pool(simulators, tmp_path) as pool:
+        result = {}
+        t = threading.Thread(target=lambda: result.update(record=pool.acquire(count, str(tmp_path / 'run'),
+                                                                              interval=interval)),
+                             daemon=True)
+        t.start()
+        deadline = time.monotonic() + 10
+        while len(pool._pipelines) < N_BOARDS and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(pool._pipelines) == N_BOARDS
+
+        t0 = time.monotonic()
+        pool.stop()
+        t.join(interval / 2)
+        assert not t.is_alive(), "stop()未到达所有板卡的采集流水线"
+        assert time.monotonic() - t0 < interval / 2
+
+    record = result['record']
+    assert record['stopped']
+    assert pool._pipelines == {}
+    for board in record['boards'].values():
+        assert board['saved'] < count
@@ -0,0 +1,141 @@
+# tests/test_calibration.py
+# VNA 12项误差模型：数组化修正与逐频点循环一致，并能还原真实S参数
+import numpy as np
+import pytest
+
+from app.core.VNACalibration import VNACalibration
+
+N_FREQ = 64
+N_MEAS = 5
+S_NAMES = ('S11', 'S21', 'S12', 'S22')
+
+
+def legacy_apply_calibration(results, c):
+    """旧版VNACalibration.apply_calibration：逐频点循环"""
+    n_points = len(results['S11'])
+    out = {name: np.zeros(n_points, dtype=complex) for name in S_NAMES}
+    for i in range(n_points):
+        S11, S21, S12, S22 = (results[name][i] for name in S_NAMES)
+        A = (S11 - c['EDF'][i]) / c['ERF'][i]
+        B = (S21 - c['EXF'][i]) / c['ETF'][i]
+        C = (S12 - c['EXR'][i]) / c['ETR'][i]
+        D = (S22 - c['EDR'][i]) / c['ERR'][i]
+        den = (1 + A * c['ESF'][i]) * (1 + D * c['ESR'][i]) - B * C * c['ELF'][i] * c['ELR'][i]
+        out['S11'][i] = (A * (1 + D * c['ESR'][i]) - B * C * c['ELF'][i]) / den
+        out['S22'][i] = (D * (1 + A * c['ESF'][i]) - B * C * c['ELR'][i]) / den
+        out['S12'][i] = (C * (1 + A * (c['ESF'][i] - c['ELR'][i]))) / den
+        out['S21'][i] = (B * (1 + D * (c['ESR'][i] - c['ELF'][i]))) / den
+    return out
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def rand_c(rng, scale, size):
+    return scale * (rng.standard_normal(size) + 1j * rng.standard_normal(size))
+
+
+@pytest.fixture
+def coeffs(rng):
+    """随机误差项"""
+    terms = {}
+    for d in 'FR':
+        terms.update({f'ED{d}': rand_c(rng, 0.05, N_FREQ), f'ER{d}': 0.9 + rand_c(rng, 0.05, N_FREQ),
+                      f'ES{d}': rand_c(rng, 0.05, N_FREQ), f'EX{d}': rand_c(rng, 0.001, N_FREQ),
+                      f'EL{d}': rand_c(rng, 0.05, N_FREQ), f'ET{d}': 0.9 + rand_c(rng, 0.05, N_FREQ)})
+    return terms
+
+
+@pytest.fixture
+def dut(rng):
+    """真实DUT的S参数 [N_MEAS, N_FREQ]"""
+    return {name: rand_c(rng, 0.3, (N_MEAS, N_FREQ)) for name in S_NAMES}
+
+
+def measure(dut, c):
+    """按12项误差模型由真实S参数生成原始测量值"""
+    dS = dut['S11'] * dut['S22'] - dut['S21'] * dut['S12']
+    den_f = 1 - c['ESF'] * dut['S11'] - c['ELF'] * dut['S22'] + c['ESF'] * c['ELF'] * dS
+    den_r = 1 - c['ESR'] * dut['S22'] - c['ELR'] * dut['S11'] + c['ESR'] * c['ELR'] * dS
+    return {
+        'S11': c['EDF'] + c['ERF'] * (dut['S11'] - c['ELF'] * dS) / den_f,
+        'S21': c['EXF'] + c['ETF'] * dut['S21'] / den_f,
+        'S22': c['EDR'] + c['ERR'] * (dut['S22'] - c['ELR'] * dS) / den_r,
+        'S12': c['EXR'] + c['ETR'] * dut['S12'] / den_r,
+    }
+
+
+def test_correct_s_parameters_matches_scalar_loop(coeffs, dut):
+    raw = measure(dut, coeffs)
+    for row in range(N_MEAS):
+        single = {name: raw[name][row] for name in S_NAMES}
+        expected = legacy_apply_calibration(single, coeffs)
+        corrected = VNACalibration.correct_s_parameters(*(single[name] for name in S_NAMES), coeffs)
+        for name in S_NAMES:
+            assert corrected[name].shape == (N_FREQ,)
+            np.testing.assert_allclose(corrected[name], expected[name], rtol=1e-12, atol=1e-15)
+
+
+def test_correct_s_parameters_batch_recovers_dut(coeffs, dut):
+    raw = measure(dut, coeffs)
+    corrected = VNACalibration.correct_s_parameters(*(raw[name] for name in S_NAMES), coeffs)
+    for name in S_NAMES:
+        assert corrected[name].shape == (N_MEAS, N_FREQ)
+        np.testing.assert_allclose(corrected[name], dut[name], rtol=1e-10, atol=1e-12)
+
+
+def test_apply_calibration_checks_frequency_count(coeffs, dut):
+    cal = VNACalibration(lambda cmd: None)
+    cal.calibration_coeffs = coeffs
+    raw = measure(dut, coeffs)
+    batch = cal.apply_calibration(raw)
+    np.testing.assert_allclose(batch['S21'], dut['S21'], rtol=1e-10, atol=1e-12)
+    with pytest.raises(ValueError):
+        cal.apply_calibration({name: raw[name][:, :-1] for name in S_NAMES})
+
+
+def standard_measurements(c):
+    """
+    按误差模型生成各校准步骤的原始测量值，键与measure_standard存入cal.measurements的一致: f"{步骤}_{数据键}"
+    """
+    std = {}
+    for d, standards in (('F', VNACalibration.FORWARD_STANDARDS), ('R', VNACalibration.REVERSE_STANDARDS)):
+        def one_port(gamma):
+            return c[f'ED{d}'] + c[f'ER{d}'] * gamma / (1 - c[f'ES{d}'] * gamma)
+        values = {
+            'short': one_port(-1),
+            'open': one_port(1),
+            'load': one_port(0),
+            'isolation': c[f'EX{d}'],
+            'thru_refl': one_port(c[f'EL{d}']),
+            'thru_trans': c[f'EX{d}'] + c[f'ET{d}'] / (1 - c[f'ES{d}'] * c[f'EL{d}']),
+        }
+        for name, (step, data_key) in standards.items():
+            std[f"{step}_{data_key}"] = values[name]
+    return std
+
+
+@pytest.fixture
+def calibrated(coeffs):
+    cal = VNACalibration(lambda cmd: None)
+    cal.start_freq, cal.step_freq = 1000, 100
+    cal.stop_freq = cal.start_freq + (N_FREQ - 1) * cal.step_freq
+    cal.measurements.update(standard_measurements(coeffs))
+    cal.calculate_calibration_coefficients()
+    return cal
+
+
+def test_calculate_calibration_coefficients_recovers_all_terms(calibrated, coeffs):
+    assert set(calibrated.calibration_coeffs) == set(VNACalibration.FORWARD_TERMS + VNACalibration.REVERSE_TERMS)
+    assert len(calibrated.calibration_coeffs) == 12
+    for name, value in coeffs.items():
+        assert calibrated.calibration_coeffs[name].shape == (N_FREQ,)
+        np.testing.assert_allclose(calibrated.calibration_coeffs[name], value, rtol=1e-10, atol=1e-12, err_msg=name)
+
+
+def test_recovered_terms_correct_dut(calibrated, coeffs, dut):
+    corrected = calibrated.apply_calibration(measure(dut, coeffs))
+    for name in S_NAMES:
+        np.testing.assert_allclose(corrected[name], dut[name], rtol=1e-9, atol=1e-11, err_msg=name)
@@ -0,0 +1,130 @@
+# tests/test_calibration_store.py
+# 校准库：保存/加载往返、ID唯一、插值索引与np.interp一致、超出范围报错、插值缓存有界
+import logging
+
+import numpy as np
+import pytest
+
+from app.core.CalibrationStore import CalibrationStore, StoredCalibration, TERM_NAMES, interpolation_indices
+from app.core.VNACalibration import VNACalibration
+
+
+@pytest.fixture
+def store(tmp_path):
+    logging.getLogger('app.core').setLevel(logging.WARNING)
+    return CalibrationStore(str(tmp_path / 'calibration'))
+
+
+@pytest.fixture
+def freqs():
+    return np.arange(1000.0, 6100.0, 100.0)
+
+
+@pytest.fixture
+def coeffs(freqs):
+    rng = np.random.default_rng(1)
+    return {name: rng.standard_normal(len(freqs)) + 1j * rng.standard_normal(len(freqs)) for name in TERM_NAMES}
+
+
+def test_save_load_round_trip(store, coeffs, freqs):
+    ok, cal_id = store.save(coeffs, freqs, 'SOLT', 'DualPort', extra={'calibration_pow': -20})
+    assert ok, cal_id
+
+    # 新的CalibrationStore实例从磁盘读取，而不是内存缓存
+    stored = CalibrationStore(store.root_dir).load(cal_id)
+    np.testing.assert_array_equal(stored.freqs, freqs)
+    for name in TERM_NAMES:
+        np.testing.assert_array_equal(stored.coefficients[name], coeffs[name])
+    assert stored.metadata['calibration_pow'] == -20
+    assert stored.metadata['n_points'] == len(freqs)
+
+    entries = store.list_calibrations(cal_type='SOLT')
+    assert [e['id'] for e in entries] == [cal_id]
+    assert entries[0]['start_freq'] == freqs[0] and entries[0]['stop_freq'] == freqs[-1]
+    assert store.load() is store.load(cal_id)
+
+
+def test_default_ids_are_unique_within_a_second(store, coeffs, freqs):
+    ids = [store.save(coeffs, freqs)[1] for _ in range(5)]
+    assert len(set(ids)) == 5
+    entries = store.list_calibrations()
+    assert len(entries) == 5
+    assert len({e['timestamp'] for e in entries}) == 5
+    # 最新的排在最前
+    assert entries[0]['id'] == ids[-1]
+
+
+def test_reserved_id_gets_suffix_when_taken(store):
+    first = store._reserve_id('Calibration_SOLT_DualPort_x')
+    second = store._reserve_id('Calibration_SOLT_DualPort_x')
+    assert first == 'Calibration_SOLT_DualPort_x'
+    assert second == 'Calibration_SOLT_DualPort_x_2'
+
+
+def test_save_validates_input(store, coeffs, freqs):
+    ok, msg = store.save({k: v for k, v in coeffs.items() if k != 'ETR'}, freqs)
+    assert not ok and 'ETR' in msg
+    ok, msg = store.save(coeffs, freqs[:-1])
+    assert not ok
+    ok, msg = store.save(coeffs, freqs[::-1])
+    assert not ok and '递增' in msg
+
+
+def test_load_missing_raises(store):
+    with pytest.raises(KeyError):
+        store.load()
+    with pytest.raises(KeyError):
+        store.load('missing')
+
+
+@pytest.mark.parametrize('dut_freqs', [
+    np.linspace(1000.0, 6000.0, 77),
+    np.array([1000.0, 1000.0 + 1e-7, 2500.0, 5999.9, 6000.0]),
+    np.arange(1000.0, 6100.0, 100.0),
+])
+def test_interpolation_indices_match_np_interp(freqs, coeffs, dut_freqs):
+    i0, w = interpolation_indices(freqs, dut_freqs)
+    c = coeffs['EDF']
+    interp = c[i0] * (1 - w) + c[np.minimum(i0 + 1, len(freqs) - 1)] * w
+    expected = np.interp(dut_freqs, freqs, c.real) + 1j * np.interp(dut_freqs, freqs, c.imag)
+    np.testing.assert_allclose(interp, expected, rtol=1e-12, atol=1e-12)
+
+    stored = StoredCalibration('x', freqs, np.stack([coeffs[n] for n in TERM_NAMES]), {})
+    np.testing.assert_allclose(stored.coefficients_at(dut_freqs)['EDF'], expected, rtol=1e-12, atol=1e-12)
+
+
+def test_interpolation_single_point():
+    i0, w = interpolation_indices(np.array([1000.0]), np.array([1000.0, 1000.0]))
+    assert list(i0) == [0, 0] and list(w) == [0.0, 0.0]
+
+
+@pytest.mark.parametrize('dut_freqs', [np.array([900.0, 2000.0]), np.array([2000.0, 6000.5])])
+def test_out_of_range_raises(freqs, coeffs, dut_freqs):
+    with pytest.raises(ValueError):
+        interpolation_indices(freqs, dut_freqs)
+    stored = StoredCalibration('x', freqs, np.stack([coeffs[n] for n in TERM_NAMES]), {})
+    with pytest.raises(ValueError):
+        stored.coefficients_at(dut_freqs)
+
+
+def test_resampled_cache_is_bounded(freqs, coeffs):
+    stored = StoredCalibration('x', freqs, np.stack([coeffs[n] for n in TERM_NAMES]), {})
+    grids = [np.linspace(1000.0, 6000.0, 50 + k) for k in range(3 * StoredCalibration.RESAMPLED_CACHE_SIZE)]
+    for grid in grids:
+        stored.coefficients_at(grid)
+    assert len(stored._resampled) == StoredCalibration.RESAMPLED_CACHE_SIZE
+    # 最近使用的频率轴仍命中缓存
+    assert stored.coefficients_at(grids[-1]) is stored.coefficients_at(grids[-1])
+
+
+def test_vna_calibration_save_and_load(store, coeffs, freqs):
+    cal = VNACalibration(lambda cmd: None)
+    cal.start_freq, cal.stop_freq, cal.step_freq = 1000, 6000, 100
+    cal.calibration_coeffs = coeffs
+    ok, cal_id = cal.save_calibration(store)
+    assert ok, cal_id
+
+    cal.step_freq = 50
+    cal.load_calibration(store, cal_id)
+    assert len(cal.calibration_coeffs['EDF']) == len(cal.get_frequencies())
+    np.testing.assert_allclose(cal.calibration_coeffs['EDF'][::2], coeffs['EDF'], rtol=1e-12)
@@ -0,0 +1,144 @@
+# tests/test_clock_controller.py
+# 时钟控制：状态差分只发送变化的通道，模式不变时不产生网络往返，应答失败时缓存失效
+import time
+
+import pytest
+
+from app.core.ADCBoardSimulator import ADCBoardSimulator, SimulatorConfig
+from app.core.ClockController import ClockController
+from app.core.TcpClient import TcpClient
+
+
+class RecordingSimulator(ADCBoardSimulator):
+    """记录收到的每条命令"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commands = []
+    
+    def _handle_command(self, conn, command, session):
+        self.commands.append(command)
+        super()._handle_command(conn, command, session)
+
+
+class CountingClient(TcpClient):
+    """统计send调用次数"""
+    
+    def __init__(self):
+        super().__init__()
+        self.send_count = 0
+    
+    def send(self, msg, max_retries=3, base_timeout=1.0):
+        self.send_count += 1
+        return super().send(msg, max_retries, base_timeout)
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@pytest.fixture
+def sim():
+    with RecordingSimulator(config=SimulatorConfig()) as sim:
+        yield sim
+
+
+@pytest.fixture
+def client(sim):
+    tcp = CountingClient()
+    ok, msg = tcp.connect(sim.host, sim.port)
+    assert ok, msg
+    yield tcp
+    tcp.close()
+
+
+def lmk_commands(sim):
+    return [c for c in sim.commands if c.startswith('lmk_state')]
+
+
+def expected_board_states(mode):
+    return {ClockController.PORT_CHANNELS[key]: int(on)
+            for key, on in ClockController(None).get_mode_states(mode).items()}
+
+
+@pytest.mark.parametrize('ack_command', [None, 'STATUS?'])
+def test_only_changed_channels_are_sent(sim, client, ack_command):
+    clock = ClockController(client, ack_command=ack_command)
+    ok, msg = clock.set_s_mode('S11')
+    assert ok, msg
+    # 首次配置时状态未知，四个通道全部发送，先关闭再开启
+    assert wait_for(lambda: len(lmk_commands(sim)) == 4)
+    enables = [int(c.split()[3]) for c in lmk_commands(sim)]
+    assert enables == sorted(enables)
+    
+    sim.commands.clear()
+    ok, msg = clock.set_s_mode('S21')
+    assert ok, msg
+    # S11 -> S21 只有采样时钟的两个端口改变
+    assert wait_for(lambda: len(lmk_commands(sim)) == 2)
+    time.sleep(0.05)
+    assert sorted(lmk_commands(sim)) == ['lmk_state 2 1 1', 'lmk_state 2 3 0']
+    assert wait_for(lambda: sim.lmk_states == expected_board_states('S21'))
+    assert clock.validate_configuration('S21')[0]
+    assert (ack_command in sim.commands) == (ack_command is not None)
+
+
+def test_unchanged_mode_makes_no_round_trip(sim, client):
+    clock = ClockController(client, ack_command='STATUS?')
+    assert clock.set_s_mode('S12')[0]
+    sends = client.send_count
+    sim.commands.clear()
+    for _ in range(5):
+        ok, msg = clock.set_s_mode('S12')
+        assert ok, msg
+    assert client.send_count == sends
+    time.sleep(0.05)
+    assert sim.commands == []
+    assert clock.get_current_mode() == 'S12'
+
+
+def test_send_only_does_not_wait_for_reply(sim, client):
+    """默认不追加查询命令：板卡对lmk_state不应答，不能等待超时"""
+    clock = ClockController(client, ack_timeout=5.0)
+    t0 = time.perf_counter()
+    assert clock.set_s_mode('S22')[0]
+    assert time.perf_counter() - t0 < 1.0
+    assert 'STATUS?' not in sim.commands
+
+
+@pytest.mark.parametrize('ack_reply, config', [
+    ('READY', SimulatorConfig()),           # 应答内容不符
+    ('OK', SimulatorConfig(drop_rate=1.0)),  # 没有应答
+])
+def test_failed_ack_invalidates_cache(client, sim, ack_reply, config):
+    clock = ClockController(client, ack_command='STATUS?', ack_reply='OK', ack_timeout=0.2)
+    assert clock.set_s_mode('S11')[0]
+    
+    sim.config = config
+    clock.ack_reply = ack_reply
+    ok, msg = clock.set_s_mode('S22')
+    assert not ok
+    assert clock.get_current_mode() is None
+    # S11 -> S22 改变了全部四个通道，应答失败后全部标记为未知
+    assert all(state is None for state in clock.clock_states.values())
+    
+    # 恢复后再次设置同一模式时重新发送所有通道
+    sim.config = SimulatorConfig()
+    clock.ack_reply = 'OK'
+    client.clear_receive_buffer()
+    sim.commands.clear()
+    ok, msg = clock.set_s_mode('S22')
+    assert ok, msg
+    assert len(lmk_commands(sim)) == 4
+
+
+def test_not_connected():
+    clock = ClockController(None)
+    ok, _ = clock.set_s_mode('S11')
+    assert not ok
+    assert clock.set_s_mode('S33') == (False, "不支持的S参数模式: S33")
@@ -0,0 +1,138 @@
+# tests/test_data_analyzer_adcconfig.py
+# 界面把ADCConfig（而不是AnalysisConfig）传给DataAnalyzer，核心代码不能依赖ADCConfig没有的字段
+import importlib
+import os
+import sys
+import types
+from dataclasses import fields, replace
+
+import numpy as np
+import pytest
+
+from app.core.ADCBoardSimulator import SimulatorConfig, make_tdr_frame
+from app.core.ConfigManager import AnalysisConfig
+from app.core.DataAnalyze import DataAnalyzer
+from app.core.FileManager import FileManager
+
+N_FILES = 3
+COMPARE_KEYS = ('y_full', 'y_roi', 'mag_linear', 'y_full_diff', 'y_diff', 'mag_linear_d', 'Xd_norm')
+
+
+@pytest.fixture(scope='module')
+def gui_model():
+    """
+    导入界面的Model模块
+
+    DataAnalysisPanel/__init__.py会导入View(PyQt5)；没有PyQt5时用只含__path__的空包代替，
+    只执行Model.py本身
+    """
+    try:
+        from app.widgets.DataAnalysisPanel import Model
+        yield Model
+        return
+    except ImportError:
+        pass
+    import app.widgets
+    name = 'app.widgets.DataAnalysisPanel'
+    package = types.ModuleType(name)
+    package.__path__ = [os.path.join(os.path.dirname(app.widgets.__file__), 'DataAnalysisPanel')]
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(sys.modules, name, package)
+        model = importlib.import_module(name + '.Model')
+        yield model
+        sys.modules.pop(name + '.Model', None)
+
+
+@pytest.fixture
+def files(tmp_path):
+    fm = FileManager(base_data_path=str(tmp_path / 'data'))
+    out_dir = str(tmp_path / 'raw')
+    paths = []
+    for i in range(N_FILES):
+        name = f'frame_{i:03d}.bin'
+        assert fm.save_adc_binary_data(make_tdr_frame(i, SimulatorConfig(seed=i)), name, out_dir)[0]
+        paths.append(os.path.join(out_dir, name))
+    return paths
+
+
+@pytest.fixture
+def file_manager(tmp_path):
+    return FileManager(base_data_path=str(tmp_path / 'data'))
+
+
+def assert_same_result(a, b):
+    for key in COMPARE_KEYS:
+        np.testing.assert_array_equal(a[key], b[key], err_msg=key)
+    assert a['n_averages'] == b['n_averages']
+
+
+def test_adcconfig_matches_analysis_config(gui_model, files, file_manager):
+    gui_config = gui_model.DataAnalysisModel().adc_config
+    assert not gui_config.analysis_cache
+    # 两者共有的字段取ADCConfig的值，其余（如reuse_adc_buffer、analysis_cache_dir）为AnalysisConfig默认值
+    shared = {f.name: getattr(gui_config, f.name) for f in fields(AnalysisConfig) if hasattr(gui_config, f.name)}
+    gui = DataAnalyzer(gui_config, file_manager=file_manager)
+    core = DataAnalyzer(AnalysisConfig(**shared), file_manager=file_manager)
+    for i, path in enumerate(files):
+        res = gui.analyze_file(path, i)
+        assert res is not None
+        raw = file_manager.load_u32_data(path)
+        assert_same_result(res, gui.process_single_file(raw, i))
+        assert_same_result(res, core.analyze_file(path, i))
+    assert gui.cache is None
+
+
+def test_adcconfig_with_analysis_cache(gui_model, files, file_manager, tmp_path):
+    gui_config = gui_model.ADCConfig(analysis_cache=True)
+    analyzer = DataAnalyzer(gui_config, file_manager=file_manager)
+    cold = [analyzer.analyze_file(path, i) for i, path in enumerate(files)]
+    cache = analyzer.cache
+    assert cache is not None
+    assert cache.cache_dir == os.path.join(str(tmp_path / 'data'), 'cache', 'analysis')
+    assert cache.max_bytes == 1024 * 1024 * 1024
+    assert (cache.hits, cache.misses) == (0, 2 * N_FILES)
+    
+    warm = [analyzer.analyze_file(path, i) for i, path in enumerate(files)]
+    assert cache.hits == N_FILES
+    for a, b in zip(cold, warm):
+        assert a is not None and b is not None
+        assert_same_result(a, b)
+        assert a['data_dict']['rise_pos'] == b['data_dict']['rise_pos']
+    
+    # 只改ROI：复用对齐后的y_full，结果与不使用缓存一致
+    roi_config = replace(gui_config, roi_end_tenths=28)
+    reused = DataAnalyzer(roi_config, file_manager=file_manager)
+    plain = DataAnalyzer(replace(roi_config, analysis_cache=False), file_manager=file_manager)
+    for i, path in enumerate(files):
+        assert_same_result(reused.analyze_file(path, i), plain.analyze_file(path, i))
+    assert reused.cache.hits == N_FILES
+
+
+@pytest.mark.parametrize('fold_periods', [1, 0])
+def test_adcconfig_batch_processing(gui_model, files, file_manager, fold_periods):
+    gui_config = gui_model.ADCConfig(fold_periods=fold_periods)
+    analyzer = DataAnalyzer(gui_config, file_manager=file_manager)
+    results = analyzer.batch_process_files(files)
+    assert results['success_count'] == N_FILES
+    assert len(results['n_averages']) == N_FILES
+    if fold_periods == 1:
+        assert set(results['n_averages']) == {1}
+    averages = analyzer.result_processor.calculate_averages(results)
+    assert averages['y_full_avg'].shape == (gui_config.n_points,)
+
+
+def test_adcconfig_parallel_workers(gui_model, files, file_manager):
+    gui_config = gui_model.ADCConfig(n_workers=2, analysis_cache=True)
+    analyzer = DataAnalyzer(gui_config, file_manager=file_manager)
+    parallel = analyzer.batch_process_files(files)
+    serial = DataAnalyzer(replace(gui_config, n_workers=1, analysis_cache=False),
+                          file_manager=file_manager).batch_process_files(files)
+    assert parallel['success_count'] == serial['success_count'] == N_FILES
+    np.testing.assert_allclose(parallel['sum_Xd'], serial['sum_Xd'])
+
+
+def test_run_analysis_without_data_files_raises(tmp_path):
+    config = AnalysisConfig(input_dir=str(tmp_path))
+    analyzer = DataAnalyzer(config, file_manager=FileManager(base_data_path=str(tmp_path / 'data')))
+    with pytest.raises(FileNotFoundError):
+        analyzer.run_analysis()
@@ -0,0 +1,122 @@
+# tests/test_edge_candidates.py
+# 向量化的 EdgeDetector._find_edge_candidates 与原逐窗口循环实现逐位一致
+import logging
+import types
+
+import numpy as np
+import pytest
+
+from app.core.ADCBoardSimulator import SimulatorConfig, make_tdr_frame
+from app.core.ConfigManager import AnalysisConfig
+from app.core.DataAnalyze import DataAnalyzer
+from app.core.EdgeDetector import EdgeDetector
+from app.core.FileManager import FileManager
+
+N_FRAMES = 4
+
+
+def legacy_find_edge_candidates(self, smoothed_data, is_rising=True, min_amplitude_ratio=0.3):
+    """原实现：Python循环逐窗口计算峰峰值，逐个候选点切片求前后均值"""
+    window_size = max(10, int(len(smoothed_data) * 0.05))
+    step_size = max(5, int(len(smoothed_data) * 0.03))
+    if step_size == 0:
+        step_size = 1
+
+    threshold = np.ptp(smoothed_data) * min_amplitude_ratio
+
+    candidate_windows = []
+    for start in range(0, len(smoothed_data) - window_size, step_size):
+        end = start + window_size
+        window_p2p = np.ptp(smoothed_data[start:end])
+        if window_p2p > threshold:
+            candidate_windows.append((start, end, window_p2p))
+
+    if not candidate_windows:
+        return []
+
+    window_means = [np.mean(smoothed_data[start:end]) for start, end, _ in candidate_windows]
+    mean_of_means = np.mean(window_means)
+    std_of_means = np.std(window_means)
+    valid_windows = [window for i, window in enumerate(candidate_windows)
+                     if abs(window_means[i] - mean_of_means) < 2 * std_of_means]
+
+    if not valid_windows:
+        return []
+
+    valid_candidates = []
+    for start, end, p2p in valid_windows:
+        dy = np.diff(smoothed_data[start:end])
+        if is_rising:
+            dy_threshold = np.max(dy) * 0.3 if len(dy) > 0 else 0
+            candidate_indices = np.flatnonzero(dy > dy_threshold) + 1
+        else:
+            dy_threshold = np.min(dy) * 0.3 if len(dy) > 0 else 0
+            candidate_indices = np.flatnonzero(dy < dy_threshold) + 1
+
+        for candidate in candidate_indices:
+            global_pos = start + candidate
+            if 20 <= global_pos < len(smoothed_data) - 20:
+                if self._is_spike_noise(smoothed_data, 3):
+                    continue
+
+                window_size_5pct = max(5, int(len(smoothed_data) * 0.02))
+                pre_avg = np.mean(smoothed_data[max(0, global_pos - window_size_5pct):global_pos])
+                post_avg = np.mean(smoothed_data[global_pos:min(len(smoothed_data), global_pos + window_size_5pct)])
+
+                if abs(pre_avg - post_avg) < threshold * 0.1:
+                    continue
+
+                if is_rising and post_avg > pre_avg:
+                    valid_candidates.append((global_pos, post_avg - pre_avg))
+                elif not is_rising and post_avg < pre_avg:
+                    valid_candidates.append((global_pos, pre_avg - post_avg))
+
+    return valid_candidates
+
+
+@pytest.fixture(scope='module')
+def detectors():
+    cfg = AnalysisConfig()
+    legacy = EdgeDetector(cfg)
+    legacy._find_edge_candidates = types.MethodType(legacy_find_edge_candidates, legacy)
+    return EdgeDetector(cfg), legacy
+
+
+@pytest.fixture(scope='module')
+def traces(tmp_path_factory):
+    """仿真帧的 (按周期排序的曲线, 对齐后的曲线)"""
+    logging.getLogger('app.core').setLevel(logging.ERROR)
+    fm = FileManager(base_data_path=str(tmp_path_factory.mktemp('data')))
+    analyzer = DataAnalyzer(AnalysisConfig(), file_manager=fm)
+    result = []
+    for seed in range(N_FRAMES):
+        u32 = np.frombuffer(make_tdr_frame(seed, SimulatorConfig(seed=seed)), dtype='<u4')[1:]
+        segment = analyzer.extract_basic_segment(u32, seed)
+        result.append((segment['y_sorted'], segment['y_full'].astype(np.float64)))
+    return result
+
+
+@pytest.mark.parametrize('is_rising', [True, False])
+@pytest.mark.parametrize('ratio', [0.5, 0.1])
+def test_candidates_match_loop(detectors, traces, is_rising, ratio):
+    detector, legacy = detectors
+    for y_sorted, y_full in traces:
+        smoothed = detector._preprocess_data(y_full)
+        for data in (y_sorted, y_full, smoothed, smoothed[20000:40960]):
+            expected = legacy._find_edge_candidates(data, is_rising, ratio)
+            assert detector._find_edge_candidates(data, is_rising, ratio) == expected
+
+
+def test_candidates_on_flat_and_short_data(detectors):
+    detector, legacy = detectors
+    for data in (np.zeros(1000), np.ones(50), np.arange(30, dtype=np.float64)):
+        for is_rising in (True, False):
+            assert detector._find_edge_candidates(data, is_rising, 0.3) == \
+                legacy._find_edge_candidates(data, is_rising, 0.3)
+
+
+def test_analyze_edges_match_loop(detectors, traces):
+    detector, legacy = detectors
+    aligned = [y_full for _, y_full in traces]
+    for y_full in aligned + [np.mean(aligned, axis=0)]:
+        assert detector.analyze_edges(y_full) == legacy.analyze_edges(y_full)
@@ -0,0 +1,108 @@
+# tests/test_edge_pyramid.py
+# 多分辨率(金字塔)边沿搜索与全分辨率搜索(SearchMethod.RISING)的一致性
+import logging
+
+import numpy as np
+import pytest
+
+from app.core.ADCBoardSimulator import SimulatorConfig, make_tdr_frame
+from app.core.ConfigManager import AnalysisConfig, SearchMethod
+from app.core.DataAnalyze import DataAnalyzer
+from app.core.EdgeDetector import EdgeDetector
+from app.core.FileManager import FileManager
+
+N_FRAMES = 4
+EDGE_KEYS = ('first_rise_pos', 'second_rise_pos', 'fall_pos')
+
+
+@pytest.fixture(scope='module')
+def analyzer(tmp_path_factory):
+    logging.getLogger('app.core').setLevel(logging.ERROR)
+    fm = FileManager(base_data_path=str(tmp_path_factory.mktemp('data')))
+    return DataAnalyzer(AnalysisConfig(), file_manager=fm)
+
+
+@pytest.fixture(scope='module')
+def full():
+    return EdgeDetector(AnalysisConfig(search_method=SearchMethod.RISING))
+
+
+@pytest.fixture(scope='module')
+def pyramid():
+    return EdgeDetector(AnalysisConfig(search_method=SearchMethod.PYRAMID))
+
+
+def simulated_traces(analyzer, sim_config):
+    """返回 (按周期排序的曲线列表, 对齐后的曲线列表+其平均)"""
+    sorted_traces, aligned = [], []
+    for i in range(N_FRAMES):
+        u32 = np.frombuffer(make_tdr_frame(i, sim_config), dtype='<u4')[1:]
+        segment = analyzer.extract_basic_segment(u32, i)
+        sorted_traces.append(segment['y_sorted'])
+        aligned.append(segment['y_full'].astype(np.float64))
+    return sorted_traces, aligned + [np.mean(aligned, axis=0)]
+
+
+# 两种方法结果一致的波形：第二上升沿允许3个点的偏差
+PARITY_VARIANTS = {
+    'nominal': SimulatorConfig(seed=0),
+    'reflection_2ns': SimulatorConfig(seed=2, reflections=[(2e-9, 0.4)]),
+    'low_noise': SimulatorConfig(seed=5, noise_rms=50),
+}
+
+# 全分辨率搜索的第二边沿落在噪声或第一边沿上（或检测不到）的波形：金字塔结果按仿真的反射位置检验
+GROUND_TRUTH_VARIANTS = {
+    'noisy': SimulatorConfig(seed=1, noise_rms=2000),
+    'negative_reflection': SimulatorConfig(seed=3, reflections=[(0.5e-9, -0.3)]),
+    'slow_edge': SimulatorConfig(seed=4, rise_time=300e-12),
+}
+
+
+@pytest.mark.parametrize('name', list(PARITY_VARIANTS))
+def test_pyramid_matches_full_resolution(analyzer, full, pyramid, name):
+    _, aligned = simulated_traces(analyzer, PARITY_VARIANTS[name])
+    for y in aligned:
+        ref, new = full.analyze_edges(y), pyramid.analyze_edges(y)
+        assert new['first_rise_pos'] == ref['first_rise_pos']
+        for key in ('second_rise_pos', 'fall_pos'):
+            assert (ref.get(key) is None) == (new.get(key) is None), key
+            if ref.get(key) is not None:
+                assert abs(int(ref[key]) - int(new[key])) <= 3, (key, ref[key], new[key])
+
+
+@pytest.mark.parametrize('sim_config', list(PARITY_VARIANTS.values()) + list(GROUND_TRUTH_VARIANTS.values()),
+                         ids=list(PARITY_VARIANTS) + list(GROUND_TRUTH_VARIANTS))
+def test_pyramid_first_rise_on_sorted_traces(analyzer, full, pyramid, sim_config):
+    """
+    对齐用的上升沿（按周期排序、未对齐的数据）
+
+    上升沿靠近数据末端时全分辨率搜索的窗口覆盖不到，会退回到最大差分点，
+    金字塔搜索仍按台阶幅度定位，两者相差不超过上升时间对应的点数
+    """
+    sorted_traces, _ = simulated_traces(analyzer, sim_config)
+    tolerance = max(8, int(sim_config.rise_time / analyzer.config.ts_eff))
+    for y in sorted_traces:
+        a = int(full.find_rise_position(y, SearchMethod.RISING, None, 0.5))
+        b = int(pyramid.find_rise_position(y, SearchMethod.PYRAMID, None, 0.5))
+        assert abs(a - b) <= tolerance, (a, b)
+
+
+@pytest.mark.parametrize('name', list(GROUND_TRUTH_VARIANTS))
+def test_pyramid_second_edge_at_simulated_reflection(analyzer, pyramid, name):
+    """第二边沿与仿真反射位置的偏差不超过 上升时间/4 + 25个点（约30ps）"""
+    sim_config = GROUND_TRUTH_VARIANTS[name]
+    ts_eff = analyzer.config.ts_eff
+    delay, coeff = sim_config.reflections[0]
+    key = 'second_rise_pos' if coeff > 0 else 'fall_pos'
+    tolerance = sim_config.rise_time / ts_eff / 4 + 25
+    _, aligned = simulated_traces(analyzer, sim_config)
+    for y in aligned:
+        edges = pyramid.analyze_edges(y)
+        assert edges[key] is not None, key
+        offset = int(edges[key]) - int(edges['first_rise_pos'])
+        assert abs(offset - delay / ts_eff) <= tolerance, (key, offset, delay / ts_eff)
+
+
+def test_short_traces_fall_back_to_full_resolution(full, pyramid):
+    y = np.concatenate((np.zeros(40), np.ones(50)))
+    assert pyramid._find_edge_candidates_pyramid(y, True, 0.5) == full._find_edge_candidates(y, True, 0.5)
@@ -0,0 +1,77 @@
+# tests/test_file_load.py
+# 原始数据文件读写：.bin与.csv加载结果一致
+import os
+
+import numpy as np
+import pytest
+
+from app.core.FileManager import FileManager
+
+
+@pytest.fixture
+def file_manager(tmp_path):
+    return FileManager(base_data_path=str(tmp_path / 'data'))
+
+
+@pytest.fixture
+def words():
+    rng = np.random.default_rng(1)
+    u32 = rng.integers(0, 1 << 32, size=50_000, dtype=np.uint32)
+    u32[:4] = [0, 1, 0x7FFFFFFF, 0xFFFFFFFF]
+    return u32
+
+
+@pytest.mark.parametrize('timestamp_in_header', [False, True])
+def test_bin_and_csv_load_parity(file_manager, tmp_path, words, timestamp_in_header):
+    out_dir = str(tmp_path)
+    assert file_manager.save_adc_binary_data(words, 'frame.bin', out_dir)[0]
+    assert file_manager.save_adc_csv_data(words, 'frame.csv', out_dir,
+                                          timestamp_in_header=timestamp_in_header)[0]
+    
+    from_bin = file_manager.load_u32_data(os.path.join(out_dir, 'frame.bin'))
+    from_csv = file_manager.load_u32_data(os.path.join(out_dir, 'frame.csv'), skip_first=True)
+    assert from_bin.dtype == from_csv.dtype == np.uint32
+    assert np.array_equal(from_bin, words)
+    assert np.array_equal(from_csv, words)
+    assert np.array_equal(file_manager.load_u32_binary(os.path.join(out_dir, 'frame.bin'), use_mmap=False), words)
+    assert file_manager.load_adc_metadata(os.path.join(out_dir, 'frame.bin'))['n_samples'] == words.size
+
+
+def test_csv_slow_path_rows(file_manager, tmp_path):
+    """十六进制、带空白和非数字的第二列走逐行解析，结果与快速路径拼接后一致"""
+    path = tmp_path / 'mixed.csv'
+    path.write_bytes(b"Index,raw\r\n0,12\r\n1, 0x10\r\n2,4294967295\r\n\r\n3,abc\r\n4,7\n")
+    assert file_manager.load_u32_text_first_col(str(path)).tolist() == [12, 16, 0xFFFFFFFF, 7]
+
+
+def test_binary_ignores_trailing_bytes(file_manager, tmp_path):
+    path = tmp_path / 'odd.bin'
+    path.write_bytes(np.array([5, 6], dtype='<u4').tobytes() + b'\x01')
+    assert file_manager.load_u32_data(str(path)).tolist() == [5, 6]
+
+
+@pytest.mark.parametrize('prefer_binary, expected', [(True, '.bin'), (False, '.csv')])
+def test_find_data_files_prefers_one_format(file_manager, tmp_path, words, prefer_binary, expected):
+    out_dir = str(tmp_path / 'raw')
+    file_manager.save_adc_binary_data(words[:10], 'a.bin', out_dir)
+    file_manager.save_adc_csv_data(words[:10], 'a.csv', out_dir)
+    file_manager.save_adc_csv_data(words[:10], 'b.csv', out_dir)
+    files = file_manager.find_data_files(out_dir, recursive=False, prefer_binary=prefer_binary)
+    assert [os.path.basename(f) for f in files] == ['a' + expected, 'b.csv']
+
+
+def test_mmap_load_does_not_keep_the_file_mapped(file_manager, tmp_path, words):
+    """返回的数组不引用文件映射：文件随后可被覆盖或删除（Windows上映射会锁定文件）"""
+    path = str(tmp_path / 'frame.bin')
+    assert file_manager.save_adc_binary_data(words, 'frame.bin', str(tmp_path))[0]
+    loaded = file_manager.load_u32_binary(path, use_mmap=True)
+    assert type(loaded) is np.ndarray and loaded.base is None and loaded.flags.writeable
+    
+    assert file_manager.save_adc_binary_data(words[::-1], 'frame.bin', str(tmp_path))[0]
+    os.remove(path)
+    assert np.array_equal(loaded, words)
+
+
+def test_find_data_files_raises_when_empty(file_manager, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        file_manager.find_data_files(str(tmp_path), recursive=True)
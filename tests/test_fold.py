@@ -0,0 +1,77 @@
+# tests/test_fold.py
+# 多周期折叠：fold_index / fold_segment / fold_batch
+import numpy as np
+import pytest
+
+from app.core.ConfigManager import AnalysisConfig
+from app.core.DataProcessor import DataProcessor
+
+N_POINTS = 4096
+
+
+@pytest.fixture
+def processor():
+    return DataProcessor(AnalysisConfig(n_points=N_POINTS))
+
+
+@pytest.fixture
+def adc():
+    return np.random.default_rng(4).integers(-(1 << 19), 1 << 19, size=6 * N_POINTS + 100).astype(np.int32)
+
+
+@pytest.mark.parametrize('n_periods', [1, 2, 5])
+def test_fold_index_covers_every_bin(processor, n_periods):
+    cfg = processor.config
+    bins, counts = processor.fold_index(N_POINTS, n_periods, cfg.t_sample, cfg.t_trig)
+    assert bins.shape == (n_periods, N_POINTS)
+    assert counts.sum() == n_periods * N_POINTS
+    assert counts.min() >= 1
+    assert np.array_equal(np.bincount(bins.ravel(), minlength=N_POINTS), counts)
+    # 第0个周期与排序网格一一对应
+    sort_idx = processor.period_sort_index(N_POINTS, cfg.t_sample, cfg.t_trig)
+    assert np.array_equal(np.sort(bins[0]), np.arange(N_POINTS))
+    assert np.array_equal(bins[0][sort_idx], np.arange(N_POINTS))
+    # 按参数缓存，且不可写
+    assert processor.fold_index(N_POINTS, n_periods, cfg.t_sample, cfg.t_trig)[0] is bins
+    assert not bins.flags.writeable
+
+
+def test_fold_one_period_equals_sorted_segment(processor, adc):
+    cfg = processor.config
+    start = 37
+    segment = processor.extract_data_segment(adc, 0, start, N_POINTS)
+    sorted_data, _ = processor.sort_data_by_period(segment, cfg.t_sample, cfg.t_trig)
+    np.testing.assert_array_equal(processor.fold_segment(adc, start, N_POINTS, 1), sorted_data)
+
+
+@pytest.mark.parametrize('n_periods', [2, 3, 6])
+def test_fold_averages_samples_per_bin(processor, adc, n_periods):
+    cfg = processor.config
+    start = 11
+    bins, counts = processor.fold_index(N_POINTS, n_periods, cfg.t_sample, cfg.t_trig)
+    samples = adc[start:start + n_periods * N_POINTS].astype(np.float64)
+    expected = np.zeros(N_POINTS)
+    np.add.at(expected, bins.ravel(), samples)
+    expected /= counts
+    np.testing.assert_allclose(processor.fold_segment(adc, start, N_POINTS, n_periods), expected, rtol=1e-12)
+
+
+def test_fold_constant_and_noise_reduction(processor):
+    rng = np.random.default_rng(5)
+    n_periods = 8
+    constant = np.full(n_periods * N_POINTS, 1234, dtype=np.int32)
+    np.testing.assert_allclose(processor.fold_segment(constant, 0, N_POINTS, n_periods), 1234.0)
+    noise = rng.normal(0.0, 100.0, n_periods * N_POINTS)
+    folded = processor.fold_segment(noise, 0, N_POINTS, n_periods)
+    # 白噪声平均n_periods次后标准差约降为1/sqrt(n_periods)
+    assert folded.std() < 100.0 / np.sqrt(n_periods) * 1.2
+
+
+@pytest.mark.parametrize('n_periods', [1, 4])
+def test_fold_batch_equals_fold_segment(processor, adc, n_periods):
+    rows = np.stack([adc, np.roll(adc, 1000), -adc])
+    starts = np.array([0, 50, 99])
+    folded = processor.fold_batch(rows, starts, n_periods)
+    assert folded.shape == (3, N_POINTS)
+    for row, start, result in zip(rows, starts, folded):
+        np.testing.assert_allclose(result, processor.fold_segment(row, start, N_POINTS, n_periods), rtol=1e-12)
@@ -0,0 +1,107 @@
+# tests/test_parallel_analysis.py
+# 多进程文件分析：结果按文件顺序产出、在途任务数受max_pending限制、should_stop中断、与单进程结果一致
+import logging
+import os
+
+import numpy as np
+import pytest
+
+from app.core.ADCBoardSimulator import SimulatorConfig, make_tdr_frame
+from app.core.ConfigManager import AnalysisConfig
+from app.core.DataAnalyze import DataAnalyzer
+from app.core.FileManager import FileManager
+from app.core.ParallelAnalysis import ParallelFileAnalyzer
+
+N_FILES = 8
+TRACE_NAMES = ('ys_full', 'ys', 'mags', 'ys_d_full', 'ys_d', 'mags_d')
+
+
+class CountingList(list):
+    """记录被迭代取走（即已提交）的元素个数"""
+
+    consumed = 0
+
+    def __iter__(self):
+        for item in super().__iter__():
+            self.consumed += 1
+            yield item
+
+
+@pytest.fixture
+def file_manager(tmp_path):
+    logging.getLogger('app.core').setLevel(logging.ERROR)
+    return FileManager(base_data_path=str(tmp_path / 'data'))
+
+
+@pytest.fixture
+def files(file_manager, tmp_path):
+    out_dir = str(tmp_path / 'raw')
+    paths = []
+    for i in range(N_FILES):
+        name = f'frame_{i:03d}.bin'
+        file_manager.save_adc_binary_data(make_tdr_frame(i, SimulatorConfig(seed=i)), name, out_dir)
+        paths.append(os.path.join(out_dir, name))
+    # 没有触发沿的文件：结果为None，不影响后续文件的顺序
+    file_manager.save_adc_binary_data(np.zeros(90000, dtype=np.uint32), 'empty.bin', out_dir)
+    paths.insert(3, os.path.join(out_dir, 'empty.bin'))
+    return paths
+
+
+def test_results_in_file_order(files, file_manager):
+    analyzer = ParallelFileAnalyzer(AnalysisConfig(), n_workers=2, base_data_path=file_manager.base_data_path)
+    results = list(analyzer.iter_results(files))
+    assert [(i, path) for i, path, _, _ in results] == list(enumerate(files))
+    assert results[3][2] is None
+    config = AnalysisConfig()
+    for i, _, res, error in results:
+        assert error is None
+        if i != 3:
+            assert res['y_roi'].shape == (config.roi_end - config.roi_start,)
+            np.testing.assert_array_equal(res['y_roi'], res['y_full'][config.roi_start:config.roi_end])
+
+
+def test_in_flight_tasks_bounded_by_max_pending(files, file_manager):
+    max_pending = 2
+    file_list = CountingList(files)
+    analyzer = ParallelFileAnalyzer(AnalysisConfig(), n_workers=2, base_data_path=file_manager.base_data_path,
+                                    max_pending=max_pending)
+    submitted = [file_list.consumed for _ in analyzer.iter_results(file_list)]
+    # 产出第k个结果时最多已提交 k + 1 + max_pending 个任务
+    for k, n in enumerate(submitted):
+        assert n <= min(len(files), k + 1 + max_pending), (k, n)
+    assert len(submitted) == len(files)
+
+
+def test_should_stop_cancels_remaining(files, file_manager):
+    file_list = CountingList(files)
+    analyzer = ParallelFileAnalyzer(AnalysisConfig(), n_workers=2, base_data_path=file_manager.base_data_path,
+                                    max_pending=2)
+    received = []
+    for item in analyzer.iter_results(file_list, should_stop=lambda: len(received) >= 2):
+        received.append(item[0])
+    assert received == [0, 1]
+    assert file_list.consumed < len(files)
+
+
+def test_worker_errors_are_reported_in_order(file_manager, files):
+    missing = os.path.join(os.path.dirname(files[0]), 'missing.bin')
+    file_list = [files[0], missing, files[1]]
+    analyzer = ParallelFileAnalyzer(AnalysisConfig(), n_workers=2, base_data_path=file_manager.base_data_path)
+    results = list(analyzer.iter_results(file_list))
+    assert [i for i, _, _, _ in results] == [0, 1, 2]
+    assert results[1][2] is None
+    assert results[0][2] is not None and results[2][2] is not None
+
+
+def test_parallel_matches_serial(files, file_manager):
+    config = AnalysisConfig(keep_traces=True)
+    analyzer = DataAnalyzer(config, file_manager=file_manager)
+    serial = analyzer.batch_process_files(files, n_workers=1)
+    parallel = analyzer.batch_process_files(files, n_workers=2)
+
+    assert serial['success_count'] == parallel['success_count'] == N_FILES
+    assert list(serial['n_averages']) == list(parallel['n_averages'])
+    for name in TRACE_NAMES:
+        assert len(serial[name]) == len(parallel[name]) == N_FILES
+        for a, b in zip(serial[name], parallel[name]):
+            np.testing.assert_array_equal(a, b)
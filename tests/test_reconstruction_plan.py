@@ -0,0 +1,62 @@
+# tests/test_reconstruction_plan.py
+# 等效时间重建计划：排序+对齐结果与逐文件argsort+roll一致，配置改变后自动重建
+import numpy as np
+import pytest
+
+from app.core.ConfigManager import AnalysisConfig
+from app.core.DataProcessor import DataProcessor
+
+N_POINTS = 8192
+
+
+@pytest.fixture
+def processor():
+    return DataProcessor(AnalysisConfig(n_points=N_POINTS))
+
+
+def test_sort_and_align_match_argsort_roll(processor):
+    cfg = processor.config
+    segment = np.random.default_rng(0).integers(-(1 << 19), 1 << 19, N_POINTS).astype(np.int32)
+    rise_pos = 1234
+
+    order = np.argsort((np.arange(N_POINTS, dtype=np.float64) * cfg.t_sample) % cfg.t_trig)
+    expected = np.roll(segment[order], (N_POINTS // 4 - rise_pos) % N_POINTS)
+
+    plan = processor.get_reconstruction_plan()
+    y_sorted = plan.sort(segment)
+    assert np.array_equal(y_sorted, processor.sort_data_by_period(segment, cfg.t_sample, cfg.t_trig)[0])
+    y_full = processor.align_data(y_sorted, rise_pos, plan.target_position)
+    assert np.array_equal(y_full, expected)
+    assert np.array_equal(processor.extract_roi(y_full, plan.roi_start, plan.roi_end),
+                          expected[cfg.roi_start:cfg.roi_end])
+
+
+def test_plan_is_cached_while_config_unchanged(processor):
+    plan = processor.get_reconstruction_plan()
+    assert processor.get_reconstruction_plan() is plan
+
+
+@pytest.mark.parametrize('field, value', [
+    ('clock_freq', 40e6),
+    ('trigger_freq', 12.5e6),
+    ('n_points', N_POINTS // 2),
+    ('roi_start_tenths', 10),
+    ('roi_end_tenths', 40),
+])
+def test_plan_rebuilt_when_config_changes(processor, field, value):
+    cfg = processor.config
+    plan = processor.get_reconstruction_plan()
+    setattr(cfg, field, value)
+
+    rebuilt = processor.get_reconstruction_plan()
+    assert rebuilt is not plan
+    assert rebuilt.n_points == cfg.n_points
+    assert (rebuilt.roi_start, rebuilt.roi_end) == (cfg.roi_start, cfg.roi_end)
+    assert np.array_equal(rebuilt.sort_idx, processor.period_sort_index(cfg.n_points, cfg.t_sample, cfg.t_trig))
+    assert processor.get_reconstruction_plan() is rebuilt
+
+
+def test_invalidate_plan(processor):
+    plan = processor.get_reconstruction_plan()
+    processor.invalidate_plan()
+    assert processor.get_reconstruction_plan() is not plan
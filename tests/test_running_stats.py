@@ -0,0 +1,95 @@
+# tests/test_running_stats.py
+# 流式统计：RunningStats / ResultAccumulator 与 np.mean / np.var 一致
+import numpy as np
+import pytest
+
+from app.core.ResultProcessor import RunningStats, ResultAccumulator, TRACE_KEYS
+
+
+@pytest.fixture
+def rows():
+    # 较大的直流偏置检验数值稳定性（直接用平方和相减会丢失精度）
+    rng = np.random.default_rng(2)
+    return 1e6 + rng.standard_normal((37, 257)) * np.linspace(0.1, 10.0, 257)
+
+
+def test_update_matches_numpy(rows):
+    stats = RunningStats()
+    for row in rows:
+        stats.update(row)
+    assert stats.count == len(rows)
+    np.testing.assert_allclose(stats.mean, rows.mean(axis=0), rtol=1e-13)
+    np.testing.assert_allclose(stats.variance(), rows.var(axis=0), rtol=1e-8)
+    np.testing.assert_allclose(stats.variance(ddof=1), rows.var(axis=0, ddof=1), rtol=1e-8)
+    np.testing.assert_allclose(stats.std(), rows.std(axis=0), rtol=1e-8)
+
+
+@pytest.mark.parametrize('splits', [[37], [1, 36], [10, 5, 22], [0, 20, 0, 17]])
+def test_update_batch_merge_matches_numpy(rows, splits):
+    stats = RunningStats()
+    start = 0
+    for n in splits:
+        stats.update_batch(rows[start:start + n])
+        start += n
+    assert stats.count == len(rows)
+    np.testing.assert_allclose(stats.mean, rows.mean(axis=0), rtol=1e-13)
+    np.testing.assert_allclose(stats.variance(), rows.var(axis=0), rtol=1e-8)
+
+
+def test_mixed_single_and_batch_updates(rows):
+    stats = RunningStats()
+    stats.update(rows[0])
+    stats.update_batch(rows[1:20])
+    for row in rows[20:]:
+        stats.update(row)
+    np.testing.assert_allclose(stats.mean, rows.mean(axis=0), rtol=1e-13)
+    np.testing.assert_allclose(stats.variance(), rows.var(axis=0), rtol=1e-8)
+
+
+def test_errors():
+    stats = RunningStats()
+    with pytest.raises(ValueError):
+        stats.variance()
+    stats.update(np.zeros(3))
+    with pytest.raises(ValueError):
+        stats.variance(ddof=1)
+    with pytest.raises(ValueError):
+        stats.update(np.zeros(4))
+    with pytest.raises(ValueError):
+        stats.update_batch(np.zeros((2, 4)))
+
+
+def make_results(rng, n_files):
+    """模拟process_single_file的输出（只含累加器用到的键）"""
+    sizes = {'y_full': 64, 'y_roi': 16, 'mag_linear': 9, 'y_full_diff': 60, 'y_diff': 12, 'mag_linear_d': 7}
+    results = []
+    for _ in range(n_files):
+        res = {src: rng.standard_normal(n) for src, n in sizes.items()}
+        res['mag_linear'], res['mag_linear_d'] = np.abs(res['mag_linear']), np.abs(res['mag_linear_d'])
+        res['Xd_norm'] = rng.standard_normal(7) + 1j * rng.standard_normal(7)
+        res['freq'], res['freq_d'] = np.arange(9.0), np.arange(7.0)
+        results.append(res)
+    return results
+
+
+def test_accumulator_single_and_batch_agree():
+    rng = np.random.default_rng(3)
+    results = make_results(rng, 12)
+    
+    single = ResultAccumulator(keep_traces=True)
+    for res in results:
+        single.add(res)
+    batch = ResultAccumulator()
+    for chunk in (results[:5], results[5:]):
+        batch.add_batch({key: np.array([res[key] for res in chunk]) for key in chunk[0]})
+    
+    a, b = single.averages(), batch.averages()
+    for key, src in TRACE_KEYS:
+        stacked = np.array([res[src] for res in results])
+        np.testing.assert_allclose(single.stats[key].mean, stacked.mean(axis=0), rtol=1e-12, atol=1e-15)
+        np.testing.assert_allclose(single.stats[key].variance(), stacked.var(axis=0), rtol=1e-10)
+        assert len(single.traces[key]) == len(results)
+    for key in a:
+        np.testing.assert_allclose(a[key], b[key], rtol=1e-10, atol=1e-14)
+    np.testing.assert_allclose(a['avg_Xd'], np.mean([res['Xd_norm'] for res in results], axis=0))
+    assert single.count == batch.count == len(results)
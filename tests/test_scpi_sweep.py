@@ -0,0 +1,148 @@
+# tests/test_scpi_sweep.py
+# SCPI扫频引擎：影子状态、消息拆分、流水线查询（本地SCPI模拟仪器）
+import logging
+
+import numpy as np
+import pytest
+
+from app.core.AsyncTcpClient import PipelinedTcpClient
+from app.core.SCPIInstrumentSimulator import SCPIInstrumentSimulator
+from app.core.SCPISweepEngine import SCPISweepEngine, client_query_many
+from app.core.VNACalibration import VNACalibration
+
+
+@pytest.fixture
+def sim():
+    logging.getLogger('app.core').setLevel(logging.WARNING)
+    with SCPIInstrumentSimulator() as sim:
+        yield sim
+
+
+@pytest.fixture
+def client(sim):
+    client = PipelinedTcpClient()
+    ok, msg = client.connect(sim.host, sim.port)
+    assert ok, msg
+    yield client
+    client.shutdown()
+
+
+@pytest.fixture
+def send_command(client):
+    def send_command(cmd):
+        if '?' in cmd or cmd.startswith('CALI'):
+            ok, resp = client.query(cmd + '\n')
+            return resp if ok else None
+        client.send(cmd + '\n')
+        return None
+    return send_command
+
+
+def sync(client):
+    """同一连接上的消息按顺序执行，查询返回后之前的设置命令都已生效"""
+    ok, _ = client.query('*IDN?\n')
+    assert ok
+
+
+def channel_state(freq, power, waveform='Sin1M.sin', state='TRXD'):
+    return {'STATe': state, 'WFORm': f"'{waveform}'", 'FREQuency': f"{freq:.2f}Mhz", 'POWer': f"{power:.2f}"}
+
+
+def test_unchanged_settings_are_skipped(sim, client, send_command):
+    engine = SCPISweepEngine(send_command)
+    engine.setup_channel(1, 1000, -20)
+    engine.flush()
+    sync(client)
+    assert sim.channels[1] == channel_state(1000, -20)
+    commands = sim.command_count
+
+    engine.setup_channel(1, 1000, -20)
+    engine.flush()
+    assert engine.commands_skipped == 4
+    engine.setup_channel(1, 1100, -20)
+    engine.flush()
+    sync(client)
+    # 只有频率变化的一条命令下发（另一条为同步用的*IDN?）
+    assert sim.command_count - commands == 1 + 1
+    assert engine.commands_sent == 5
+    assert sim.channels[1] == channel_state(1100, -20)
+
+
+def test_setup_instrument_invalidates_shadow_state(sim, client, send_command):
+    cal = VNACalibration(send_command, client_query_many(client))
+    engine = cal.sweep_engine
+    engine.setup_channel(1, 1000, -20)
+    engine.flush()
+
+    cal.setup_instrument(1, 2000, -10, state='OFF')
+    sync(client)
+    assert sim.channels[1] == channel_state(2000, -10, state='OFF')
+
+    # 影子状态已清空，相同的配置再次完整下发
+    engine.setup_channel(1, 1000, -20)
+    engine.flush()
+    sync(client)
+    assert engine.commands_sent == 8
+    assert sim.channels[1] == channel_state(1000, -20)
+
+
+@pytest.mark.parametrize('max_len', [60, 120, 1024])
+def test_messages_split_at_max_length(sim, client, send_command, max_len):
+    written = []
+
+    def record(message):
+        written.append(message)
+        return send_command(message)
+
+    engine = SCPISweepEngine(record, max_message_len=max_len)
+    for ch in (1, 2, 3):
+        engine.setup_channel(ch, 1000 + ch, -20 - ch)
+    engine.flush()
+    sync(client)
+
+    assert engine.messages_sent == len(written)
+    assert all(len(m) <= max_len for m in written)
+    assert sum(len(m.split(';:')) for m in written) == 12
+    if max_len < 1024:
+        assert len(written) > 1
+    for ch in (1, 2, 3):
+        assert sim.channels[ch] == channel_state(1000 + ch, -20 - ch)
+
+
+@pytest.mark.parametrize('adapter', ['client_query_many', 'raw_tuples'])
+def test_measure_point_accepts_client_query_many(sim, client, send_command, adapter):
+    if adapter == 'client_query_many':
+        engine = SCPISweepEngine(send_command, client_query_many(client))
+    else:
+        # 直接使用PipelinedTcpClient.query_many，由terminator附加结束符
+        engine = SCPISweepEngine(lambda cmd: send_command(cmd.rstrip('\n')), client.query_many, terminator='\n')
+    freq = 2500
+    engine.setup_channel(1, freq, -20)
+    engine.setup_channel(2, freq, -70)
+    (p11, ph11), (p12, ph12) = engine.measure_point(1, [1, 2], 1.0, 122880)
+
+    for rx, power, phase in ((1, p11, ph11), (2, p12, ph12)):
+        expected = sim.s_params(freq, 1, rx)
+        assert power - (-20) == pytest.approx(20 * np.log10(abs(expected)), abs=1e-3)
+        assert phase == pytest.approx(np.degrees(np.angle(expected)), abs=1e-3)
+    assert engine.queries_sent == 4
+
+
+def test_failed_queries_read_as_zero():
+    engine = SCPISweepEngine(lambda cmd: None, lambda cmds: [(False, '接收失败: 超时')] * len(cmds))
+    assert engine.measure_point(1, [1, 2], 1.0, 122880) == [(0, 0), (0, 0)]
+
+
+def test_measure_standard_against_simulator(sim, client, send_command):
+    cal = VNACalibration(send_command, client_query_many(client))
+    cal.sweep_engine.invalidate()
+    freq_range = [1000, 3000, 500]
+    result = cal.measure_standard('Through', 1, [1, 2], freq_range)
+
+    freqs = np.arange(1000, 3500, 500)
+    for rx in (1, 2):
+        expected = np.array([sim.s_params(f, 1, rx) for f in freqs])
+        assert np.allclose(result[f'DATA_M_1{rx}'], expected, rtol=1e-3, atol=1e-4)
+    # 第二个频点起只下发两个通道的频率命令
+    stats = cal.sweep_engine.get_stats()
+    assert stats['commands_sent'] == 8 + 2 * (len(freqs) - 1)
@@ -0,0 +1,76 @@
+# tests/test_spectral_engine.py
+# SpectralEngine与原DataProcessor.compute_spectrum（每次重新生成窗函数和频率轴）结果一致
+import numpy as np
+import pytest
+
+from app.core.ConfigManager import AnalysisConfig
+from app.core.DataProcessor import DataProcessor
+from app.core.SpectralEngine import HAS_SCIPY_FFT, SpectralEngine
+
+TS_EFF = AnalysisConfig().ts_eff
+# 每个文件的ROI、差分ROI以及SHORT模式左右两半的长度
+LENGTHS = (8192, 8182, 2212, 5980, 7)
+
+
+def legacy_compute_spectrum(data, ts_eff):
+    """原DataProcessor.compute_spectrum：去均值、汉宁窗、np.fft.rfft"""
+    data_centered = data.astype(np.float64) - np.mean(data)
+    window = np.hanning(len(data))
+    fft_result = np.fft.rfft(data_centered * window)
+    freq = np.fft.rfftfreq(len(data), d=ts_eff)
+    scale = (np.sum(window) / len(data)) * len(data)
+    return freq, np.abs(fft_result) / (scale + 1e-12), fft_result
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.mark.parametrize('n', LENGTHS)
+@pytest.mark.parametrize('dtype', [np.int32, np.float64])
+def test_matches_legacy_compute_spectrum(rng, n, dtype):
+    x = (rng.standard_normal(n) * 1000 + 500).astype(dtype)
+    engine = SpectralEngine()
+    for _ in range(2):  # 第二次使用缓存的窗函数和频率轴
+        for ref, new in zip(legacy_compute_spectrum(x, TS_EFF), engine.spectrum(x, TS_EFF)):
+            np.testing.assert_allclose(new, ref, rtol=1e-10, atol=1e-9)
+
+
+@pytest.mark.parametrize('workers', [1, 2, -1])
+def test_batch_rows_match_legacy(rng, workers):
+    stack = rng.standard_normal((16, 8182)) * 1000
+    freq, mag, fft_result = SpectralEngine(workers=workers).spectrum(stack, TS_EFF)
+    for row, m, f in zip(stack, mag, fft_result):
+        ref_freq, ref_mag, ref_fft = legacy_compute_spectrum(row, TS_EFF)
+        np.testing.assert_allclose(m, ref_mag, rtol=1e-10, atol=1e-12)
+        np.testing.assert_allclose(f, ref_fft, rtol=1e-10, atol=1e-6)
+    np.testing.assert_array_equal(freq, ref_freq)
+
+
+def test_data_processor_delegates_to_engine(rng):
+    x = rng.standard_normal(8192)
+    processor = DataProcessor(AnalysisConfig())
+    for ref, new in zip(legacy_compute_spectrum(x, TS_EFF), processor.compute_spectrum(x, TS_EFF)):
+        np.testing.assert_allclose(new, ref, rtol=1e-10, atol=1e-9)
+
+
+def test_cached_arrays_are_read_only():
+    engine = SpectralEngine()
+    freq, _, _ = engine.spectrum(np.ones(64), TS_EFF)
+    window, _ = engine.window(64)
+    assert not freq.flags.writeable and not window.flags.writeable
+    with pytest.raises(ValueError):
+        engine.window(64, 'kaiser')
+
+
+@pytest.mark.skipif(not HAS_SCIPY_FFT, reason="未安装scipy")
+def test_numpy_fallback_matches_scipy(rng, monkeypatch):
+    """未安装scipy时退回np.fft，结果相同"""
+    import app.core.SpectralEngine as spectral_module
+    stack = rng.standard_normal((4, 2212)) * 1000
+    expected = SpectralEngine(workers=-1).spectrum(stack, TS_EFF)
+    monkeypatch.setattr(spectral_module, '_fft', np.fft)
+    monkeypatch.setattr(spectral_module, 'HAS_SCIPY_FFT', False)
+    for ref, new in zip(expected, SpectralEngine(workers=-1).spectrum(stack, TS_EFF)):
+        np.testing.assert_allclose(new, ref, rtol=1e-10, atol=1e-6)
@@ -0,0 +1,198 @@
+# tests/test_transport_metrics.py
+# 传输统计：延时直方图分桶、TcpClient重试/重连计数（仿真板卡）、JSON/文本导出
+import json
+import logging
+import math
+import socket
+import struct
+import time
+
+import pytest
+
+from app.core.ADCBoardSimulator import ADCBoardSimulator, SimulatorConfig
+from app.core.ADCSample import ADCSample
+from app.core.FileManager import FileManager
+from app.core.TcpClient import TcpClient
+from app.core.TransportMetrics import LatencyHistogram, TransportMetrics
+
+N_SAMPLES = 4096
+IDN_REPLY = b'TDR,ADC Board Simulator,0,1.0\r\n'
+
+
+class ResettingSimulator(ADCBoardSimulator):
+    """第一条STATUS?指令时以RST复位连接（之后的连接正常应答）"""
+
+    reset_done = False
+
+    def _handle_command(self, conn, command, session):
+        if command == 'STATUS?' and not self.reset_done:
+            self.reset_done = True
+            conn.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            raise ConnectionResetError("模拟连接复位")
+        super()._handle_command(conn, command, session)
+
+
+@pytest.fixture
+def client():
+    logging.getLogger('app.core').setLevel(logging.ERROR)
+    with ADCBoardSimulator(config=SimulatorConfig(n_samples=N_SAMPLES)) as sim:
+        tcp = TcpClient()
+        ok, msg = tcp.connect(sim.host, sim.port)
+        assert ok, msg
+        yield tcp
+        tcp.close()
+
+
+# ===== 直方图 =====
+@pytest.mark.parametrize('seconds, idx', [
+    (0.0, 0), (0.5e-6, 0), (1e-6, 1), (1.9e-6, 1), (2e-6, 2), (3e-6, 2),
+    (1e-3, 10), (1.5, 21), (1e6, LatencyHistogram.N_BUCKETS - 1),
+])
+def test_histogram_bucket_index(seconds, idx):
+    hist = LatencyHistogram()
+    hist.record(seconds)
+    assert hist.buckets[idx] == 1 and hist.count == 1
+
+
+def test_values_fall_below_their_bucket_upper_bound():
+    hist = LatencyHistogram()
+    for seconds in [10 ** (e / 4) for e in range(-28, 8)]:
+        before = list(hist.buckets)
+        hist.record(seconds)
+        idx = next(i for i, (a, b) in enumerate(zip(before, hist.buckets)) if a != b)
+        assert seconds < hist.bucket_upper(idx) or idx == hist.N_BUCKETS - 1
+        assert idx == 0 or seconds >= hist.bucket_upper(idx - 1)
+
+
+def test_histogram_summary():
+    hist = LatencyHistogram()
+    assert hist.percentile(50) == 0.0
+    assert hist.to_dict()['min_ms'] == 0.0 and hist.to_dict()['buckets_ms'] == {}
+
+    for seconds in [1e-3] * 90 + [0.1] * 10:
+        hist.record(seconds)
+    summary = hist.to_dict()
+    assert summary['count'] == 100
+    assert summary['min_ms'] == pytest.approx(1.0) and summary['max_ms'] == pytest.approx(100.0)
+    assert summary['mean_ms'] == pytest.approx(10.9)
+    # 分位数按桶上限估计，且不超过最大值
+    assert summary['p50_ms'] == summary['p90_ms'] == pytest.approx(hist.bucket_upper(10) * 1e3)
+    assert summary['p99_ms'] == pytest.approx(100.0)
+    assert sum(summary['buckets_ms'].values()) == 100
+    assert len(summary['buckets_ms']) == 2
+
+
+# ===== TcpClient计数 =====
+def test_disabled_by_default_and_enable_is_idempotent(client, tmp_path):
+    assert client.metrics is None
+    metrics = client.enable_metrics()
+    assert client.enable_metrics(str(tmp_path / 'm.json')) is metrics
+    assert metrics.dump_path == str(tmp_path / 'm.json')
+    client.disable_metrics()
+    assert client.metrics is None
+
+
+def test_commands_bytes_and_rtt(client):
+    metrics = client.enable_metrics()
+    for _ in range(3):
+        assert client.send('*IDN?\n')[0]
+        ok, reply = client.receive()
+        assert ok and reply == IDN_REPLY.decode().strip()
+    assert client.send('lmk_state 1 2 1\n')[0]
+
+    snap = metrics.snapshot()
+    assert snap['commands_sent'] == 4
+    assert snap['bytes_sent'] == 3 * len('*IDN?\n') + len('lmk_state 1 2 1\n')
+    assert snap['responses_received'] == 3
+    assert snap['bytes_received'] == 3 * len(IDN_REPLY)
+    assert set(snap['rtt']) == {'*IDN?'}
+    assert snap['rtt']['*IDN?']['count'] == 3
+    assert snap['retries'] == snap['reconnects'] == snap['errors'] == 0
+
+
+def test_receive_timeout_counts_retries_and_error(client):
+    metrics = client.enable_metrics()
+    ok, _ = client.receive(max_retries=2, base_timeout=0.05)
+    assert not ok
+    assert (metrics.retries, metrics.reconnects, metrics.errors) == (2, 0, 1)
+
+
+def test_clear_receive_buffer_is_recorded(client):
+    metrics = client.enable_metrics()
+    assert client.send('*IDN?\n')[0]
+    time.sleep(0.2)
+    assert client.clear_receive_buffer() == len(IDN_REPLY)
+    assert client.clear_receive_buffer() == 0
+    clear = metrics.snapshot()['clear_receive_buffer']
+    assert clear['calls'] == 2 and clear['bytes'] == len(IDN_REPLY)
+
+
+def test_reset_connection_counts_retry_and_reconnect():
+    logging.getLogger('app.core').setLevel(logging.ERROR)
+    with ResettingSimulator(config=SimulatorConfig(n_samples=N_SAMPLES)) as sim:
+        tcp = TcpClient()
+        assert tcp.connect(sim.host, sim.port)[0]
+        metrics = tcp.enable_metrics()
+        assert tcp.send('STATUS?\n')[0]
+        time.sleep(0.2)
+
+        # 对端已复位：发送失败一次后按原地址重连并重发成功
+        assert tcp.send('*IDN?\n', base_timeout=0.1)[0]
+        ok, reply = tcp.receive()
+        assert ok and reply == IDN_REPLY.decode().strip()
+        assert (metrics.retries, metrics.reconnects, metrics.errors) == (1, 1, 0)
+        tcp.close()
+
+
+def test_acquisitions_are_recorded(client, tmp_path):
+    metrics = client.enable_metrics()
+    adc = ADCSample(client, FileManager(base_data_path=str(tmp_path)))
+    assert adc.metrics is metrics
+    for i in range(2):
+        data, error = adc.acquire_raw(i)
+        assert error is None and len(data) == 4 * N_SAMPLES
+    acq = metrics.snapshot()['acquisitions']
+    assert acq['count'] == 2 and acq['bytes'] == 2 * 4 * N_SAMPLES
+    assert 0 < acq['min_mb_per_s'] <= acq['mean_mb_per_s'] <= acq['max_mb_per_s']
+    assert 'sample' in metrics.snapshot()['rtt']
+
+
+# ===== 导出 =====
+def test_close_dumps_json(client, tmp_path):
+    path = tmp_path / 'sub' / 'metrics.json'
+    metrics = client.enable_metrics(str(path))
+    assert client.send('*IDN?\n')[0] and client.receive()[0]
+    client.close()
+
+    with open(path, encoding='utf-8') as f:
+        saved = json.load(f)
+    assert saved['commands_sent'] == 1 and saved['bytes_received'] == len(IDN_REPLY)
+    assert saved['rtt']['*IDN?']['count'] == 1
+    assert set(saved) == set(metrics.snapshot())
+
+
+def test_dump_text_and_missing_path(client, tmp_path):
+    metrics = client.enable_metrics()
+    assert not metrics.dump()
+    assert client.send('*IDN?\n')[0] and client.receive()[0]
+    assert client.receive(max_retries=1, base_timeout=0.05)[0] is False
+
+    path = tmp_path / 'metrics.txt'
+    assert metrics.dump(str(path))
+    text = path.read_text(encoding='utf-8')
+    # 首行含会话持续时间，其余行与format_text一致
+    assert text.splitlines()[1:] == metrics.format_text().splitlines()[1:]
+    assert "重试: 1  重连: 0  错误: 1" in text
+    assert any(line.strip().startswith('*IDN?') and 'n=1' in line for line in text.splitlines())
+
+
+def test_reset_clears_counters():
+    metrics = TransportMetrics()
+    metrics.record_send(10)
+    metrics.record_rtt('sample', 1e-3, 8)
+    metrics.record_acquisition(1024 * 1024, 0.5)
+    metrics.reset()
+    snap = metrics.snapshot()
+    assert snap['bytes_sent'] == snap['bytes_received'] == 0
+    assert snap['rtt'] == {} and snap['acquisitions']['min_mb_per_s'] == 0.0
+    assert not math.isinf(snap['acquisitions']['min_mb_per_s'])